@@ -0,0 +1,141 @@
+<?php
+/**
+ * Airtable Sync Driver for airtable_stub.py
+ * Loads a local WordPress installation with the Legal Automation plugins and
+ * runs LAI_Airtable_Source::sync_data against an Airtable API stub instead of
+ * api.airtable.com. Every command prints one JSON line.
+ *
+ *   php airtable-sync.php <wp-path> sync <stub-url> <full|incremental> [--reset]
+ *   php airtable-sync.php <wp-path> count
+ *   php airtable-sync.php <wp-path> clean
+ *
+ * sync   points the Airtable configuration at the stub (base appSTUB, table
+ *        Cases, the field mappings below) and runs one sync; --reset drops the
+ *        stored cursor first. The real configuration is restored afterwards
+ * count  cases synced from the stub, and how many Airtable ids occur twice
+ * clean  removes every row synced from the stub
+ *
+ * Stub records have ids recSTUB* and e-mail addresses at stub.example.test.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    exit;
+}
+
+const STUB_PREFIX = 'recSTUB';
+const STUB_DOMAIN = 'stub.example.test';
+
+function stub_fail($message) {
+    echo json_encode(array('error' => $message)), "\n";
+    exit(1);
+}
+
+$args = array_slice($argv, 1);
+if (count($args) < 2) {
+    fwrite(STDERR, "Usage: php airtable-sync.php <wp-path> <sync URL full|incremental|count|clean> [--reset]\n");
+    exit(2);
+}
+$wp_path = rtrim($args[0], '/');
+$command = $args[1];
+
+if (!file_exists($wp_path . '/wp-load.php')) {
+    stub_fail("No WordPress installation at $wp_path");
+}
+
+define('WP_USE_THEMES', false);
+$_SERVER['HTTP_HOST'] = isset($_SERVER['HTTP_HOST']) ? $_SERVER['HTTP_HOST'] : 'localhost';
+$_SERVER['REQUEST_URI'] = '/';
+require $wp_path . '/wp-load.php';
+set_time_limit(0);
+
+global $wpdb;
+
+if (!defined('LAI_PLUGIN_PATH')) {
+    stub_fail('Legal Automation Import is not active');
+}
+
+$cases_table = $wpdb->prefix . 'klage_cases';
+$stub_cases = $wpdb->prepare("import_source = 'airtable' AND external_id LIKE %s", STUB_PREFIX . '%');
+
+switch ($command) {
+    case 'sync':
+        if (count($args) < 4 || !in_array($args[3], array('full', 'incremental'), true)) {
+            stub_fail('sync needs the stub URL and full or incremental');
+        }
+        $stub_url = $args[2];
+        $sync_type = $args[3];
+
+        $saved_config = get_option('lai_airtable_config');
+        $saved_mappings = get_option('lai_airtable_field_mappings');
+        $state = get_option('lai_airtable_stub_state', array());
+
+        update_option('lai_airtable_config', array(
+            'api_key' => 'keySTUB',
+            'base_id' => 'appSTUB',
+            'table_name' => 'Cases',
+            'sync_cursor' => in_array('--reset', $args, true) ? null : ($state['sync_cursor'] ?? null)
+        ));
+        update_option('lai_airtable_field_mappings', array(
+            'Case ID' => array('target_table' => 'klage_cases', 'target_field' => 'case_id', 'data_type' => 'string'),
+            'Status' => array('target_table' => 'klage_cases', 'target_field' => 'case_status', 'data_type' => 'string'),
+            'Amount' => array('target_table' => 'klage_cases', 'target_field' => 'claim_amount', 'data_type' => 'decimal'),
+            'First Name' => array('target_table' => 'klage_contacts', 'target_field' => 'first_name', 'data_type' => 'string'),
+            'Last Name' => array('target_table' => 'klage_contacts', 'target_field' => 'last_name', 'data_type' => 'string'),
+            'Email' => array('target_table' => 'klage_contacts', 'target_field' => 'email', 'data_type' => 'email')
+        ));
+        add_filter('lai_airtable_api_url', function () use ($stub_url) {
+            return $stub_url;
+        });
+
+        require_once LAI_PLUGIN_PATH . 'includes/class-field-mapper.php';
+        require_once LAI_PLUGIN_PATH . 'includes/sources/class-airtable-source.php';
+        $source = new LAI_Airtable_Source($wpdb, new LAI_Field_Mapper());
+
+        $queries_before = $wpdb->num_queries;
+        $start = microtime(true);
+        try {
+            $result = $source->sync_data($sync_type);
+        } catch (Throwable $e) {
+            $result = array('success' => false, 'error' => get_class($e) . ': ' . $e->getMessage());
+        }
+        $elapsed = microtime(true) - $start;
+
+        // The stub's cursor is kept apart from the real one
+        $stub_config = get_option('lai_airtable_config', array());
+        update_option('lai_airtable_stub_state', array('sync_cursor' => $stub_config['sync_cursor'] ?? null));
+        $saved_config === false ? delete_option('lai_airtable_config') : update_option('lai_airtable_config', $saved_config);
+        $saved_mappings === false ? delete_option('lai_airtable_field_mappings') : update_option('lai_airtable_field_mappings', $saved_mappings);
+
+        $result['elapsed'] = $elapsed;
+        $result['queries'] = $wpdb->num_queries - $queries_before;
+        $result['peak_memory'] = memory_get_peak_usage();
+        $result['errors'] = array_slice($result['errors'] ?? array(), 0, 5);
+        echo json_encode($result), "\n";
+        break;
+
+    case 'count':
+        echo json_encode(array(
+            'cases' => (int) $wpdb->get_var("SELECT COUNT(*) FROM $cases_table WHERE $stub_cases"),
+            'duplicates' => (int) $wpdb->get_var("SELECT COUNT(*) - COUNT(DISTINCT external_id) FROM $cases_table WHERE $stub_cases")
+        )), "\n";
+        break;
+
+    case 'clean':
+        $case_ids = $wpdb->get_col("SELECT id FROM $cases_table WHERE $stub_cases");
+        $deleted = 0;
+        foreach (array_chunk($case_ids, 1000) as $chunk) {
+            $ids = implode(',', array_map('intval', $chunk));
+            $deleted += (int) $wpdb->query("DELETE FROM {$wpdb->prefix}klage_case_contacts WHERE case_id IN ($ids)");
+            $deleted += (int) $wpdb->query("DELETE FROM {$wpdb->prefix}klage_financials WHERE case_id IN ($ids)");
+            $deleted += (int) $wpdb->query("DELETE FROM $cases_table WHERE id IN ($ids)");
+        }
+        $deleted += (int) $wpdb->query($wpdb->prepare(
+            "DELETE FROM {$wpdb->prefix}klage_contacts WHERE email LIKE %s", '%@' . STUB_DOMAIN
+        ));
+        delete_option('lai_airtable_stub_state');
+        echo json_encode(array('deleted' => $deleted)), "\n";
+        break;
+
+    default:
+        stub_fail("Unknown command: $command");
+}
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Airtable API Stub for the LAI Airtable sync engine
+Serves a seeded table (base appSTUB, table Cases) with the list-records API of
+api.airtable.com: pageSize/offset pagination, filterByFormula with the
+IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('...')) cursor the sync sends,
+a bearer token check, a per-request latency and Airtable's limit of
+5 requests per second per base (429 RATE_LIMIT_REACHED above it).
+
+With --wp-path it drives LAI_Airtable_Sync through airtable-sync.php against a
+local WordPress installation and checks the engine end-to-end:
+
+    full         every record synced once, errors only for the invalid ones
+    incremental  after --touch records changed, only those are pulled and
+                 they update their cases instead of creating new ones
+    duplicates   no Airtable id occurs twice in klage_cases
+    rate limit   no 429 and at most 5 requests in any one-second window
+
+Throughput and request statistics are recorded in the run history.
+
+Usage:
+    python3 airtable_stub.py --wp-path /var/www/html [--records 5000] [--touch 250] [--latency 150]
+    python3 airtable_stub.py --serve [--port 8765] [--records 5000]
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import shutil
+import random
+import argparse
+import threading
+import subprocess
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from import_benchmark import format_memory
+from run_history import DEFAULT_HISTORY_DB, build_run, record_run
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVER = os.path.join(BASE_DIR, 'airtable-sync.php')
+
+BASE_ID = 'appSTUB'
+TABLE = 'Cases'
+API_KEY = 'keySTUB'
+PAGE_SIZE_MAX = 100
+RATE_LIMIT = 5
+INVALID_EVERY = 50  # every 50th record has an invalid e-mail address
+CURSOR_FORMULA = re.compile(r"IS_AFTER\(LAST_MODIFIED_TIME\(\), DATETIME_PARSE\('([^']+)'\)\)")
+
+FIRST_NAMES = ['Max', 'Anna', 'Lukas', 'Sophie', 'Jonas', 'Marie', 'Felix', 'Laura']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker']
+STATUSES = ['draft', 'processing', 'pending', 'completed']
+
+
+def iso(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def parse_time(text: str) -> datetime:
+    return datetime.strptime(text.replace('.000Z', 'Z'), '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+
+class StubTable:
+    """The seeded records and the request log of the stub"""
+
+    def __init__(self, records: int, seed: int, latency: float):
+        rng = random.Random(seed)
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests: List[float] = []
+        self.rate_limited = 0
+        self.records = []
+        for index in range(1, records + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f'{first.lower()}.{index}@stub.example.test'
+            if index % INVALID_EVERY == 0:
+                email = f'{first.lower()}.{index}-at-stub.example.test'
+            self.records.append({
+                'id': f'recSTUB{index:09d}',
+                'createdTime': iso(yesterday),
+                'modified': yesterday,
+                'fields': {
+                    'Case ID': f'STUB-{index:09d}',
+                    'Status': rng.choice(STATUSES),
+                    'Amount': round(rng.uniform(100, 5000), 2),
+                    'First Name': first,
+                    'Last Name': last,
+                    'Email': email
+                }
+            })
+
+    def touch(self, count: int, seed: int) -> List[str]:
+        """Change `count` records now, as a user editing them in Airtable would"""
+        rng = random.Random(seed + 1)
+        now = datetime.now(timezone.utc)
+        touched = rng.sample(self.records, min(count, len(self.records)))
+        for record in touched:
+            record['fields']['Status'] = rng.choice(STATUSES)
+            record['fields']['Amount'] = round(rng.uniform(100, 5000), 2)
+            record['modified'] = now
+        return [record['id'] for record in touched]
+
+    def admit(self) -> bool:
+        """Log a request; False if it exceeds the limit of the base"""
+        now = time.monotonic()
+        with self.lock:
+            self.requests.append(now)
+            if len([moment for moment in self.requests if now - moment < 1.0]) > RATE_LIMIT:
+                self.rate_limited += 1
+                return False
+        return True
+
+    def reset_log(self):
+        with self.lock:
+            self.requests = []
+            self.rate_limited = 0
+
+    def busiest_second(self) -> int:
+        """Most requests in any one-second window"""
+        best = 0
+        for index, start in enumerate(self.requests):
+            best = max(best, len([moment for moment in self.requests[index:] if moment - start < 1.0]))
+        return best
+
+    def page(self, query: Dict) -> Dict:
+        formula = query.get('filterByFormula', '')
+        records = self.records
+        if formula:
+            match = CURSOR_FORMULA.fullmatch(formula)
+            if not match:
+                raise ValueError(f'Unsupported formula: {formula}')
+            cursor = parse_time(match.group(1))
+            records = [record for record in records if record['modified'] > cursor]
+
+        size = min(PAGE_SIZE_MAX, int(query.get('pageSize', PAGE_SIZE_MAX)))
+        start = int(query['offset'].split('/')[-1]) if query.get('offset') else 0
+        page = {'records': [{key: record[key] for key in ('id', 'createdTime', 'fields')}
+                            for record in records[start:start + size]]}
+        if start + size < len(records):
+            page['offset'] = f'itrSTUB/{start + size}'
+        return page
+
+
+def make_handler(table: StubTable):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status: int, body: Dict):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if not table.admit():
+                self.send_json(429, {'errors': [{'error': 'RATE_LIMIT_REACHED',
+                                                 'message': 'Rate limit exceeded. Please try again later'}]})
+                return
+            if self.headers.get('Authorization') != f'Bearer {API_KEY}':
+                self.send_json(401, {'error': {'type': 'AUTHENTICATION_REQUIRED',
+                                               'message': 'Authentication required'}})
+                return
+            if url.path.rstrip('/') != f'/v0/{BASE_ID}/{TABLE}':
+                self.send_json(404, {'error': 'NOT_FOUND'})
+                return
+
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            time.sleep(table.latency)
+            try:
+                self.send_json(200, table.page(query))
+            except ValueError as e:
+                self.send_json(422, {'error': {'type': 'INVALID_FILTER_BY_FORMULA', 'message': str(e)}})
+
+    return Handler
+
+
+def start_stub(table: StubTable, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(table))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_driver(php: str, wp_path: str, arguments: List[str], timeout: float) -> Dict:
+    """One airtable-sync.php command; failures come back as {'error': ...}"""
+    command = [php, DRIVER, wp_path] + arguments
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f'Timed out after {timeout:g}s'}
+    except OSError as e:
+        return {'error': str(e)}
+
+    for line in reversed(proc.stdout.strip().splitlines()):
+        if line.startswith('{'):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    output = (proc.stderr or proc.stdout).strip().splitlines()
+    return {'error': output[-1] if output else f'Driver exited with code {proc.returncode}'}
+
+
+def check_phase(name: str, outcome: Dict, table: StubTable, expected: Dict) -> Dict:
+    """Compare one sync with what the stub served; returns the phase results"""
+    phase = {'phase': name, 'error': outcome.get('error'), 'busiest_second': table.busiest_second(),
+             'rate_limited': table.rate_limited, 'stub_requests': len(table.requests), 'failures': []}
+    for key in ('total_rows', 'created', 'updated', 'failed_imports', 'pages', 'requests',
+                'elapsed', 'queries', 'peak_memory', 'cursor'):
+        phase[key] = outcome.get(key)
+    phase['rows_per_sec'] = (outcome['total_rows'] / outcome['elapsed']
+                             if outcome.get('elapsed') and outcome.get('total_rows') else None)
+
+    if phase['error']:
+        phase['failures'].append(phase['error'])
+        return phase
+    for key, value in expected.items():
+        if outcome.get(key) != value:
+            phase['failures'].append(f"{key} is {outcome.get(key)}, expected {value}")
+    if table.rate_limited:
+        phase['failures'].append(f"{table.rate_limited} requests were rate limited")
+    if phase['busiest_second'] > RATE_LIMIT:
+        phase['failures'].append(f"{phase['busiest_second']} requests within one second")
+    return phase
+
+
+def print_phase(phase: Dict):
+    icon = '❌' if phase['failures'] else '✅'
+    if phase['error']:
+        print(f"{icon} {phase['phase']}: {phase['error']}")
+        return
+    speed = f"{phase['rows_per_sec']:.0f} rows/s" if phase['rows_per_sec'] else '-'
+    print(f"{icon} {phase['phase']}: {phase['total_rows']} records in {phase['pages']} pages, "
+          f"{phase['created']} created, {phase['updated']} updated, {phase['failed_imports']} failed "
+          f"({phase['elapsed']:.1f}s, {speed}, {phase['queries']} queries, {format_memory(phase['peak_memory'])})")
+    print(f"   📡 {phase['stub_requests']} requests, busiest second {phase['busiest_second']}, "
+          f"{phase['rate_limited']} rate limited")
+    for failure in phase['failures']:
+        print(f"   ⚠️  {failure}")
+
+
+def invalid_among(ids: List[str]) -> int:
+    return len([record_id for record_id in ids if int(record_id[len('recSTUB'):]) % INVALID_EVERY == 0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Airtable API stub and end-to-end check of the Airtable sync')
+    parser.add_argument('--wp-path', help='Local WordPress installation with both plugins active')
+    parser.add_argument('--serve', action='store_true', help='Only serve the stub until interrupted')
+    parser.add_argument('--port', type=int, default=0, help='Stub port (default: any free port)')
+    parser.add_argument('--records', type=int, default=5000, help='Records in the stub table')
+    parser.add_argument('--touch', type=int, default=250, help='Records changed before the incremental sync')
+    parser.add_argument('--latency', type=float, default=150, help='Stub latency per request in milliseconds')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the stub records')
+    parser.add_argument('--php', default='php', help='PHP CLI binary')
+    parser.add_argument('--timeout', type=float, default=1800, help='Timeout per driver command in seconds')
+    parser.add_argument('--keep', action='store_true', help='Keep the synced stub rows in the database afterwards')
+    parser.add_argument('--json', metavar='PATH', help="Write the results as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB, help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true', help='Do not append the run to the run history')
+    args = parser.parse_args()
+
+    if not args.serve and not args.wp_path:
+        parser.error('--wp-path or --serve is required')
+
+    table = StubTable(args.records, args.seed, args.latency / 1000)
+    server = start_stub(table, args.port)
+    stub_url = f'http://127.0.0.1:{server.server_address[1]}/v0/'
+
+    if args.serve:
+        print(f"🧪 Airtable stub at {stub_url} (base {BASE_ID}, table {TABLE}, key {API_KEY}, "
+              f"{args.records} records)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+            sys.exit(0)
+
+    if shutil.which(args.php) is None:
+        print(f"Error: {args.php} not found")
+        sys.exit(2)
+
+    started_at = time.time()
+    invalid = args.records // INVALID_EVERY
+    phases = []
+
+    cleaned = run_driver(args.php, args.wp_path, ['clean'], args.timeout)
+    if cleaned.get('error'):
+        print(f"❌ {cleaned['error']}")
+        sys.exit(1)
+
+    print(f"🧪 Airtable stub at {stub_url} with {args.records} records, {args.latency:g}ms latency")
+    outcome = run_driver(args.php, args.wp_path, ['sync', stub_url, 'full', '--reset'], args.timeout)
+    phases.append(check_phase('full', outcome, table, {
+        'total_rows': args.records, 'created': args.records - invalid, 'updated': 0, 'failed_imports': invalid,
+        'pages': max(1, math.ceil(args.records / PAGE_SIZE_MAX))
+    }))
+    print_phase(phases[-1])
+
+    if not phases[-1]['error']:
+        touched = table.touch(args.touch, args.seed)
+        table.reset_log()
+        outcome = run_driver(args.php, args.wp_path, ['sync', stub_url, 'incremental'], args.timeout)
+        touched_invalid = invalid_among(touched)
+        phases.append(check_phase('incremental', outcome, table, {
+            'total_rows': len(touched), 'created': 0, 'updated': len(touched) - touched_invalid,
+            'failed_imports': touched_invalid
+        }))
+        print_phase(phases[-1])
+
+        counted = run_driver(args.php, args.wp_path, ['count'], args.timeout)
+        duplicates = {'phase': 'duplicates', 'error': counted.get('error'), 'failures': []}
+        if counted.get('error'):
+            duplicates['failures'].append(counted['error'])
+        else:
+            duplicates.update(counted)
+            if counted['duplicates']:
+                duplicates['failures'].append(f"{counted['duplicates']} Airtable ids occur twice")
+            if counted['cases'] != args.records - invalid:
+                duplicates['failures'].append(f"{counted['cases']} cases, expected {args.records - invalid}")
+        phases.append(duplicates)
+        print(f"{'❌' if duplicates['failures'] else '✅'} duplicates: "
+              f"{'; '.join(duplicates['failures']) or 'every Airtable id synced once'}")
+
+    server.shutdown()
+    if not args.keep:
+        cleaned = run_driver(args.php, args.wp_path, ['clean'], args.timeout)
+        if cleaned.get('error'):
+            print(f"⚠️  Could not remove the synced stub rows: {cleaned['error']}")
+        else:
+            print(f"🧹 Removed {cleaned['deleted']} synced stub rows")
+
+    passed = all(not phase['failures'] for phase in phases)
+    results = {'records': args.records, 'touched': args.touch, 'latency_ms': args.latency,
+               'seed': args.seed, 'phases': phases}
+    run = build_run('airtable_sync', 'stub', results, time.time() - started_at,
+                    files_scanned=len(phases), bytes_read=0, passed=passed, started_at=started_at)
+    if not args.no_history:
+        record_run(run, args.history_db)
+
+    if args.json:
+        output = json.dumps(run, default=str, ensure_ascii=False)
+        if args.json == '-':
+            print(output)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Audit Latency Report for the doc-in API
+Reads the latency analytics endpoint of the Document Analysis plugin
+(/wp-json/cah-doc-in/v1/analytics/latency), which serves p50/p95/p99 and error
+rates per action_type from per-minute rollups of the audit table, and prints
+them together with the latency regressions since the last plugin upgrade.
+
+Exits with 1 when the upgrade check flags a regression, so it can run after a
+deployment.
+
+Usage:
+    python3 audit_latency.py [--base-url http://localhost] --auth user:app-password
+                             [--hours 24] [--interval hour] [--action api_case_lookup] [--json PATH]
+"""
+
+import sys
+import json
+import base64
+import argparse
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from typing import Dict, Optional
+
+DEFAULT_BASE_URL = 'http://localhost'
+ENDPOINT = '/wp-json/cah-doc-in/v1/analytics/latency'
+REQUEST_TIMEOUT = 120.0
+
+
+def fetch_report(base_url: str, auth: Optional[str], hours: float, interval: str,
+                 action_type: Optional[str], threshold: float) -> Dict:
+    params = {'hours': format(hours, 'g'), 'interval': interval, 'threshold': format(threshold, 'g')}
+    if action_type:
+        params['action_type'] = action_type
+    request = Request(base_url.rstrip('/') + ENDPOINT + '?' + urlencode(params),
+                      headers={'Accept': 'application/json'})
+    if auth:
+        request.add_header('Authorization', 'Basic ' + base64.b64encode(auth.encode('utf-8')).decode('ascii'))
+    with urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def print_report(report: Dict):
+    window = report['window']
+    actions = report.get('actions') or {}
+    print(f"\n📊 DOC-IN API LATENCY: {window['from']} → {window['to']} ({window['hours']:g}h)")
+    print("=" * 80)
+    if not actions:
+        print("ℹ️  No API calls recorded in this window")
+    else:
+        print(f"{'action_type':<30} {'calls':>8} {'errors':>7} {'avg':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for action, stats in actions.items():
+            print(f"{action:<30} {stats['calls']:>8} {stats['error_rate'] * 100:>6.1f}% "
+                  f"{stats['avg']:>6.1f}ms {stats['p50']:>6.1f}ms {stats['p95']:>6.1f}ms {stats['p99']:>6.1f}ms")
+
+    for action, stats in actions.items():
+        if not stats.get('series'):
+            continue
+        print(f"\n📈 {action}")
+        for period in stats['series']:
+            print(f"   {period['period']}  {period['calls']:>7} calls  p50 {period['p50']:>7.1f}ms  "
+                  f"p95 {period['p95']:>7.1f}ms  p99 {period['p99']:>7.1f}ms  {period['error_rate'] * 100:>5.1f}% errors")
+
+    check = report.get('upgrade_check') or {}
+    upgrade = check.get('upgrade')
+    if not upgrade:
+        print("\nℹ️  No plugin upgrade recorded yet - nothing to compare")
+        return
+    print(f"\n🔄 Upgrade {upgrade['from']} → {upgrade['to']} at {upgrade['since']}")
+    if not check['regressions']:
+        print("✅ No latency or error rate regressions")
+    for regression in check['regressions']:
+        print(f"🐌 {regression['action_type']}: p95 {regression['p95_before']:.1f}ms → {regression['p95_after']:.1f}ms "
+              f"({regression['p95_ratio']:.2f}x), errors {regression['error_rate_before'] * 100:.1f}% → "
+              f"{regression['error_rate_after'] * 100:.1f}% ({regression['calls_before']} → {regression['calls_after']} calls)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report doc-in API latency percentiles from the audit rollups')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='WordPress installation to query')
+    parser.add_argument('--auth', metavar='USER:APP_PASSWORD',
+                        help='WordPress application password of an administrator (basic auth)')
+    parser.add_argument('--hours', type=float, default=24, help='Length of the window ending now')
+    parser.add_argument('--interval', choices=['minute', 'hour', 'day'], default='',
+                        help='Also show the percentiles per minute, hour or day')
+    parser.add_argument('--action', dest='action_type', help='Only this action_type (e.g. api_case_lookup)')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='p95 ratio after/before the last upgrade that counts as a regression')
+    parser.add_argument('--json', metavar='PATH', help="Write the raw report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    try:
+        report = fetch_report(args.base_url, args.auth, args.hours, args.interval, args.action_type, args.threshold)
+    except HTTPError as e:
+        print(f"Error: {args.base_url}{ENDPOINT} returned HTTP {e.code}")
+        sys.exit(2)
+    except (URLError, OSError, ValueError) as e:
+        print(f"Error: Could not fetch the latency report: {e}")
+        sys.exit(2)
+
+    if args.json:
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.json == '-':
+            print(output)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+    if args.json != '-':
+        print_report(report)
+
+    regressions = (report.get('upgrade_check') or {}).get('regressions') or []
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
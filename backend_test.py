@@ -12,14 +12,94 @@ Specific tests for the review request:
 """
 
 import requests
+import io
 import json
 import sys
 import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse, parse_qs
 import re
+from pathlib import Path
+
+from pattern_scanner import PatternScanner
+from php_symbols import SymbolIndex
+from load_test import add_load_arguments, finish_load_test, run_load_test
+from run_history import DEFAULT_HISTORY_DB, build_run, record_run, report_to_stderr, write_json
+
+ADMIN_DASHBOARD = 'core/admin/class-admin-dashboard.php'
+UNIFIED_MENU = 'core/includes/class-unified-menu.php'
+CORE_PLUGIN = 'core/court-automation-hub.php'
+
+class ThreadOutput:
+    """sys.stdout stand-in that sends each thread's prints to its own buffer, if it has one"""
+
+    def __init__(self, stream, local):
+        self.stream = stream
+        self.local = local
+
+    def write(self, text):
+        buffer = getattr(self.local, 'output', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        if getattr(self.local, 'output', None) is None:
+            self.stream.flush()
 
 class LegalAutomationTester:
-    def __init__(self):
+    # Look for old URL patterns that should be fixed
+    old_patterns = [
+        'page=legal-automation&view=cases',
+        'page=legal-automation-cases',
+        'page=klage-click-cases'
+    ]
+
+    # Literal markers the case management checks look for in the admin dashboard
+    dashboard_markers = {
+        'edit_link': 'admin.php?page=la-cases&action=edit',
+        'view_link': 'admin.php?page=la-cases&action=view',
+        'delete_link': 'admin.php?page=la-cases&action=delete',
+        'update_method_call': 'handle_case_update_v210($case_id, $_POST)',
+        'tab_navigation': 'nav-tab-wrapper',
+        'nav_tab': 'nav-tab',
+        'post_method_check': "if ($_SERVER['REQUEST_METHOD'] === 'POST')",
+        'save_case_action': "isset($_POST['save_case'])",
+        'save_case': 'save_case',
+        'edit_case_nonce': 'edit_case_nonce',
+        'nonce_verification': "wp_verify_nonce($post_data['edit_case_nonce'], 'edit_case_action')",
+        'success_redirect': "wp_redirect(admin_url('admin.php?page=la-cases&updated=",
+        'exit': 'exit;',
+        'success_title': '✅ Erfolg!',
+        'success_text': 'wurde aktualisiert',
+        'error_notice': 'notice notice-error',
+        'case_id_field': 'name="case_id"'
+    }
+
+    # Methods the dashboard must define or call, answered by the symbol index
+    dashboard_symbols = {
+        'edit_form_method': 'render_edit_case_form',
+        'case_update_method': 'handle_case_update_v210',
+        'action_handling': 'handle_case_actions'
+    }
+
+    # Version markers in the core plugin file
+    version_markers = {
+        'header_241': 'Version: 241',
+        'constant_241': "define('CAH_PLUGIN_VERSION', '241')",
+        'header_240': 'Version: 240',
+        'constant_240': "define('CAH_PLUGIN_VERSION', '240')"
+    }
+
+    def __init__(self, base_path='/app', scanner=None, symbols=None):
+        # Plugin sources checked by the static tests; a scanner and symbol
+        # index can be shared with other suites (see watch.py)
+        self.base_path = Path(base_path)
+        self.scanner = scanner or PatternScanner(self.base_path)
+        self.symbols = symbols or SymbolIndex(self.base_path)
+        self.register_patterns()
+        
         # WordPress admin simulation endpoints
         self.base_url = "http://localhost"  # WordPress installation
         self.admin_url = f"{self.base_url}/wp-admin/"
@@ -42,69 +122,105 @@ class LegalAutomationTester:
         self.session.headers.update({
             'User-Agent': 'Legal-Automation-Tester/1.0'
         })
+        
+        # Tests may run on a thread pool: each worker thread tracks the start
+        # time, the printed output and the results of the test it is running,
+        # which are reported in get_tests() order once all tests are done
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.wall_time = 0.0
+
+    def register_patterns(self):
+        """Register every literal check in the shared scanner so each file is matched in one pass"""
+        for pattern in self.old_patterns:
+            self.scanner.register_literal(f'old_url:{pattern}', pattern, paths=[ADMIN_DASHBOARD, UNIFIED_MENU])
+        self.scanner.register_literal('la_cases', 'page=la-cases', paths=[ADMIN_DASHBOARD, UNIFIED_MENU])
+
+        for name, text in self.dashboard_markers.items():
+            self.scanner.register_literal(f'dashboard:{name}', text, paths=[ADMIN_DASHBOARD])
+
+        for name, text in self.version_markers.items():
+            self.scanner.register_literal(f'version:{name}', text, paths=[CORE_PLUGIN])
+
+    def require_file(self, relative_path):
+        """Path of a plugin file; raises like open() would if it is missing"""
+        file_path = self.base_path / relative_path
+        if not file_path.is_file():
+            raise FileNotFoundError(f"[Errno 2] No such file or directory: '{file_path}'")
+        return file_path
+
+    def count(self, rule_id, relative_path):
+        """Number of matches of a registered rule in one file (like str.count)"""
+        return len(self.scanner.matches(rule_id, self.base_path / relative_path))
+
+    def has(self, rule_id, relative_path):
+        """Whether a registered rule matches in one file (like `text in content`)"""
+        return self.count(rule_id, relative_path) > 0
+
+    def dashboard(self, name):
+        if name in self.dashboard_symbols:
+            return self.symbols.defines_or_calls(self.dashboard_symbols[name], ADMIN_DASHBOARD)
+        return self.has(f'dashboard:{name}', ADMIN_DASHBOARD)
 
     def log_result(self, category, test_name, status, message, details=None):
         """Log test result"""
+        started = getattr(self.local, 'started', None)
         result = {
             'test': test_name,
             'status': status,
             'message': message,
             'details': details or {},
-            'timestamp': time.time()
+            'timestamp': time.time(),
+            'duration': time.perf_counter() - started if started is not None else None
         }
         
-        self.results[category].append(result)
-        self.results['summary']['total_tests'] += 1
-        
         if status == 'PASS':
-            self.results['summary']['passed'] += 1
             print(f"✅ {test_name}: {message}")
         else:
-            self.results['summary']['failed'] += 1
             print(f"❌ {test_name}: {message}")
             if details:
                 print(f"   Details: {details}")
+        
+        logged = getattr(self.local, 'logged', None)
+        if logged is not None:
+            logged.append((category, result))
+        else:
+            self.add_result(category, result)
+
+    def add_result(self, category, result):
+        with self.lock:
+            self.results[category].append(result)
+            self.results['summary']['total_tests'] += 1
+            if result['status'] == 'PASS':
+                self.results['summary']['passed'] += 1
+            else:
+                self.results['summary']['failed'] += 1
 
     def test_unified_url_routing(self):
         """Test 1: Unified URL Routing - All case actions point to la-cases page consistently"""
         print("\n🔍 Testing Unified URL Routing...")
         
         try:
-            # Check admin dashboard file for consistent la-cases usage
-            admin_dashboard_path = "/app/core/admin/class-admin-dashboard.php"
-            unified_menu_path = "/app/core/includes/class-unified-menu.php"
+            # Check admin dashboard and unified menu files for consistent la-cases usage
+            self.require_file(ADMIN_DASHBOARD)
+            self.require_file(UNIFIED_MENU)
             
             issues_found = []
             
-            # Check admin dashboard file
-            with open(admin_dashboard_path, 'r') as f:
-                admin_content = f.read()
-            
-            # Check unified menu file for old URL patterns
-            with open(unified_menu_path, 'r') as f:
-                unified_content = f.read()
-            
-            # Look for old URL patterns that should be fixed
-            old_patterns = [
-                'page=legal-automation&view=cases',
-                'page=legal-automation-cases',
-                'page=klage-click-cases'
-            ]
-            
-            for pattern in old_patterns:
-                if pattern in admin_content:
+            for pattern in self.old_patterns:
+                if self.has(f'old_url:{pattern}', ADMIN_DASHBOARD):
                     issues_found.append(f"Admin Dashboard: {pattern}")
-                if pattern in unified_content:
+                if self.has(f'old_url:{pattern}', UNIFIED_MENU):
                     issues_found.append(f"Unified Menu: {pattern}")
             
             # Check that la-cases is used consistently
-            la_cases_count_admin = admin_content.count('page=la-cases')
-            la_cases_count_unified = unified_content.count('page=la-cases')
+            la_cases_count_admin = self.count('la_cases', ADMIN_DASHBOARD)
+            la_cases_count_unified = self.count('la_cases', UNIFIED_MENU)
             
             # Verify case action links point to la-cases
-            case_edit_links = 'admin.php?page=la-cases&action=edit' in admin_content
-            case_view_links = 'admin.php?page=la-cases&action=view' in admin_content
-            case_delete_links = 'admin.php?page=la-cases&action=delete' in admin_content
+            case_edit_links = self.dashboard('edit_link')
+            case_view_links = self.dashboard('view_link')
+            case_delete_links = self.dashboard('delete_link')
             
             if len(issues_found) == 0 and case_edit_links and case_view_links and case_delete_links:
                 self.log_result(
@@ -144,27 +260,21 @@ class LegalAutomationTester:
         
         try:
             # Files to check for old URL patterns
-            files_to_check = [
-                "/app/core/admin/class-admin-dashboard.php",
-                "/app/core/includes/class-unified-menu.php"
-            ]
+            files_to_check = [ADMIN_DASHBOARD, UNIFIED_MENU]
             
             old_url_issues = []
             
-            for file_path in files_to_check:
-                try:
-                    with open(file_path, 'r') as f:
-                        content = f.read()
-                    
-                    # Check for specific old URL patterns mentioned in review request
-                    if 'page=legal-automation&view=cases' in content:
-                        old_url_issues.append(f"{file_path}: page=legal-automation&view=cases")
-                    
-                    if 'page=legal-automation-cases' in content:
-                        old_url_issues.append(f"{file_path}: page=legal-automation-cases")
-                        
-                except FileNotFoundError:
+            for relative_path in files_to_check:
+                file_path = self.base_path / relative_path
+                if not file_path.is_file():
                     continue
+                
+                # Check for specific old URL patterns mentioned in review request
+                if self.has('old_url:page=legal-automation&view=cases', relative_path):
+                    old_url_issues.append(f"{file_path}: page=legal-automation&view=cases")
+                
+                if self.has('old_url:page=legal-automation-cases', relative_path):
+                    old_url_issues.append(f"{file_path}: page=legal-automation-cases")
             
             if len(old_url_issues) == 0:
                 self.log_result(
@@ -201,29 +311,26 @@ class LegalAutomationTester:
         print("\n🔍 Testing Consistent Case Edit Experience...")
         
         try:
-            # Read the admin dashboard file to verify consistent edit experience
-            admin_dashboard_path = "/app/core/admin/class-admin-dashboard.php"
-            
-            with open(admin_dashboard_path, 'r') as f:
-                content = f.read()
+            # Verify consistent edit experience in the admin dashboard file
+            self.require_file(ADMIN_DASHBOARD)
             
             # Check that case editing functionality is unified
-            edit_form_method = 'render_edit_case_form(' in content
-            case_update_method = 'handle_case_update_v210(' in content
+            edit_form_method = self.dashboard('edit_form_method')
+            case_update_method = self.dashboard('case_update_method')
             
             # Check that both dashboard and case list use same edit links
-            dashboard_edit_links = 'admin.php?page=la-cases&action=edit' in content
+            dashboard_edit_links = self.dashboard('edit_link')
             
             # Check for complete tab structure in edit form
-            tab_navigation = 'nav-tab-wrapper' in content
-            multiple_tabs = content.count('nav-tab') > 5  # Should have multiple tabs
+            tab_navigation = self.dashboard('tab_navigation')
+            multiple_tabs = self.count('dashboard:nav_tab', ADMIN_DASHBOARD) > 5  # Should have multiple tabs
             
             # Check that form processing is consistent
-            form_processing = "if ($_SERVER['REQUEST_METHOD'] === 'POST')" in content
-            save_case_action = "isset($_POST['save_case'])" in content
+            form_processing = self.dashboard('post_method_check')
+            save_case_action = self.dashboard('save_case_action')
             
             # Check for success messages and redirects
-            success_redirect = "wp_redirect(admin_url('admin.php?page=la-cases&updated=" in content
+            success_redirect = self.dashboard('success_redirect')
             
             if (edit_form_method and case_update_method and dashboard_edit_links and 
                 tab_navigation and multiple_tabs and form_processing and save_case_action and success_redirect):
@@ -276,21 +383,18 @@ class LegalAutomationTester:
         print("\n🔍 Testing Core Plugin Version Update to 241...")
         
         try:
-            # Read the core plugin file to verify version update
-            core_plugin_path = "/app/core/court-automation-hub.php"
-            
-            with open(core_plugin_path, 'r') as f:
-                content = f.read()
+            # Verify version update in the core plugin file
+            self.require_file(CORE_PLUGIN)
             
             # Check for version 241 in plugin header
-            version_header = 'Version: 241' in content
+            version_header = self.has('version:header_241', CORE_PLUGIN)
             
             # Check for version constant
-            version_constant = "define('CAH_PLUGIN_VERSION', '241')" in content
+            version_constant = self.has('version:constant_241', CORE_PLUGIN)
             
             # Ensure old version 240 is not present
-            old_version_header = 'Version: 240' in content
-            old_version_constant = "define('CAH_PLUGIN_VERSION', '240')" in content
+            old_version_header = self.has('version:header_240', CORE_PLUGIN)
+            old_version_constant = self.has('version:constant_240', CORE_PLUGIN)
             
             if version_header and version_constant and not old_version_header and not old_version_constant:
                 self.log_result(
@@ -325,29 +429,26 @@ class LegalAutomationTester:
         print("\n🔍 Testing Form Processing Consistency...")
         
         try:
-            # Read the admin dashboard file to verify form processing
-            admin_dashboard_path = "/app/core/admin/class-admin-dashboard.php"
-            
-            with open(admin_dashboard_path, 'r') as f:
-                content = f.read()
+            # Verify form processing in the admin dashboard file
+            self.require_file(ADMIN_DASHBOARD)
             
             # Check for unified form processing
-            post_method_check = "if ($_SERVER['REQUEST_METHOD'] === 'POST')" in content
-            action_handling = 'handle_case_actions()' in content
+            post_method_check = self.dashboard('post_method_check')
+            action_handling = self.dashboard('action_handling')
             
             # Check for consistent save case processing
-            save_case_nonce = 'save_case' in content and 'edit_case_nonce' in content
-            case_update_call = 'handle_case_update_v210(' in content
+            save_case_nonce = self.dashboard('save_case') and self.dashboard('edit_case_nonce')
+            case_update_call = self.dashboard('case_update_method')
             
             # Check for consistent redirect after save
-            redirect_after_save = "wp_redirect(admin_url('admin.php?page=la-cases&updated=" in content
-            exit_after_redirect = 'exit;' in content
+            redirect_after_save = self.dashboard('success_redirect')
+            exit_after_redirect = self.dashboard('exit')
             
             # Check for success message handling
-            success_message = '✅ Erfolg!' in content and 'wurde aktualisiert' in content
+            success_message = self.dashboard('success_title') and self.dashboard('success_text')
             
             # Check for error handling
-            error_handling = 'notice notice-error' in content
+            error_handling = self.dashboard('error_notice')
             
             if (post_method_check and action_handling and save_case_nonce and case_update_call and 
                 redirect_after_save and exit_after_redirect and success_message):
@@ -390,18 +491,59 @@ class LegalAutomationTester:
                 f'❌ Test failed: {str(e)}'
             )
 
-    def run_all_tests(self):
+    def get_tests(self):
+        """URL Routing Fix Tests for Review Request, in report order"""
+        return [
+            self.test_unified_url_routing,
+            self.test_no_old_url_patterns,
+            self.test_consistent_case_edit_experience,
+            self.test_core_plugin_version_241_update,
+            self.test_form_processing_consistency,
+            self.test_complete_case_edit_workflow
+        ]
+
+    def run_timed(self, test):
+        """Run one test; returns its printed output and the results it logged"""
+        self.local.started = time.perf_counter()
+        self.local.output = io.StringIO()
+        self.local.logged = []
+        try:
+            test()
+            return self.local.output.getvalue(), self.local.logged
+        finally:
+            self.local.started = None
+            self.local.output = None
+            self.local.logged = None
+
+    def run_all_tests(self, workers=None):
         """Run all URL routing fix verification tests"""
         print("🚀 Starting URL Routing Fix Verification (v241)...")
         print("=" * 80)
         
-        # URL Routing Fix Tests for Review Request
-        self.test_unified_url_routing()
-        self.test_no_old_url_patterns()
-        self.test_consistent_case_edit_experience()
-        self.test_core_plugin_version_241_update()
-        self.test_form_processing_consistency()
-        self.test_complete_case_edit_workflow()
+        tests = self.get_tests()
+        start = time.perf_counter()
+        
+        # Scan the plugin files and update the symbol index once up front;
+        # the tests only read the shared results
+        self.scanner.scan()
+        self.symbols.update()
+        
+        # The tests are independent of each other and run on a thread pool;
+        # their output is buffered and printed in test order
+        stdout = sys.stdout
+        sys.stdout = ThreadOutput(stdout, self.local)
+        try:
+            with ThreadPoolExecutor(max_workers=workers or len(tests)) as pool:
+                outcomes = list(pool.map(self.run_timed, tests))
+        finally:
+            sys.stdout = stdout
+        
+        for output, logged in outcomes:
+            print(output, end='')
+            for category, result in logged:
+                self.add_result(category, result)
+        
+        self.wall_time = time.perf_counter() - start
         
         # Print summary
         self.print_summary()
@@ -413,35 +555,32 @@ class LegalAutomationTester:
         print("\n🔍 Testing Complete Case Edit Workflow...")
         
         try:
-            # Read the admin dashboard file to verify complete workflow
-            admin_dashboard_path = "/app/core/admin/class-admin-dashboard.php"
-            
-            with open(admin_dashboard_path, 'r') as f:
-                content = f.read()
+            # Verify complete workflow in the admin dashboard file
+            self.require_file(ADMIN_DASHBOARD)
             
             # Check for edit form rendering
-            edit_form_method = 'render_edit_case_form(' in content
+            edit_form_method = self.dashboard('edit_form_method')
             
             # Check for form processing in admin_page_cases
-            form_processing = "if ($_SERVER['REQUEST_METHOD'] === 'POST')" in content
-            save_case_action = "isset($_POST['save_case'])" in content
+            form_processing = self.dashboard('post_method_check')
+            save_case_action = self.dashboard('save_case_action')
             
             # Check for handle_case_update_v210 method call
-            update_method_call = 'handle_case_update_v210($case_id, $_POST)' in content
+            update_method_call = self.dashboard('update_method_call')
             
             # Check for success message and redirect flow
-            success_message = '✅ Erfolg!' in content and 'wurde aktualisiert' in content
-            redirect_to_list = "wp_redirect(admin_url('admin.php?page=la-cases&updated=" in content
+            success_message = self.dashboard('success_title') and self.dashboard('success_text')
+            redirect_to_list = self.dashboard('success_redirect')
             
             # Check for proper nonce handling throughout workflow
-            edit_nonce_field = 'edit_case_nonce' in content
-            nonce_verification = "wp_verify_nonce($post_data['edit_case_nonce'], 'edit_case_action')" in content
+            edit_nonce_field = self.dashboard('edit_case_nonce')
+            nonce_verification = self.dashboard('nonce_verification')
             
             # Check for case ID field in edit form
-            case_id_field = 'name="case_id"' in content
+            case_id_field = self.dashboard('case_id_field')
             
             # Check for error handling
-            error_handling = 'notice notice-error' in content
+            error_handling = self.dashboard('error_notice')
             
             if (edit_form_method and form_processing and save_case_action and update_method_call and 
                 success_message and redirect_to_list and edit_nonce_field and nonce_verification and case_id_field):
@@ -521,11 +660,55 @@ class LegalAutomationTester:
                 for test in tests:
                     if test['status'] == 'FAIL':
                         print(f"  ❌ {test['test']}: {test['message']}")
+        
+        # Show which checks are slow
+        timed = [t for category in categories for t in self.results[category] if t['duration'] is not None]
+        if timed:
+            print(f"\n⏱️  Wall time: {self.wall_time:.3f}s "
+                  f"({self.scanner.stats['files_scanned']} files, {self.scanner.stats['bytes_read']} bytes scanned)")
+            for test in sorted(timed, key=lambda t: t['duration'], reverse=True):
+                print(f"  {test['duration'] * 1000:8.1f} ms  {test['test']}")
 
 def main():
     """Main test execution"""
+    parser = argparse.ArgumentParser(description='URL routing fix verification')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of tests to run concurrently (default: all)')
+    parser.add_argument('--json', metavar='PATH',
+                        help="Write the results of this run as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB,
+                        help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true',
+                        help='Do not append this run to the run history')
+    parser.add_argument('--load', action='store_true',
+                        help='Load test the REST endpoints of the WordPress installation instead of the static checks')
+    add_load_arguments(parser)
+    args = parser.parse_args()
+    report_to_stderr(args.json)
+    
     tester = LegalAutomationTester()
-    results = tester.run_all_tests()
+    
+    if args.load:
+        target = 'local stub server' if args.stub else tester.base_url
+        print(f"🚀 Load testing {target} for {args.duration:g}s with {args.concurrency} connections"
+              f"{'' if args.allow_writes else ', read-only endpoints'}...")
+        results = asyncio.run(run_load_test(args, tester.base_url))
+        finish_load_test(results, args, 'stub' if args.stub else tester.base_url)
+        return
+    
+    results = tester.run_all_tests(workers=args.workers)
+    
+    # Export the run and append it to the trend store
+    run = build_run(
+        'backend_test', str(tester.base_path), results, tester.wall_time,
+        files_scanned=tester.scanner.stats['files_scanned'],
+        bytes_read=tester.scanner.stats['bytes_read'],
+        passed=results['summary']['failed'] == 0
+    )
+    if args.json:
+        write_json(run, args.json)
+    if not args.no_history:
+        record_run(run, args.history_db)
     
     # Return appropriate exit code
     if results['summary']['failed'] > 0:
@@ -0,0 +1,324 @@
+<?php
+/**
+ * Plugin Name: Legal Automation Bootstrap Profiler
+ * Description: Records the per-request bootstrap cost of the Legal Automation plugins for bootstrap_report.py
+ * Version: 1.0.0
+ *
+ * Must-use plugin: copy or symlink into wp-content/mu-plugins/ and enable it in
+ * wp-config.php with define('LA_BOOTSTRAP_PROFILE', true), or with a sample rate
+ * such as define('LA_BOOTSTRAP_PROFILE', 0.1). Every sampled request writes one
+ * JSON trace to LA_BOOTSTRAP_PROFILE_DIR (default wp-content/la-bootstrap-traces):
+ *
+ *   plugins  time and memory of including each plugin's main file
+ *   frames   calls, inclusive and exclusive time and memory per stack, where a
+ *            stack is request;<hook>;<plugin>:<callback>[;<hook>;...] for every
+ *            hook callback defined in one of the seven plugins, and
+ *            request;include;<plugin> for the main file include
+ *   files    every included file, attributed to the stack that loaded it
+ *
+ * PHP cannot time a single require without an extension, so files are
+ * attributed to the include or callback during which they were loaded.
+ */
+
+if (!defined('ABSPATH') || !defined('LA_BOOTSTRAP_PROFILE') || !LA_BOOTSTRAP_PROFILE) {
+    return;
+}
+
+class LA_Bootstrap_Profiler {
+
+    // Main plugin files of the Legal Automation stack, by the name used in the traces
+    const PLUGIN_FILES = array(
+        'court-automation-hub.php' => 'core',
+        'legal-automation-admin.php' => 'admin',
+        'legal-automation-finance.php' => 'finance',
+        'court-automation-hub-document-analysis.php' => 'doc-in',
+        'klage-click-doc-out.php' => 'doc-out',
+        'legal-automation-crm.php' => 'crm',
+        'legal-automation-import.php' => 'import'
+    );
+
+    private $plugin_dirs = array();
+    private $plugins = array();
+    private $frames = array();
+    private $files = array();
+    private $stack = array();
+    private $skipped = array();
+    private $mark;
+
+    public static function start() {
+        $rate = LA_BOOTSTRAP_PROFILE === true ? 1.0 : (float) LA_BOOTSTRAP_PROFILE;
+        if ($rate <= 0 || ($rate < 1 && mt_rand() / mt_getrandmax() >= $rate)) {
+            return;
+        }
+
+        $profiler = new self();
+        add_action('muplugins_loaded', array($profiler, 'reset_mark'), PHP_INT_MAX);
+        add_action('plugin_loaded', array($profiler, 'plugin_loaded'), PHP_INT_MAX);
+        add_action('all', array($profiler, 'wrap_callbacks'));
+        add_action('shutdown', array($profiler, 'write_trace'), PHP_INT_MAX);
+    }
+
+    private function __construct() {
+        $this->reset_mark();
+    }
+
+    public function reset_mark() {
+        $this->mark = array(
+            'time' => microtime(true),
+            'memory' => memory_get_usage(),
+            'files' => count(get_included_files())
+        );
+    }
+
+    /**
+     * Time and files of one plugin's main file include (fired right after the include)
+     */
+    public function plugin_loaded($plugin_file) {
+        $now = microtime(true);
+        $memory = memory_get_usage();
+        $basename = basename($plugin_file);
+        $name = isset(self::PLUGIN_FILES[$basename]) ? self::PLUGIN_FILES[$basename] : null;
+
+        if ($name !== null) {
+            $this->plugin_dirs[wp_normalize_path(dirname($plugin_file)) . '/'] = $name;
+            $key = 'request;include;' . $name;
+            $this->frames[$key] = array(
+                'calls' => 1,
+                'time' => $now - $this->mark['time'],
+                'self' => $now - $this->mark['time'],
+                'memory' => $memory - $this->mark['memory']
+            );
+            $this->attribute_files($this->mark['files'], $key);
+        }
+
+        $this->plugins[] = array(
+            'plugin' => $name !== null ? $name : basename(dirname($plugin_file)),
+            'file' => plugin_basename($plugin_file),
+            'profiled' => $name !== null,
+            'time' => $now - $this->mark['time'],
+            'memory' => $memory - $this->mark['memory']
+        );
+
+        $this->reset_mark();
+    }
+
+    /**
+     * Runs before every action and filter: wraps the hook's callbacks that belong to a profiled plugin
+     * The callback array keys stay the same, so remove_action() and has_action() keep working
+     */
+    public function wrap_callbacks($hook_name) {
+        global $wp_filter;
+
+        if (empty($this->plugin_dirs) || !isset($wp_filter[$hook_name])) {
+            return;
+        }
+
+        foreach ($wp_filter[$hook_name]->callbacks as $priority => $callbacks) {
+            foreach ($callbacks as $idx => $callback) {
+                if ($callback['function'] instanceof LA_Profiled_Callback || isset($this->skipped[$hook_name][$idx])) {
+                    continue;
+                }
+                list($plugin, $name) = $this->describe($callback['function']);
+                if ($plugin === null) {
+                    $this->skipped[$hook_name][$idx] = true;
+                    continue;
+                }
+                $wp_filter[$hook_name]->callbacks[$priority][$idx]['function'] =
+                    new LA_Profiled_Callback($this, $hook_name, $plugin . ':' . $name, $callback['function']);
+            }
+        }
+    }
+
+    public function enter($hook_name, $callback_name) {
+        $parent = empty($this->stack) ? 'request' : end($this->stack)['key'];
+        $this->stack[] = array(
+            'key' => $parent . ';' . $hook_name . ';' . $callback_name,
+            'time' => microtime(true),
+            'memory' => memory_get_usage(),
+            'files' => count(get_included_files()),
+            'children' => 0.0
+        );
+    }
+
+    public function leave() {
+        $frame = array_pop($this->stack);
+        $elapsed = microtime(true) - $frame['time'];
+
+        if (!isset($this->frames[$frame['key']])) {
+            $this->frames[$frame['key']] = array('calls' => 0, 'time' => 0.0, 'self' => 0.0, 'memory' => 0);
+        }
+        $stats = &$this->frames[$frame['key']];
+        $stats['calls']++;
+        $stats['time'] += $elapsed;
+        $stats['self'] += $elapsed - $frame['children'];
+        $stats['memory'] += memory_get_usage() - $frame['memory'];
+
+        $this->attribute_files($frame['files'], $frame['key']);
+
+        if (!empty($this->stack)) {
+            $this->stack[count($this->stack) - 1]['children'] += $elapsed;
+        }
+    }
+
+    /**
+     * Write the trace of this request
+     */
+    public function write_trace() {
+        // Callbacks that ended the request with exit/wp_die() never returned
+        while (!empty($this->stack)) {
+            $this->leave();
+        }
+
+        $total = microtime(true) - $_SERVER['REQUEST_TIME_FLOAT'];
+        $profiled = 0.0;
+        foreach ($this->frames as $key => $stats) {
+            if (substr_count($key, ';') === 2) {
+                $profiled += $stats['time'];
+            }
+        }
+        $this->frames['request;wordpress'] = array(
+            'calls' => 1,
+            'time' => max(0.0, $total - $profiled),
+            'self' => max(0.0, $total - $profiled),
+            'memory' => 0
+        );
+
+        $files = array();
+        foreach ($this->files as $file => $key) {
+            $files[$this->relative_path($file)] = array('stack' => $key, 'bytes' => (int) @filesize($file));
+        }
+
+        $trace = array(
+            'version' => 1,
+            'url' => isset($_SERVER['REQUEST_URI']) ? $_SERVER['REQUEST_URI'] : '',
+            'method' => isset($_SERVER['REQUEST_METHOD']) ? $_SERVER['REQUEST_METHOD'] : 'CLI',
+            'context' => $this->request_context(),
+            'started' => $_SERVER['REQUEST_TIME_FLOAT'],
+            'total_time' => $total,
+            'peak_memory' => memory_get_peak_usage(),
+            'included_files' => count(get_included_files()),
+            'php' => PHP_VERSION,
+            'wordpress' => get_bloginfo('version'),
+            'plugins' => $this->plugins,
+            'frames' => $this->frames,
+            'files' => $files
+        );
+
+        $dir = defined('LA_BOOTSTRAP_PROFILE_DIR') ? LA_BOOTSTRAP_PROFILE_DIR : WP_CONTENT_DIR . '/la-bootstrap-traces';
+        if (!wp_mkdir_p($dir)) {
+            error_log('LA Bootstrap Profiler: Could not create ' . $dir);
+            return;
+        }
+        $file = sprintf('%s/trace-%s-%d-%s.json', $dir, gmdate('Ymd-His'), getmypid(), substr(md5(uniqid('', true)), 0, 8));
+        file_put_contents($file, wp_json_encode($trace), LOCK_EX);
+    }
+
+    /**
+     * Plugin name and readable name of a callback, or (null, null) if no profiled plugin defines it
+     */
+    private function describe($callback) {
+        try {
+            if (is_string($callback) && strpos($callback, '::') !== false) {
+                $reflection = new ReflectionMethod($callback);
+                $name = $callback;
+            } elseif (is_string($callback)) {
+                $reflection = new ReflectionFunction($callback);
+                $name = $callback;
+            } elseif (is_array($callback) && count($callback) === 2) {
+                $reflection = new ReflectionMethod($callback[0], $callback[1]);
+                $name = (is_object($callback[0]) ? get_class($callback[0]) : $callback[0]) . '::' . $callback[1];
+            } elseif ($callback instanceof Closure) {
+                $reflection = new ReflectionFunction($callback);
+                $name = '{closure}';
+            } elseif (is_object($callback)) {
+                $reflection = new ReflectionMethod($callback, '__invoke');
+                $name = get_class($callback) . '::__invoke';
+            } else {
+                return array(null, null);
+            }
+        } catch (ReflectionException $e) {
+            return array(null, null);
+        }
+
+        $file = $reflection->getFileName();
+        if ($file === false) {
+            return array(null, null);
+        }
+        $file = wp_normalize_path($file);
+
+        foreach ($this->plugin_dirs as $dir => $plugin) {
+            if (strpos($file, $dir) === 0) {
+                if ($name === '{closure}') {
+                    $name = '{closure}@' . substr($file, strlen($dir)) . ':' . $reflection->getStartLine();
+                }
+                return array($plugin, $name);
+            }
+        }
+
+        return array(null, null);
+    }
+
+    private function attribute_files($since, $key) {
+        foreach (array_slice(get_included_files(), $since) as $file) {
+            // Nested frames finish first and keep their files
+            if (!isset($this->files[$file])) {
+                $this->files[$file] = $key;
+            }
+        }
+    }
+
+    private function relative_path($file) {
+        $file = wp_normalize_path($file);
+        foreach (array(wp_normalize_path(WP_PLUGIN_DIR) . '/', wp_normalize_path(ABSPATH)) as $root) {
+            if (strpos($file, $root) === 0) {
+                return substr($file, strlen($root));
+            }
+        }
+        return $file;
+    }
+
+    private function request_context() {
+        if (defined('WP_CLI') && WP_CLI) {
+            return 'cli';
+        }
+        if (wp_doing_cron()) {
+            return 'cron';
+        }
+        if (wp_doing_ajax()) {
+            return 'ajax';
+        }
+        if (defined('REST_REQUEST') && REST_REQUEST) {
+            return 'rest';
+        }
+        return is_admin() ? 'admin' : 'front';
+    }
+}
+
+/**
+ * Stands in for a plugin callback in $wp_filter and times each call
+ */
+class LA_Profiled_Callback {
+
+    private $profiler;
+    private $hook_name;
+    private $name;
+    private $callback;
+
+    public function __construct($profiler, $hook_name, $name, $callback) {
+        $this->profiler = $profiler;
+        $this->hook_name = $hook_name;
+        $this->name = $name;
+        $this->callback = $callback;
+    }
+
+    public function __invoke(...$args) {
+        $this->profiler->enter($this->hook_name, $this->name);
+        try {
+            return call_user_func_array($this->callback, $args);
+        } finally {
+            $this->profiler->leave();
+        }
+    }
+}
+
+LA_Bootstrap_Profiler::start();
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Bootstrap Cost Report for the Legal Automation plugins
+Aggregates the per-request traces written by bootstrap-profiler.php (a
+must-use plugin) into a flame-graph-style breakdown: mean time per request
+for every stack of plugin include, hook and callback, the cost of each
+plugin (main file include plus its callbacks, exclusive time) and the files
+each plugin loads. Plugins are ranked by that cost, which is the order in
+which lazy loading them pays off most.
+
+--folded writes the aggregated stacks in the folded format that
+flamegraph.pl, speedscope and inferno read.
+
+Usage:
+    python3 bootstrap_report.py /path/to/wp-content/la-bootstrap-traces [--context admin]
+                                [--url /wp-admin/admin.php] [--min-ms 0.5] [--folded stacks.txt] [--json PATH]
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+from statistics import mean
+from typing import Dict, List
+
+DEFAULT_TRACE_DIR = 'la-bootstrap-traces'
+PLUGIN_ORDER = ['core', 'admin', 'finance', 'doc-in', 'doc-out', 'crm', 'import']
+
+
+def load_traces(paths: List[str], context: str = None, url: str = None, last: int = None) -> List[Dict]:
+    """Traces from files and directories, oldest first, optionally filtered by request context and URL"""
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, 'trace-*.json'))) if os.path.isdir(path) else [path]
+
+    traces = []
+    for file in files:
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                trace = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {file}: {e}")
+            continue
+        if context and trace.get('context') != context:
+            continue
+        if url and url not in trace.get('url', ''):
+            continue
+        traces.append(trace)
+
+    traces.sort(key=lambda trace: trace.get('started', 0))
+    return traces[-last:] if last else traces
+
+
+def frame_plugin(stack: str) -> str:
+    """Plugin a stack's innermost frame belongs to; 'wordpress' for everything else"""
+    parts = stack.split(';')
+    if len(parts) >= 3 and parts[-2] == 'include':
+        return parts[-1]
+    if ':' in parts[-1] and len(parts) >= 3:
+        return parts[-1].split(':', 1)[0]
+    return 'wordpress'
+
+
+def aggregate(traces: List[Dict]) -> Dict:
+    """Mean cost per request of every stack, plugin and file over all traces"""
+    requests = len(traces)
+    stacks = {}
+    plugins = {}
+    files = {}
+
+    for trace in traces:
+        for stack, stats in trace['frames'].items():
+            entry = stacks.setdefault(stack, {'calls': 0, 'time': 0.0, 'self': 0.0, 'memory': 0, 'requests': 0})
+            entry['calls'] += stats['calls']
+            entry['time'] += stats['time']
+            entry['self'] += stats['self']
+            entry['memory'] += stats['memory']
+            entry['requests'] += 1
+
+            plugin = frame_plugin(stack)
+            if plugin == 'wordpress':
+                continue
+            totals = plugins.setdefault(plugin, {'include': 0.0, 'callbacks': 0.0, 'include_memory': 0,
+                                                 'callback_memory': 0, 'files': set(), 'bytes': 0})
+            if stack.endswith(';include;' + plugin):
+                totals['include'] += stats['self']
+                totals['include_memory'] += stats['memory']
+            else:
+                totals['callbacks'] += stats['self']
+                totals['callback_memory'] += stats['memory']
+
+        for file, info in trace.get('files', {}).items():
+            entry = files.setdefault(file, {'stack': info['stack'], 'bytes': info['bytes'], 'requests': 0})
+            entry['requests'] += 1
+            plugin = frame_plugin(info['stack'])
+            if plugin in plugins and file not in plugins[plugin]['files']:
+                plugins[plugin]['files'].add(file)
+                plugins[plugin]['bytes'] += info['bytes']
+
+    ranking = []
+    for plugin, totals in plugins.items():
+        ranking.append({
+            'plugin': plugin,
+            'include_ms': totals['include'] / requests * 1000,
+            'callbacks_ms': totals['callbacks'] / requests * 1000,
+            'total_ms': (totals['include'] + totals['callbacks']) / requests * 1000,
+            'memory_kb': (totals['include_memory'] + totals['callback_memory']) / requests / 1024,
+            'files': len(totals['files']),
+            'bytes': totals['bytes']
+        })
+    ranking.sort(key=lambda entry: -entry['total_ms'])
+
+    return {
+        'requests': requests,
+        'total_ms': mean(trace['total_time'] for trace in traces) * 1000,
+        'peak_memory_mb': mean(trace['peak_memory'] for trace in traces) / 1024 / 1024,
+        'included_files': mean(trace.get('included_files', 0) for trace in traces),
+        'plugins': ranking,
+        'stacks': {stack: dict(entry, time_ms=entry['time'] / requests * 1000, self_ms=entry['self'] / requests * 1000,
+                               calls_per_request=entry['calls'] / requests)
+                   for stack, entry in stacks.items()},
+        'files': files
+    }
+
+
+def build_tree(stacks: Dict[str, Dict]) -> Dict:
+    """Nested {name: {'time_ms', 'self_ms', 'calls', 'children'}} from the flat stacks"""
+    root = {'time_ms': 0.0, 'self_ms': 0.0, 'calls': 0, 'children': {}}
+    for stack, entry in stacks.items():
+        node = root
+        # Every stack starts at 'request'; hook levels group the callbacks that ran for them
+        for part in stack.split(';')[1:]:
+            node = node['children'].setdefault(part, {'time_ms': 0.0, 'self_ms': 0.0, 'calls': 0, 'children': {}})
+        node['self_ms'] += entry['self_ms']
+        node['calls'] += entry['calls_per_request']
+
+    def total(node):
+        node['time_ms'] = node['self_ms'] + sum(total(child) for child in node['children'].values())
+        return node['time_ms']
+
+    total(root)
+    return root
+
+
+def print_tree(node: Dict, scale: float, min_ms: float, depth: int = 0, name: str = 'request'):
+    bar = '█' * max(1, round(node['time_ms'] / scale * 40)) if scale else ''
+    calls = f" ×{node['calls']:.0f}" if node['calls'] >= 2 else ''
+    print(f"{'  ' * depth}{name:<{max(10, 60 - 2 * depth)}} {node['time_ms']:>8.2f}ms "
+          f"(self {node['self_ms']:>7.2f}ms){calls} {bar}")
+    for child_name, child in sorted(node['children'].items(), key=lambda item: -item[1]['time_ms']):
+        if child['time_ms'] >= min_ms:
+            print_tree(child, scale, min_ms, depth + 1, child_name)
+
+
+def write_folded(stacks: Dict[str, Dict], path: str):
+    """Folded stacks weighted by exclusive microseconds per request"""
+    lines = [f"{stack} {round(entry['self_ms'] * 1000)}" for stack, entry in sorted(stacks.items())
+             if round(entry['self_ms'] * 1000) > 0]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def print_report(report: Dict, min_ms: float, top_files: int):
+    print(f"\n📊 BOOTSTRAP COST: {report['requests']} requests, {report['total_ms']:.1f}ms mean, "
+          f"{report['peak_memory_mb']:.1f} MB peak, {report['included_files']:.0f} files included")
+    print("=" * 80)
+
+    print(f"\n{'plugin':<10} {'include':>10} {'callbacks':>10} {'total':>10} {'memory':>10} {'files':>6} {'KB':>8}")
+    for entry in report['plugins']:
+        print(f"{entry['plugin']:<10} {entry['include_ms']:>8.2f}ms {entry['callbacks_ms']:>8.2f}ms "
+              f"{entry['total_ms']:>8.2f}ms {entry['memory_kb']:>7.0f} KB {entry['files']:>6} {entry['bytes'] / 1024:>8.0f}")
+    missing = [plugin for plugin in PLUGIN_ORDER if plugin not in {entry['plugin'] for entry in report['plugins']}]
+    if missing:
+        print(f"ℹ️  Not loaded in these requests: {', '.join(missing)}")
+
+    print(f"\n🔥 Breakdown per request (stacks ≥ {min_ms:g}ms):")
+    tree = build_tree(report['stacks'])
+    print_tree(tree, tree['time_ms'], min_ms)
+
+    heaviest = sorted(report['files'].items(), key=lambda item: -item[1]['bytes'])[:top_files]
+    if heaviest:
+        print("\n📄 Largest included files:")
+        for file, info in heaviest:
+            print(f"   {info['bytes'] / 1024:>7.0f} KB  {file}  ← {info['stack'].split(';', 1)[-1]}")
+
+    if report['plugins']:
+        first = report['plugins'][0]
+        print(f"\n💡 Lazy-load {first['plugin']} first: {first['total_ms']:.1f}ms and "
+              f"{first['files']} files per request ({first['total_ms'] / report['total_ms'] * 100:.0f}% of the request)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate bootstrap-profiler.php traces into a cost breakdown')
+    parser.add_argument('paths', nargs='*', default=[DEFAULT_TRACE_DIR], help='Trace files or directories')
+    parser.add_argument('--context', choices=['admin', 'front', 'ajax', 'rest', 'cron', 'cli'],
+                        help='Only requests of this kind')
+    parser.add_argument('--url', help='Only requests whose URL contains this text')
+    parser.add_argument('--last', type=int, help='Only the newest N traces')
+    parser.add_argument('--min-ms', type=float, default=0.5, help='Hide stacks cheaper than this per request')
+    parser.add_argument('--top-files', type=int, default=15, help='Number of largest included files to list')
+    parser.add_argument('--folded', metavar='PATH', help='Write folded stacks for flamegraph.pl / speedscope')
+    parser.add_argument('--json', metavar='PATH', help="Write the aggregated report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    traces = load_traces(args.paths, args.context, args.url, args.last)
+    if not traces:
+        print("Error: No traces found (is LA_BOOTSTRAP_PROFILE enabled in wp-config.php?)")
+        sys.exit(1)
+
+    report = aggregate(traces)
+    if args.json != '-':
+        print_report(report, args.min_ms, args.top_files)
+    if args.folded:
+        write_folded(report['stacks'], args.folded)
+        print(f"\n🔥 Folded stacks written to {args.folded}")
+    if args.json:
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.json == '-':
+            print(output)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+
+if __name__ == "__main__":
+    main()
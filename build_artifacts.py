@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Plugin Artifact Builder for the Legal Automation suite
+Builds the deployment zips of all plugins concurrently and deterministically
+(sorted members, fixed timestamps and permissions), writes a content-hash
+manifest next to each zip and validates every zip straight from the archive.
+Plugins whose sources did not change since the last build are not rebuilt, but
+their zips are validated again (mostly from the lint cache), so a rebuild
+never lets a zip that failed validation through.
+
+Usage:
+    python3 build_artifacts.py [--manifest deployment-manifest.json] [--out zip] [--workers N] [--force]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import zipfile
+import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from lint_engine import DEFAULT_CACHE_FILE, LintCache, default_workers, php_version
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MANIFEST = os.path.join(BASE_DIR, 'deployment-manifest.json')
+DEFAULT_OUT_DIR = os.path.join(BASE_DIR, 'zip')
+ARTIFACT_PREFIX = 'klage01'
+
+# Default timestamp of every member: the earliest date a zip can store,
+# overridable with the usual SOURCE_DATE_EPOCH for reproducible builds
+DEFAULT_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+EXCLUDED_NAMES = {'.DS_Store', 'Thumbs.db', '__pycache__', '.git', '.gitignore'}
+
+
+def load_validator():
+    """validate-deployment.py is a script with a hyphenated name, so load it by path"""
+    spec = importlib.util.spec_from_file_location('validate_deployment',
+                                                  os.path.join(BASE_DIR, 'validate-deployment.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def artifact_name(plugin_path: str, version: str) -> str:
+    """klage01-<plugin><version without dots>.zip, e.g. klage01-finance201.zip"""
+    return f"{ARTIFACT_PREFIX}-{os.path.basename(os.path.normpath(plugin_path))}{version.replace('.', '')}.zip"
+
+
+def build_date_time() -> Tuple[int, ...]:
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return max(DEFAULT_DATE_TIME, time.gmtime(int(epoch))[:6])
+    return DEFAULT_DATE_TIME
+
+
+def collect_sources(plugin_path: str) -> Tuple[List[str], List[str]]:
+    """Directories and files of a plugin, relative and sorted"""
+    directories, files = [], []
+    for root, dirs, names in os.walk(plugin_path):
+        dirs[:] = sorted(name for name in dirs if name not in EXCLUDED_NAMES)
+        relative_root = os.path.relpath(root, plugin_path)
+        if relative_root != '.':
+            directories.append(relative_root.replace(os.sep, '/') + '/')
+        for name in sorted(names):
+            if name not in EXCLUDED_NAMES:
+                files.append(name if relative_root == '.'
+                             else os.path.join(relative_root, name).replace(os.sep, '/'))
+    return sorted(directories), sorted(files)
+
+
+def hash_sources(plugin_path: str, files: List[str]) -> Tuple[str, Dict[str, str]]:
+    """SHA-256 per file plus one source hash over all paths and contents"""
+    file_hashes = {}
+    source_hash = hashlib.sha256()
+    for relative_path in files:
+        with open(os.path.join(plugin_path, relative_path), 'rb') as f:
+            file_hashes[relative_path] = hashlib.sha256(f.read()).hexdigest()
+        source_hash.update(f"{relative_path}\0{file_hashes[relative_path]}\n".encode('utf-8'))
+    return source_hash.hexdigest(), file_hashes
+
+
+def file_sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def manifest_path(zip_path: str) -> str:
+    return zip_path + '.manifest.json'
+
+
+def is_up_to_date(zip_path: str, source_hash: str) -> bool:
+    """The zip exists, is untouched and was built from exactly these sources"""
+    try:
+        with open(manifest_path(zip_path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest['source_hash'] == source_hash and manifest['zip_sha256'] == file_sha256(zip_path)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def write_zip(zip_path: str, plugin_path: str, directories: List[str], files: List[str]):
+    """Write the archive with stable member order, timestamps and permissions"""
+    date_time = build_date_time()
+    tmp_path = zip_path + '.tmp'
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        for name in sorted(directories + files):
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.create_system = 3
+            if name.endswith('/'):
+                info.external_attr = (0o40755 << 16) | 0x10
+                archive.writestr(info, b'')
+            else:
+                info.external_attr = 0o100644 << 16
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(os.path.join(plugin_path, name), 'rb') as f:
+                    archive.writestr(info, f.read(), compresslevel=9)
+    os.replace(tmp_path, zip_path)
+
+
+def build_plugin(plugin_path: str, version: str, out_dir: str, force: bool = False) -> Dict:
+    """Build one plugin zip unless an identical one exists; runs in a worker process"""
+    start = time.perf_counter()
+    zip_path = os.path.join(out_dir, artifact_name(plugin_path, version))
+    directories, files = collect_sources(plugin_path)
+    source_hash, file_hashes = hash_sources(plugin_path, files)
+
+    if not force and is_up_to_date(zip_path, source_hash):
+        return {'plugin': plugin_path, 'zip': zip_path, 'built': False,
+                'duration': time.perf_counter() - start}
+
+    write_zip(zip_path, plugin_path, directories, files)
+    manifest = {
+        'plugin': os.path.basename(os.path.normpath(plugin_path)),
+        'version': version,
+        'source_hash': source_hash,
+        'zip_sha256': file_sha256(zip_path),
+        'files': file_hashes
+    }
+    with open(manifest_path(zip_path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+    return {'plugin': plugin_path, 'zip': zip_path, 'built': True,
+            'duration': time.perf_counter() - start}
+
+
+def build_all(manifest: Dict[str, str], out_dir: str, workers: Optional[int] = None,
+              force: bool = False) -> List[Dict]:
+    """Build every plugin of the manifest in parallel worker processes"""
+    os.makedirs(out_dir, exist_ok=True)
+    plugins = list(manifest)
+    with ProcessPoolExecutor(max_workers=max(1, min(workers or default_workers(), len(plugins)))) as pool:
+        return list(pool.map(build_plugin, plugins, [manifest[p] for p in plugins],
+                             [out_dir] * len(plugins), [force] * len(plugins)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and validate the plugin zips')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help='JSON manifest {"plugin dir": "version"} (default: deployment-manifest.json)')
+    parser.add_argument('--out', default=DEFAULT_OUT_DIR, help='Output directory for the zips')
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='Number of parallel build processes and lint processes')
+    parser.add_argument('--force', action='store_true', help='Rebuild zips even if their sources are unchanged')
+    parser.add_argument('--no-validate', action='store_true', help='Only build, do not validate the zips')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use the lint cache while validating')
+    args = parser.parse_args()
+
+    validator = load_validator()
+    manifest = validator.load_manifest(args.manifest)
+
+    print(f"📦 Building {len(manifest)} plugin zips into {args.out}")
+    print("=" * 60)
+    start = time.perf_counter()
+    builds = build_all(manifest, args.out, workers=args.workers, force=args.force)
+    for build in builds:
+        status = 'built' if build['built'] else 'unchanged, skipped'
+        print(f"   {os.path.basename(build['zip']):<32} {status} ({build['duration']:.2f}s)")
+    print(f"   - Build time: {time.perf_counter() - start:.2f}s")
+
+    if args.no_validate:
+        sys.exit(0)
+
+    cache = None if args.no_cache else LintCache(DEFAULT_CACHE_FILE, php_version=php_version())
+    print("\n🔍 Validating the zips from the archive")
+    print("-" * 60)
+    lowest = 100
+    for build in builds:
+        results = validator.validate_plugin(build['zip'], manifest[build['plugin']],
+                                            workers=args.workers, cache=cache)
+        lowest = min(lowest, results['confidence_score'])
+        failed = [check for check in ('php_syntax', 'wordpress_compliance', 'naming_convention')
+                  if not results[check]['passed']]
+        if not results['version_info']['match']:
+            failed.append('version')
+        print(f"   {os.path.basename(build['zip']):<32} {results['confidence_score']:>3}%"
+              f"{'' if build['built'] else '  (unchanged)'}"
+              f"{'  ❌ ' + ', '.join(failed) if failed else ''}")
+        for error in results['php_syntax']['errors']:
+            print(f"      - {error}")
+
+    print("-" * 60)
+    if lowest >= 95:
+        print("✅ ARTIFACTS APPROVED - Confidence score ≥ 95%")
+        sys.exit(0)
+    else:
+        print("❌ ARTIFACTS NOT RECOMMENDED - Confidence score < 95%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
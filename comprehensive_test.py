@@ -8,11 +8,63 @@ import os
 import re
 import json
 import sys
+import time
+import argparse
 from pathlib import Path
 
+from pattern_scanner import DEFAULT_SCAN_CACHE, PatternScanner
+from php_symbols import DEFAULT_SYMBOL_INDEX, SymbolIndex
+from run_history import DEFAULT_HISTORY_DB, build_run, record_run, report_to_stderr, run_mode, write_json
+from git_changes import GitError, changed_files
+
+FINANCE_DB_MANAGER = 'finance/includes/class-finance-db-manager.php'
+UNIFIED_MENU = 'core/includes/class-unified-menu.php'
+CORE_PLUGIN = 'core/court-automation-hub.php'
+ADMIN_DASHBOARDS = ['core/admin/class-admin-dashboard.php', 'admin/includes/class-admin-dashboard-v210.php']
+FINANCE_PLUGIN = 'finance/legal-automation-finance.php'
+
 class LegalAutomationFixValidator:
-    def __init__(self):
-        self.base_path = Path('/app')
+    # Look for foreign key constraints that might cause MySQL syntax errors
+    foreign_key_patterns = [
+        r'FOREIGN\s+KEY',
+        r'REFERENCES\s+\w+',
+        r'ON\s+DELETE\s+CASCADE',
+        r'ON\s+UPDATE\s+CASCADE'
+    ]
+
+    # Check for consistent page slug usage
+    page_slug_patterns = {
+        'cases': r"'la-cases'",
+        'dashboard': r"'legal-automation'",
+        'settings': r"'legal-automation-settings'"
+    }
+
+    # Look for CRUD method patterns
+    crud_patterns = {
+        'create': r'(create_case|add_case|new_case)',
+        'read': r'(get_case|view_case|admin_page_cases)',
+        'update': r'(update_case|edit_case|save_case)',
+        'delete': r'(delete_case|remove_case)'
+    }
+
+    # Check for proper integration patterns: code symbols come from the symbol
+    # index so mentions in comments or strings do not count
+    integration_symbols = {
+        'core_dependency': ('class_refs', 'CourtAutomationHub'),
+        'database_manager': ('class_refs', 'LAF_Database_Manager'),
+        'table_creation': ('calls', 'create_tables')
+    }
+    integration_checks = {
+        'version_check': r'Version:\s*2\.0\.1'
+    }
+
+    def __init__(self, scan_cache=DEFAULT_SCAN_CACHE, symbol_index=DEFAULT_SYMBOL_INDEX,
+                 base_path='/app', scanner=None, symbols=None):
+        self.base_path = Path(base_path)
+        self.scanner = scanner or PatternScanner(self.base_path, cache_file=scan_cache)
+        self.symbols = symbols or SymbolIndex(self.base_path, index_file=symbol_index)
+        self.register_patterns()
+        self.duration = 0.0
         self.results = {
             'database_issues': [],
             'page_reference_issues': [],
@@ -25,6 +77,23 @@ class LegalAutomationFixValidator:
             }
         }
 
+    def register_patterns(self):
+        """Register the patterns of every test so the tree is scanned only once"""
+        for pattern in self.foreign_key_patterns:
+            self.scanner.register(f'foreign_key:{pattern}', pattern,
+                                  paths=[FINANCE_DB_MANAGER], flags=re.IGNORECASE)
+
+        # Look for old page slug references in all PHP files
+        self.scanner.register('old_page_slug', r'klage-click-cases', glob='*.php')
+
+        for page_type, pattern in self.page_slug_patterns.items():
+            self.scanner.register(f'page_slug:{page_type}', pattern, paths=[UNIFIED_MENU])
+
+        self.scanner.register('core_version', r"Version:\s*(\d+)", paths=[CORE_PLUGIN])
+
+        for check_name, pattern in self.integration_checks.items():
+            self.scanner.register(f'integration:{check_name}', pattern, paths=[FINANCE_PLUGIN])
+
     def log_issue(self, category, severity, issue_type, message, file_path=None, line_number=None, details=None):
         """Log an issue found during testing"""
         issue = {
@@ -57,26 +126,13 @@ class LegalAutomationFixValidator:
         print("\n🔍 Testing Database Foreign Key Constraint Fixes...")
         
         # Check finance plugin database manager
-        finance_db_file = self.base_path / 'finance' / 'includes' / 'class-finance-db-manager.php'
+        finance_db_file = self.base_path / FINANCE_DB_MANAGER
         
         if finance_db_file.exists():
-            with open(finance_db_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Look for foreign key constraints that might cause MySQL syntax errors
-            foreign_key_patterns = [
-                r'FOREIGN\s+KEY',
-                r'REFERENCES\s+\w+',
-                r'ON\s+DELETE\s+CASCADE',
-                r'ON\s+UPDATE\s+CASCADE'
-            ]
-            
             foreign_keys_found = []
-            for pattern in foreign_key_patterns:
-                matches = re.finditer(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    line_num = content[:match.start()].count('\n') + 1
-                    foreign_keys_found.append((pattern, line_num))
+            for pattern in self.foreign_key_patterns:
+                for match in self.scanner.matches(f'foreign_key:{pattern}'):
+                    foreign_keys_found.append((pattern, match['line']))
             
             if foreign_keys_found:
                 self.log_issue(
@@ -102,35 +158,21 @@ class LegalAutomationFixValidator:
         """Test 2: Page Reference Updates (klage-click-cases -> la-cases)"""
         print("\n🔍 Testing Page Reference Updates...")
         
-        # Find all PHP files that might contain page references
-        php_files = list(self.base_path.rglob('*.php'))
+        # Matches of the old page slug in all PHP files, from the shared scan
         old_page_references = []
         
-        for php_file in php_files:
-            try:
-                with open(php_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # Look for old page slug references
-                old_slug_pattern = r'klage-click-cases'
-                matches = re.finditer(old_slug_pattern, content)
-                
-                for match in matches:
-                    line_num = content[:match.start()].count('\n') + 1
-                    line_content = content.split('\n')[line_num - 1].strip()
-                    
-                    # Skip if it's in a comment about the fix
-                    if 'should use' in line_content.lower() or 'instead of' in line_content.lower():
-                        continue
-                        
-                    old_page_references.append({
-                        'file': php_file,
-                        'line': line_num,
-                        'content': line_content
-                    })
-                    
-            except Exception as e:
+        for match in self.scanner.matches('old_page_slug'):
+            line_content = match['content']
+            
+            # Skip if it's in a comment about the fix
+            if 'should use' in line_content.lower() or 'instead of' in line_content.lower():
                 continue
+                
+            old_page_references.append({
+                'file': match['file'],
+                'line': match['line'],
+                'content': line_content
+            })
         
         if old_page_references:
             self.log_issue(
@@ -154,22 +196,12 @@ class LegalAutomationFixValidator:
         print("\n🔍 Testing Unified Menu System Consistency...")
         
         # Check unified menu file
-        unified_menu_file = self.base_path / 'core' / 'includes' / 'class-unified-menu.php'
+        unified_menu_file = self.base_path / UNIFIED_MENU
         
         if unified_menu_file.exists():
-            with open(unified_menu_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check for consistent page slug usage
-            page_slug_patterns = {
-                'cases': r"'la-cases'",
-                'dashboard': r"'legal-automation'",
-                'settings': r"'legal-automation-settings'"
-            }
-            
             inconsistencies = []
-            for page_type, pattern in page_slug_patterns.items():
-                if not re.search(pattern, content):
+            for page_type in self.page_slug_patterns:
+                if not self.scanner.found(f'page_slug:{page_type}'):
                     inconsistencies.append(page_type)
             
             if inconsistencies:
@@ -196,18 +228,14 @@ class LegalAutomationFixValidator:
         print("\n🔍 Testing Core Plugin Version Update...")
         
         # Check core plugin file
-        core_plugin_file = self.base_path / 'core' / 'court-automation-hub.php'
+        core_plugin_file = self.base_path / CORE_PLUGIN
         
         if core_plugin_file.exists():
-            with open(core_plugin_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
             # Check version number
-            version_pattern = r"Version:\s*(\d+)"
-            version_match = re.search(version_pattern, content)
+            version_matches = self.scanner.matches('core_version')
             
-            if version_match:
-                version = int(version_match.group(1))
+            if version_matches:
+                version = int(version_matches[0]['groups'][0])
                 if version >= 236:
                     print(f"✅ Core plugin version updated to {version}")
                     self.results['summary']['fixed_issues'] += 1
@@ -239,36 +267,16 @@ class LegalAutomationFixValidator:
         """Test 5: Case Management CRUD Structure"""
         print("\n🔍 Testing Case Management CRUD Structure...")
         
-        # Check admin dashboard file
-        admin_files = [
-            self.base_path / 'core' / 'admin' / 'class-admin-dashboard.php',
-            self.base_path / 'admin' / 'includes' / 'class-admin-dashboard-v210.php'
-        ]
-        
+        # Methods defined or called in the admin dashboard files, from the symbol index
+        method_names = [name
+                        for relative_path in ADMIN_DASHBOARDS
+                        for kind in ('functions', 'calls')
+                        for name in self.symbols.names(kind, relative_path)]
         crud_methods_found = {
-            'create': False,
-            'read': False,
-            'update': False,
-            'delete': False
+            operation: any(re.search(pattern, name, re.IGNORECASE) for name in method_names)
+            for operation, pattern in self.crud_patterns.items()
         }
         
-        for admin_file in admin_files:
-            if admin_file.exists():
-                with open(admin_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Look for CRUD method patterns
-                crud_patterns = {
-                    'create': r'(create_case|add_case|new_case)',
-                    'read': r'(get_case|view_case|admin_page_cases)',
-                    'update': r'(update_case|edit_case|save_case)',
-                    'delete': r'(delete_case|remove_case)'
-                }
-                
-                for operation, pattern in crud_patterns.items():
-                    if re.search(pattern, content, re.IGNORECASE):
-                        crud_methods_found[operation] = True
-        
         missing_operations = [op for op, found in crud_methods_found.items() if not found]
         
         if missing_operations:
@@ -288,23 +296,15 @@ class LegalAutomationFixValidator:
         print("\n🔍 Testing Finance Plugin Integration...")
         
         # Check finance plugin main file
-        finance_plugin_file = self.base_path / 'finance' / 'legal-automation-finance.php'
+        finance_plugin_file = self.base_path / FINANCE_PLUGIN
         
         if finance_plugin_file.exists():
-            with open(finance_plugin_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check for proper integration patterns
-            integration_checks = {
-                'core_dependency': r'CourtAutomationHub',
-                'database_manager': r'LAF_Database_Manager',
-                'table_creation': r'create_tables',
-                'version_check': r'Version:\s*2\.0\.1'
-            }
-            
             missing_integrations = []
-            for check_name, pattern in integration_checks.items():
-                if not re.search(pattern, content):
+            for check_name, (kind, name) in self.integration_symbols.items():
+                if not self.symbols.find(kind, name, FINANCE_PLUGIN):
+                    missing_integrations.append(check_name)
+            for check_name in self.integration_checks:
+                if not self.scanner.found(f'integration:{check_name}'):
                     missing_integrations.append(check_name)
             
             if missing_integrations:
@@ -326,18 +326,37 @@ class LegalAutomationFixValidator:
                 'Finance plugin main file not found'
             )
 
+    def get_tests(self):
+        """Fix validation tests, in report order"""
+        return [
+            self.test_database_foreign_key_fixes,
+            self.test_page_reference_updates,
+            self.test_unified_menu_consistency,
+            self.test_core_plugin_version_update,
+            self.test_case_management_crud_structure,
+            self.test_finance_plugin_integration
+        ]
+
     def run_comprehensive_tests(self):
         """Run all comprehensive tests"""
         print("🚀 Starting Comprehensive Legal Automation Fix Validation...")
         print("=" * 70)
+        start = time.perf_counter()
+        
+        # Scan the tree once for the patterns of all tests
+        self.scanner.scan()
+        print(f"📂 Scanned {self.scanner.stats['files_scanned']} files "
+              f"({self.scanner.stats['bytes_read']} bytes) in one pass, "
+              f"{self.scanner.stats['files_reused']} unchanged files from cache")
+        self.symbols.update()
+        print(f"📚 Symbol index: {self.symbols.stats['files_indexed']} files tokenized, "
+              f"{self.symbols.stats['files_reused']} unchanged files reused")
         
         # Run all tests
-        self.test_database_foreign_key_fixes()
-        self.test_page_reference_updates()
-        self.test_unified_menu_consistency()
-        self.test_core_plugin_version_update()
-        self.test_case_management_crud_structure()
-        self.test_finance_plugin_integration()
+        for test in self.get_tests():
+            test()
+        
+        self.duration = time.perf_counter() - start
         
         # Print comprehensive summary
         self.print_comprehensive_summary()
@@ -380,9 +399,46 @@ class LegalAutomationFixValidator:
 
 def main():
     """Main test execution"""
-    validator = LegalAutomationFixValidator()
+    parser = argparse.ArgumentParser(description='Comprehensive fix validation')
+    parser.add_argument('--json', metavar='PATH',
+                        help="Write the results of this run as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB,
+                        help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true',
+                        help='Do not append this run to the run history')
+    parser.add_argument('--changed-since', metavar='REV',
+                        help='Only rescan files changed since this git revision; reuse cached matches for the rest')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Neither read nor write the scan cache and symbol index')
+    args = parser.parse_args()
+    report_to_stderr(args.json)
+    
+    validator = LegalAutomationFixValidator(scan_cache=None if args.no_cache else DEFAULT_SCAN_CACHE,
+                                            symbol_index=None if args.no_cache else DEFAULT_SYMBOL_INDEX)
+    if args.changed_since:
+        try:
+            validator.scanner.set_changed(changed_files(args.changed_since, str(validator.base_path)))
+        except GitError as e:
+            print(f"Error: Could not determine changes since {args.changed_since}: {e}")
+            sys.exit(1)
+        affected = validator.scanner.affected_rules()
+        print(f"🔀 Changed since {args.changed_since}: {len(affected)} of {len(validator.scanner.rules)} rules affected")
     results = validator.run_comprehensive_tests()
     
+    # Export the run and append it to the trend store
+    run = build_run(
+        'comprehensive_test', str(validator.base_path), results, validator.duration,
+        files_scanned=validator.scanner.stats['files_scanned'],
+        bytes_read=validator.scanner.stats['bytes_read'],
+        passed=results['summary']['critical_issues'] == 0,
+        mode=run_mode(changed_since=bool(args.changed_since),
+                      cached=validator.scanner.stats['files_reused'] > 0)
+    )
+    if args.json:
+        write_json(run, args.json)
+    if not args.no_history:
+        record_run(run, args.history_db)
+    
     # Return appropriate exit code based on critical issues
     if results['summary']['critical_issues'] > 0:
         print(f"\n❌ VALIDATION FAILED: {results['summary']['critical_issues']} critical issues found")
@@ -464,21 +464,40 @@ class CAH_Universal_Import_Admin {
                 var originalText = $(buttonId).text();
                 $(buttonId).prop('disabled', true).text(action === 'preview' ? '🔄 Previewing...' : '⚡ Processing...');
                 
-                $.ajax({
+                var requestData = {
+                    action: action === 'preview' ? 'cah_preview_import' : 'cah_process_import',
+                    nonce: cah_ajax.nonce,
+                    csv_content: csvContent,
+                    field_mappings: JSON.stringify(fieldMappings),
+                    client_type: clientType
+                };
+                var fileInput = $('#csv_file')[0];
+                var ajaxOptions = {data: requestData};
+                
+                if (action === 'process' && window.csvFileSampled && fileInput.files && fileInput.files[0]) {
+                    var formData = new FormData();
+                    $.each(requestData, function(key, value) {
+                        if (key !== 'csv_content') {
+                            formData.append(key, value);
+                        }
+                    });
+                    formData.append('csv_file', fileInput.files[0]);
+                    // Large files are imported by a background job; its progress is polled below
+                    formData.append('background', '1');
+                    ajaxOptions = {data: formData, processData: false, contentType: false};
+                }
+                
+                $.ajax($.extend({
                     url: cah_ajax.ajax_url,
                     type: 'POST',
-                    data: {
-                        action: action === 'preview' ? 'cah_preview_import' : 'cah_process_import',
-                        nonce: cah_ajax.nonce,
-                        csv_content: csvContent,
-                        field_mappings: JSON.stringify(fieldMappings),
-                        client_type: clientType
-                    },
                     success: function(response) {
                         if (response.success) {
                             if (action === 'preview') {
                                 displayImportPreview(response.data);
                                 $('#import-preview').show();
+                            } else if (response.data.job_id) {
+                                $('#import-results').show();
+                                pollImportJob(response.data.job_id);
                             } else {
                                 displayImportResults(response.data);
                                 $('#import-results').show();
@@ -493,7 +512,7 @@ class CAH_Universal_Import_Admin {
                     complete: function() {
                         $(buttonId).prop('disabled', false).text(originalText);
                     }
-                });
+                }, ajaxOptions));
             }
             
             function displayFieldDetectionResults(data) {
@@ -507,7 +526,7 @@ class CAH_Universal_Import_Admin {
                 var html = '<div class=\"detection-summary\">';
                 html += '<h4>📊 Detection Summary</h4>';
                 html += '<p><strong>Client Type:</strong> ' + (data.client_config ? data.client_config.name : 'Generic') + '</p>';
-                html += '<p><strong>Total Rows:</strong> ' + data.total_rows + '</p>';
+                html += '<p><strong>Total Rows:</strong> ' + data.total_rows + (data.sampled ? '+ (first part of the file)' : '') + '</p>';
                 html += '<p><strong>Detected Fields:</strong> ' + data.detected_fields.length + '</p>';
                 html += '</div>';
                 
@@ -558,6 +577,8 @@ class CAH_Universal_Import_Admin {
                 
                 // Store CSV data for later use
                 $('#csv_data').val(data.csv_content || $('#csv_content').val());
+                // Large uploads were only sampled; the full import uploads the file again and streams it
+                window.csvFileSampled = !!data.sampled;
                 $('#selected_client_type').val($('#client_type').val());
             }
             
@@ -623,6 +644,46 @@ class CAH_Universal_Import_Admin {
                 $('#preview-results').html(html);
             }
             
+            function pollImportJob(jobId) {
+                $.post(cah_ajax.ajax_url, {action: 'cah_import_job_status', nonce: cah_ajax.nonce, job_id: jobId}, function(response) {
+                    if (!response.success) {
+                        $('#final-results').html('<p>❌ ' + response.data.message + '</p>');
+                        return;
+                    }
+                    var job = response.data;
+                    if (job.status === 'completed' || job.status === 'cancelled') {
+                        displayImportResults(job);
+                        return;
+                    }
+                    
+                    var html = '<h4>⏳ Import job #' + job.job_id + ' (' + job.status + ')</h4>';
+                    html += '<progress max="100" value="' + job.percent + '" style="width: 100%;"></progress>';
+                    html += '<p>' + job.percent + '% · ' + job.rows_done + (job.rows_estimate ? ' of ~' + job.rows_estimate : '') + ' rows';
+                    if (job.rows_per_sec) {
+                        html += ' · ' + job.rows_per_sec + ' rows/s';
+                    }
+                    if (job.eta_seconds !== null) {
+                        html += ' · about ' + Math.ceil(job.eta_seconds / 60) + ' min left';
+                    }
+                    html += '</p>';
+                    
+                    if (job.status === 'failed') {
+                        html += '<p>❌ ' + (job.last_error || 'Import failed') + '</p>';
+                        html += '<button type="button" class="button" id="retry-import-job">🔁 Retry from row ' + job.rows_done + '</button>';
+                        $('#final-results').html(html);
+                        $('#retry-import-job').click(function() {
+                            $.post(cah_ajax.ajax_url, {action: 'cah_import_job_retry', nonce: cah_ajax.nonce, job_id: jobId}, function() {
+                                pollImportJob(jobId);
+                            });
+                        });
+                        return;
+                    }
+                    
+                    $('#final-results').html(html + '<p>The import continues in the background; you can leave this page.</p>');
+                    setTimeout(function() { pollImportJob(jobId); }, 2000);
+                });
+            }
+            
             function displayImportResults(data) {
                 var html = '<h4>⚡ Import Complete!</h4>';
                 
@@ -651,18 +712,11 @@ class CAH_Universal_Import_Admin {
                 if (data.successful_imports > 0) {
                     html += '<h4>📋 Created Records</h4>';
                     html += '<ul>';
-                    if (data.created_records.cases.length > 0) {
-                        html += '<li><strong>Cases:</strong> ' + data.created_records.cases.length + ' created</li>';
-                    }
-                    if (data.created_records.debtors.length > 0) {
-                        html += '<li><strong>Debtors:</strong> ' + data.created_records.debtors.length + ' created</li>';
-                    }
-                    if (data.created_records.clients.length > 0) {
-                        html += '<li><strong>Clients:</strong> ' + data.created_records.clients.length + ' created</li>';
-                    }
-                    if (data.created_records.emails.length > 0) {
-                        html += '<li><strong>Emails:</strong> ' + data.created_records.emails.length + ' created</li>';
-                    }
+                    $.each({cases: 'Cases', debtors: 'Debtors', clients: 'Clients', emails: 'Emails'}, function(key, label) {
+                        if (data.created_records[key] > 0) {
+                            html += '<li><strong>' + label + ':</strong> ' + data.created_records[key] + ' created</li>';
+                        }
+                    });
                     html += '</ul>';
                 }
                 
@@ -674,6 +728,9 @@ class CAH_Universal_Import_Admin {
                     data.errors.forEach(function(error) {
                         html += '<li>' + error + '</li>';
                     });
+                    if (data.omitted_errors > 0) {
+                        html += '<li>... and ' + data.omitted_errors + ' more</li>';
+                    }
                     html += '</ul></div>';
                 }
                 
@@ -39,6 +39,7 @@ class CourtAutomationHub {
     // Universal Import Manager
     public $universal_import_manager;
     public $universal_import_admin;
+    public $import_jobs;
     
     // Core API for admin plugin integration
     public $core_api;
@@ -80,6 +81,10 @@ class CourtAutomationHub {
         // Document Analysis Integration
         require_once CAH_PLUGIN_PATH . 'includes/class-doc-in-integration.php';
         
+        // Streaming CSV reader, batch importer and background import jobs used by the import managers
+        require_once CAH_PLUGIN_PATH . 'includes/class-csv-stream-import.php';
+        require_once CAH_PLUGIN_PATH . 'includes/class-import-jobs.php';
+        
         // Universal Import Manager - MUST load before admin classes
         require_once CAH_PLUGIN_PATH . 'includes/class-universal-import-manager.php';
         
@@ -129,6 +134,9 @@ class CourtAutomationHub {
         // Universal Import Manager
         $this->universal_import_manager = new CAH_Universal_Import_Manager();
         
+        // Background import jobs (WP-Cron or import-worker.php)
+        $this->import_jobs = new CAH_Import_Jobs();
+        
         // Initialize Unified Menu System (must be early)
         Legal_Automation_Unified_Menu::getInstance();
         
@@ -284,6 +292,10 @@ class CourtAutomationHub {
     public function deactivate() {
         // Flush rewrite rules
         flush_rewrite_rules();
+        
+        // Queued import jobs stay in their table and continue after reactivation
+        wp_clear_scheduled_hook('cah_import_jobs_run');
+        wp_clear_scheduled_hook('cah_import_jobs_watchdog');
     }
     
     private function add_capabilities() {
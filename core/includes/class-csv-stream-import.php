@@ -0,0 +1,449 @@
+<?php
+/**
+ * Streaming CSV Import
+ * Reads CSV files record by record and writes the mapped rows with multi-row
+ * INSERTs, one transaction per batch, so large exports import in flat memory
+ */
+
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+/**
+ * CSV reader on a file handle: quoted fields may span lines, the delimiter is detected once
+ */
+class CAH_CSV_Reader {
+
+    const DELIMITERS = array(',', ';', "\t", '|');
+
+    private $handle;
+    private $delimiter = ',';
+    private $header = array();
+    private $record = 0;
+
+    private function __construct($handle) {
+        $this->handle = $handle;
+        $this->read_header();
+    }
+
+    /**
+     * Reader for a CSV file, or null if it cannot be opened
+     */
+    public static function from_file($file_path) {
+        $handle = @fopen($file_path, 'rb');
+        return $handle ? new self($handle) : null;
+    }
+
+    /**
+     * Reader for CSV content already in memory (spills to a temp file above 2 MB)
+     */
+    public static function from_string($csv_content) {
+        $handle = fopen('php://temp', 'w+b');
+        fwrite($handle, $csv_content);
+        rewind($handle);
+        return new self($handle);
+    }
+
+    public function get_header() {
+        return $this->header;
+    }
+
+    public function get_delimiter() {
+        return $this->delimiter;
+    }
+
+    /**
+     * Number of the last record read; the header is record 0
+     */
+    public function get_record_number() {
+        return $this->record;
+    }
+
+    /**
+     * Byte offset after the last record read, a cursor for seek()
+     */
+    public function tell() {
+        return ftell($this->handle);
+    }
+
+    /**
+     * Continue after a cursor from tell() and the record number read up to it
+     */
+    public function seek($offset, $record) {
+        if ($offset > 0 && fseek($this->handle, $offset) === 0) {
+            $this->record = $record;
+        }
+    }
+
+    /**
+     * Next non-empty record, or null at the end of the file
+     */
+    public function next_row() {
+        while (($row = fgetcsv($this->handle, 0, $this->delimiter, '"', '')) !== false) {
+            if ($row === array(null)) {
+                continue; // blank line
+            }
+            $this->record++;
+            if (trim(implode('', $row)) === '') {
+                continue;
+            }
+            return $row;
+        }
+        return null;
+    }
+
+    public function close() {
+        if ($this->handle) {
+            fclose($this->handle);
+            $this->handle = null;
+        }
+    }
+
+    private function read_header() {
+        $first_line = fgets($this->handle);
+        if ($first_line === false) {
+            return;
+        }
+
+        // Skip a UTF-8 byte order mark, Excel writes one
+        $offset = strncmp($first_line, "\xEF\xBB\xBF", 3) === 0 ? 3 : 0;
+        $this->delimiter = $this->detect_delimiter(substr($first_line, $offset));
+        fseek($this->handle, $offset);
+
+        $header = fgetcsv($this->handle, 0, $this->delimiter, '"', '');
+        $this->header = $header && $header !== array(null) ? array_map('trim', $header) : array();
+    }
+
+    /**
+     * The candidate occurring most often outside quotes in the header line
+     */
+    private function detect_delimiter($line) {
+        $unquoted = preg_replace('/"[^"]*"/', '', $line);
+        $best = ',';
+        $best_count = 0;
+
+        foreach (self::DELIMITERS as $delimiter) {
+            $count = substr_count($unquoted, $delimiter);
+            if ($count > $best_count) {
+                $best = $delimiter;
+                $best_count = $count;
+            }
+        }
+
+        return $best;
+    }
+}
+
+/**
+ * Buffers mapped rows and inserts them batch by batch
+ *
+ * Config:
+ *   insert_order          tables in insert order
+ *   links                 table => array(column => parent table), filled with the parent row's id
+ *   join_tables           table => array('requires' => array(column => table), 'values' => array(...)),
+ *                         one row per imported row that created all required parents
+ *   import_source         value for import_source in import_source_tables
+ *   batch_size            rows per transaction
+ *   on_commit             callable($entry, $results) run inside each transaction before COMMIT, with
+ *                         the last row written and the results as they are once it commits;
+ *                         returning false rolls the transaction back
+ *
+ * A simple multi-row INSERT gets consecutive auto-increment ids (stepped by
+ * auto_increment_increment), so the ids of a batch follow from insert_id.
+ * If a batch fails it is rolled back and retried row by row, so only the
+ * failing rows are reported.
+ */
+class CAH_Batch_Importer {
+
+    const MAX_REPORTED_ERRORS = 100;
+
+    private $wpdb;
+    private $config;
+    private $buffer = array();
+    private $results;
+    private $increment = 1;
+    private $last_error = '';
+
+    public function __construct($wpdb, $config) {
+        $this->wpdb = $wpdb;
+        $this->config = array_merge(array(
+            'insert_order' => array(),
+            'links' => array(),
+            'join_tables' => array(),
+            'import_source' => 'csv',
+            'import_source_tables' => array('klage_cases'),
+            'batch_size' => 500,
+            'on_commit' => null
+        ), $config);
+    }
+
+    /**
+     * Import every record of the reader, or the next $max_rows of them
+     *
+     * $map_row($header, $row, $row_number) returns array('tables' => array(table => data), 'errors' => array()).
+     * created_records in the results counts the rows created per table.
+     */
+    public function run($reader, $map_row, $max_rows = 0) {
+        $this->start();
+        $this->results['delimiter'] = $reader->get_delimiter();
+
+        $header = $reader->get_header();
+        if (empty($header)) {
+            $this->results['errors'][] = 'Could not parse CSV header';
+            return $this->results;
+        }
+
+        while (($max_rows <= 0 || $this->results['processed_rows'] < $max_rows) && ($row = $reader->next_row()) !== null) {
+            $row_number = $reader->get_record_number();
+            $mapped = call_user_func($map_row, $header, $row, $row_number);
+            $this->add($row_number, $mapped['tables'], $mapped['errors'], array('offset' => $reader->tell()));
+        }
+        $this->flush();
+
+        $this->results['success'] = $this->results['successful_imports'] > 0;
+        return $this->results;
+    }
+
+    /**
+     * Insert rows that are already mapped, for sources that are not read from a CSV file
+     *
+     * $entries is a list of array('row' => label, 'tables' => array(table => data)); the
+     * label names the row in the errors. Returns the same results as run().
+     */
+    public function import_entries($entries) {
+        $this->start();
+
+        foreach ($entries as $entry) {
+            $this->add($entry['row'], $entry['tables'], array());
+        }
+        $this->flush();
+
+        $this->results['success'] = $this->results['successful_imports'] > 0;
+        return $this->results;
+    }
+
+    private function start() {
+        $this->results = array(
+            'success' => false,
+            'total_rows' => 0,
+            'processed_rows' => 0,
+            'successful_imports' => 0,
+            'failed_imports' => 0,
+            'errors' => array(),
+            'omitted_errors' => 0,
+            'created_records' => array()
+        );
+        foreach ($this->config['insert_order'] as $table) {
+            $this->results['created_records'][str_replace('klage_', '', $table)] = 0;
+        }
+
+        $this->increment = max(1, (int) $this->wpdb->get_var('SELECT @@auto_increment_increment'));
+    }
+
+    /**
+     * Buffer one mapped row, or count it as failed
+     */
+    private function add($row_number, $tables, $errors, $extra = array()) {
+        $this->results['total_rows']++;
+        $this->results['processed_rows']++;
+
+        if (empty($errors)) {
+            $errors = $this->invalid_columns($tables);
+        }
+        if (!empty($errors)) {
+            $this->fail($row_number, $errors);
+            return;
+        }
+
+        $this->buffer[] = array_merge(array('row' => $row_number, 'tables' => $tables), $extra);
+        if (count($this->buffer) >= $this->config['batch_size']) {
+            $this->flush();
+        }
+    }
+
+    /**
+     * Write the buffered rows in one transaction, or row by row if the batch fails
+     */
+    private function flush() {
+        if (empty($this->buffer)) {
+            return;
+        }
+
+        if ($this->write($this->buffer)) {
+            foreach ($this->buffer as $entry) {
+                $this->succeed($entry);
+            }
+        } else {
+            foreach ($this->buffer as $entry) {
+                if ($this->write(array($entry))) {
+                    $this->succeed($entry);
+                } else {
+                    $this->fail($entry['row'], array($this->last_error));
+                }
+            }
+        }
+
+        $this->buffer = array();
+    }
+
+    private function write($entries) {
+        $this->wpdb->query('START TRANSACTION');
+
+        if ($this->insert_entries($entries) && $this->before_commit($entries) && $this->wpdb->query('COMMIT') !== false) {
+            return true;
+        }
+
+        $this->wpdb->query('ROLLBACK');
+        return false;
+    }
+
+    private function before_commit($entries) {
+        if (!$this->config['on_commit']) {
+            return true;
+        }
+
+        $results = $this->results;
+        foreach ($entries as $entry) {
+            $this->count_success($results, $entry);
+        }
+
+        if (call_user_func($this->config['on_commit'], end($entries), $results) === false) {
+            $this->last_error = 'Could not save the import progress';
+            return false;
+        }
+        return true;
+    }
+
+    private function insert_entries($entries) {
+        $now = current_time('mysql');
+        $ids = array();
+
+        foreach ($this->config['insert_order'] as $table) {
+            $rows = array();
+            foreach ($entries as $index => $entry) {
+                if (!isset($entry['tables'][$table])) {
+                    continue;
+                }
+                $data = $entry['tables'][$table];
+                $data['created_at'] = $now;
+                if (in_array($table, $this->config['import_source_tables'], true)) {
+                    $data['import_source'] = $this->config['import_source'];
+                }
+                foreach ($this->config['links'][$table] ?? array() as $column => $parent) {
+                    if (isset($ids[$index][$parent])) {
+                        $data[$column] = $ids[$index][$parent];
+                    }
+                }
+                $rows[$index] = $data;
+            }
+
+            $inserted = $this->insert_rows($table, $rows);
+            if ($inserted === false) {
+                return false;
+            }
+            foreach ($inserted as $index => $id) {
+                $ids[$index][$table] = $id;
+            }
+        }
+
+        foreach ($this->config['join_tables'] as $table => $join) {
+            $rows = array();
+            foreach ($entries as $index => $entry) {
+                $data = array();
+                foreach ($join['requires'] as $column => $parent) {
+                    if (!isset($ids[$index][$parent])) {
+                        continue 2;
+                    }
+                    $data[$column] = $ids[$index][$parent];
+                }
+                $rows[$index] = array_merge($data, $join['values'] ?? array(), array('created_at' => $now));
+            }
+
+            if ($this->insert_rows($table, $rows) === false) {
+                return false;
+            }
+        }
+
+        return true;
+    }
+
+    /**
+     * One INSERT per column set; returns the new ids by row index, or false
+     */
+    private function insert_rows($table, $rows) {
+        $groups = array();
+        foreach ($rows as $index => $data) {
+            $groups[implode(',', array_keys($data))][$index] = $data;
+        }
+
+        $ids = array();
+        foreach ($groups as $group) {
+            $columns = array_keys(reset($group));
+            $values = array();
+            foreach ($group as $data) {
+                $values[] = '(' . implode(', ', array_map(array($this, 'quote'), $data)) . ')';
+            }
+
+            $sql = "INSERT INTO `{$this->wpdb->prefix}{$table}` (`" . implode('`, `', $columns) . '`) VALUES ' . implode(', ', $values);
+            if ($this->wpdb->query($sql) === false || (int) $this->wpdb->rows_affected !== count($group)) {
+                $this->last_error = "Failed to insert into {$table}: " . $this->wpdb->last_error;
+                return false;
+            }
+
+            $id = (int) $this->wpdb->insert_id;
+            foreach (array_keys($group) as $index) {
+                $ids[$index] = $id;
+                $id += $this->increment;
+            }
+        }
+
+        return $ids;
+    }
+
+    private function quote($value) {
+        if ($value === null) {
+            return 'NULL';
+        }
+        if (is_bool($value)) {
+            $value = (int) $value;
+        }
+        return "'" . esc_sql((string) $value) . "'";
+    }
+
+    /**
+     * Column names come from the field mappings and cannot be escaped, only checked
+     */
+    private function invalid_columns($tables) {
+        $errors = array();
+        foreach ($tables as $table => $data) {
+            foreach (array_keys($data) as $column) {
+                if (!preg_match('/^[A-Za-z0-9_]+$/', $column)) {
+                    $errors[] = "Invalid target field '{$column}' for {$table}";
+                }
+            }
+        }
+        return $errors;
+    }
+
+    private function succeed($entry) {
+        $this->count_success($this->results, $entry);
+    }
+
+    private function count_success(&$results, $entry) {
+        $results['successful_imports']++;
+        foreach ($this->config['insert_order'] as $table) {
+            if (isset($entry['tables'][$table])) {
+                $results['created_records'][str_replace('klage_', '', $table)]++;
+            }
+        }
+    }
+
+    private function fail($row_number, $errors) {
+        $this->results['failed_imports']++;
+        if (count($this->results['errors']) < self::MAX_REPORTED_ERRORS) {
+            $this->results['errors'][] = "Row {$row_number}: " . implode(', ', $errors);
+        } else {
+            $this->results['omitted_errors']++;
+        }
+    }
+}
@@ -0,0 +1,557 @@
+<?php
+/**
+ * Import Jobs
+ * Runs large CSV imports in the background: an upload becomes a job, and
+ * WP-Cron or import-worker.php works through it in chunks of rows. The file
+ * cursor and counters are saved in the transaction of each batch, so a job
+ * that stops halfway (timeout, crash, deploy) resumes after the last
+ * committed row and never imports a row twice.
+ *
+ * Importers register through the cah_import_job_handlers filter as
+ * callable($reader, $options), returning CAH_Batch_Importer results.
+ */
+
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+class CAH_Import_Jobs {
+
+    const RUN_HOOK = 'cah_import_jobs_run';
+    const WATCHDOG_HOOK = 'cah_import_jobs_watchdog';
+    const TABLE_VERSION = '1.0.0';
+    const TABLE_VERSION_OPTION = 'cah_import_jobs_table_version';
+
+    const DEFAULT_CHUNK_SIZE = 1000;
+    const MAX_ATTEMPTS = 3;
+    const MAX_REPORTED_ERRORS = 100;
+
+    // Seconds one WP-Cron run keeps processing chunks
+    const TIME_BUDGET = 20;
+
+    private $wpdb;
+    private $table;
+
+    public function __construct() {
+        global $wpdb;
+        $this->wpdb = $wpdb;
+        $this->table = $wpdb->prefix . 'cah_import_jobs';
+
+        add_action(self::RUN_HOOK, array($this, 'run_due_jobs'));
+        add_action(self::WATCHDOG_HOOK, array($this, 'run_due_jobs'));
+        add_filter('cron_schedules', array($this, 'add_cron_schedule'));
+        add_action('init', array($this, 'schedule_watchdog'));
+        add_action('rest_api_init', array($this, 'register_routes'));
+        add_action('wp_ajax_cah_import_job_status', array($this, 'ajax_job_status'));
+        add_action('wp_ajax_cah_import_job_retry', array($this, 'ajax_job_retry'));
+    }
+
+    /**
+     * Register REST API routes
+     */
+    public function register_routes() {
+        // GET /wp-json/klage-click/v1/import-jobs
+        register_rest_route('klage-click/v1', '/import-jobs', array(
+            'methods' => 'GET',
+            'callback' => array($this, 'rest_list_jobs'),
+            'permission_callback' => array($this, 'check_permissions')
+        ));
+
+        // GET /wp-json/klage-click/v1/import-jobs/<id>
+        register_rest_route('klage-click/v1', '/import-jobs/(?P<id>\d+)', array(
+            'methods' => 'GET',
+            'callback' => array($this, 'rest_get_job'),
+            'permission_callback' => array($this, 'check_permissions')
+        ));
+
+        // POST /wp-json/klage-click/v1/import-jobs/<id>/retry and /cancel
+        register_rest_route('klage-click/v1', '/import-jobs/(?P<id>\d+)/(?P<command>retry|cancel)', array(
+            'methods' => 'POST',
+            'callback' => array($this, 'rest_job_command'),
+            'permission_callback' => array($this, 'check_permissions')
+        ));
+    }
+
+    public function check_permissions() {
+        return current_user_can('manage_klage_click_cases') || current_user_can('manage_options');
+    }
+
+    public function add_cron_schedule($schedules) {
+        $schedules['cah_import_jobs_five_minutes'] = array(
+            'interval' => 5 * MINUTE_IN_SECONDS,
+            'display' => 'Every 5 minutes'
+        );
+        return $schedules;
+    }
+
+    /**
+     * Each run schedules the next one while work is left; the watchdog picks
+     * jobs up again when that chain broke (fatal error, cron not spawned)
+     */
+    public function schedule_watchdog() {
+        if (!wp_next_scheduled(self::WATCHDOG_HOOK)) {
+            wp_schedule_event(time(), 'cah_import_jobs_five_minutes', self::WATCHDOG_HOOK);
+        }
+    }
+
+    /**
+     * Queue an import of a CSV file
+     * Uploaded files are moved into a protected uploads directory, other files are copied
+     * Returns the job's progress, or array('error' => ...)
+     */
+    public function create_job($importer, $file_path, $options = array(), $chunk_size = self::DEFAULT_CHUNK_SIZE) {
+        $this->maybe_create_table();
+
+        if (!isset($this->get_handlers()[$importer])) {
+            return array('error' => "Unknown importer: {$importer}");
+        }
+        $reader = CAH_CSV_Reader::from_file($file_path);
+        if (!$reader) {
+            return array('error' => 'Could not open CSV file');
+        }
+        $header = $reader->get_header();
+        $reader->close();
+        if (empty($header)) {
+            return array('error' => 'Could not parse CSV header');
+        }
+
+        $stored_path = $this->store_file($file_path);
+        if (!$stored_path) {
+            return array('error' => 'Could not store the CSV file for the import job');
+        }
+
+        // Runtime options are set per chunk
+        unset($options['on_commit'], $options['max_rows'], $options['case_id_token']);
+
+        $now = current_time('mysql');
+        $inserted = $this->wpdb->insert($this->table, array(
+            'importer' => $importer,
+            'status' => 'queued',
+            'file_path' => $stored_path,
+            'file_size' => (int) filesize($stored_path),
+            'options' => wp_json_encode($options),
+            'chunk_size' => max(1, (int) $chunk_size),
+            'created_records' => wp_json_encode(array()),
+            'errors' => wp_json_encode(array()),
+            'user_id' => get_current_user_id(),
+            'created_at' => $now,
+            'updated_at' => $now
+        ));
+
+        if ($inserted === false) {
+            @unlink($stored_path);
+            return array('error' => 'Could not create the import job: ' . $this->wpdb->last_error);
+        }
+
+        $this->schedule_run();
+
+        return $this->get_progress($this->wpdb->insert_id);
+    }
+
+    /**
+     * Process chunks of due jobs until the time budget is used up
+     * Returns the number of chunks processed
+     */
+    public function run_due_jobs($time_budget = self::TIME_BUDGET) {
+        // WP-Cron calls the hooks with an empty argument
+        $time_budget = $time_budget ? (float) $time_budget : self::TIME_BUDGET;
+
+        $this->maybe_create_table();
+
+        $deadline = microtime(true) + $time_budget;
+        $busy = array();
+        $chunks = 0;
+
+        while (microtime(true) < $deadline) {
+            $job_id = $this->next_job_id($busy);
+            if (!$job_id) {
+                break;
+            }
+            if ($this->process_chunk($job_id) === false) {
+                $busy[] = $job_id; // another worker has it
+                continue;
+            }
+            $chunks++;
+        }
+
+        if ($this->next_job_id($busy)) {
+            $this->schedule_run();
+        }
+
+        return $chunks;
+    }
+
+    /**
+     * Import the next chunk of one job
+     * Returns the job's progress, or false if another worker is processing the job
+     */
+    public function process_chunk($job_id) {
+        $lock = $this->wpdb->prefix . 'cah_import_job_' . (int) $job_id;
+        if (!$this->wpdb->get_var($this->wpdb->prepare('SELECT GET_LOCK(%s, 0)', $lock))) {
+            return false;
+        }
+
+        try {
+            $job = $this->get_job($job_id);
+            if (!$job || !in_array($job->status, array('queued', 'running'), true)) {
+                return $job ? $this->get_progress($job) : false;
+            }
+
+            if ($job->attempts >= self::MAX_ATTEMPTS) {
+                $this->finish_job($job, 'failed');
+                return $this->get_progress($job->id);
+            }
+
+            $handlers = $this->get_handlers();
+            if (!isset($handlers[$job->importer])) {
+                $this->finish_job($job, 'failed', "No importer registered for {$job->importer}");
+                return $this->get_progress($job->id);
+            }
+
+            // Count the attempt first, so a chunk that kills PHP is not retried forever
+            $now = current_time('mysql');
+            $this->update_job($job->id, array(
+                'status' => 'running',
+                'attempts' => $job->attempts + 1,
+                'started_at' => $job->started_at ? $job->started_at : $now,
+                'updated_at' => $now
+            ));
+
+            try {
+                $this->import_chunk($job, $handlers[$job->importer]);
+            } catch (Throwable $e) {
+                // The job stays running and the chunk is retried from the saved cursor
+                $this->update_job($job->id, array('last_error' => get_class($e) . ': ' . $e->getMessage()));
+                error_log("CAH Import Jobs: Chunk of job {$job->id} failed: " . $e->getMessage());
+            }
+
+            return $this->get_progress($job->id);
+        } finally {
+            $this->wpdb->query($this->wpdb->prepare('SELECT RELEASE_LOCK(%s)', $lock));
+        }
+    }
+
+    private function import_chunk($job, $handler) {
+        $reader = CAH_CSV_Reader::from_file($job->file_path);
+        if (!$reader) {
+            $this->finish_job($job, 'failed', 'Could not open CSV file');
+            return;
+        }
+
+        $reader->seek((int) $job->cursor_offset, (int) $job->cursor_record);
+        $started = microtime(true);
+
+        $options = json_decode($job->options, true) ?: array();
+        $options['max_rows'] = (int) $job->chunk_size;
+        $options['case_id_token'] = 'J' . $job->id;
+        $options['on_commit'] = function ($entry, $results) use ($job, $started) {
+            return $this->save_progress($job, $entry['offset'], $entry['row'], $results, microtime(true) - $started);
+        };
+
+        $results = call_user_func($handler, $reader, $options);
+        $offset = $reader->tell();
+        $record = $reader->get_record_number();
+        $reader->close();
+
+        if ($results['processed_rows'] === 0 && !empty($results['errors'])) {
+            $this->finish_job($job, 'failed', implode(', ', $results['errors']));
+            return;
+        }
+
+        // The chunk stops early only at the end of the file
+        $done = $results['processed_rows'] < (int) $job->chunk_size;
+        $extra = array('attempts' => 0, 'last_error' => null);
+        $this->save_progress($job, $offset, $record, $results, microtime(true) - $started, $extra);
+
+        // A job cancelled meanwhile stays cancelled
+        $job = $this->get_job($job->id);
+        if ($done && $job->status === 'running') {
+            $this->finish_job($job, 'completed');
+        }
+    }
+
+    /**
+     * Cursor and counters of a job: the counters at the start of the chunk plus the chunk's results
+     */
+    private function save_progress($job, $offset, $record, $results, $elapsed, $extra = array()) {
+        $errors = json_decode($job->errors, true) ?: array();
+        $room = max(0, self::MAX_REPORTED_ERRORS - count($errors));
+        $omitted = (int) $job->omitted_errors + (int) $results['omitted_errors'] + max(0, count($results['errors']) - $room);
+        $errors = array_merge($errors, array_slice($results['errors'], 0, $room));
+
+        $created = json_decode($job->created_records, true) ?: array();
+        foreach ($results['created_records'] as $table => $count) {
+            $created[$table] = ($created[$table] ?? 0) + $count;
+        }
+
+        return $this->update_job($job->id, array_merge(array(
+            'cursor_offset' => $offset,
+            'cursor_record' => $record,
+            'successful_imports' => $job->successful_imports + $results['successful_imports'],
+            'failed_imports' => $job->failed_imports + $results['failed_imports'],
+            'created_records' => wp_json_encode($created),
+            'errors' => wp_json_encode($errors),
+            'omitted_errors' => $omitted,
+            'processing_time' => $job->processing_time + $elapsed,
+            'updated_at' => current_time('mysql')
+        ), $extra));
+    }
+
+    private function finish_job($job, $status, $error = null) {
+        $data = array('status' => $status, 'finished_at' => current_time('mysql'), 'updated_at' => current_time('mysql'));
+        if ($error !== null) {
+            $data['last_error'] = $error;
+        }
+        $this->update_job($job->id, $data);
+
+        // The file is kept while a failed job can still be retried
+        if (in_array($status, array('completed', 'cancelled'), true)) {
+            @unlink($job->file_path);
+        }
+
+        do_action('cah_import_job_finished', $this->get_progress($job->id), $job->importer, json_decode($job->options, true) ?: array());
+    }
+
+    /**
+     * Queue a failed or stalled job again; it resumes after the last committed row
+     */
+    public function retry_job($job_id) {
+        $job = $this->get_job($job_id);
+        if (!$job || !in_array($job->status, array('failed', 'running', 'queued'), true)) {
+            return array('error' => 'Only failed or unfinished jobs can be retried');
+        }
+        if (!file_exists($job->file_path)) {
+            return array('error' => 'The CSV file of this job no longer exists');
+        }
+
+        $this->update_job($job->id, array(
+            'status' => 'queued',
+            'attempts' => 0,
+            'last_error' => null,
+            'finished_at' => null,
+            'updated_at' => current_time('mysql')
+        ));
+        $this->schedule_run();
+
+        return $this->get_progress($job->id);
+    }
+
+    public function cancel_job($job_id) {
+        $job = $this->get_job($job_id);
+        if (!$job || in_array($job->status, array('completed', 'cancelled'), true)) {
+            return array('error' => 'Only unfinished jobs can be cancelled');
+        }
+
+        $this->finish_job($job, 'cancelled');
+        return $this->get_progress($job->id);
+    }
+
+    public function get_job($job_id) {
+        $this->maybe_create_table();
+        return $this->wpdb->get_row($this->wpdb->prepare("SELECT * FROM {$this->table} WHERE id = %d", $job_id));
+    }
+
+    /**
+     * Newest jobs first
+     */
+    public function get_jobs($limit = 20) {
+        $this->maybe_create_table();
+        $ids = $this->wpdb->get_col($this->wpdb->prepare("SELECT id FROM {$this->table} ORDER BY id DESC LIMIT %d", $limit));
+        return array_map(array($this, 'get_progress'), $ids);
+    }
+
+    /**
+     * Progress of a job (row or id): rows done, throughput and ETA
+     * Totals are estimated from the bytes read, so the file is never counted up front
+     */
+    public function get_progress($job) {
+        if (!is_object($job)) {
+            $job = $this->get_job($job);
+            if (!$job) {
+                return array('error' => 'Import job not found');
+            }
+        }
+
+        $file_size = (int) $job->file_size;
+        $bytes_done = min((int) $job->cursor_offset, $file_size);
+        $fraction = $job->status === 'completed' ? 1.0 : ($file_size > 0 ? $bytes_done / $file_size : 0.0);
+        $rows_done = (int) $job->cursor_record;
+
+        // Wall-clock time since the first chunk, including the gaps between cron runs
+        $elapsed = 0;
+        if ($job->started_at) {
+            $end = $job->finished_at ? strtotime($job->finished_at) : current_time('timestamp');
+            $elapsed = max(0, $end - strtotime($job->started_at));
+        }
+
+        $eta = null;
+        if (in_array($job->status, array('queued', 'running'), true) && $fraction > 0 && $elapsed > 0) {
+            $eta = (int) round($elapsed * (1 - $fraction) / $fraction);
+        }
+
+        return array(
+            'job_id' => (int) $job->id,
+            'importer' => $job->importer,
+            'status' => $job->status,
+            'percent' => round($fraction * 100, 1),
+            'rows_done' => $rows_done,
+            'rows_estimate' => $fraction > 0 ? (int) round($rows_done / $fraction) : null,
+            'bytes_done' => $bytes_done,
+            'file_size' => $file_size,
+            'rows_per_sec' => $elapsed > 0 ? round($rows_done / $elapsed, 1) : null,
+            'processing_rows_per_sec' => $job->processing_time > 0 ? round($rows_done / $job->processing_time, 1) : null,
+            'eta_seconds' => $eta,
+            'success' => $job->status === 'completed' && $job->successful_imports > 0,
+            'total_rows' => $rows_done,
+            'successful_imports' => (int) $job->successful_imports,
+            'failed_imports' => (int) $job->failed_imports,
+            'created_records' => json_decode($job->created_records, true) ?: array(),
+            'errors' => json_decode($job->errors, true) ?: array(),
+            'omitted_errors' => (int) $job->omitted_errors,
+            'attempts' => (int) $job->attempts,
+            'last_error' => $job->last_error,
+            'created_at' => $job->created_at,
+            'started_at' => $job->started_at,
+            'finished_at' => $job->finished_at
+        );
+    }
+
+    public function rest_list_jobs($request) {
+        return rest_ensure_response($this->get_jobs(min(100, max(1, (int) ($request->get_param('limit') ?: 20)))));
+    }
+
+    public function rest_get_job($request) {
+        $progress = $this->get_progress((int) $request->get_param('id'));
+        if (isset($progress['error'])) {
+            return new WP_Error('import_job_not_found', $progress['error'], array('status' => 404));
+        }
+        return rest_ensure_response($progress);
+    }
+
+    public function rest_job_command($request) {
+        $job_id = (int) $request->get_param('id');
+        $result = $request->get_param('command') === 'retry' ? $this->retry_job($job_id) : $this->cancel_job($job_id);
+        if (isset($result['error'])) {
+            return new WP_Error('import_job_' . $request->get_param('command') . '_failed', $result['error'], array('status' => 400));
+        }
+        return rest_ensure_response($result);
+    }
+
+    /**
+     * AJAX: Progress of an import job
+     */
+    public function ajax_job_status() {
+        if (!wp_verify_nonce($_POST['nonce'] ?? '', 'cah_universal_import')) {
+            wp_die('Security check failed');
+        }
+
+        if (!$this->check_permissions()) {
+            wp_die('Insufficient permissions');
+        }
+
+        $progress = $this->get_progress(intval($_POST['job_id'] ?? 0));
+        if (isset($progress['error'])) {
+            wp_send_json_error(array('message' => $progress['error']));
+        }
+        wp_send_json_success($progress);
+    }
+
+    /**
+     * AJAX: Retry a failed import job
+     */
+    public function ajax_job_retry() {
+        if (!wp_verify_nonce($_POST['nonce'] ?? '', 'cah_universal_import')) {
+            wp_die('Security check failed');
+        }
+
+        if (!$this->check_permissions()) {
+            wp_die('Insufficient permissions');
+        }
+
+        $result = $this->retry_job(intval($_POST['job_id'] ?? 0));
+        if (isset($result['error'])) {
+            wp_send_json_error(array('message' => $result['error']));
+        }
+        wp_send_json_success($result);
+    }
+
+    private function get_handlers() {
+        return apply_filters('cah_import_job_handlers', array());
+    }
+
+    private function next_job_id($skip = array()) {
+        $where = empty($skip) ? '' : ' AND id NOT IN (' . implode(',', array_map('intval', $skip)) . ')';
+        return (int) $this->wpdb->get_var(
+            "SELECT id FROM {$this->table} WHERE status IN ('queued', 'running'){$where} ORDER BY id LIMIT 1"
+        );
+    }
+
+    private function schedule_run() {
+        if (!wp_next_scheduled(self::RUN_HOOK)) {
+            wp_schedule_single_event(time(), self::RUN_HOOK);
+        }
+    }
+
+    private function update_job($job_id, $data) {
+        return $this->wpdb->update($this->table, $data, array('id' => $job_id)) !== false;
+    }
+
+    /**
+     * Copy of the CSV file in uploads/cah-import-jobs, which the web server must not serve
+     */
+    private function store_file($file_path) {
+        $uploads = wp_upload_dir();
+        $dir = $uploads['basedir'] . '/cah-import-jobs';
+
+        if (!wp_mkdir_p($dir)) {
+            return false;
+        }
+        if (!file_exists($dir . '/.htaccess')) {
+            file_put_contents($dir . '/.htaccess', "Deny from all\n");
+            file_put_contents($dir . '/index.php', "<?php\n// Silence is golden.\n");
+        }
+
+        $target = $dir . '/job-' . wp_generate_password(20, false) . '.csv';
+        $stored = is_uploaded_file($file_path) ? move_uploaded_file($file_path, $target) : copy($file_path, $target);
+
+        return $stored ? $target : false;
+    }
+
+    private function maybe_create_table() {
+        if (get_option(self::TABLE_VERSION_OPTION) === self::TABLE_VERSION) {
+            return;
+        }
+
+        $charset_collate = $this->wpdb->get_charset_collate();
+        $sql = "CREATE TABLE {$this->table} (
+            id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+            importer varchar(50) NOT NULL,
+            status varchar(20) NOT NULL DEFAULT 'queued',
+            file_path varchar(500) NOT NULL,
+            file_size bigint(20) unsigned NOT NULL DEFAULT 0,
+            options longtext DEFAULT NULL,
+            chunk_size int(10) unsigned NOT NULL DEFAULT 1000,
+            cursor_offset bigint(20) unsigned NOT NULL DEFAULT 0,
+            cursor_record bigint(20) unsigned NOT NULL DEFAULT 0,
+            successful_imports bigint(20) unsigned NOT NULL DEFAULT 0,
+            failed_imports bigint(20) unsigned NOT NULL DEFAULT 0,
+            created_records text DEFAULT NULL,
+            errors longtext DEFAULT NULL,
+            omitted_errors int(10) unsigned NOT NULL DEFAULT 0,
+            attempts int(10) unsigned NOT NULL DEFAULT 0,
+            last_error text DEFAULT NULL,
+            processing_time double NOT NULL DEFAULT 0,
+            user_id bigint(20) unsigned DEFAULT NULL,
+            created_at datetime DEFAULT NULL,
+            started_at datetime DEFAULT NULL,
+            updated_at datetime DEFAULT NULL,
+            finished_at datetime DEFAULT NULL,
+            PRIMARY KEY  (id),
+            KEY status (status)
+        ) $charset_collate;";
+
+        require_once ABSPATH . 'wp-admin/includes/upgrade.php';
+        dbDelta($sql);
+        update_option(self::TABLE_VERSION_OPTION, self::TABLE_VERSION);
+    }
+}
@@ -10,6 +10,9 @@ if (!defined('ABSPATH')) {
 
 class CAH_Universal_Import_Manager {
     
+    // Bytes of an uploaded file read for field detection and preview
+    const CSV_SAMPLE_BYTES = 262144;
+    
     private $wpdb;
     private $supported_clients = array();
     
@@ -237,6 +240,10 @@ class CAH_Universal_Import_Manager {
         add_action('wp_ajax_cah_process_import', array($this, 'ajax_process_import'));
         add_action('wp_ajax_cah_save_field_mapping', array($this, 'ajax_save_field_mapping'));
         add_action('wp_ajax_cah_load_client_mapping', array($this, 'ajax_load_client_mapping'));
+        
+        // Background import jobs
+        add_filter('cah_import_job_handlers', array($this, 'register_job_handler'));
+        add_action('cah_import_job_finished', array($this, 'log_finished_job'), 10, 3);
     }
     
     /**
@@ -639,66 +646,71 @@ class CAH_Universal_Import_Manager {
      * Process full import
      */
     public function process_import($csv_content, $field_mappings, $client_type = 'generic', $import_options = array()) {
-        $import_results = array(
-            'success' => false,
-            'total_rows' => 0,
-            'processed_rows' => 0,
-            'successful_imports' => 0,
-            'failed_imports' => 0,
-            'errors' => array(),
-            'created_records' => array(
-                'cases' => array(),
-                'debtors' => array(),
-                'clients' => array(),
-                'emails' => array()
-            )
-        );
-        
-        $lines = explode("\n", trim($csv_content));
-        if (empty($lines)) {
-            $import_results['errors'][] = 'CSV content is empty';
-            return $import_results;
-        }
-        
-        $header = str_getcsv($lines[0], ',');
-        if (empty($header)) {
-            $header = str_getcsv($lines[0], ';');
+        return $this->run_import(CAH_CSV_Reader::from_string($csv_content), $field_mappings, $client_type, $import_options);
+    }
+    
+    /**
+     * Process full import straight from a CSV file, without loading it into memory
+     */
+    public function process_import_file($file_path, $field_mappings, $client_type = 'generic', $import_options = array()) {
+        $reader = CAH_CSV_Reader::from_file($file_path);
+        if (!$reader) {
+            return array(
+                'success' => false,
+                'total_rows' => 0,
+                'processed_rows' => 0,
+                'successful_imports' => 0,
+                'failed_imports' => 0,
+                'errors' => array('Could not open CSV file')
+            );
         }
         
-        $import_results['total_rows'] = count($lines) - 1;
-        
-        // Process each row
-        for ($i = 1; $i < count($lines); $i++) {
-            $row = str_getcsv($lines[$i], ',');
-            if (empty($row)) {
-                $row = str_getcsv($lines[$i], ';');
-            }
-            
-            if (empty(trim(implode('', $row)))) {
-                continue; // Skip empty rows
-            }
-            
-            $import_results['processed_rows']++;
-            
-            $row_result = $this->process_single_row($header, $row, $field_mappings, $i);
-            
-            if ($row_result['success']) {
-                $import_results['successful_imports']++;
-                
-                // Merge created records
-                foreach ($row_result['created_records'] as $table => $records) {
-                    $import_results['created_records'][$table] = array_merge(
-                        $import_results['created_records'][$table],
-                        $records
-                    );
-                }
-            } else {
-                $import_results['failed_imports']++;
-                $import_results['errors'][] = "Row {$i}: " . implode(', ', $row_result['errors']);
-            }
+        return $this->run_import($reader, $field_mappings, $client_type, $import_options);
+    }
+    
+    /**
+     * Stream the rows of a reader into clients -> debtors -> cases -> emails, in batches of multi-row INSERTs
+     * Import jobs call this chunk by chunk, with max_rows and on_commit in the options
+     */
+    public function import_rows($reader, $field_mappings, $import_options = array()) {
+        $importer = new CAH_Batch_Importer($this->wpdb, array(
+            'insert_order' => array('klage_clients', 'klage_debtors', 'klage_cases', 'klage_emails'),
+            'links' => array(
+                'klage_cases' => array('client_id' => 'klage_clients', 'debtor_id' => 'klage_debtors'),
+                'klage_emails' => array('case_id' => 'klage_cases')
+            ),
+            'import_source' => 'universal_import',
+            'batch_size' => $import_options['batch_size'] ?? 500,
+            'on_commit' => $import_options['on_commit'] ?? null
+        ));
+        
+        return $importer->run($reader, function ($header, $row) use ($field_mappings) {
+            return $this->map_row($header, $row, $field_mappings);
+        }, $import_options['max_rows'] ?? 0);
+    }
+    
+    /**
+     * Import job handler: the next chunk of a universal import job
+     */
+    public function register_job_handler($handlers) {
+        $handlers['universal'] = function ($reader, $options) {
+            return $this->import_rows($reader, $options['field_mappings'] ?? array(), $options);
+        };
+        return $handlers;
+    }
+    
+    /**
+     * Log finished universal import jobs like direct imports
+     */
+    public function log_finished_job($progress, $importer, $options) {
+        if ($importer === 'universal' && $progress['status'] === 'completed') {
+            $this->log_import_activity($progress, $options['client_type'] ?? 'generic');
         }
-        
-        $import_results['success'] = $import_results['successful_imports'] > 0;
+    }
+    
+    private function run_import($reader, $field_mappings, $client_type, $import_options) {
+        $import_results = $this->import_rows($reader, $field_mappings, $import_options);
+        $reader->close();
         
         // Log import activity
         $this->log_import_activity($import_results, $client_type);
@@ -707,22 +719,11 @@ class CAH_Universal_Import_Manager {
     }
     
     /**
-     * Process single CSV row
+     * Validate one CSV row and group the mapped values by target table
      */
-    private function process_single_row($header, $row, $field_mappings, $row_number) {
-        $row_result = array(
-            'success' => false,
-            'errors' => array(),
-            'created_records' => array(
-                'cases' => array(),
-                'debtors' => array(),
-                'clients' => array(),
-                'emails' => array()
-            )
-        );
-        
-        // Group mapped data by target table
+    private function map_row($header, $row, $field_mappings) {
         $table_data = array();
+        $errors = array();
         
         foreach ($header as $index => $csv_field) {
             if (isset($field_mappings[$csv_field]) && isset($row[$index])) {
@@ -732,83 +733,14 @@ class CAH_Universal_Import_Manager {
                 $validation_result = $this->validate_field_value($value, $mapping);
                 
                 if ($validation_result['valid']) {
-                    $table = $mapping['target_table'];
-                    $field = $mapping['target_field'];
-                    
-                    if (!isset($table_data[$table])) {
-                        $table_data[$table] = array();
-                    }
-                    
-                    $table_data[$table][$field] = $validation_result['value'];
+                    $table_data[$mapping['target_table']][$mapping['target_field']] = $validation_result['value'];
                 } else {
-                    $row_result['errors'][] = "Field '{$csv_field}': " . $validation_result['error'];
-                }
-            }
-        }
-        
-        if (!empty($row_result['errors'])) {
-            return $row_result;
-        }
-        
-        // Insert data into database
-        try {
-            // Start transaction
-            $this->wpdb->query('START TRANSACTION');
-            
-            $created_ids = array();
-            
-            // Insert in proper order: clients -> debtors -> cases -> emails
-            $insert_order = array('klage_clients', 'klage_debtors', 'klage_cases', 'klage_emails');
-            
-            foreach ($insert_order as $table) {
-                if (!isset($table_data[$table])) {
-                    continue;
-                }
-                
-                $data = $table_data[$table];
-                
-                // Add metadata
-                $data['created_at'] = current_time('mysql');
-                $data['import_source'] = 'universal_import';
-                
-                // Handle foreign key relationships
-                if ($table === 'klage_cases') {
-                    if (isset($created_ids['klage_clients'])) {
-                        $data['client_id'] = $created_ids['klage_clients'];
-                    }
-                    if (isset($created_ids['klage_debtors'])) {
-                        $data['debtor_id'] = $created_ids['klage_debtors'];
-                    }
-                } elseif ($table === 'klage_emails') {
-                    if (isset($created_ids['klage_cases'])) {
-                        $data['case_id'] = $created_ids['klage_cases'];
-                    }
-                }
-                
-                $insert_result = $this->wpdb->insert(
-                    $this->wpdb->prefix . $table,
-                    $data
-                );
-                
-                if ($insert_result === false) {
-                    throw new Exception("Failed to insert into {$table}: " . $this->wpdb->last_error);
+                    $errors[] = "Field '{$csv_field}': " . $validation_result['error'];
                 }
-                
-                $created_ids[$table] = $this->wpdb->insert_id;
-                $row_result['created_records'][str_replace('klage_', '', $table)][] = $created_ids[$table];
             }
-            
-            // Commit transaction
-            $this->wpdb->query('COMMIT');
-            $row_result['success'] = true;
-            
-        } catch (Exception $e) {
-            // Rollback transaction
-            $this->wpdb->query('ROLLBACK');
-            $row_result['errors'][] = $e->getMessage();
         }
         
-        return $row_result;
+        return array('tables' => $table_data, 'errors' => $errors);
     }
     
     /**
@@ -836,6 +768,27 @@ class CAH_Universal_Import_Manager {
         update_option('cah_import_logs', $import_logs);
     }
     
+    /**
+     * First CSV_SAMPLE_BYTES of a file, cut at the last complete line
+     */
+    private function read_csv_sample($file_path, &$sampled) {
+        $handle = @fopen($file_path, 'rb');
+        if (!$handle) {
+            return '';
+        }
+        
+        $content = (string) fread($handle, self::CSV_SAMPLE_BYTES + 1);
+        fclose($handle);
+        
+        $sampled = strlen($content) > self::CSV_SAMPLE_BYTES;
+        if ($sampled) {
+            $cut = strrpos(substr($content, 0, self::CSV_SAMPLE_BYTES), "\n");
+            $content = substr($content, 0, $cut === false ? self::CSV_SAMPLE_BYTES : $cut);
+        }
+        
+        return $content;
+    }
+    
     /**
      * Get supported clients
      */
@@ -856,11 +809,12 @@ class CAH_Universal_Import_Manager {
         }
         
         $csv_content = '';
+        $sampled = false;
         $client_type = sanitize_text_field($_POST['client_type'] ?? 'generic');
         
-        // Handle file upload or direct content
+        // Handle file upload or direct content; uploads are only sampled, the import streams the file
         if (isset($_FILES['csv_file']) && $_FILES['csv_file']['error'] === UPLOAD_ERR_OK) {
-            $csv_content = file_get_contents($_FILES['csv_file']['tmp_name']);
+            $csv_content = $this->read_csv_sample($_FILES['csv_file']['tmp_name'], $sampled);
         } elseif (isset($_POST['csv_content']) && !empty($_POST['csv_content'])) {
             $csv_content = sanitize_textarea_field($_POST['csv_content']);
         }
@@ -876,6 +830,7 @@ class CAH_Universal_Import_Manager {
         } else {
             // Store CSV content for later use
             $result['csv_content'] = $csv_content;
+            $result['sampled'] = $sampled;
             wp_send_json_success($result);
         }
     }
@@ -916,16 +871,35 @@ class CAH_Universal_Import_Manager {
             wp_die('Insufficient permissions');
         }
         
-        $csv_content = sanitize_textarea_field($_POST['csv_content']);
         $field_mappings = json_decode(stripslashes($_POST['field_mappings']), true);
         $client_type = sanitize_text_field($_POST['client_type'] ?? 'generic');
         
-        if (empty($csv_content) || empty($field_mappings)) {
-            wp_send_json_error(array('message' => 'Missing CSV content or field mappings'));
+        // An uploaded file is streamed from its temp file, or queued as a background job
+        if (isset($_FILES['csv_file']) && $_FILES['csv_file']['error'] === UPLOAD_ERR_OK && !empty($field_mappings)) {
+            if (!empty($_POST['background'])) {
+                global $court_automation_hub;
+                $job = $court_automation_hub->import_jobs->create_job('universal', $_FILES['csv_file']['tmp_name'], array(
+                    'field_mappings' => $field_mappings,
+                    'client_type' => $client_type
+                ));
+                
+                if (isset($job['error'])) {
+                    wp_send_json_error(array('message' => $job['error']));
+                }
+                wp_send_json_success($job);
+            }
+            
+            $result = $this->process_import_file($_FILES['csv_file']['tmp_name'], $field_mappings, $client_type);
+        } else {
+            $csv_content = sanitize_textarea_field($_POST['csv_content'] ?? '');
+            
+            if (empty($csv_content) || empty($field_mappings)) {
+                wp_send_json_error(array('message' => 'Missing CSV content or field mappings'));
+            }
+            
+            $result = $this->process_import($csv_content, $field_mappings, $client_type);
         }
         
-        $result = $this->process_import($csv_content, $field_mappings, $client_type);
-        
         if ($result['success']) {
             wp_send_json_success($result);
         } else {
@@ -0,0 +1,187 @@
+<?php
+/**
+ * Bulk Document Generation
+ * Generates one document per case from a doc-out template for many cases at
+ * once, spread over a pool of worker processes, and builds a zip archive or
+ * one merged PDF from the results.
+ *
+ *   php doc-bulk.php <wp-path> create <template-id> [--status S] [--search T] [--case-ids A,B] [--limit N] [--output zip|merged|files] [--workers N]
+ *   php doc-bulk.php <wp-path> work <batch-id> [--worker I] [--workers N] [--budget S]
+ *   php doc-bulk.php <wp-path> resume <batch-id> [--workers N]
+ *   php doc-bulk.php <wp-path> status|finalize <batch-id>
+ *
+ * create   selects the cases, starts --workers processes (default: one per CPU
+ *          core) and prints the progress until all documents are generated,
+ *          then builds the output
+ * work     generates the documents of one worker; used by create and resume
+ * resume   restarts the pool for a batch whose workers were stopped
+ *
+ * Every worker loads mPDF, the compiled template and the case data of its
+ * share once per chunk of cases instead of once per document. Documents that
+ * exist already are skipped, so a batch can be resumed with any worker count.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    exit;
+}
+
+function bulk_fail($message) {
+    fwrite(STDERR, "❌ $message\n");
+    exit(1);
+}
+
+function bulk_option(&$args, $name, $default = null) {
+    $index = array_search($name, $args, true);
+    if ($index === false) {
+        return $default;
+    }
+    $value = isset($args[$index + 1]) ? $args[$index + 1] : $default;
+    array_splice($args, $index, 2);
+    return $value;
+}
+
+function bulk_cpu_count() {
+    $count = (int) trim((string) @shell_exec('nproc 2>/dev/null'));
+    if ($count < 1 && is_readable('/proc/cpuinfo')) {
+        $count = substr_count(file_get_contents('/proc/cpuinfo'), "\nprocessor") + 1;
+    }
+    return max(1, $count);
+}
+
+function bulk_print_progress($progress) {
+    if (is_wp_error($progress)) {
+        bulk_fail($progress->get_error_message());
+    }
+    $eta = $progress['eta_seconds'] !== null ? gmdate('H:i:s', $progress['eta_seconds']) : '-';
+    printf("%s %-9s %5.1f%%  %d/%d documents (%d failed)  %s docs/s  ETA %s%s\n",
+        $progress['batch_id'], $progress['status'], $progress['percent'],
+        $progress['done'], $progress['total'], $progress['failed'],
+        $progress['docs_per_sec'] !== null ? $progress['docs_per_sec'] : '-', $eta,
+        $progress['output_file'] ? '  → ' . $progress['output_file'] : '');
+}
+
+/**
+ * Run the worker pool for a batch and finalize it
+ */
+function bulk_run_pool($wp_path, $generator, $batch_id, $workers) {
+    $processes = array();
+    for ($worker = 0; $worker < $workers; $worker++) {
+        $command = sprintf('%s %s %s work %s --worker %d --workers %d',
+            escapeshellarg(PHP_BINARY), escapeshellarg(__FILE__), escapeshellarg($wp_path),
+            escapeshellarg($batch_id), $worker, $workers);
+        $process = proc_open($command, array(1 => array('file', '/dev/null', 'w'), 2 => STDERR), $pipes);
+        if (!is_resource($process)) {
+            bulk_fail("Could not start worker $worker");
+        }
+        $processes[$worker] = $process;
+    }
+    echo "🚀 Started $workers workers for batch $batch_id\n";
+
+    $failed_workers = 0;
+    while ($processes) {
+        sleep(2);
+        foreach ($processes as $worker => $process) {
+            $status = proc_get_status($process);
+            if (!$status['running']) {
+                if ($status['exitcode'] !== 0) {
+                    $failed_workers++;
+                    fwrite(STDERR, "⚠️ Worker $worker exited with code {$status['exitcode']}\n");
+                }
+                proc_close($process);
+                unset($processes[$worker]);
+            }
+        }
+        bulk_print_progress($generator->get_progress($batch_id));
+    }
+
+    $progress = $generator->get_progress($batch_id);
+    if ($progress['remaining'] > 0) {
+        bulk_fail("$failed_workers workers stopped early, run: php doc-bulk.php $wp_path resume $batch_id");
+    }
+
+    $progress = $generator->finalize($batch_id);
+    bulk_print_progress($progress);
+    foreach ($progress['errors'] as $error) {
+        echo "   ❌ $error\n";
+    }
+    if ($progress['output_error']) {
+        echo "⚠️ {$progress['output_error']}\n";
+    }
+}
+
+$args = array_slice($argv, 1);
+$status = bulk_option($args, '--status');
+$search = bulk_option($args, '--search');
+$case_ids = bulk_option($args, '--case-ids');
+$limit = (int) bulk_option($args, '--limit', 0);
+$output = bulk_option($args, '--output', 'zip');
+$worker = (int) bulk_option($args, '--worker', 0);
+$workers = (int) bulk_option($args, '--workers', 0);
+$budget = (float) bulk_option($args, '--budget', 0);
+if (count($args) < 3) {
+    fwrite(STDERR, "Usage: php doc-bulk.php <wp-path> <create TEMPLATE|work|resume|status|finalize BATCH> [...]\n");
+    exit(2);
+}
+list($wp_path, $command, $target) = $args;
+$wp_path = rtrim($wp_path, '/');
+
+if (!file_exists($wp_path . '/wp-load.php')) {
+    bulk_fail("No WordPress installation at $wp_path");
+}
+
+define('WP_USE_THEMES', false);
+$_SERVER['HTTP_HOST'] = isset($_SERVER['HTTP_HOST']) ? $_SERVER['HTTP_HOST'] : 'localhost';
+$_SERVER['REQUEST_URI'] = '/';
+require $wp_path . '/wp-load.php';
+set_time_limit(0);
+
+global $klage_click_doc_out;
+
+if (empty($klage_click_doc_out->bulk_generator)) {
+    bulk_fail('Klage.Click Document Output is not active');
+}
+$generator = $klage_click_doc_out->bulk_generator;
+if ($workers < 1) {
+    $workers = $command === 'work' ? 1 : bulk_cpu_count();
+}
+
+switch ($command) {
+    case 'create':
+        $filter = array(
+            'status' => $status,
+            'search' => $search,
+            'case_ids' => $case_ids !== null ? explode(',', $case_ids) : array(),
+            'limit' => $limit
+        );
+        $progress = $generator->create_batch((int) $target, $filter, $output);
+        bulk_print_progress($progress);
+        bulk_run_pool($wp_path, $generator, $progress['batch_id'], min($workers, $progress['total']));
+        break;
+
+    case 'resume':
+        $progress = $generator->get_progress($target);
+        bulk_print_progress($progress);
+        if ($progress['status'] === 'completed') {
+            break;
+        }
+        bulk_run_pool($wp_path, $generator, $target, max(1, min($workers, $progress['remaining'])));
+        break;
+
+    case 'work':
+        $progress = $generator->process($target, $worker, $workers, $budget);
+        if (is_wp_error($progress)) {
+            bulk_fail($progress->get_error_message());
+        }
+        break;
+
+    case 'status':
+        bulk_print_progress($generator->get_progress($target));
+        break;
+
+    case 'finalize':
+        bulk_print_progress($generator->finalize($target));
+        break;
+
+    default:
+        bulk_fail("Unknown command: $command");
+}
@@ -32,6 +32,7 @@ class CourtAutomationHub_DocumentAnalysis {
     public $api;
     public $case_matcher;
     public $admin;
+    public $latency_analytics;
     
     public function __construct() {
         add_action('plugins_loaded', array($this, 'init'));
@@ -73,6 +74,7 @@ class CourtAutomationHub_DocumentAnalysis {
         require_once CAH_DOC_IN_PLUGIN_PATH . 'includes/class-doc-in-api.php';
         require_once CAH_DOC_IN_PLUGIN_PATH . 'includes/class-doc-in-case-matcher.php';
         require_once CAH_DOC_IN_PLUGIN_PATH . 'includes/class-doc-in-admin.php';
+        require_once CAH_DOC_IN_PLUGIN_PATH . 'includes/class-doc-in-latency-analytics.php';
     }
     
     private function init_components() {
@@ -84,6 +86,7 @@ class CourtAutomationHub_DocumentAnalysis {
         $this->api = new CAH_Document_in_API();
         $this->case_matcher = new CAH_Document_in_Case_Matcher();
         $this->admin = new CAH_Document_in_Admin();
+        $this->latency_analytics = new CAH_Document_in_Latency_Analytics();
     }
     
     private function add_hooks() {
@@ -142,6 +145,7 @@ class CourtAutomationHub_DocumentAnalysis {
     public function deactivate() {
         // Clean up scheduled events if any
         wp_clear_scheduled_hook('cah_doc_in_cleanup');
+        wp_clear_scheduled_hook('cah_doc_in_audit_rollup');
         
         // Set deactivation flag
         update_option('cah_doc_in_activated', false);
@@ -24,6 +24,7 @@ class CAH_Document_in_DB_Manager {
         $this->create_communications_table();
         $this->create_attachments_table();
         $this->create_audit_table();
+        $this->create_audit_rollup_table();
         
         // Update database version
         update_option('cah_doc_in_db_version', CAH_DOC_IN_PLUGIN_VERSION);
@@ -134,6 +135,28 @@ class CAH_Document_in_DB_Manager {
         dbDelta($sql);
     }
     
+    /**
+     * Create per-minute latency rollup of the audit table (see CAH_Document_in_Latency_Analytics)
+     */
+    public function create_audit_rollup_table() {
+        $table_name = $this->wpdb->prefix . 'cah_document_in_audit_rollup';
+        $charset_collate = $this->wpdb->get_charset_collate();
+        
+        $sql = "CREATE TABLE IF NOT EXISTS $table_name (
+            bucket_start datetime NOT NULL,
+            action_type varchar(50) NOT NULL,
+            latency_bucket smallint(5) unsigned NOT NULL,
+            calls int(10) unsigned NOT NULL DEFAULT 0,
+            errors int(10) unsigned NOT NULL DEFAULT 0,
+            total_time decimal(16,4) NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket_start, action_type, latency_bucket),
+            KEY action_type (action_type, bucket_start)
+        ) $charset_collate";
+        
+        require_once(ABSPATH . 'wp-admin/includes/upgrade.php');
+        dbDelta($sql);
+    }
+    
     /**
      * Get communication by ID
      */
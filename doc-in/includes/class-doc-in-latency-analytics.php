@@ -0,0 +1,386 @@
+<?php
+/**
+ * Latency Analytics for the Document Analysis API
+ * Rolls the audit trail up into per-minute latency histograms and reports
+ * p50/p95/p99 and error rates per action type, plus regressions after upgrades
+ */
+
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+class CAH_Document_in_Latency_Analytics {
+
+    // Histogram buckets are quarter powers of two in milliseconds: bucket b holds [2^(b/4), 2^((b+1)/4)) ms
+    const BUCKETS_PER_DOUBLING = 4;
+    const MAX_BUCKET = 79; // ~17 minutes
+
+    const ROLLUP_BATCH = 50000;
+    const ROLLUP_HOOK = 'cah_doc_in_audit_rollup';
+    const CURSOR_OPTION = 'cah_doc_in_audit_rollup_cursor';
+    const VERSION_HISTORY_OPTION = 'cah_doc_in_version_history';
+    const TABLE_VERSION_OPTION = 'cah_doc_in_audit_rollup_version';
+
+    private $wpdb;
+    private $db_manager;
+
+    public function __construct() {
+        global $wpdb;
+        $this->wpdb = $wpdb;
+        $this->db_manager = new CAH_Document_in_DB_Manager();
+
+        add_action('rest_api_init', array($this, 'register_routes'));
+        add_action(self::ROLLUP_HOOK, array($this, 'rollup'));
+        add_filter('cron_schedules', array($this, 'add_cron_schedule'));
+        add_action('init', array($this, 'schedule_rollup'));
+
+        $this->record_version();
+    }
+
+    /**
+     * Register REST API routes
+     */
+    public function register_routes() {
+        // GET /wp-json/cah-doc-in/v1/analytics/latency
+        register_rest_route('cah-doc-in/v1', '/analytics/latency', array(
+            'methods' => 'GET',
+            'callback' => array($this, 'get_latency_report'),
+            'permission_callback' => function() {
+                return current_user_can('manage_options');
+            },
+            'args' => array(
+                'hours' => array(
+                    'default' => 24,
+                    'validate_callback' => function($param) {
+                        return is_numeric($param) && $param > 0;
+                    }
+                ),
+                'interval' => array(
+                    'default' => '',
+                    'validate_callback' => function($param) {
+                        return in_array($param, array('', 'minute', 'hour', 'day'), true);
+                    }
+                ),
+                'action_type' => array('required' => false),
+                'threshold' => array(
+                    'default' => 1.25,
+                    'validate_callback' => function($param) {
+                        return is_numeric($param) && $param > 1;
+                    }
+                )
+            )
+        ));
+    }
+
+    public function add_cron_schedule($schedules) {
+        $schedules['cah_doc_in_five_minutes'] = array(
+            'interval' => 5 * MINUTE_IN_SECONDS,
+            'display' => 'Every 5 minutes'
+        );
+        return $schedules;
+    }
+
+    public function schedule_rollup() {
+        if (!wp_next_scheduled(self::ROLLUP_HOOK)) {
+            wp_schedule_event(time(), 'cah_doc_in_five_minutes', self::ROLLUP_HOOK);
+        }
+    }
+
+    /**
+     * Remember when the running doc-in/core versions were first seen, for regression checks
+     */
+    public function record_version() {
+        $label = 'doc-in ' . CAH_DOC_IN_PLUGIN_VERSION . (defined('CAH_PLUGIN_VERSION') ? ' / core ' . CAH_PLUGIN_VERSION : '');
+        $history = get_option(self::VERSION_HISTORY_OPTION, array());
+        $latest = end($history);
+
+        if ($latest && $latest['version'] === $label) {
+            return;
+        }
+
+        // Rollup buckets use the database clock, so the upgrade time does too
+        $history[] = array('version' => $label, 'since' => $this->wpdb->get_var('SELECT NOW()'));
+        update_option(self::VERSION_HISTORY_OPTION, array_slice($history, -20));
+    }
+
+    /**
+     * Add audit rows written since the last run to the per-minute rollup
+     * Returns the number of audit rows processed
+     */
+    public function rollup($max_batches = 20) {
+        // WP-Cron calls the hook with an empty argument
+        $max_batches = $max_batches ? (int) $max_batches : 20;
+
+        $this->maybe_create_table();
+
+        $audit_table = $this->wpdb->prefix . 'cah_document_in_audit';
+        $rollup_table = $this->wpdb->prefix . 'cah_document_in_audit_rollup';
+
+        // Concurrent rollups would count the same rows twice
+        if (!$this->wpdb->get_var("SELECT GET_LOCK('" . self::ROLLUP_HOOK . "', 0)")) {
+            return 0;
+        }
+
+        $processed = 0;
+
+        try {
+            $cursor = (int) get_option(self::CURSOR_OPTION, 0);
+
+            // Leave the last minute alone, so rows of transactions still open are not skipped
+            $last_id = (int) $this->wpdb->get_var(
+                "SELECT id FROM $audit_table
+                 WHERE created_at < NOW() - INTERVAL 1 MINUTE
+                 ORDER BY created_at DESC, id DESC
+                 LIMIT 1"
+            );
+
+            for ($batch = 0; $batch < $max_batches && $cursor < $last_id; $batch++) {
+                $batch_end = min($cursor + self::ROLLUP_BATCH, $last_id);
+
+                $this->wpdb->query('START TRANSACTION');
+
+                $result = $this->wpdb->query($this->wpdb->prepare(
+                    "INSERT INTO $rollup_table (bucket_start, action_type, latency_bucket, calls, errors, total_time)
+                     SELECT DATE_FORMAT(created_at, '%%Y-%%m-%%d %%H:%%i:00'),
+                            action_type,
+                            LEAST(%d, FLOOR(%d * LOG2(GREATEST(COALESCE(execution_time, 0) * 1000, 1)))),
+                            COUNT(*),
+                            SUM(api_response_code >= 400),
+                            COALESCE(SUM(execution_time), 0)
+                     FROM $audit_table
+                     WHERE id > %d AND id <= %d AND api_response_code IS NOT NULL
+                     GROUP BY 1, 2, 3
+                     ON DUPLICATE KEY UPDATE
+                        calls = calls + VALUES(calls),
+                        errors = errors + VALUES(errors),
+                        total_time = total_time + VALUES(total_time)",
+                    self::MAX_BUCKET,
+                    self::BUCKETS_PER_DOUBLING,
+                    $cursor,
+                    $batch_end
+                ));
+
+                if ($result === false) {
+                    $this->wpdb->query('ROLLBACK');
+                    error_log('CAH Doc-In: Audit rollup failed: ' . $this->wpdb->last_error);
+                    break;
+                }
+
+                update_option(self::CURSOR_OPTION, $batch_end, false);
+                $this->wpdb->query('COMMIT');
+
+                $processed += $batch_end - $cursor;
+                $cursor = $batch_end;
+            }
+        } finally {
+            $this->wpdb->query("SELECT RELEASE_LOCK('" . self::ROLLUP_HOOK . "')");
+        }
+
+        return $processed;
+    }
+
+    /**
+     * Latency and error statistics per action type between two database times
+     * With an interval ('minute', 'hour' or 'day') the statistics are also returned per period
+     */
+    public function get_stats($from, $to, $action_type = null, $interval = '') {
+        $rollup_table = $this->wpdb->prefix . 'cah_document_in_audit_rollup';
+
+        $periods = array(
+            'minute' => '%Y-%m-%d %H:%i:00',
+            'hour' => '%Y-%m-%d %H:00:00',
+            'day' => '%Y-%m-%d 00:00:00'
+        );
+        $period = isset($periods[$interval]) ? "DATE_FORMAT(bucket_start, '{$periods[$interval]}')" : "''";
+
+        $where = $this->wpdb->prepare('bucket_start >= %s AND bucket_start < %s', $from, $to);
+        if (!empty($action_type)) {
+            $where .= $this->wpdb->prepare(' AND action_type = %s', $action_type);
+        }
+
+        $rows = $this->wpdb->get_results(
+            "SELECT $period AS period, action_type, latency_bucket,
+                    SUM(calls) AS calls, SUM(errors) AS errors, SUM(total_time) AS total_time
+             FROM $rollup_table
+             WHERE $where
+             GROUP BY period, action_type, latency_bucket"
+        );
+
+        // Histograms keyed by latency bucket, for the whole window and per period
+        $histograms = array();
+        foreach ($rows as $row) {
+            $this->add_to_histogram($histograms[$row->action_type]['total'], $row);
+            if ($interval) {
+                $this->add_to_histogram($histograms[$row->action_type]['series'][$row->period], $row);
+            }
+        }
+
+        $stats = array();
+        foreach ($histograms as $action => $histogram) {
+            $stats[$action] = $this->summarize($histogram['total']);
+            if ($interval) {
+                $stats[$action]['series'] = array();
+                foreach ($histogram['series'] as $period_start => $period_histogram) {
+                    $stats[$action]['series'][] = array_merge(array('period' => $period_start), $this->summarize($period_histogram));
+                }
+            }
+        }
+
+        ksort($stats);
+        return $stats;
+    }
+
+    /**
+     * Compare the window after the latest upgrade with the same length of time before it
+     */
+    public function detect_regressions($threshold = 1.25, $min_calls = 30, $window_hours = 24) {
+        $history = get_option(self::VERSION_HISTORY_OPTION, array());
+        if (count($history) < 2) {
+            return array('upgrade' => null, 'regressions' => array());
+        }
+
+        $previous = $history[count($history) - 2];
+        $upgrade = $history[count($history) - 1];
+
+        $bounds = $this->wpdb->get_row($this->wpdb->prepare(
+            "SELECT GREATEST(%s, %s - INTERVAL %d HOUR) AS before_start,
+                    LEAST(NOW(), %s + INTERVAL %d HOUR) AS after_end",
+            $previous['since'], $upgrade['since'], $window_hours, $upgrade['since'], $window_hours
+        ));
+
+        $before = $this->get_stats($bounds->before_start, $upgrade['since']);
+        $after = $this->get_stats($upgrade['since'], $bounds->after_end);
+
+        $regressions = array();
+        foreach ($after as $action => $current) {
+            if (!isset($before[$action]) || $current['calls'] < $min_calls || $before[$action]['calls'] < $min_calls) {
+                continue;
+            }
+            $baseline = $before[$action];
+            $ratio = $baseline['p95'] > 0 ? $current['p95'] / $baseline['p95'] : 1.0;
+            $error_increase = $current['error_rate'] - $baseline['error_rate'];
+
+            if ($ratio > $threshold || $error_increase > 0.01) {
+                $regressions[] = array(
+                    'action_type' => $action,
+                    'p95_before' => $baseline['p95'],
+                    'p95_after' => $current['p95'],
+                    'p95_ratio' => round($ratio, 2),
+                    'error_rate_before' => $baseline['error_rate'],
+                    'error_rate_after' => $current['error_rate'],
+                    'calls_before' => $baseline['calls'],
+                    'calls_after' => $current['calls']
+                );
+            }
+        }
+
+        return array(
+            'upgrade' => array(
+                'from' => $previous['version'],
+                'to' => $upgrade['version'],
+                'since' => $upgrade['since'],
+                'before_start' => $bounds->before_start,
+                'after_end' => $bounds->after_end
+            ),
+            'regressions' => $regressions
+        );
+    }
+
+    /**
+     * GET /wp-json/cah-doc-in/v1/analytics/latency
+     * Rolling latency percentiles and error rates per action type
+     */
+    public function get_latency_report($request) {
+        $start_time = microtime(true);
+
+        // Bring the rollup up to date first; it only reads rows added since the last run
+        $rolled_up = $this->rollup();
+
+        $hours = (float) $request->get_param('hours');
+        $window = $this->wpdb->get_row($this->wpdb->prepare(
+            'SELECT NOW() - INTERVAL %d MINUTE AS window_start, NOW() AS window_end',
+            (int) round($hours * 60)
+        ));
+
+        $stats = $this->get_stats(
+            $window->window_start,
+            $window->window_end,
+            $request->get_param('action_type'),
+            $request->get_param('interval')
+        );
+
+        return new WP_REST_Response(array(
+            'success' => true,
+            'window' => array('from' => $window->window_start, 'to' => $window->window_end, 'hours' => $hours),
+            'actions' => $stats,
+            'upgrade_check' => $this->detect_regressions((float) $request->get_param('threshold')),
+            'versions' => get_option(self::VERSION_HISTORY_OPTION, array()),
+            'rolled_up_rows' => $rolled_up,
+            'timestamp' => current_time('c'),
+            'execution_time' => round((microtime(true) - $start_time) * 1000, 2) . 'ms'
+        ), 200);
+    }
+
+    private function add_to_histogram(&$histogram, $row) {
+        $bucket = (int) $row->latency_bucket;
+        if (!isset($histogram[$bucket])) {
+            $histogram[$bucket] = array('calls' => 0, 'errors' => 0, 'total_time' => 0.0);
+        }
+        $histogram[$bucket]['calls'] += (int) $row->calls;
+        $histogram[$bucket]['errors'] += (int) $row->errors;
+        $histogram[$bucket]['total_time'] += (float) $row->total_time;
+    }
+
+    /**
+     * Calls, error rate, mean and p50/p95/p99 (ms) of one latency histogram
+     */
+    private function summarize($histogram) {
+        ksort($histogram);
+
+        $calls = 0;
+        $errors = 0;
+        $total_time = 0.0;
+        foreach ($histogram as $bucket) {
+            $calls += $bucket['calls'];
+            $errors += $bucket['errors'];
+            $total_time += $bucket['total_time'];
+        }
+
+        return array(
+            'calls' => $calls,
+            'errors' => $errors,
+            'error_rate' => $calls > 0 ? round($errors / $calls, 4) : 0,
+            'avg' => $calls > 0 ? round($total_time / $calls * 1000, 1) : 0,
+            'p50' => $this->percentile($histogram, $calls, 0.50),
+            'p95' => $this->percentile($histogram, $calls, 0.95),
+            'p99' => $this->percentile($histogram, $calls, 0.99)
+        );
+    }
+
+    /**
+     * Percentile in ms of a sorted histogram: the geometric middle of the bucket holding that rank
+     */
+    private function percentile($histogram, $calls, $fraction) {
+        if ($calls === 0) {
+            return 0;
+        }
+
+        $rank = max(1, (int) ceil($fraction * $calls));
+        $seen = 0;
+        foreach ($histogram as $bucket => $counts) {
+            $seen += $counts['calls'];
+            if ($seen >= $rank) {
+                return round(pow(2, ($bucket + 0.5) / self::BUCKETS_PER_DOUBLING), 1);
+            }
+        }
+
+        return 0;
+    }
+
+    private function maybe_create_table() {
+        if (get_option(self::TABLE_VERSION_OPTION) !== CAH_DOC_IN_PLUGIN_VERSION) {
+            $this->db_manager->create_audit_rollup_table();
+            update_option(self::TABLE_VERSION_OPTION, CAH_DOC_IN_PLUGIN_VERSION);
+        }
+    }
+}
@@ -0,0 +1,475 @@
+<?php
+/**
+ * Bulk Generator Class
+ *
+ * Generates one document per case for many cases at once. A batch lives in its
+ * own directory below uploads/klage-documents/bulk/ and is worked off by one or
+ * more worker processes, each taking every n-th case.
+ *
+ * @package KlageClickDocOut
+ */
+
+// Prevent direct access
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+class KCDO_Bulk_Generator {
+
+    const CRON_HOOK = 'kcdo_bulk_generate';
+    const OUTPUTS = array('zip', 'merged', 'files');
+    const PRELOAD_SIZE = 200;
+    const CRON_TIME_BUDGET = 20;
+    const CRON_RETRY_DELAY = 120;
+    const MAX_REPORTED_ERRORS = 50;
+    const BATCH_ID_PATTERN = '/^\d{8}-\d{6}-[a-z0-9]{6}$/';
+
+    private $base_dir;
+
+    public function __construct() {
+        $upload_dir = wp_upload_dir();
+        $this->base_dir = trailingslashit($upload_dir['basedir']) . 'klage-documents/bulk/';
+
+        add_action(self::CRON_HOOK, array($this, 'run_scheduled'));
+    }
+
+    /**
+     * Create a batch for a template and a case filter
+     *
+     * @param int $template_id Template ID
+     * @param array $filter Case filter, see KCDO_Core_Integration::find_case_ids()
+     * @param string $output 'zip', 'merged' (one PDF) or 'files'
+     * @param bool $schedule Work the batch off through WP-Cron
+     * @return array|WP_Error Batch progress or error
+     */
+    public function create_batch($template_id, $filter = array(), $output = 'zip', $schedule = false) {
+        global $klage_click_doc_out;
+
+        $template = $klage_click_doc_out->template_manager->get_template($template_id);
+        if (!$template) {
+            return new WP_Error('template_not_found', __('Template not found.', 'klage-click-doc-out'), array('status' => 404));
+        }
+
+        if (!in_array($output, self::OUTPUTS, true)) {
+            return new WP_Error('invalid_output', __('Output must be zip, merged or files.', 'klage-click-doc-out'), array('status' => 400));
+        }
+
+        $case_ids = $klage_click_doc_out->core_integration->find_case_ids($filter);
+        if (empty($case_ids)) {
+            return new WP_Error('no_cases', __('No cases match the filter.', 'klage-click-doc-out'), array('status' => 404));
+        }
+
+        if (!$this->prepare_base_dir()) {
+            return new WP_Error('bulk_dir_error', __('Could not create the bulk document directory.', 'klage-click-doc-out'));
+        }
+
+        $batch_id = gmdate('Ymd-His') . '-' . strtolower(wp_generate_password(6, false));
+        if (!wp_mkdir_p($this->get_documents_dir($batch_id))) {
+            return new WP_Error('bulk_dir_error', __('Could not create the bulk document directory.', 'klage-click-doc-out'));
+        }
+
+        $this->save_manifest($batch_id, array(
+            'batch_id' => $batch_id,
+            'template_id' => (int) $template_id,
+            'template_slug' => $template->template_slug,
+            'output' => $output,
+            'filter' => $filter,
+            'case_ids' => $case_ids,
+            'status' => 'queued',
+            'output_file' => null,
+            'output_error' => null,
+            'created_at' => time(),
+            'finished_at' => null,
+            'user_id' => get_current_user_id()
+        ));
+
+        if ($schedule) {
+            wp_schedule_single_event(time(), self::CRON_HOOK, array($batch_id));
+        }
+
+        return $this->get_progress($batch_id);
+    }
+
+    /**
+     * Generate the documents of one worker's share of a batch
+     *
+     * Worker $worker of $workers takes the cases whose position modulo $workers
+     * is $worker. Cases that already have a document are skipped, so a killed
+     * or timed-out worker picks up where it stopped when it is run again.
+     *
+     * @param string $batch_id Batch ID
+     * @param int $worker Worker number, from 0
+     * @param int $workers Number of workers
+     * @param float $time_budget Seconds after which no further document is started, 0 for no limit
+     * @return array|WP_Error Batch progress or error
+     */
+    public function process($batch_id, $worker = 0, $workers = 1, $time_budget = 0) {
+        global $klage_click_doc_out;
+
+        $manifest = $this->get_manifest($batch_id);
+        if (!$manifest) {
+            return new WP_Error('batch_not_found', __('Bulk generation batch not found.', 'klage-click-doc-out'), array('status' => 404));
+        }
+
+        $template = $klage_click_doc_out->template_manager->get_template($manifest['template_id']);
+        if (!$template) {
+            return new WP_Error('template_not_found', __('Template not found.', 'klage-click-doc-out'), array('status' => 404));
+        }
+
+        $workers = max(1, (int) $workers);
+        $worker = (int) $worker;
+        $documents_dir = $this->get_documents_dir($batch_id);
+        $existing = $this->get_document_positions($batch_id);
+
+        $pending = array();
+        foreach ($manifest['case_ids'] as $position => $case_id) {
+            if ($position % $workers === $worker && !isset($existing[$position])) {
+                $pending[$position] = $case_id;
+            }
+        }
+
+        $state = $this->get_worker_state($batch_id, $worker);
+        $state['workers'] = $workers;
+        $state['started_at'] = $state['started_at'] ?: microtime(true);
+        $started = microtime(true);
+        $this->save_worker_state($batch_id, $worker, $state);
+        $saved_state = $state;
+
+        $generator = $klage_click_doc_out->document_generator;
+        $pdf_engine = $klage_click_doc_out->pdf_engine;
+
+        foreach (array_chunk($pending, self::PRELOAD_SIZE, true) as $chunk) {
+            if ($time_budget > 0 && microtime(true) - $started >= $time_budget) {
+                break;
+            }
+
+            $cases_data = $klage_click_doc_out->core_integration->get_cases_data($chunk);
+
+            foreach ($chunk as $position => $case_id) {
+                if ($time_budget > 0 && microtime(true) - $started >= $time_budget) {
+                    break 2;
+                }
+
+                // Saved before the next document, so a worker killed mid-chunk keeps its failures
+                if ($state !== $saved_state) {
+                    $this->save_worker_state($batch_id, $worker, $state);
+                    $saved_state = $state;
+                }
+
+                if (!isset($cases_data[$case_id])) {
+                    $state['failed'][$position] = sprintf(__('Case %d not found.', 'klage-click-doc-out'), $case_id);
+                    continue;
+                }
+
+                $name = $this->get_document_name($position, $cases_data[$case_id]['case']['case_id']);
+                $html = $generator->replace_template_placeholders($template, $cases_data[$case_id]);
+                $result = $pdf_engine->generate_pdf($html, array('filename' => 'bulk-' . $batch_id . '-' . $name . '.pdf'));
+
+                if (is_wp_error($result)) {
+                    $state['failed'][$position] = $cases_data[$case_id]['case']['case_id'] . ': ' . $result->get_error_message();
+                    continue;
+                }
+
+                // The fallback engine writes HTML instead of PDF
+                if (!rename($result, $documents_dir . $name . '.' . pathinfo($result, PATHINFO_EXTENSION))) {
+                    $state['failed'][$position] = $cases_data[$case_id]['case']['case_id'] . ': ' . __('Could not move the document into the batch directory.', 'klage-click-doc-out');
+                    continue;
+                }
+                unset($state['failed'][$position]);
+            }
+        }
+
+        $this->save_worker_state($batch_id, $worker, $state);
+
+        return $this->get_progress($batch_id);
+    }
+
+    /**
+     * Build the zip archive or merged PDF of a batch
+     *
+     * A merged PDF needs mPDF and PDF documents; otherwise a zip archive is
+     * built and the reason is kept in 'output_error'.
+     *
+     * @param string $batch_id Batch ID
+     * @return array|WP_Error Batch progress or error
+     */
+    public function finalize($batch_id) {
+        global $klage_click_doc_out;
+
+        $manifest = $this->get_manifest($batch_id);
+        if (!$manifest) {
+            return new WP_Error('batch_not_found', __('Bulk generation batch not found.', 'klage-click-doc-out'), array('status' => 404));
+        }
+
+        $progress = $this->get_progress($batch_id);
+        if ($progress['remaining'] > 0) {
+            return new WP_Error('batch_incomplete', __('The batch still has cases without a document.', 'klage-click-doc-out'), array('status' => 409));
+        }
+
+        if ($manifest['status'] === 'completed') {
+            return $progress;
+        }
+
+        $documents = glob($this->get_documents_dir($batch_id) . '*.*') ?: array();
+        sort($documents);
+        $basename = $manifest['template_slug'] . '-' . $batch_id;
+        $output = $manifest['output'];
+        $manifest['output_error'] = null;
+
+        if ($output === 'merged') {
+            $extensions = array_unique(array_map(function ($file) {
+                return pathinfo($file, PATHINFO_EXTENSION);
+            }, $documents));
+
+            if ($extensions !== array('pdf')) {
+                $manifest['output_error'] = __('Only PDF documents can be merged, a zip archive was built instead.', 'klage-click-doc-out');
+                $output = 'zip';
+            } else {
+                $result = $klage_click_doc_out->pdf_engine->merge_pdfs($documents, $this->get_batch_dir($batch_id) . $basename . '.pdf');
+                if (is_wp_error($result)) {
+                    $manifest['output_error'] = $result->get_error_message();
+                    $output = 'zip';
+                } else {
+                    $manifest['output_file'] = basename($result);
+                }
+            }
+        }
+
+        if ($output === 'zip') {
+            $result = $this->build_zip($documents, $this->get_batch_dir($batch_id) . $basename . '.zip');
+            if (is_wp_error($result)) {
+                return $result;
+            }
+            $manifest['output_file'] = basename($result);
+        }
+
+        $manifest['status'] = 'completed';
+        $manifest['finished_at'] = time();
+        $this->save_manifest($batch_id, $manifest);
+
+        do_action('klage_doc_bulk_generated', $batch_id, $manifest);
+
+        return $this->get_progress($batch_id);
+    }
+
+    /**
+     * Progress of a batch
+     *
+     * @param string $batch_id Batch ID
+     * @return array|WP_Error Progress or error
+     */
+    public function get_progress($batch_id) {
+        $manifest = $this->get_manifest($batch_id);
+        if (!$manifest) {
+            return new WP_Error('batch_not_found', __('Bulk generation batch not found.', 'klage-click-doc-out'), array('status' => 404));
+        }
+
+        $total = count($manifest['case_ids']);
+        $existing = $this->get_document_positions($batch_id);
+        $done = count($existing);
+
+        // Failures of earlier runs that a later run has since generated don't count
+        $errors = array();
+        $started_at = null;
+        $workers = 0;
+        foreach (glob($this->get_batch_dir($batch_id) . 'worker-*.json') ?: array() as $file) {
+            $state = json_decode(file_get_contents($file), true);
+            if (!is_array($state)) {
+                continue;
+            }
+            foreach ($state['failed'] as $position => $message) {
+                if (!isset($existing[$position])) {
+                    $errors[$position] = $message;
+                }
+            }
+            $started_at = $started_at === null ? $state['started_at'] : min($started_at, $state['started_at']);
+            $workers = max($workers, $state['workers']);
+        }
+        ksort($errors);
+        $failed = count($errors);
+        $remaining = max(0, $total - $done - $failed);
+
+        if ($manifest['status'] === 'completed') {
+            $status = 'completed';
+        } elseif ($remaining === 0) {
+            $status = 'generated';
+        } else {
+            $status = $started_at === null ? 'queued' : 'running';
+        }
+
+        $elapsed = $started_at === null ? 0 : ($manifest['finished_at'] ?: microtime(true)) - $started_at;
+        $docs_per_sec = $elapsed > 0 && $done > 0 ? round($done / $elapsed, 2) : null;
+
+        return array(
+            'batch_id' => $batch_id,
+            'status' => $status,
+            'template_id' => $manifest['template_id'],
+            'output' => $manifest['output'],
+            'total' => $total,
+            'done' => $done,
+            'failed' => $failed,
+            'remaining' => $remaining,
+            'percent' => $total ? round(($done + $failed) / $total * 100, 1) : 100.0,
+            'workers' => $workers,
+            'elapsed' => round($elapsed, 1),
+            'docs_per_sec' => $docs_per_sec,
+            'eta_seconds' => $docs_per_sec && $remaining ? (int) ceil($remaining / $docs_per_sec) : null,
+            'errors' => array_slice(array_values($errors), 0, self::MAX_REPORTED_ERRORS),
+            'output_file' => $manifest['output_file'],
+            'output_error' => $manifest['output_error'],
+            'created_at' => $manifest['created_at']
+        );
+    }
+
+    /**
+     * Path of a finished batch's zip archive or merged PDF
+     *
+     * @param string $batch_id Batch ID
+     * @return string|null File path or null
+     */
+    public function get_output_path($batch_id) {
+        $manifest = $this->get_manifest($batch_id);
+        if (!$manifest || empty($manifest['output_file'])) {
+            return null;
+        }
+
+        $path = $this->get_batch_dir($batch_id) . $manifest['output_file'];
+        return file_exists($path) ? $path : null;
+    }
+
+    /**
+     * Work a batch off through WP-Cron, one time budget per event
+     *
+     * The next event is scheduled before any document is rendered, so a run
+     * killed by max_execution_time is picked up again CRON_RETRY_DELAY seconds
+     * later. A lock keeps two events of one batch from running at once.
+     *
+     * @param string $batch_id Batch ID
+     */
+    public function run_scheduled($batch_id) {
+        global $wpdb;
+
+        $manifest = $this->get_manifest($batch_id);
+        if (!$manifest || $manifest['status'] === 'completed') {
+            return;
+        }
+
+        wp_schedule_single_event(time() + self::CRON_RETRY_DELAY, self::CRON_HOOK, array($batch_id));
+
+        $lock = $wpdb->prefix . 'kcdo_bulk_' . $batch_id;
+        if (!$wpdb->get_var($wpdb->prepare('SELECT GET_LOCK(%s, 0)', $lock))) {
+            return;
+        }
+
+        try {
+            $progress = $this->process($batch_id, 0, 1, self::CRON_TIME_BUDGET);
+            if (is_wp_error($progress)) {
+                wp_clear_scheduled_hook(self::CRON_HOOK, array($batch_id));
+                error_log('Bulk generation ' . $batch_id . ': ' . $progress->get_error_message());
+                return;
+            }
+
+            // Continue right away instead of waiting for the retry
+            wp_clear_scheduled_hook(self::CRON_HOOK, array($batch_id));
+            if ($progress['remaining'] > 0) {
+                wp_schedule_single_event(time(), self::CRON_HOOK, array($batch_id));
+            } else {
+                $this->finalize($batch_id);
+            }
+        } finally {
+            $wpdb->get_var($wpdb->prepare('SELECT RELEASE_LOCK(%s)', $lock));
+        }
+    }
+
+    private function build_zip($files, $zip_path) {
+        if (!class_exists('ZipArchive')) {
+            return new WP_Error('zip_missing', __('Building a zip archive requires the PHP zip extension.', 'klage-click-doc-out'));
+        }
+
+        $zip = new ZipArchive();
+        if ($zip->open($zip_path, ZipArchive::CREATE | ZipArchive::OVERWRITE) !== true) {
+            return new WP_Error('zip_error', __('Could not create the zip archive.', 'klage-click-doc-out'));
+        }
+        foreach ($files as $file) {
+            $zip->addFile($file, basename($file));
+        }
+        if (!$zip->close()) {
+            return new WP_Error('zip_error', __('Could not write the zip archive.', 'klage-click-doc-out'));
+        }
+
+        return $zip_path;
+    }
+
+    private function get_document_name($position, $case_number) {
+        return sprintf('%06d-%s', $position + 1, sanitize_file_name($case_number));
+    }
+
+    /**
+     * Positions of the cases that already have a document
+     */
+    private function get_document_positions($batch_id) {
+        $positions = array();
+        foreach (glob($this->get_documents_dir($batch_id) . '*.*') ?: array() as $file) {
+            $positions[(int) basename($file) - 1] = true;
+        }
+        return $positions;
+    }
+
+    private function get_worker_state($batch_id, $worker) {
+        $file = $this->get_batch_dir($batch_id) . 'worker-' . $worker . '.json';
+        $state = file_exists($file) ? json_decode(file_get_contents($file), true) : null;
+
+        return is_array($state) ? $state : array('workers' => 1, 'started_at' => null, 'failed' => array());
+    }
+
+    private function save_worker_state($batch_id, $worker, $state) {
+        $this->write_json($this->get_batch_dir($batch_id) . 'worker-' . $worker . '.json', $state);
+    }
+
+    private function get_manifest($batch_id) {
+        if (!preg_match(self::BATCH_ID_PATTERN, (string) $batch_id)) {
+            return null;
+        }
+
+        $file = $this->get_batch_dir($batch_id) . 'batch.json';
+        $manifest = file_exists($file) ? json_decode(file_get_contents($file), true) : null;
+        return is_array($manifest) ? $manifest : null;
+    }
+
+    private function save_manifest($batch_id, $manifest) {
+        $this->write_json($this->get_batch_dir($batch_id) . 'batch.json', $manifest);
+    }
+
+    /**
+     * Write JSON through a temporary file, so readers never see half a file
+     */
+    private function write_json($file, $data) {
+        $temp_file = $file . '.' . getmypid() . '.tmp';
+        file_put_contents($temp_file, wp_json_encode($data));
+        rename($temp_file, $file);
+    }
+
+    private function get_batch_dir($batch_id) {
+        return $this->base_dir . $batch_id . '/';
+    }
+
+    private function get_documents_dir($batch_id) {
+        return $this->get_batch_dir($batch_id) . 'documents/';
+    }
+
+    /**
+     * Create the bulk directory and keep it from being served directly
+     */
+    private function prepare_base_dir() {
+        if (!wp_mkdir_p($this->base_dir)) {
+            return false;
+        }
+        if (!file_exists($this->base_dir . '.htaccess')) {
+            file_put_contents($this->base_dir . '.htaccess', "Deny from all\n");
+        }
+        if (!file_exists($this->base_dir . 'index.php')) {
+            file_put_contents($this->base_dir . 'index.php', "<?php\n// Silence is golden.\n");
+        }
+        return true;
+    }
+}
@@ -271,6 +271,154 @@ class KCDO_Core_Integration {
         return $financial_data;
     }
     
+    /**
+     * Find cases for bulk generation
+     * 
+     * @param array $filter 'case_ids' (case numbers), 'status', 'search', 'limit'
+     * @return array Internal case IDs in ascending order
+     */
+    public function find_case_ids($filter = array()) {
+        global $wpdb;
+        
+        if (!$this->is_core_plugin_available()) {
+            return array();
+        }
+        
+        $case_table = $wpdb->prefix . 'klage_cases';
+        $debtor_table = $wpdb->prefix . 'klage_debtors';
+        $where_conditions = array('1 = 1');
+        $where_values = array();
+        
+        if (!empty($filter['case_ids'])) {
+            $case_ids = array_values(array_filter(array_map('strval', (array) $filter['case_ids']), 'strlen'));
+            $where_conditions[] = 'c.case_id IN (' . implode(', ', array_fill(0, count($case_ids), '%s')) . ')';
+            $where_values = array_merge($where_values, $case_ids);
+        }
+        
+        if (!empty($filter['status'])) {
+            $where_conditions[] = 'c.case_status = %s';
+            $where_values[] = $filter['status'];
+        }
+        
+        if (!empty($filter['search'])) {
+            $where_conditions[] = '(c.case_id LIKE %s OR d.debtors_name LIKE %s OR d.debtors_company LIKE %s)';
+            $search_term = '%' . $wpdb->esc_like($filter['search']) . '%';
+            array_push($where_values, $search_term, $search_term, $search_term);
+        }
+        
+        $query = "SELECT c.id FROM {$case_table} c
+                  LEFT JOIN {$debtor_table} d ON c.debtor_id = d.id
+                  WHERE " . implode(' AND ', $where_conditions) . ' ORDER BY c.id';
+        
+        if (!empty($filter['limit'])) {
+            $query .= ' LIMIT ' . absint($filter['limit']);
+        }
+        
+        $ids = $where_values ? $wpdb->get_col($wpdb->prepare($query, $where_values)) : $wpdb->get_col($query);
+        return array_map('intval', $ids);
+    }
+    
+    /**
+     * Get case data for many cases with one query per table
+     * 
+     * Returns the same structure as get_case_data() for every case found.
+     * 
+     * @param array $ids Internal case IDs
+     * @return array Case data by internal case ID
+     */
+    public function get_cases_data($ids) {
+        global $wpdb;
+        
+        $ids = array_values(array_unique(array_map('intval', $ids)));
+        if (empty($ids) || !$this->is_core_plugin_available()) {
+            return array();
+        }
+        
+        $cases = $this->get_rows_by_ids($wpdb->prefix . 'klage_cases', 'id', $ids);
+        
+        $debtors = $this->get_rows_by_ids($wpdb->prefix . 'klage_debtors', 'id', array_column($cases, 'debtor_id'));
+        $clients = $this->get_rows_by_ids($wpdb->prefix . 'klage_clients', 'id', array_column($cases, 'client_id'));
+        $courts = $this->get_rows_by_ids($wpdb->prefix . 'klage_courts', 'id', array_column($cases, 'court_id'));
+        
+        $emails = array();
+        $id_list = implode(', ', $ids);
+        $email_rows = $wpdb->get_results(
+            "SELECT * FROM {$wpdb->prefix}klage_emails WHERE case_id IN ({$id_list}) ORDER BY sent_at DESC",
+            ARRAY_A
+        );
+        foreach ($email_rows ?: array() as $email) {
+            $emails[$email['case_id']][] = $email;
+        }
+        
+        // Latest financial calculation per case, if the financial plugin is active
+        $financials = array();
+        if (class_exists('CAH_Financial_Calculator_Plugin')) {
+            $financial_rows = $wpdb->get_results(
+                "SELECT * FROM {$wpdb->prefix}cah_case_financials WHERE case_id IN ({$id_list}) ORDER BY created_at DESC",
+                ARRAY_A
+            );
+            foreach ($financial_rows ?: array() as $financial_data) {
+                if (isset($financials[$financial_data['case_id']])) {
+                    continue;
+                }
+                if (!empty($financial_data['cost_breakdown'])) {
+                    $financial_data['cost_breakdown'] = json_decode($financial_data['cost_breakdown'], true);
+                }
+                if (!empty($financial_data['template_data'])) {
+                    $financial_data['template_data'] = json_decode($financial_data['template_data'], true);
+                }
+                $financials[$financial_data['case_id']] = $financial_data;
+            }
+        }
+        
+        $cases_data = array();
+        foreach ($ids as $id) {
+            if (!isset($cases[$id])) {
+                continue;
+            }
+            $case = $cases[$id];
+            $case_data = array(
+                'case' => $case,
+                'debtor' => $debtors[$case['debtor_id']] ?? null,
+                'client' => $clients[$case['client_id']] ?? null,
+                'court' => $courts[$case['court_id'] ?? 0] ?? null,
+                'emails' => $emails[$id] ?? array(),
+                'financial' => $financials[$id] ?? null
+            );
+            $cases_data[$id] = apply_filters('klage_doc_case_data', $case_data, $case['case_id']);
+        }
+        
+        return $cases_data;
+    }
+    
+    /**
+     * Rows of a table by ID, with one query
+     * 
+     * @param string $table Table name
+     * @param string $column ID column
+     * @param array $ids IDs, empty values are skipped
+     * @return array Rows by ID
+     */
+    private function get_rows_by_ids($table, $column, $ids) {
+        global $wpdb;
+        
+        $ids = array_values(array_unique(array_filter(array_map('intval', $ids))));
+        if (empty($ids)) {
+            return array();
+        }
+        
+        $rows = $wpdb->get_results(
+            "SELECT * FROM {$table} WHERE {$column} IN (" . implode(', ', $ids) . ')',
+            ARRAY_A
+        );
+        
+        $rows_by_id = array();
+        foreach ($rows ?: array() as $row) {
+            $rows_by_id[$row[$column]] = $row;
+        }
+        return $rows_by_id;
+    }
+    
     /**
      * Get all available cases for selection
      * 
@@ -167,6 +167,55 @@ class KCDO_Doc_REST_API {
             'permission_callback' => array($this, 'check_permissions'),
         ));
         
+        // Bulk generation endpoints
+        register_rest_route($this->namespace, '/bulk', array(
+            'methods' => WP_REST_Server::CREATABLE,
+            'callback' => array($this, 'create_bulk_batch'),
+            'permission_callback' => array($this, 'check_permissions'),
+            'args' => array(
+                'template_id' => array(
+                    'type' => 'integer',
+                    'required' => true,
+                    'description' => __('Template ID', 'klage-click-doc-out'),
+                ),
+                'case_ids' => array(
+                    'type' => 'array',
+                    'items' => array('type' => 'string'),
+                    'description' => __('Case numbers', 'klage-click-doc-out'),
+                ),
+                'status' => array(
+                    'type' => 'string',
+                    'description' => __('Filter by case status', 'klage-click-doc-out'),
+                ),
+                'search' => array(
+                    'type' => 'string',
+                    'description' => __('Search cases', 'klage-click-doc-out'),
+                ),
+                'limit' => array(
+                    'type' => 'integer',
+                    'minimum' => 1,
+                ),
+                'output' => array(
+                    'type' => 'string',
+                    'enum' => array('zip', 'merged', 'files'),
+                    'default' => 'zip',
+                    'description' => __('Zip archive, one merged PDF or the single files', 'klage-click-doc-out'),
+                ),
+            )
+        ));
+        
+        register_rest_route($this->namespace, '/bulk/(?P<id>[a-z0-9-]+)', array(
+            'methods' => WP_REST_Server::READABLE,
+            'callback' => array($this, 'get_bulk_batch'),
+            'permission_callback' => array($this, 'check_permissions'),
+        ));
+        
+        register_rest_route($this->namespace, '/bulk/(?P<id>[a-z0-9-]+)/download', array(
+            'methods' => WP_REST_Server::READABLE,
+            'callback' => array($this, 'download_bulk_batch'),
+            'permission_callback' => array($this, 'check_permissions'),
+        ));
+        
         // Plugin status endpoint
         register_rest_route($this->namespace, '/status', array(
             'methods' => WP_REST_Server::READABLE,
@@ -423,6 +472,62 @@ class KCDO_Doc_REST_API {
         return $case_data;
     }
     
+    /**
+     * Create a bulk generation batch, worked off through WP-Cron
+     */
+    public function create_bulk_batch($request) {
+        global $klage_click_doc_out;
+        
+        if (!$klage_click_doc_out || !$klage_click_doc_out->bulk_generator) {
+            return new WP_Error('service_unavailable', __('Bulk generator not available.', 'klage-click-doc-out'), array('status' => 503));
+        }
+        
+        $filter = array(
+            'case_ids' => $request->get_param('case_ids'),
+            'status' => $request->get_param('status'),
+            'search' => $request->get_param('search'),
+            'limit' => $request->get_param('limit')
+        );
+        
+        return $klage_click_doc_out->bulk_generator->create_batch(
+            $request->get_param('template_id'),
+            $filter,
+            $request->get_param('output'),
+            true
+        );
+    }
+    
+    /**
+     * Get bulk generation progress
+     */
+    public function get_bulk_batch($request) {
+        global $klage_click_doc_out;
+        
+        if (!$klage_click_doc_out || !$klage_click_doc_out->bulk_generator) {
+            return new WP_Error('service_unavailable', __('Bulk generator not available.', 'klage-click-doc-out'), array('status' => 503));
+        }
+        
+        return $klage_click_doc_out->bulk_generator->get_progress($request['id']);
+    }
+    
+    /**
+     * Download the zip archive or merged PDF of a finished batch
+     */
+    public function download_bulk_batch($request) {
+        global $klage_click_doc_out;
+        
+        if (!$klage_click_doc_out || !$klage_click_doc_out->bulk_generator) {
+            return new WP_Error('service_unavailable', __('Bulk generator not available.', 'klage-click-doc-out'), array('status' => 503));
+        }
+        
+        $path = $klage_click_doc_out->bulk_generator->get_output_path($request['id']);
+        if (!$path) {
+            return new WP_Error('not_found', __('The batch has no download yet.', 'klage-click-doc-out'), array('status' => 404));
+        }
+        
+        $klage_click_doc_out->pdf_engine->serve_pdf_download($path, basename($path), false);
+    }
+    
     /**
      * Get plugin status
      */
@@ -438,7 +543,8 @@ class KCDO_Doc_REST_API {
                 'document_generator' => !empty($klage_click_doc_out->document_generator),
                 'pdf_engine' => !empty($klage_click_doc_out->pdf_engine),
                 's3_storage' => !empty($klage_click_doc_out->s3_storage),
-                'core_integration' => !empty($klage_click_doc_out->core_integration)
+                'core_integration' => !empty($klage_click_doc_out->core_integration),
+                'bulk_generator' => !empty($klage_click_doc_out->bulk_generator)
             )
         );
         
@@ -74,7 +74,7 @@ class KCDO_Document_Generator {
         $data = array_merge($case_data, $additional_data);
         
         // Generate HTML draft
-        $draft_html = $this->replace_template_placeholders($template->template_html, $data);
+        $draft_html = $this->replace_template_placeholders($template, $data);
         
         // Save draft to database
         $draft_id = $this->save_document_draft(array(
@@ -264,15 +264,13 @@ class KCDO_Document_Generator {
     
     /**
      * Replace template placeholders with actual data
+     * Also used by bulk generation, which loads the case data itself
      * 
-     * @param string $template_html Template HTML
+     * @param object $template Template object
      * @param array $data Data array
      * @return string Processed HTML
      */
-    private function replace_template_placeholders($template_html, $data) {
-        // Flatten nested arrays for easier placeholder replacement
-        $flattened_data = $this->flatten_array($data);
-        
+    public function replace_template_placeholders($template, $data) {
         // Add some default placeholders
         $default_data = array(
             'current_date' => date_i18n(get_option('date_format')),
@@ -282,62 +280,43 @@ class KCDO_Document_Generator {
             'site_url' => get_site_url()
         );
         
-        $all_data = array_merge($default_data, $flattened_data);
-        
-        foreach ($all_data as $key => $value) {
-            // Handle different data types
-            if (is_array($value)) {
-                $value = implode(', ', $value);
-            } elseif (is_object($value)) {
-                if (method_exists($value, '__toString')) {
-                    $value = (string) $value;
-                } else {
-                    $value = json_encode($value);
-                }
-            } elseif (is_bool($value)) {
-                $value = $value ? __('Yes', 'klage-click-doc-out') : __('No', 'klage-click-doc-out');
-            } elseif (is_null($value)) {
-                $value = '';
-            }
-            
-            // Convert to string and apply basic formatting
-            $value = (string) $value;
-            
-            // Replace placeholder (case-insensitive)
-            $template_html = str_ireplace('{{' . $key . '}}', esc_html($value), $template_html);
-        }
-        
-        // Clean up any remaining placeholders
-        $template_html = preg_replace('/\{\{[^}]+\}\}/i', '<span style="color: red; background: yellow;">[MISSING DATA]</span>', $template_html);
-        
-        return $template_html;
+        // Flatten nested arrays for easier placeholder replacement
+        $all_data = array_merge($default_data, KCDO_Template_Compiler::flatten($data, true));
+        
+        return KCDO_Template_Compiler::render(
+            KCDO_Template_Compiler::for_template($template),
+            $all_data,
+            array(
+                'format' => array($this, 'format_placeholder_value'),
+                'missing' => '<span style="color: red; background: yellow;">[MISSING DATA]</span>',
+                'case_insensitive' => true
+            )
+        );
     }
     
     /**
-     * Flatten multi-dimensional array
+     * Format a placeholder value as escaped HTML
      * 
-     * @param array $array Input array
-     * @param string $prefix Key prefix
-     * @return array Flattened array
+     * @param mixed $value Placeholder value
+     * @return string Escaped value
      */
-    private function flatten_array($array, $prefix = '') {
-        $result = array();
-        
-        if (!is_array($array)) {
-            return array($prefix => $array);
-        }
-        
-        foreach ($array as $key => $value) {
-            $new_key = $prefix . $key;
-            
-            if (is_array($value) && !empty($value)) {
-                $result = array_merge($result, $this->flatten_array($value, $new_key . '_'));
+    public function format_placeholder_value($value) {
+        // Handle different data types
+        if (is_array($value)) {
+            $value = implode(', ', $value);
+        } elseif (is_object($value)) {
+            if (method_exists($value, '__toString')) {
+                $value = (string) $value;
             } else {
-                $result[$new_key] = $value;
+                $value = json_encode($value);
             }
+        } elseif (is_bool($value)) {
+            $value = $value ? __('Yes', 'klage-click-doc-out') : __('No', 'klage-click-doc-out');
+        } elseif (is_null($value)) {
+            $value = '';
         }
         
-        return $result;
+        return esc_html((string) $value);
     }
     
     /**
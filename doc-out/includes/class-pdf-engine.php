@@ -204,7 +204,7 @@ class KCDO_PDF_Engine {
         }
         
         // Replace placeholders in template
-        $html = $this->replace_placeholders($template->template_html, $data);
+        $html = $this->replace_placeholders($template, $data);
         
         // Set filename based on template name if not provided
         if (empty($options['filename'])) {
@@ -215,62 +215,40 @@ class KCDO_PDF_Engine {
     }
     
     /**
-     * Replace placeholders in HTML with actual data
+     * Replace placeholders in a template with actual data
      * 
-     * @param string $html HTML content with placeholders
+     * @param object $template Template object
      * @param array $data Data array
      * @return string Processed HTML
      */
-    private function replace_placeholders($html, $data) {
-        // Flatten nested arrays for easier placeholder replacement
-        $flattened_data = $this->flatten_array($data);
-        
-        foreach ($flattened_data as $key => $value) {
-            // Handle different data types
-            if (is_array($value)) {
-                $value = implode(', ', $value);
-            } elseif (is_object($value)) {
-                $value = json_encode($value);
-            } elseif (is_bool($value)) {
-                $value = $value ? __('Yes', 'klage-click-doc-out') : __('No', 'klage-click-doc-out');
-            } elseif (is_null($value)) {
-                $value = '';
-            }
-            
-            // Escape HTML for security
-            $value = esc_html((string) $value);
-            
-            // Replace placeholder
-            $html = str_replace('{{' . $key . '}}', $value, $html);
-        }
-        
-        // Clean up any remaining placeholders
-        $html = preg_replace('/\{\{[^}]+\}\}/', '', $html);
-        
-        return $html;
+    private function replace_placeholders($template, $data) {
+        return KCDO_Template_Compiler::render(
+            KCDO_Template_Compiler::for_template($template),
+            KCDO_Template_Compiler::flatten($data),
+            array('format' => array($this, 'format_placeholder_value'))
+        );
     }
     
     /**
-     * Flatten multi-dimensional array
+     * Format a placeholder value as escaped HTML
      * 
-     * @param array $array Input array
-     * @param string $prefix Key prefix
-     * @return array Flattened array
+     * @param mixed $value Placeholder value
+     * @return string Escaped value
      */
-    private function flatten_array($array, $prefix = '') {
-        $result = array();
-        
-        foreach ($array as $key => $value) {
-            $new_key = $prefix . $key;
-            
-            if (is_array($value)) {
-                $result = array_merge($result, $this->flatten_array($value, $new_key . '_'));
-            } else {
-                $result[$new_key] = $value;
-            }
+    public function format_placeholder_value($value) {
+        // Handle different data types
+        if (is_array($value)) {
+            $value = implode(', ', $value);
+        } elseif (is_object($value)) {
+            $value = json_encode($value);
+        } elseif (is_bool($value)) {
+            $value = $value ? __('Yes', 'klage-click-doc-out') : __('No', 'klage-click-doc-out');
+        } elseif (is_null($value)) {
+            $value = '';
         }
         
-        return $result;
+        // Escape HTML for security
+        return esc_html((string) $value);
     }
     
     /**
@@ -412,6 +390,10 @@ class KCDO_PDF_Engine {
             // Serve HTML file for browser-based PDF generation
             header('Content-Type: text/html; charset=UTF-8');
             header('Content-Disposition: inline; filename="' . $filename . '"');
+        } elseif ($file_extension === 'zip') {
+            // Serve document archive of a bulk generation
+            header('Content-Type: application/zip');
+            header('Content-Disposition: attachment; filename="' . $filename . '"');
         } else {
             // Serve PDF file
             header('Content-Type: application/pdf');
@@ -433,6 +415,43 @@ class KCDO_PDF_Engine {
         exit;
     }
     
+    /**
+     * Merge PDF files into one document
+     * 
+     * @param array $files PDF file paths, in page order
+     * @param string $target_path Path of the merged PDF
+     * @return string|WP_Error Merged PDF file path or error
+     */
+    public function merge_pdfs($files, $target_path) {
+        if (!$this->load_mpdf_library()) {
+            return new WP_Error('mpdf_missing', __('Merging PDF files requires mPDF.', 'klage-click-doc-out'));
+        }
+        
+        try {
+            $mpdf = new \Mpdf\Mpdf(array('mode' => 'utf-8', 'tempDir' => $this->temp_dir));
+            
+            foreach ($files as $file) {
+                $page_count = $mpdf->setSourceFile($file);
+                for ($page = 1; $page <= $page_count; $page++) {
+                    $imported = $mpdf->importPage($page);
+                    $size = $mpdf->getTemplateSize($imported);
+                    $mpdf->AddPageByArray(array(
+                        'orientation' => $size['orientation'],
+                        'sheet-size' => array($size['width'], $size['height'])
+                    ));
+                    $mpdf->useTemplate($imported);
+                }
+            }
+            
+            $mpdf->Output($target_path, \Mpdf\Output\Destination::FILE);
+        } catch (Exception $e) {
+            error_log('mPDF merge error: ' . $e->getMessage());
+            return new WP_Error('pdf_merge_error', $e->getMessage());
+        }
+        
+        return $target_path;
+    }
+    
     /**
      * Clean up old temporary files
      * 
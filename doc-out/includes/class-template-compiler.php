@@ -0,0 +1,155 @@
+<?php
+/**
+ * Template Compiler Class
+ *
+ * Splits template HTML once into literal text and {{placeholder}} tokens and
+ * renders it in a single pass over the tokens
+ *
+ * @package KlageClickDocOut
+ */
+
+// Prevent direct access
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+class KCDO_Template_Compiler {
+
+    const PLACEHOLDER_PATTERN = '/\{\{([^}]+)\}\}/';
+    const CACHE_GROUP = 'kcdo_templates';
+
+    /**
+     * Compiled templates of this request, by cache key
+     */
+    private static $compiled = array();
+
+    /**
+     * Compiled form of a stored template, cached by template ID and updated_at
+     *
+     * @param object $template Template object
+     * @return array Compiled template
+     */
+    public static function for_template($template) {
+        if (empty($template->id) || empty($template->updated_at)) {
+            return self::compile($template->template_html);
+        }
+
+        // updated_at has one-second resolution, the length catches two saves within a second
+        $key = $template->id . ':' . $template->updated_at . ':' . strlen($template->template_html);
+
+        if (!isset(self::$compiled[$key])) {
+            $compiled = wp_cache_get($key, self::CACHE_GROUP);
+            if ($compiled === false) {
+                $compiled = self::compile($template->template_html);
+                wp_cache_set($key, $compiled, self::CACHE_GROUP, DAY_IN_SECONDS);
+            }
+            self::$compiled[$key] = $compiled;
+        }
+
+        return self::$compiled[$key];
+    }
+
+    /**
+     * Compile template HTML
+     *
+     * 'parts' alternates literal text (even indexes) and placeholder names (odd
+     * indexes); 'placeholders' lists each name once, in order of appearance.
+     *
+     * @param string $html Template HTML
+     * @return array Compiled template
+     */
+    public static function compile($html) {
+        $parts = preg_split(self::PLACEHOLDER_PATTERN, (string) $html, -1, PREG_SPLIT_DELIM_CAPTURE);
+        if ($parts === false) {
+            $parts = array((string) $html);
+        }
+
+        $placeholders = array();
+        $seen = array();
+        for ($i = 1, $count = count($parts); $i < $count; $i += 2) {
+            $parts[$i] = trim($parts[$i]);
+            if (!isset($seen[$parts[$i]])) {
+                $seen[$parts[$i]] = true;
+                $placeholders[] = $parts[$i];
+            }
+        }
+
+        return array('parts' => $parts, 'placeholders' => $placeholders);
+    }
+
+    /**
+     * Render a compiled template
+     *
+     * Only the values of placeholders the template uses are formatted, once each.
+     *
+     * @param array $compiled Compiled template
+     * @param array $values Flat placeholder values
+     * @param array $options 'format' callable turning a value into HTML, 'missing' HTML
+     *                       for unknown placeholders, 'case_insensitive' name matching
+     * @return string Rendered HTML
+     */
+    public static function render($compiled, $values, $options = array()) {
+        $options = array_merge(array(
+            'format' => 'esc_html',
+            'missing' => '',
+            'case_insensitive' => false
+        ), $options);
+
+        $lookup = array();
+        $lowercase_values = null;
+        foreach ($compiled['placeholders'] as $name) {
+            if (array_key_exists($name, $values)) {
+                $lookup[$name] = call_user_func($options['format'], $values[$name]);
+                continue;
+            }
+
+            if ($options['case_insensitive']) {
+                if ($lowercase_values === null) {
+                    $lowercase_values = array();
+                    foreach ($values as $key => $value) {
+                        $lowercase_key = strtolower($key);
+                        if (!array_key_exists($lowercase_key, $lowercase_values)) {
+                            $lowercase_values[$lowercase_key] = $value;
+                        }
+                    }
+                }
+                if (array_key_exists(strtolower($name), $lowercase_values)) {
+                    $lookup[$name] = call_user_func($options['format'], $lowercase_values[strtolower($name)]);
+                    continue;
+                }
+            }
+
+            $lookup[$name] = $options['missing'];
+        }
+
+        $parts = $compiled['parts'];
+        for ($i = 1, $count = count($parts); $i < $count; $i += 2) {
+            $parts[$i] = $lookup[$parts[$i]];
+        }
+
+        return implode('', $parts);
+    }
+
+    /**
+     * Flatten nested data to placeholder names (parent_child)
+     *
+     * @param array $data Nested data
+     * @param bool $keep_empty_arrays Keep empty arrays as values instead of dropping them
+     * @return array Flat values
+     */
+    public static function flatten($data, $keep_empty_arrays = false) {
+        $result = array();
+        self::flatten_into($result, $data, '', $keep_empty_arrays);
+        return $result;
+    }
+
+    private static function flatten_into(&$result, $array, $prefix, $keep_empty_arrays) {
+        foreach ($array as $key => $value) {
+            if (is_array($value) && ($value || !$keep_empty_arrays)) {
+                self::flatten_into($result, $value, $prefix . $key . '_', $keep_empty_arrays);
+            } else {
+                $result[$prefix . $key] = $value;
+            }
+        }
+    }
+}
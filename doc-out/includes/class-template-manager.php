@@ -465,19 +465,8 @@ class KCDO_Template_Manager {
      * @return array Array of placeholders
      */
     private function extract_placeholders($html) {
-        preg_match_all('/\{\{([^}]+)\}\}/', $html, $matches);
-        
-        $placeholders = array();
-        if (!empty($matches[1])) {
-            foreach ($matches[1] as $placeholder) {
-                $placeholder = trim($placeholder);
-                if (!in_array($placeholder, $placeholders)) {
-                    $placeholders[] = $placeholder;
-                }
-            }
-        }
-        
-        return $placeholders;
+        $compiled = KCDO_Template_Compiler::compile($html);
+        return $compiled['placeholders'];
     }
     
     /**
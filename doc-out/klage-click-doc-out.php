@@ -31,6 +31,7 @@ class KlageClickDocOut {
     public $rest_api;
     public $core_integration;
     public $s3_storage;
+    public $bulk_generator;
     
     public function __construct() {
         // Set global instance for other classes to access
@@ -74,12 +75,14 @@ class KlageClickDocOut {
      */
     private function includes() {
         // Core classes
+        require_once KCDO_PLUGIN_PATH . 'includes/class-template-compiler.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-template-manager.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-document-generator.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-pdf-engine.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-simple-pdf-generator.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-s3-storage.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-core-integration.php';
+        require_once KCDO_PLUGIN_PATH . 'includes/class-bulk-generator.php';
         require_once KCDO_PLUGIN_PATH . 'includes/class-doc-rest-api.php';
         
         // Admin classes
@@ -100,6 +103,7 @@ class KlageClickDocOut {
         $this->pdf_engine = new KCDO_PDF_Engine();
         $this->s3_storage = new KCDO_S3_Storage();
         $this->core_integration = new KCDO_Core_Integration();
+        $this->bulk_generator = new KCDO_Bulk_Generator();
         $this->rest_api = new KCDO_Doc_REST_API();
         
         if (is_admin()) {
@@ -268,6 +272,9 @@ class KlageClickDocOut {
     public function deactivate() {
         // Clean up temporary files
         $this->cleanup_temp_files();
+        
+        // Stop scheduled bulk generation
+        wp_unschedule_hook('kcdo_bulk_generate');
     }
     
     /**
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Git Change Detection for incremental validation
+Asks git which files changed since a revision (committed, staged, unstaged
+and untracked) and maps them onto the plugin folders they belong to
+"""
+
+import os
+import subprocess
+from typing import Dict, List, Set
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(args: List[str], cwd: str) -> str:
+    try:
+        proc = subprocess.run(['git'] + args, cwd=cwd, capture_output=True, text=True)
+    except OSError as e:
+        raise GitError(str(e))
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.strip() or f"git {' '.join(args)} failed")
+    return proc.stdout
+
+
+def repo_root(path: str) -> str:
+    """Top-level directory of the git repository containing path"""
+    start = path if os.path.isdir(path) else os.path.dirname(path)
+    return _git(['rev-parse', '--show-toplevel'], os.path.abspath(start)).strip()
+
+
+def changed_files(rev: str, path: str = '.') -> Set[str]:
+    """Absolute paths of files changed since rev, including uncommitted and untracked files"""
+    root = repo_root(path)
+    names = _git(['diff', '--name-only', '--no-renames', rev, '--'], root).splitlines()
+    names += _git(['ls-files', '--others', '--exclude-standard'], root).splitlines()
+    return {os.path.normpath(os.path.join(root, name)) for name in names if name}
+
+
+def files_under(changed: Set[str], directory: str) -> Set[str]:
+    """The changed files that live below directory (or directory itself, for a plugin zip)"""
+    path = os.path.abspath(directory)
+    prefix = path + os.sep
+    return {file_path for file_path in changed if file_path == path or file_path.startswith(prefix)}
+
+
+def affected_plugins(changed: Set[str], plugin_paths: List[str]) -> Dict[str, Set[str]]:
+    """Changed files per plugin folder, for the plugins that have any"""
+    affected = {}
+    for plugin_path in plugin_paths:
+        plugin_changes = files_under(changed, plugin_path)
+        if plugin_changes:
+            affected[plugin_path] = plugin_changes
+    return affected
@@ -0,0 +1,154 @@
+<?php
+/**
+ * Import Benchmark Driver for import_benchmark.py
+ * Loads a local WordPress installation with the Legal Automation plugins,
+ * runs one CSV file through one import path and prints one JSON line with
+ * {"rows", "processed", "successful", "failed", "elapsed", "peak_memory", "queries", ...}.
+ *
+ *   php import-benchmark.php <wp-path> <csv|forderungen|universal> <file.csv> [--keep] [--stream]
+ *
+ * csv         LAI_CSV_Source::process_import with the mappings detect_fields() suggests
+ * forderungen LAI_Forderungen_Source::process_import with its own mappings
+ * universal   CAH_Universal_Import_Manager::process_import with the forderungen_com mapping
+ *
+ * --stream runs process_import_file() instead, which reads the file itself,
+ * so the file is never loaded into memory.
+ *
+ * Rows the run inserts are deleted again afterwards unless --keep is given.
+ * Set define('SAVEQUERIES', false) in wp-config.php; the query count comes from
+ * $wpdb->num_queries, which WordPress always maintains.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    exit;
+}
+
+function benchmark_fail($message) {
+    echo json_encode(array('error' => $message)), "\n";
+    exit(1);
+}
+
+$args = array_slice($argv, 1);
+$keep = in_array('--keep', $args, true);
+$stream = in_array('--stream', $args, true);
+$args = array_values(array_diff($args, array('--keep', '--stream')));
+if (count($args) < 3) {
+    fwrite(STDERR, "Usage: php import-benchmark.php <wp-path> <csv|forderungen|universal> <file.csv> [--keep] [--stream]\n");
+    exit(2);
+}
+list($wp_path, $source, $csv_file) = $args;
+
+if (!file_exists(rtrim($wp_path, '/') . '/wp-load.php')) {
+    benchmark_fail("No WordPress installation at $wp_path");
+}
+
+define('WP_USE_THEMES', false);
+$_SERVER['HTTP_HOST'] = isset($_SERVER['HTTP_HOST']) ? $_SERVER['HTTP_HOST'] : 'localhost';
+$_SERVER['REQUEST_URI'] = '/';
+require rtrim($wp_path, '/') . '/wp-load.php';
+set_time_limit(0);
+
+global $wpdb;
+
+// Streaming runs only read the head of the file, for the csv field detection
+$csv_content = $stream ? file_get_contents($csv_file, false, null, 0, 65536) : file_get_contents($csv_file);
+if ($csv_content === false) {
+    benchmark_fail("Could not read $csv_file");
+}
+
+switch ($source) {
+    case 'csv':
+    case 'forderungen':
+        if (!defined('LAI_PLUGIN_PATH')) {
+            benchmark_fail('Legal Automation Import is not active');
+        }
+        require_once LAI_PLUGIN_PATH . 'includes/class-field-mapper.php';
+        require_once LAI_PLUGIN_PATH . 'includes/sources/class-csv-source.php';
+        require_once LAI_PLUGIN_PATH . 'includes/sources/class-forderungen-source.php';
+
+        if ($source === 'csv') {
+            $importer = new LAI_CSV_Source($wpdb, new LAI_Field_Mapper());
+            // The admin flow detects the columns first; that step is not timed
+            $detected = $importer->detect_fields($csv_content);
+            $options = array('field_mappings' => isset($detected['suggested_mappings']) ? $detected['suggested_mappings'] : array());
+            $run = function () use ($importer, $csv_content, $csv_file, $options, $stream) {
+                return $stream ? $importer->process_import_file($csv_file, $options) : $importer->process_import($csv_content, $options);
+            };
+        } else {
+            $importer = new LAI_Forderungen_Source($wpdb, new LAI_Field_Mapper());
+            $run = function () use ($importer, $csv_content, $csv_file, $stream) {
+                return $stream ? $importer->process_import_file($csv_file) : $importer->process_import($csv_content);
+            };
+        }
+        break;
+
+    case 'universal':
+        if (!class_exists('CAH_Universal_Import_Manager')) {
+            benchmark_fail('Legal Automation Core is not active');
+        }
+        $manager = new CAH_Universal_Import_Manager();
+        $clients = $manager->get_supported_clients();
+        $mappings = $clients['forderungen_com']['field_mappings'];
+        $run = function () use ($manager, $csv_content, $csv_file, $mappings, $stream) {
+            return $stream ? $manager->process_import_file($csv_file, $mappings, 'forderungen_com')
+                           : $manager->process_import($csv_content, $mappings, 'forderungen_com');
+        };
+        break;
+
+    default:
+        benchmark_fail("Unknown import source: $source");
+}
+
+// Highest id per table before the run, so the rows it creates can be removed
+$tables = array('klage_cases', 'klage_contacts', 'klage_case_contacts', 'klage_financials',
+                'klage_clients', 'klage_debtors', 'klage_emails');
+$high_water = array();
+foreach ($tables as $table) {
+    $table_name = $wpdb->prefix . $table;
+    if ($wpdb->get_var($wpdb->prepare('SHOW TABLES LIKE %s', $table_name)) === $table_name) {
+        $high_water[$table_name] = (int) $wpdb->get_var("SELECT COALESCE(MAX(id), 0) FROM $table_name");
+    }
+}
+
+if (function_exists('memory_reset_peak_usage')) {
+    memory_reset_peak_usage();
+}
+$memory_before = memory_get_usage();
+$queries_before = $wpdb->num_queries;
+$start = microtime(true);
+
+try {
+    $result = $run();
+} catch (Throwable $e) {
+    $result = array('error' => get_class($e) . ': ' . $e->getMessage());
+}
+
+$elapsed = microtime(true) - $start;
+$queries = $wpdb->num_queries - $queries_before;
+$peak_memory = memory_get_peak_usage();
+
+$errors = isset($result['errors']) && is_array($result['errors']) ? $result['errors'] : array();
+$output = array(
+    'source' => $source,
+    'stream' => $stream,
+    'rows' => isset($result['total_rows']) ? (int) $result['total_rows'] : 0,
+    'processed' => isset($result['processed_rows']) ? (int) $result['processed_rows'] : 0,
+    'successful' => isset($result['successful_imports']) ? (int) $result['successful_imports'] : 0,
+    'failed' => isset($result['failed_imports']) ? (int) $result['failed_imports'] : 0,
+    'error' => isset($result['error']) ? $result['error'] : null,
+    'error_samples' => array_slice($errors, 0, 5),
+    'elapsed' => $elapsed,
+    'queries' => $queries,
+    'memory_before' => $memory_before,
+    'peak_memory' => $peak_memory,
+    'memory_limit' => ini_get('memory_limit'),
+    'php' => PHP_VERSION
+);
+
+if (!$keep) {
+    foreach ($high_water as $table_name => $max_id) {
+        $wpdb->query($wpdb->prepare("DELETE FROM $table_name WHERE id > %d", $max_id));
+    }
+}
+
+echo json_encode($output), "\n";
@@ -0,0 +1,170 @@
+<?php
+/**
+ * Import Job Worker
+ * Processes the background import jobs of CAH_Import_Jobs from the command
+ * line, without WP-Cron or a web request, and manages the job queue.
+ *
+ *   php import-worker.php <wp-path> run [--job ID] [--loop] [--sleep S] [--budget S]
+ *   php import-worker.php <wp-path> create <universal|csv|forderungen_com> <file.csv> [--client-type T] [--chunk-size N]
+ *   php import-worker.php <wp-path> list
+ *   php import-worker.php <wp-path> status|retry|cancel <ID>
+ *
+ * run      processes chunks of all due jobs (or of one job) until none is left;
+ *          --loop keeps polling for new jobs every --sleep seconds (default 10)
+ * create   queues a CSV file; universal uses the mapping of --client-type
+ *          (default forderungen_com), csv the mapping detect_fields() suggests
+ *
+ * Every chunk commits its rows together with the job's cursor, so a worker
+ * that is killed resumes after the last committed row on the next run.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    exit;
+}
+
+function worker_fail($message) {
+    fwrite(STDERR, "❌ $message\n");
+    exit(1);
+}
+
+function worker_option(&$args, $name, $default = null) {
+    $index = array_search($name, $args, true);
+    if ($index === false) {
+        return $default;
+    }
+    $value = isset($args[$index + 1]) ? $args[$index + 1] : $default;
+    array_splice($args, $index, 2);
+    return $value;
+}
+
+function worker_print_progress($progress) {
+    if (isset($progress['error'])) {
+        worker_fail($progress['error']);
+    }
+    $eta = $progress['eta_seconds'] !== null ? gmdate('H:i:s', $progress['eta_seconds']) : '-';
+    printf("#%d %-15s %-9s %5.1f%%  %d rows (%d ok, %d failed)  %s rows/s  ETA %s%s\n",
+        $progress['job_id'], $progress['importer'], $progress['status'], $progress['percent'],
+        $progress['rows_done'], $progress['successful_imports'], $progress['failed_imports'],
+        $progress['rows_per_sec'] !== null ? $progress['rows_per_sec'] : '-', $eta,
+        $progress['last_error'] ? '  ' . $progress['last_error'] : '');
+}
+
+$args = array_slice($argv, 1);
+$loop = in_array('--loop', $args, true);
+$args = array_values(array_diff($args, array('--loop')));
+$job_id = (int) worker_option($args, '--job', 0);
+$sleep = max(1, (int) worker_option($args, '--sleep', 10));
+$budget = (float) worker_option($args, '--budget', 60);
+$client_type = worker_option($args, '--client-type', 'forderungen_com');
+$chunk_size = (int) worker_option($args, '--chunk-size', 0);
+if (count($args) < 2) {
+    fwrite(STDERR, "Usage: php import-worker.php <wp-path> <run|create|list|status|retry|cancel> [...]\n");
+    exit(2);
+}
+list($wp_path, $command) = $args;
+
+if (!file_exists(rtrim($wp_path, '/') . '/wp-load.php')) {
+    worker_fail("No WordPress installation at $wp_path");
+}
+
+define('WP_USE_THEMES', false);
+$_SERVER['HTTP_HOST'] = isset($_SERVER['HTTP_HOST']) ? $_SERVER['HTTP_HOST'] : 'localhost';
+$_SERVER['REQUEST_URI'] = '/';
+require rtrim($wp_path, '/') . '/wp-load.php';
+set_time_limit(0);
+
+global $wpdb, $court_automation_hub;
+
+if (empty($court_automation_hub->import_jobs)) {
+    worker_fail('Legal Automation Core is not active');
+}
+$jobs = $court_automation_hub->import_jobs;
+
+switch ($command) {
+    case 'run':
+        if ($job_id && !$jobs->get_job($job_id)) {
+            worker_fail("Import job #$job_id not found");
+        }
+        do {
+            if ($job_id) {
+                $progress = $jobs->process_chunk($job_id);
+                if ($progress === false) {
+                    echo "⏳ Job #$job_id is being processed by another worker\n";
+                    sleep($sleep);
+                    continue;
+                }
+                worker_print_progress($progress);
+                if (!in_array($progress['status'], array('queued', 'running'), true)) {
+                    break;
+                }
+                continue;
+            }
+
+            $chunks = $jobs->run_due_jobs($budget);
+            foreach ($jobs->get_jobs() as $progress) {
+                if (in_array($progress['status'], array('queued', 'running'), true)) {
+                    worker_print_progress($progress);
+                }
+            }
+            if (!$chunks) {
+                if (!$loop) {
+                    break;
+                }
+                sleep($sleep);
+            }
+        } while (true);
+        echo "✅ No import jobs left to process\n";
+        break;
+
+    case 'create':
+        if (count($args) < 4) {
+            worker_fail('create needs an importer and a CSV file');
+        }
+        list(, , $importer, $csv_file) = $args;
+        $options = array();
+
+        if ($importer === 'universal') {
+            $clients = $court_automation_hub->universal_import_manager->get_supported_clients();
+            if (!isset($clients[$client_type])) {
+                worker_fail("Unknown client type: $client_type");
+            }
+            $options = array('field_mappings' => $clients[$client_type]['field_mappings'], 'client_type' => $client_type);
+        } elseif ($importer === 'csv') {
+            if (!defined('LAI_PLUGIN_PATH')) {
+                worker_fail('Legal Automation Import is not active');
+            }
+            require_once LAI_PLUGIN_PATH . 'includes/class-field-mapper.php';
+            require_once LAI_PLUGIN_PATH . 'includes/sources/class-csv-source.php';
+            $source = new LAI_CSV_Source($wpdb, new LAI_Field_Mapper());
+            $detected = $source->detect_fields(file_get_contents($csv_file, false, null, 0, 65536));
+            $options = array('field_mappings' => isset($detected['suggested_mappings']) ? $detected['suggested_mappings'] : array());
+        }
+
+        $progress = $chunk_size > 0 ? $jobs->create_job($importer, $csv_file, $options, $chunk_size)
+                                    : $jobs->create_job($importer, $csv_file, $options);
+        worker_print_progress($progress);
+        break;
+
+    case 'list':
+        foreach ($jobs->get_jobs(50) as $progress) {
+            worker_print_progress($progress);
+        }
+        break;
+
+    case 'status':
+    case 'retry':
+    case 'cancel':
+        if (!isset($args[2])) {
+            worker_fail("$command needs a job id");
+        }
+        $id = (int) $args[2];
+        if ($command === 'status') {
+            worker_print_progress($jobs->get_progress($id));
+        } else {
+            worker_print_progress($command === 'retry' ? $jobs->retry_job($id) : $jobs->cancel_job($id));
+        }
+        break;
+
+    default:
+        worker_fail("Unknown command: $command");
+}
@@ -418,7 +418,9 @@
                     field_mappings: JSON.stringify(this.fieldMappings)
                 },
                 success: function(response) {
-                    if (response.success) {
+                    if (response.success && response.data.job_id) {
+                        this.pollImportJob(response.data.job_id);
+                    } else if (response.success) {
                         this.showImportResults(response.data);
                     } else {
                         alert('Error: ' + (response.data.message || 'Import failed'));
@@ -433,6 +435,68 @@
             });
         },
         
+        // Poll a background import job until it finishes
+        pollImportJob: function(jobId) {
+            $.ajax({
+                url: lai_ajax.jobs_url + jobId,
+                type: 'GET',
+                headers: {
+                    'X-WP-Nonce': lai_ajax.rest_nonce
+                },
+                success: function(job) {
+                    if (job.status === 'completed' || job.status === 'cancelled') {
+                        this.showImportResults(job);
+                        return;
+                    }
+                    
+                    var html = '<div class="lai-import-results">';
+                    html += '<h3>Import running in the background (job #' + job.job_id + ')</h3>';
+                    html += '<div class="lai-import-stats">';
+                    html += '<div class="lai-stat-card"><h4>' + job.percent + '%</h4><p>Progress</p></div>';
+                    html += '<div class="lai-stat-card"><h4>' + job.rows_done + '</h4><p>Rows Done</p></div>';
+                    html += '<div class="lai-stat-card"><h4>' + (job.rows_per_sec || '-') + '</h4><p>Rows/sec</p></div>';
+                    html += '<div class="lai-stat-card"><h4>' + (job.eta_seconds !== null ? Math.ceil(job.eta_seconds / 60) + ' min' : '-') + '</h4><p>ETA</p></div>';
+                    html += '</div>';
+                    if (job.status === 'failed') {
+                        html += '<div class="lai-notification error"><strong>Import job failed:</strong> ' + (job.last_error || '') + '</div>';
+                        html += '<button class="button button-primary lai-retry-job">Retry</button>';
+                    }
+                    html += '</div>';
+                    $('#lai-import-preview').html(html);
+                    
+                    if (job.status === 'failed') {
+                        $('.lai-retry-job').on('click', function() {
+                            this.retryImportJob(jobId);
+                        }.bind(this));
+                        return;
+                    }
+                    setTimeout(function() {
+                        this.pollImportJob(jobId);
+                    }.bind(this), 3000);
+                }.bind(this),
+                error: function() {
+                    alert('Could not load the import job status');
+                }
+            });
+        },
+        
+        // Retry a failed import job from its last committed row
+        retryImportJob: function(jobId) {
+            $.ajax({
+                url: lai_ajax.jobs_url + jobId + '/retry',
+                type: 'POST',
+                headers: {
+                    'X-WP-Nonce': lai_ajax.rest_nonce
+                },
+                success: function() {
+                    this.pollImportJob(jobId);
+                }.bind(this),
+                error: function(xhr) {
+                    alert('Error: ' + ((xhr.responseJSON && xhr.responseJSON.message) || 'Retry failed'));
+                }
+            });
+        },
+        
         // Show import results
         showImportResults: function(data) {
             var html = '<div class="lai-import-results">';
@@ -0,0 +1,515 @@
+<?php
+/**
+ * Airtable Sync Engine
+ * Pages through an Airtable table under a token-bucket rate limit, writes each
+ * page as it arrives (new records in multi-row INSERTs, known records as batched
+ * upserts keyed on the Airtable record id) and keeps a last-modified cursor so
+ * incremental syncs only pull records changed since the previous sync
+ */
+
+if (!defined('ABSPATH')) {
+    exit;
+}
+
+/**
+ * Token bucket: take() blocks until a request may be sent
+ */
+class LAI_Token_Bucket {
+
+    private $rate;
+    private $capacity;
+    private $tokens;
+    private $updated;
+
+    public function __construct($rate, $capacity = 1) {
+        $this->rate = (float) $rate;
+        $this->capacity = (float) $capacity;
+        $this->tokens = $this->capacity;
+        $this->updated = microtime(true);
+    }
+
+    /**
+     * Take one token, sleeping until one is available; returns the seconds waited
+     */
+    public function take() {
+        $this->refill();
+        $waited = 0.0;
+
+        if ($this->tokens < 1) {
+            $waited = (1 - $this->tokens) / $this->rate;
+            usleep((int) ceil($waited * 1000000));
+            $this->refill();
+        }
+
+        $this->tokens -= 1;
+        return $waited;
+    }
+
+    /**
+     * Send nothing for the next $seconds, e.g. after the API answered 429
+     */
+    public function pause($seconds) {
+        $this->refill();
+        $this->tokens = min($this->tokens, 0) - $seconds * $this->rate;
+    }
+
+    private function refill() {
+        $now = microtime(true);
+        $this->tokens = min($this->capacity, $this->tokens + ($now - $this->updated) * $this->rate);
+        $this->updated = $now;
+    }
+}
+
+/**
+ * One sync run of the configured Airtable table
+ *
+ * The request for the next page is started before the current page is written
+ * and pumped between the page's queries, so downloading and writing overlap.
+ * Without the curl extension pages are fetched one after the other.
+ */
+class LAI_Airtable_Sync {
+
+    const API_URL = 'https://api.airtable.com/v0/';
+    const PAGE_SIZE = 100;
+    const REQUESTS_PER_SECOND = 4.5; // just under Airtable's 5 per base, so network jitter cannot exceed it
+    const RATE_LIMIT_PAUSE = 30;   // Airtable blocks for 30 seconds after a 429
+    const MAX_RETRIES = 5;
+    const CURSOR_OVERLAP = 60;     // seconds, against clock skew; upserts make re-reads harmless
+    const MAX_REPORTED_ERRORS = 100;
+    const INSERT_ORDER = array('klage_contacts', 'klage_cases', 'klage_financials');
+
+    private $wpdb;
+    private $config;
+    private $map_record;
+    private $api_url;
+    private $bucket;
+    private $pending;
+    private $results;
+
+    /**
+     * $map_record($record) returns array('tables' => array(table => data), 'errors' => array())
+     */
+    public function __construct($wpdb, $config, $map_record) {
+        $this->wpdb = $wpdb;
+        $this->config = $config;
+        $this->map_record = $map_record;
+
+        // A local stub can stand in for the API, see airtable_stub.py
+        $this->api_url = trailingslashit(apply_filters('lai_airtable_api_url', self::API_URL));
+        $this->bucket = new LAI_Token_Bucket(apply_filters('lai_airtable_requests_per_second', self::REQUESTS_PER_SECOND));
+    }
+
+    /**
+     * Sync the table; 'incremental' only pulls records modified after the stored cursor
+     */
+    public function run($sync_type = 'incremental', $filter_options = array()) {
+        $this->results = array(
+            'success' => false,
+            'sync_type' => $sync_type,
+            'total_rows' => 0,
+            'processed_rows' => 0,
+            'successful_imports' => 0,
+            'created' => 0,
+            'updated' => 0,
+            'failed_imports' => 0,
+            'write_failures' => 0,
+            'errors' => array(),
+            'omitted_errors' => 0,
+            'created_records' => array('contacts' => 0, 'cases' => 0, 'financials' => 0),
+            'pages' => 0,
+            'requests' => 0,
+            'rate_limited' => 0,
+            'cursor' => $this->config['sync_cursor'] ?? null
+        );
+
+        if (!$this->wpdb->get_var("SELECT GET_LOCK('{$this->wpdb->prefix}lai_airtable_sync', 0)")) {
+            return array('success' => false, 'error' => 'Another Airtable sync is running');
+        }
+
+        try {
+            $this->sync($sync_type, $filter_options);
+        } finally {
+            $this->abort_request();
+            $this->wpdb->get_var("SELECT RELEASE_LOCK('{$this->wpdb->prefix}lai_airtable_sync')");
+        }
+
+        return $this->results;
+    }
+
+    private function sync($sync_type, $filter_options) {
+        // Taken before the first request, so records changed during the sync are pulled again next time
+        $sync_started = time();
+
+        $query = array('pageSize' => self::PAGE_SIZE);
+        $formulas = array();
+        if (!empty($filter_options['formula'])) {
+            $formulas[] = $filter_options['formula'];
+        }
+        if ($sync_type === 'incremental' && !empty($this->config['sync_cursor'])) {
+            $formulas[] = "IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{$this->config['sync_cursor']}'))";
+        }
+        if ($formulas) {
+            $query['filterByFormula'] = count($formulas) > 1 ? 'AND(' . implode(', ', $formulas) . ')' : $formulas[0];
+        }
+        if (!empty($filter_options['view'])) {
+            $query['view'] = $filter_options['view'];
+        }
+
+        $this->start_request($query);
+        while ($this->pending) {
+            $page = $this->finish_request();
+            if (isset($page['error'])) {
+                $this->results['error'] = $page['error'];
+                return;
+            }
+
+            $this->results['pages']++;
+            if (!empty($page['offset'])) {
+                $this->start_request(array_merge($query, array('offset' => $page['offset'])));
+            }
+            $this->write_page($page['records'] ?? array());
+        }
+
+        $this->results['success'] = true;
+
+        // A filtered sync did not see every change, so only full and incremental syncs move the cursor.
+        // Records that failed to write would not be pulled again past a moved cursor, so it stays put;
+        // records with invalid data are pulled again once they are edited in Airtable
+        if ($this->results['write_failures'] > 0) {
+            $this->report('Sync cursor kept at ' . ($this->results['cursor'] ?: 'a full sync') . ' so failed records are pulled again');
+        } elseif (empty($filter_options['formula']) && empty($filter_options['view'])) {
+            $this->results['cursor'] = gmdate('Y-m-d\TH:i:s\Z', $sync_started - self::CURSOR_OVERLAP);
+            $config = get_option('lai_airtable_config', array());
+            $config['sync_cursor'] = $this->results['cursor'];
+            update_option('lai_airtable_config', $config);
+        }
+    }
+
+    /**
+     * Map one page and write it: unknown records are inserted, known ones updated
+     */
+    private function write_page($records) {
+        $entries = array();
+        foreach ($records as $record) {
+            $this->results['total_rows']++;
+            $this->results['processed_rows']++;
+
+            $mapped = call_user_func($this->map_record, $record);
+            $errors = $mapped['errors'] ?: $this->invalid_columns($mapped['tables']);
+            if (!empty($errors)) {
+                $this->fail($record['id'], $errors);
+                continue;
+            }
+
+            // Every record gets a case row, which carries the Airtable id
+            $tables = $mapped['tables'];
+            $tables['klage_cases'] = array_merge($tables['klage_cases'] ?? array(), array('external_id' => $record['id']));
+            $entries[$record['id']] = $tables;
+        }
+        if (empty($entries)) {
+            return;
+        }
+
+        $known = $this->find_cases(array_keys($entries));
+        $this->pump();
+
+        $new = array();
+        foreach ($entries as $airtable_id => $tables) {
+            if (!isset($known[$airtable_id])) {
+                if (!isset($tables['klage_cases']['case_id'])) {
+                    $tables['klage_cases']['case_id'] = 'AT-' . $airtable_id;
+                }
+                $new[] = array('row' => $airtable_id, 'tables' => $tables);
+            }
+        }
+        if ($new) {
+            $this->insert_records($new);
+            $this->pump();
+        }
+
+        $updates = array_intersect_key($entries, $known);
+        if ($updates) {
+            $this->update_records($updates, $known);
+        }
+    }
+
+    /**
+     * Case ids of records synced before, by Airtable id
+     */
+    private function find_cases($airtable_ids) {
+        $placeholders = implode(', ', array_fill(0, count($airtable_ids), '%s'));
+        $rows = $this->wpdb->get_results($this->wpdb->prepare(
+            "SELECT id, external_id FROM {$this->wpdb->prefix}klage_cases
+             WHERE import_source = 'airtable' AND external_id IN ($placeholders)",
+            $airtable_ids
+        ));
+
+        $cases = array();
+        foreach ($rows as $row) {
+            $cases[$row->external_id] = (int) $row->id;
+        }
+        return $cases;
+    }
+
+    private function insert_records($entries) {
+        $importer = new CAH_Batch_Importer($this->wpdb, array(
+            'insert_order' => self::INSERT_ORDER,
+            'links' => array(
+                'klage_financials' => array('case_id' => 'klage_cases')
+            ),
+            'join_tables' => array(
+                'klage_case_contacts' => array(
+                    'requires' => array('case_id' => 'klage_cases', 'contact_id' => 'klage_contacts'),
+                    'values' => array('role' => 'debtor', 'active_status' => 1)
+                )
+            ),
+            'import_source' => 'airtable',
+            'batch_size' => self::PAGE_SIZE
+        ));
+        $results = $importer->import_entries($entries);
+
+        $this->results['successful_imports'] += $results['successful_imports'];
+        $this->results['created'] += $results['successful_imports'];
+        $this->results['failed_imports'] += $results['failed_imports'];
+        $this->results['write_failures'] += $results['failed_imports'];
+        $this->results['omitted_errors'] += $results['omitted_errors'];
+        foreach ($results['created_records'] as $table => $count) {
+            $this->results['created_records'][$table] += $count;
+        }
+        foreach ($results['errors'] as $error) {
+            $this->report($error);
+        }
+    }
+
+    /**
+     * Update the case and debtor contact of known records in one transaction
+     * Financial rows are transactions and are only created with the case
+     */
+    private function update_records($entries, $known) {
+        $case_rows = array();
+        $contact_rows = array();
+        $contacts = $this->find_debtor_contacts(array_values(array_intersect_key($known, $entries)));
+
+        foreach ($entries as $airtable_id => $tables) {
+            $case_id = $known[$airtable_id];
+            $case_rows[] = array_merge(array('id' => $case_id), $tables['klage_cases']);
+            if (!empty($tables['klage_contacts']) && isset($contacts[$case_id])) {
+                $contact_rows[] = array_merge(array('id' => $contacts[$case_id]), $tables['klage_contacts']);
+            }
+        }
+
+        $this->wpdb->query('START TRANSACTION');
+        $error = $this->upsert_rows('klage_cases', $case_rows) ?: $this->upsert_rows('klage_contacts', $contact_rows);
+        if (!$error && $this->wpdb->query('COMMIT') !== false) {
+            $this->results['successful_imports'] += count($entries);
+            $this->results['updated'] += count($entries);
+            return;
+        }
+
+        $this->wpdb->query('ROLLBACK');
+        $this->results['write_failures'] += count($entries);
+        foreach (array_keys($entries) as $airtable_id) {
+            $this->fail($airtable_id, array($error ?: 'Could not commit the update'));
+        }
+    }
+
+    private function find_debtor_contacts($case_ids) {
+        $placeholders = implode(', ', array_fill(0, count($case_ids), '%d'));
+        $rows = $this->wpdb->get_results($this->wpdb->prepare(
+            "SELECT case_id, contact_id FROM {$this->wpdb->prefix}klage_case_contacts
+             WHERE role = 'debtor' AND case_id IN ($placeholders)",
+            $case_ids
+        ));
+
+        $contacts = array();
+        foreach ($rows as $row) {
+            $contacts[(int) $row->case_id] = (int) $row->contact_id;
+        }
+        return $contacts;
+    }
+
+    /**
+     * INSERT ... ON DUPLICATE KEY UPDATE on the primary key, one statement per column set;
+     * returns an error message or ''
+     */
+    private function upsert_rows($table, $rows) {
+        $groups = array();
+        foreach ($rows as $data) {
+            $groups[implode(',', array_keys($data))][] = $data;
+        }
+
+        foreach ($groups as $group) {
+            $columns = array_keys($group[0]);
+            $values = array();
+            foreach ($group as $data) {
+                $values[] = '(' . implode(', ', array_map(array($this, 'quote'), $data)) . ')';
+            }
+            $assignments = array();
+            foreach ($columns as $column) {
+                if ($column !== 'id') {
+                    $assignments[] = "`{$column}` = VALUES(`{$column}`)";
+                }
+            }
+
+            $sql = "INSERT INTO `{$this->wpdb->prefix}{$table}` (`" . implode('`, `', $columns) . '`) VALUES ' . implode(', ', $values)
+                 . ' ON DUPLICATE KEY UPDATE ' . implode(', ', $assignments);
+            if ($this->wpdb->query($sql) === false) {
+                return "Failed to update {$table}: " . $this->wpdb->last_error;
+            }
+            $this->pump();
+        }
+
+        return '';
+    }
+
+    /**
+     * Column names come from the field mappings and cannot be escaped, only checked
+     */
+    private function invalid_columns($tables) {
+        $errors = array();
+        foreach ($tables as $table => $data) {
+            foreach (array_keys($data) as $column) {
+                if (!preg_match('/^[A-Za-z0-9_]+$/', $column)) {
+                    $errors[] = "Invalid target field '{$column}' for {$table}";
+                }
+            }
+        }
+        return $errors;
+    }
+
+    private function quote($value) {
+        if ($value === null) {
+            return 'NULL';
+        }
+        if (is_bool($value)) {
+            $value = (int) $value;
+        }
+        return "'" . esc_sql((string) $value) . "'";
+    }
+
+    /**
+     * Start the request for one page; it runs while the previous page is written
+     */
+    private function start_request($query, $attempt = 0) {
+        $this->results['requests']++;
+        $this->bucket->take();
+
+        $url = $this->api_url . $this->config['base_id'] . '/' . rawurlencode($this->config['table_name']) . '?' . http_build_query($query);
+        $this->pending = array('query' => $query, 'attempt' => $attempt, 'url' => $url);
+
+        if (!function_exists('curl_multi_init')) {
+            return; // fetched in finish_request
+        }
+
+        $handle = curl_init($url);
+        curl_setopt_array($handle, array(
+            CURLOPT_RETURNTRANSFER => true,
+            CURLOPT_TIMEOUT => 30,
+            CURLOPT_HTTPHEADER => array('Authorization: Bearer ' . $this->config['api_key'], 'Content-Type: application/json')
+        ));
+        $ca_bundle = ABSPATH . WPINC . '/certificates/ca-bundle.crt';
+        if (file_exists($ca_bundle)) {
+            curl_setopt($handle, CURLOPT_CAINFO, $ca_bundle);
+        }
+
+        $multi = curl_multi_init();
+        curl_multi_add_handle($multi, $handle);
+        $this->pending['handle'] = $handle;
+        $this->pending['multi'] = $multi;
+        $this->pump();
+    }
+
+    /**
+     * Let the pending transfer progress without blocking
+     */
+    private function pump() {
+        if (isset($this->pending['multi'])) {
+            curl_multi_exec($this->pending['multi'], $running);
+        }
+    }
+
+    /**
+     * Wait for the pending page; retries rate limits and server errors
+     */
+    private function finish_request() {
+        $pending = $this->pending;
+        $this->pending = null;
+
+        if (isset($pending['multi'])) {
+            do {
+                $status = curl_multi_exec($pending['multi'], $running);
+                if ($running && curl_multi_select($pending['multi'], 1.0) === -1) {
+                    usleep(1000);
+                }
+            } while ($running && $status === CURLM_OK);
+
+            $body = curl_multi_getcontent($pending['handle']);
+            $code = (int) curl_getinfo($pending['handle'], CURLINFO_RESPONSE_CODE);
+            $transport_error = curl_error($pending['handle']);
+            $this->close_handles($pending);
+        } else {
+            $response = wp_remote_get($pending['url'], array(
+                'headers' => array(
+                    'Authorization' => 'Bearer ' . $this->config['api_key'],
+                    'Content-Type' => 'application/json'
+                ),
+                'timeout' => 30
+            ));
+            $transport_error = is_wp_error($response) ? $response->get_error_message() : '';
+            $code = $transport_error ? 0 : (int) wp_remote_retrieve_response_code($response);
+            $body = $transport_error ? '' : wp_remote_retrieve_body($response);
+        }
+
+        if ($code === 429 || $code >= 500 || $transport_error) {
+            if ($pending['attempt'] >= self::MAX_RETRIES) {
+                return array('error' => $transport_error ? 'Connection failed: ' . $transport_error : "API Error: HTTP {$code} after " . self::MAX_RETRIES . ' retries');
+            }
+            if ($code === 429) {
+                $this->results['rate_limited']++;
+                $this->bucket->pause(self::RATE_LIMIT_PAUSE);
+            } else {
+                $this->bucket->pause(pow(2, $pending['attempt']));
+            }
+            $this->start_request($pending['query'], $pending['attempt'] + 1);
+            return $this->finish_request();
+        }
+
+        $data = json_decode($body, true);
+        if ($code !== 200) {
+            return array('error' => 'API Error: ' . ($data['error']['message'] ?? $data['error'] ?? "HTTP {$code}"));
+        }
+        if (!is_array($data)) {
+            return array('error' => 'API Error: invalid JSON response');
+        }
+
+        return $data;
+    }
+
+    private function abort_request() {
+        if ($this->pending) {
+            $this->close_handles($this->pending);
+            $this->pending = null;
+        }
+    }
+
+    private function close_handles($pending) {
+        if (isset($pending['multi'])) {
+            curl_multi_remove_handle($pending['multi'], $pending['handle']);
+            curl_close($pending['handle']);
+            curl_multi_close($pending['multi']);
+        }
+    }
+
+    private function fail($airtable_id, $errors) {
+        $this->results['failed_imports']++;
+        $this->report("Record ID {$airtable_id}: " . implode(', ', $errors));
+    }
+
+    private function report($error) {
+        if (count($this->results['errors']) < self::MAX_REPORTED_ERRORS) {
+            $this->results['errors'][] = $error;
+        } else {
+            $this->results['omitted_errors']++;
+        }
+    }
+}
@@ -10,6 +10,15 @@ if (!defined('ABSPATH')) {
 
 class LAI_Import_Manager {
     
+    // Pasted CSV content larger than this is imported by a background job
+    const BACKGROUND_THRESHOLD = 1048576;
+    
+    // Sources that can run as background import jobs
+    const JOB_SOURCES = array('csv', 'forderungen_com');
+    
+    // Import options a REST caller may set; file paths, callbacks and limits stay server-side
+    const REQUEST_OPTIONS = array('background', 'preview_only', 'config');
+    
     private $wpdb;
     private $data_sources;
     private $field_mapper;
@@ -117,6 +126,10 @@ class LAI_Import_Manager {
         // Real-time sync scheduler
         add_action('lai_scheduled_sync', array($this, 'run_scheduled_sync'));
         
+        // Background import jobs run by the core plugin
+        add_filter('cah_import_job_handlers', array($this, 'register_job_handlers'));
+        add_action('cah_import_job_finished', array($this, 'log_finished_job'), 10, 2);
+        
         // Register webhook endpoints
         add_action('init', array($this, 'register_webhook_endpoints'));
     }
@@ -189,6 +202,127 @@ class LAI_Import_Manager {
      * Import data from any supported source
      */
     public function import_from_source($source_id, $data, $options = array()) {
+        $source_handler = $this->get_source_handler($source_id);
+        if (is_array($source_handler)) {
+            return $source_handler;
+        }
+        
+        // Process import; a file_path option streams the file instead of loading it
+        if (!empty($options['file_path']) && method_exists($source_handler, 'process_import_file')) {
+            $result = $source_handler->process_import_file($options['file_path'], $options);
+        } else {
+            $result = $source_handler->process_import($data, $options);
+        }
+        
+        // Log import activity
+        $this->log_import_activity($source_id, $result);
+        
+        return $result;
+    }
+    
+    /**
+     * Queue a background import job for a CSV file of a job source
+     * Returns the job's progress, or array('error' => ...)
+     */
+    public function queue_import($source_id, $file_path, $options = array()) {
+        global $court_automation_hub;
+        
+        if (!in_array($source_id, self::JOB_SOURCES, true)) {
+            return array('error' => 'Background import is not available for ' . $source_id);
+        }
+        if (empty($court_automation_hub->import_jobs)) {
+            return array('error' => 'Background imports need Legal Automation Core');
+        }
+        
+        $source_handler = $this->get_source_handler($source_id);
+        if (is_array($source_handler)) {
+            return $source_handler;
+        }
+        if (method_exists($source_handler, 'check_import_file')) {
+            $error = $source_handler->check_import_file($file_path);
+            if ($error) {
+                return array('error' => $error);
+            }
+        }
+        
+        unset($options['background'], $options['preview_only']);
+        return $court_automation_hub->import_jobs->create_job($source_id, $file_path, $options);
+    }
+    
+    /**
+     * Import job handlers for the CSV based sources
+     */
+    public function register_job_handlers($handlers) {
+        foreach (self::JOB_SOURCES as $source_id) {
+            $handlers[$source_id] = function ($reader, $options) use ($source_id) {
+                $source_handler = $this->get_source_handler($source_id);
+                if (is_array($source_handler)) {
+                    return array('processed_rows' => 0, 'errors' => array($source_handler['error']));
+                }
+                return $source_handler->import_rows($reader, $options);
+            };
+        }
+        return $handlers;
+    }
+    
+    /**
+     * Log finished import jobs like direct imports
+     */
+    public function log_finished_job($progress, $importer) {
+        if (in_array($importer, self::JOB_SOURCES, true) && $progress['status'] === 'completed') {
+            $this->log_import_activity($importer, $progress);
+        }
+    }
+    
+    /**
+     * AJAX: Process import; large content is imported by a background job
+     */
+    public function ajax_process_import() {
+        if (!wp_verify_nonce($_POST['nonce'], 'lai_ajax_nonce')) {
+            wp_die('Security check failed');
+        }
+        
+        if (!current_user_can('manage_options')) {
+            wp_die('Insufficient permissions');
+        }
+        
+        $source_id = sanitize_text_field($_POST['source_id']);
+        $data = wp_unslash($_POST['data'] ?? '');
+        $options = array('field_mappings' => json_decode(wp_unslash($_POST['field_mappings'] ?? ''), true) ?: array());
+        
+        if (!empty($_FILES['csv_file']['tmp_name']) && is_uploaded_file($_FILES['csv_file']['tmp_name'])) {
+            $result = $this->queue_import($source_id, $_FILES['csv_file']['tmp_name'], $options);
+        } elseif (in_array($source_id, self::JOB_SOURCES, true) && (!empty($_POST['background']) || strlen($data) > self::BACKGROUND_THRESHOLD)) {
+            $result = $this->queue_content($source_id, $data, $options);
+        } else {
+            $result = $this->import_from_source($source_id, $data, $options);
+        }
+        
+        if (isset($result['error'])) {
+            wp_send_json_error(array('message' => $result['error']));
+        }
+        wp_send_json_success($result);
+    }
+    
+    /**
+     * Queue CSV content that is already in memory (AJAX and REST requests)
+     */
+    private function queue_content($source_id, $data, $options) {
+        $temp_file = wp_tempnam('lai-import.csv');
+        if (!$temp_file || file_put_contents($temp_file, $data) === false) {
+            return array('error' => 'Could not write the CSV content to a temporary file');
+        }
+        
+        $result = $this->queue_import($source_id, $temp_file, $options);
+        @unlink($temp_file);
+        
+        return $result;
+    }
+    
+    /**
+     * Source handler instance, or array('error' => ...)
+     */
+    private function get_source_handler($source_id) {
         $source_config = $this->get_data_source($source_id);
         
         if (!$source_config) {
@@ -205,15 +339,7 @@ class LAI_Import_Manager {
             return array('error' => 'Source handler not found: ' . $source_class);
         }
         
-        $source_handler = new $source_class($this->wpdb, $this->field_mapper);
-        
-        // Process import
-        $result = $source_handler->process_import($data, $options);
-        
-        // Log import activity
-        $this->log_import_activity($source_id, $result);
-        
-        return $result;
+        return new $source_class($this->wpdb, $this->field_mapper);
     }
     
     /**
@@ -444,6 +570,8 @@ class LAI_Import_Manager {
             $result = $airtable_source->sync_data('incremental');
             
             if ($result['success']) {
+                // Re-read the configuration, the sync has stored a new cursor
+                $airtable_config = get_option('lai_airtable_config', array());
                 $airtable_config['last_sync'] = current_time('mysql');
                 update_option('lai_airtable_config', $airtable_config);
             }
@@ -548,11 +676,15 @@ class LAI_Import_Manager {
         $source_id = $request->get_param('source_id');
         $data = $request->get_param('data');
         $field_mappings = $request->get_param('field_mappings');
-        $options = $request->get_param('options', array());
+        $options = array_intersect_key((array) $request->get_param('options'), array_flip(self::REQUEST_OPTIONS));
         
         $options['field_mappings'] = $field_mappings;
         
-        $result = $this->import_from_source($source_id, $data, $options);
+        if (!empty($options['background'])) {
+            $result = $this->queue_content($source_id, $data, $options);
+        } else {
+            $result = $this->import_from_source($source_id, $data, $options);
+        }
         
         if (isset($result['error'])) {
             return new WP_Error('import_failed', $result['error'], array('status' => 400));
@@ -12,12 +12,14 @@ class LAI_Airtable_Source {
     
     private $wpdb;
     private $field_mapper;
-    private $api_base_url = 'https://api.airtable.com/v0/';
-    private $rate_limit_delay = 200; // milliseconds between requests
+    private $api_base_url;
     
     public function __construct($wpdb, $field_mapper) {
         $this->wpdb = $wpdb;
         $this->field_mapper = $field_mapper;
+        
+        require_once LAI_PLUGIN_PATH . 'includes/class-airtable-sync.php';
+        $this->api_base_url = trailingslashit(apply_filters('lai_airtable_api_url', LAI_Airtable_Sync::API_URL));
     }
     
     /**
@@ -150,6 +152,7 @@ class LAI_Airtable_Source {
     
     /**
      * Sync data from Airtable
+     * Pages are written as they arrive and known records are updated, see LAI_Airtable_Sync
      */
     public function sync_data($sync_type = 'incremental', $filter_options = array()) {
         $config = get_option('lai_airtable_config');
@@ -158,33 +161,6 @@ class LAI_Airtable_Source {
             return array('success' => false, 'error' => 'Airtable not configured');
         }
         
-        $api_key = $config['api_key'];
-        $base_id = $config['base_id'];
-        $table_name = $config['table_name'];
-        
-        $fetch_options = array();
-        
-        // Configure sync based on type
-        if ($sync_type === 'incremental' && isset($config['last_sync'])) {
-            $fetch_options['filterByFormula'] = 'IS_AFTER({Last Modified}, "' . $config['last_sync'] . '")';
-        }
-        
-        // Add custom filters
-        if (!empty($filter_options['formula'])) {
-            $fetch_options['filterByFormula'] = $filter_options['formula'];
-        }
-        
-        if (!empty($filter_options['view'])) {
-            $fetch_options['view'] = $filter_options['view'];
-        }
-        
-        // Fetch all records (handle pagination)
-        $all_records = $this->fetch_all_records($api_key, $base_id, $table_name, $fetch_options);
-        
-        if (isset($all_records['error'])) {
-            return array('success' => false, 'error' => $all_records['error']);
-        }
-        
         // Get field mappings
         $field_mappings = get_option('lai_airtable_field_mappings', array());
         
@@ -192,43 +168,15 @@ class LAI_Airtable_Source {
             return array('success' => false, 'error' => 'Field mappings not configured');
         }
         
-        // Process records
-        $import_results = array(
-            'success' => true,
-            'total_rows' => count($all_records),
-            'processed_rows' => 0,
-            'successful_imports' => 0,
-            'failed_imports' => 0,
-            'errors' => array(),
-            'created_records' => array(
-                'cases' => array(),
-                'contacts' => array(),
-                'financials' => array()
-            )
-        );
-        
-        foreach ($all_records as $record) {
-            $row_result = $this->process_airtable_record($record, $field_mappings);
-            
-            $import_results['processed_rows']++;
-            
-            if ($row_result['success']) {
-                $import_results['successful_imports']++;
-                
-                // Merge created records
-                foreach ($row_result['created_records'] as $type => $records) {
-                    $import_results['created_records'][$type] = array_merge(
-                        $import_results['created_records'][$type] ?? array(),
-                        $records
-                    );
-                }
-            } else {
-                $import_results['failed_imports']++;
-                $import_results['errors'][] = 'Record ID ' . $record['id'] . ': ' . implode(', ', $row_result['errors']);
-            }
+        if (!class_exists('CAH_Batch_Importer')) {
+            return array('success' => false, 'error' => 'Airtable sync needs Legal Automation Core');
         }
         
-        return $import_results;
+        $sync = new LAI_Airtable_Sync($this->wpdb, $config, function ($record) use ($field_mappings) {
+            return $this->map_airtable_record($record, $field_mappings);
+        });
+        
+        return $sync->run($sync_type, is_array($filter_options) ? $filter_options : array());
     }
     
     /**
@@ -264,15 +212,15 @@ class LAI_Airtable_Source {
         $validation_errors = array();
         
         foreach ($records as $index => $record) {
-            $row_result = $this->process_airtable_record($record, $field_mappings, true);
+            $row_result = $this->map_airtable_record($record, $field_mappings);
             
             $preview_data[] = array(
                 'row_number' => $index + 1,
                 'airtable_id' => $record['id'],
                 'original_data' => $record['fields'],
-                'mapped_data' => $row_result['mapped_data'] ?? array(),
-                'errors' => $row_result['errors'] ?? array(),
-                'valid' => $row_result['success'] ?? false
+                'mapped_data' => $row_result['tables'],
+                'errors' => $row_result['errors'],
+                'valid' => empty($row_result['errors'])
             );
             
             if (!empty($row_result['errors'])) {
@@ -324,55 +272,15 @@ class LAI_Airtable_Source {
     }
     
     /**
-     * Fetch all records with pagination
-     */
-    private function fetch_all_records($api_key, $base_id, $table_name, $options = array()) {
-        $all_records = array();
-        $offset = null;
-        
-        do {
-            $request_options = $options;
-            if ($offset) {
-                $request_options['offset'] = $offset;
-            }
-            
-            $response = $this->fetch_records($api_key, $base_id, $table_name, $request_options);
-            
-            if (isset($response['error'])) {
-                return $response;
-            }
-            
-            $all_records = array_merge($all_records, $response);
-            
-            // Check for pagination
-            $offset = $response['offset'] ?? null;
-            
-            // Rate limiting
-            if ($offset) {
-                usleep($this->rate_limit_delay * 1000);
-            }
-            
-        } while ($offset);
-        
-        return $all_records;
-    }
-    
-    /**
-     * Process single Airtable record
+     * Map one Airtable record to table data
+     * Returns array('tables' => array(table => data), 'errors' => array())
      */
-    private function process_airtable_record($record, $field_mappings, $preview_only = false) {
-        $result = array(
-            'success' => false,
-            'errors' => array(),
-            'mapped_data' => array(),
-            'created_records' => array()
-        );
-        
-        $fields = $record['fields'] ?? array();
+    private function map_airtable_record($record, $field_mappings) {
         $table_data = array();
+        $errors = array();
         
         // Map Airtable fields to database fields
-        foreach ($fields as $airtable_field => $value) {
+        foreach ($record['fields'] ?? array() as $airtable_field => $value) {
             if (isset($field_mappings[$airtable_field])) {
                 $mapping = $field_mappings[$airtable_field];
                 
@@ -380,39 +288,14 @@ class LAI_Airtable_Source {
                 $converted_value = $this->convert_airtable_value($value, $mapping);
                 
                 if ($converted_value['valid']) {
-                    $table = $mapping['target_table'];
-                    $field = $mapping['target_field'];
-                    
-                    if (!isset($table_data[$table])) {
-                        $table_data[$table] = array();
-                    }
-                    
-                    $table_data[$table][$field] = $converted_value['value'];
-                } else {
-                    $result['errors'][] = "Field '{$airtable_field}': " . $converted_value['error'];
-                }
-            }
-        }
-        
-        $result['mapped_data'] = $table_data;
-        
-        if (empty($result['errors'])) {
-            if (!$preview_only) {
-                // Insert into database
-                $insert_result = $this->insert_mapped_data($table_data, $record['id']);
-                
-                if ($insert_result['success']) {
-                    $result['success'] = true;
-                    $result['created_records'] = $insert_result['created_records'];
+                    $table_data[$mapping['target_table']][$mapping['target_field']] = $converted_value['value'];
                 } else {
-                    $result['errors'] = $insert_result['errors'];
+                    $errors[] = "Field '{$airtable_field}': " . $converted_value['error'];
                 }
-            } else {
-                $result['success'] = true;
             }
         }
         
-        return $result;
+        return array('tables' => $table_data, 'errors' => $errors);
     }
     
     /**
@@ -491,85 +374,6 @@ class LAI_Airtable_Source {
         return array('valid' => true, 'value' => $value);
     }
     
-    /**
-     * Insert mapped data into database
-     */
-    private function insert_mapped_data($table_data, $airtable_id) {
-        $result = array(
-            'success' => false,
-            'errors' => array(),
-            'created_records' => array()
-        );
-        
-        try {
-            // Start transaction
-            $this->wpdb->query('START TRANSACTION');
-            
-            $created_ids = array();
-            
-            // Insert in proper order: contacts -> cases -> financials
-            $insert_order = array('klage_contacts', 'klage_cases', 'klage_financials');
-            
-            foreach ($insert_order as $table) {
-                if (!isset($table_data[$table])) {
-                    continue;
-                }
-                
-                $data = $table_data[$table];
-                
-                // Add metadata
-                $data['created_at'] = current_time('mysql');
-                $data['import_source'] = 'airtable';
-                $data['external_id'] = $airtable_id;
-                
-                // Handle foreign key relationships
-                if ($table === 'klage_cases' && isset($created_ids['klage_contacts'])) {
-                    // Link case to contact using new v2.0.0 structure
-                    $case_contact_data = array(
-                        'case_id' => null, // Will be filled after case creation
-                        'contact_id' => $created_ids['klage_contacts'],
-                        'role' => 'debtor',
-                        'active_status' => 1,
-                        'created_at' => current_time('mysql')
-                    );
-                }
-                
-                $insert_result = $this->wpdb->insert(
-                    $this->wpdb->prefix . $table,
-                    $data
-                );
-                
-                if ($insert_result === false) {
-                    throw new Exception("Failed to insert into {$table}: " . $this->wpdb->last_error);
-                }
-                
-                $created_ids[$table] = $this->wpdb->insert_id;
-                $result['created_records'][str_replace('klage_', '', $table)][] = $created_ids[$table];
-                
-                // Create case-contact relationship if needed
-                if ($table === 'klage_cases' && isset($case_contact_data)) {
-                    $case_contact_data['case_id'] = $created_ids[$table];
-                    
-                    $this->wpdb->insert(
-                        $this->wpdb->prefix . 'klage_case_contacts',
-                        $case_contact_data
-                    );
-                }
-            }
-            
-            // Commit transaction
-            $this->wpdb->query('COMMIT');
-            $result['success'] = true;
-            
-        } catch (Exception $e) {
-            // Rollback transaction
-            $this->wpdb->query('ROLLBACK');
-            $result['errors'][] = $e->getMessage();
-        }
-        
-        return $result;
-    }
-    
     /**
      * Detect Airtable field type
      */
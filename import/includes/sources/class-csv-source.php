@@ -147,88 +147,70 @@ class LAI_CSV_Source {
     }
     
     /**
-     * Process full CSV import
+     * Process a full import straight from a CSV file, without loading it into memory
      */
-    private function process_full_import($csv_content, $field_mappings, $options) {
-        $import_results = array(
-            'success' => false,
-            'total_rows' => 0,
-            'processed_rows' => 0,
-            'successful_imports' => 0,
-            'failed_imports' => 0,
-            'errors' => array(),
-            'created_records' => array(
-                'cases' => array(),
-                'contacts' => array(),
-                'financials' => array()
-            )
-        );
-        
-        $lines = explode("\n", trim($csv_content));
-        if (empty($lines)) {
-            $import_results['errors'][] = 'CSV content is empty';
-            return $import_results;
+    public function process_import_file($file_path, $options = array()) {
+        $reader = CAH_CSV_Reader::from_file($file_path);
+        if (!$reader) {
+            return array('error' => 'Could not open CSV file');
         }
         
-        $header = str_getcsv($lines[0], ',');
-        if (empty($header)) {
-            $header = str_getcsv($lines[0], ';');
-        }
+        return $this->run_import($reader, $options['field_mappings'] ?? array(), $options);
+    }
+    
+    /**
+     * Process full CSV import
+     */
+    private function process_full_import($csv_content, $field_mappings, $options) {
+        return $this->run_import(CAH_CSV_Reader::from_string($csv_content), $field_mappings, $options);
+    }
+    
+    private function run_import($reader, $field_mappings, $options) {
+        $options['field_mappings'] = $field_mappings;
+        $import_results = $this->import_rows($reader, $options);
+        $reader->close();
         
-        $import_results['total_rows'] = count($lines) - 1;
+        return $import_results;
+    }
+    
+    /**
+     * Stream the rows of a reader into contacts -> cases -> financials, in batches of multi-row INSERTs
+     * Import jobs call this chunk by chunk, with max_rows and on_commit in the options
+     */
+    public function import_rows($reader, $options = array()) {
+        $field_mappings = $options['field_mappings'] ?? array();
         
-        // Process each row
-        for ($i = 1; $i < count($lines); $i++) {
-            $row = str_getcsv($lines[$i], ',');
-            if (empty($row)) {
-                $row = str_getcsv($lines[$i], ';');
-            }
-            
-            if (empty(trim(implode('', $row)))) {
-                continue; // Skip empty rows
-            }
-            
-            $import_results['processed_rows']++;
-            
-            $row_result = $this->process_single_row($header, $row, $field_mappings, $i);
-            
-            if ($row_result['success']) {
-                $import_results['successful_imports']++;
-                
-                // Merge created records
-                foreach ($row_result['created_records'] as $table => $records) {
-                    $import_results['created_records'][$table] = array_merge(
-                        $import_results['created_records'][$table],
-                        $records
-                    );
-                }
-            } else {
-                $import_results['failed_imports']++;
-                $import_results['errors'][] = "Row {$i}: " . implode(', ', $row_result['errors']);
-            }
-        }
+        $importer = new CAH_Batch_Importer($this->wpdb, array(
+            'insert_order' => array('klage_contacts', 'klage_cases', 'klage_financials'),
+            'links' => array(
+                'klage_financials' => array('case_id' => 'klage_cases')
+            ),
+            'join_tables' => array(
+                'klage_case_contacts' => array(
+                    'requires' => array('case_id' => 'klage_cases', 'contact_id' => 'klage_contacts'),
+                    'values' => array('role' => 'debtor', 'active_status' => 1)
+                )
+            ),
+            'import_source' => 'csv',
+            'batch_size' => $options['batch_size'] ?? 500,
+            'on_commit' => $options['on_commit'] ?? null
+        ));
         
-        $import_results['success'] = $import_results['successful_imports'] > 0;
+        // Generated case IDs carry a token of this run (or job) and the row number, so they stay unique
+        $token = $options['case_id_token'] ?? strtoupper(substr(md5(uniqid('', true)), 0, 6));
         
-        return $import_results;
+        return $importer->run($reader, function ($header, $row, $row_number) use ($field_mappings, $token) {
+            return $this->map_row($header, $row, $field_mappings, $row_number, $token);
+        }, $options['max_rows'] ?? 0);
     }
     
     /**
-     * Process single CSV row
+     * Validate one CSV row and group the mapped values by target table
      */
-    private function process_single_row($header, $row, $field_mappings, $row_number) {
-        $row_result = array(
-            'success' => false,
-            'errors' => array(),
-            'created_records' => array(
-                'cases' => array(),
-                'contacts' => array(),
-                'financials' => array()
-            )
-        );
-        
-        // Group mapped data by target table
+    private function map_row($header, $row, $field_mappings, $row_number, $token) {
         $table_data = array();
+        $errors = array();
+        $financial_type = null;
         
         foreach ($header as $index => $csv_field) {
             if (isset($field_mappings[$csv_field]) && isset($row[$index])) {
@@ -238,91 +220,30 @@ class LAI_CSV_Source {
                 $validation_result = $this->validate_field_value($value, $mapping);
                 
                 if ($validation_result['valid']) {
-                    $table = $mapping['target_table'];
-                    $field = $mapping['target_field'];
-                    
-                    if (!isset($table_data[$table])) {
-                        $table_data[$table] = array();
+                    $table_data[$mapping['target_table']][$mapping['target_field']] = $validation_result['value'];
+                    if ($mapping['target_table'] === 'klage_financials' && !empty($mapping['financial_type'])) {
+                        $financial_type = $mapping['financial_type'];
                     }
-                    
-                    $table_data[$table][$field] = $validation_result['value'];
                 } else {
-                    $row_result['errors'][] = "Field '{$csv_field}': " . $validation_result['error'];
+                    $errors[] = "Field '{$csv_field}': " . $validation_result['error'];
                 }
             }
         }
         
-        if (!empty($row_result['errors'])) {
-            return $row_result;
+        // Generate case_id if not provided
+        if (isset($table_data['klage_cases']) && empty($table_data['klage_cases']['case_id'])) {
+            $table_data['klage_cases']['case_id'] = 'CSV-' . date('Y') . '-' . $token . '-' . $row_number;
         }
         
-        // Insert data into database
-        try {
-            // Start transaction
-            $this->wpdb->query('START TRANSACTION');
-            
-            $created_ids = array();
-            
-            // Insert in proper order: contacts -> cases -> case_contacts -> financials
-            $insert_order = array('klage_contacts', 'klage_cases', 'klage_financials');
-            
-            foreach ($insert_order as $table) {
-                if (!isset($table_data[$table])) {
-                    continue;
-                }
-                
-                $data = $table_data[$table];
-                
-                // Add metadata
-                $data['created_at'] = current_time('mysql');
-                $data['import_source'] = 'csv';
-                
-                // Generate case_id if not provided
-                if ($table === 'klage_cases' && empty($data['case_id'])) {
-                    $data['case_id'] = 'CSV-' . date('Y') . '-' . str_pad(wp_rand(1, 9999), 4, '0', STR_PAD_LEFT);
-                }
-                
-                // Insert record
-                $insert_result = $this->wpdb->insert(
-                    $this->wpdb->prefix . $table,
-                    $data
-                );
-                
-                if ($insert_result === false) {
-                    throw new Exception("Failed to insert into {$table}: " . $this->wpdb->last_error);
-                }
-                
-                $created_ids[$table] = $this->wpdb->insert_id;
-                $row_result['created_records'][str_replace('klage_', '', $table)][] = $created_ids[$table];
-            }
-            
-            // Create case-contact relationship if both exist
-            if (isset($created_ids['klage_cases']) && isset($created_ids['klage_contacts'])) {
-                $case_contact_data = array(
-                    'case_id' => $created_ids['klage_cases'],
-                    'contact_id' => $created_ids['klage_contacts'],
-                    'role' => 'debtor',
-                    'active_status' => 1,
-                    'created_at' => current_time('mysql')
-                );
-                
-                $this->wpdb->insert(
-                    $this->wpdb->prefix . 'klage_case_contacts',
-                    $case_contact_data
-                );
-            }
-            
-            // Commit transaction
-            $this->wpdb->query('COMMIT');
-            $row_result['success'] = true;
-            
-        } catch (Exception $e) {
-            // Rollback transaction
-            $this->wpdb->query('ROLLBACK');
-            $row_result['errors'][] = $e->getMessage();
+        // Financial rows need a type and purpose (NOT NULL); case_id is linked on insert
+        if (isset($table_data['klage_financials'])) {
+            $table_data['klage_financials'] += array(
+                'transaction_type' => 'claim',
+                'purpose' => $financial_type ?? 'CSV import'
+            );
         }
         
-        return $row_result;
+        return array('tables' => $table_data, 'errors' => $errors);
     }
     
     /**
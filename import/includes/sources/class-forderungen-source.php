@@ -70,8 +70,8 @@ class LAI_Forderungen_Source {
      * Process Forderungen.com import
      */
     public function process_import($csv_content, $options = array()) {
-        // Validate Forderungen.com format
-        $validation_result = $this->validate_forderungen_format($csv_content);
+        // The format check only needs the header and the first row
+        $validation_result = $this->validate_forderungen_format(CAH_CSV_Reader::from_string(substr($csv_content, 0, 65536)));
         if (!$validation_result['valid']) {
             return array(
                 'error' => 'Invalid Forderungen.com format: ' . implode(', ', $validation_result['errors'])
@@ -88,12 +88,65 @@ class LAI_Forderungen_Source {
         
         if ($result['success']) {
             // Post-process for Forderungen.com specific handling
-            $result = $this->post_process_forderungen_import($result, $csv_content);
+            $result = $this->post_process_forderungen_import($result, $validation_result['header']);
         }
         
         return $result;
     }
     
+    /**
+     * Process a Forderungen.com export straight from the file, for exports too large to load
+     */
+    public function process_import_file($file_path, $options = array()) {
+        $reader = CAH_CSV_Reader::from_file($file_path);
+        if (!$reader) {
+            return array('error' => 'Could not open CSV file');
+        }
+        
+        $validation_result = $this->validate_forderungen_format($reader);
+        if (!$validation_result['valid']) {
+            return array(
+                'error' => 'Invalid Forderungen.com format: ' . implode(', ', $validation_result['errors'])
+            );
+        }
+        
+        if (empty($options['field_mappings'])) {
+            $options['field_mappings'] = $this->get_forderungen_field_mappings();
+        }
+        
+        $result = $this->csv_source->process_import_file($file_path, $options);
+        
+        if (!empty($result['success'])) {
+            $result = $this->post_process_forderungen_import($result, $validation_result['header']);
+        }
+        
+        return $result;
+    }
+    
+    /**
+     * Format error of a Forderungen.com export file, or '' if it can be imported
+     */
+    public function check_import_file($file_path) {
+        $reader = CAH_CSV_Reader::from_file($file_path);
+        if (!$reader) {
+            return 'Could not open CSV file';
+        }
+        
+        $validation_result = $this->validate_forderungen_format($reader);
+        return $validation_result['valid'] ? '' : 'Invalid Forderungen.com format: ' . implode(', ', $validation_result['errors']);
+    }
+    
+    /**
+     * Import the next rows of a reader, used by background import jobs
+     */
+    public function import_rows($reader, $options = array()) {
+        if (empty($options['field_mappings'])) {
+            $options['field_mappings'] = $this->get_forderungen_field_mappings();
+        }
+        
+        return $this->csv_source->import_rows($reader, $options);
+    }
+    
     /**
      * Get Forderungen.com specific field mappings
      */
@@ -232,26 +285,24 @@ class LAI_Forderungen_Source {
     /**
      * Validate Forderungen.com CSV format
      */
-    private function validate_forderungen_format($csv_content) {
+    private function validate_forderungen_format($reader) {
         $validation = array(
             'valid' => true,
             'errors' => array(),
-            'warnings' => array()
+            'warnings' => array(),
+            'header' => $reader->get_header()
         );
         
-        $lines = explode("\n", trim($csv_content));
-        if (empty($lines)) {
+        $header = $validation['header'];
+        $sample_row = $reader->next_row();
+        $reader->close();
+        
+        if (empty($header)) {
             $validation['valid'] = false;
             $validation['errors'][] = 'CSV content is empty';
             return $validation;
         }
         
-        // Parse header
-        $header = str_getcsv($lines[0], ',');
-        if (empty($header)) {
-            $header = str_getcsv($lines[0], ';');
-        }
-        
         // Check for required Forderungen.com columns
         $required_columns = array('ID', 'Lawyer Case ID', 'User_First_Name', 'User_Last_Name');
         $missing_columns = array();
@@ -282,15 +333,8 @@ class LAI_Forderungen_Source {
         }
         
         // Validate data rows (sample check)
-        if (count($lines) > 1) {
-            $sample_row = str_getcsv($lines[1], ',');
-            if (empty($sample_row)) {
-                $sample_row = str_getcsv($lines[1], ';');
-            }
-            
-            if (count($sample_row) !== count($header)) {
-                $validation['warnings'][] = 'Column count mismatch in data rows';
-            }
+        if ($sample_row !== null && count($sample_row) !== count($header)) {
+            $validation['warnings'][] = 'Column count mismatch in data rows';
         }
         
         return $validation;
@@ -299,17 +343,10 @@ class LAI_Forderungen_Source {
     /**
      * Post-process Forderungen.com import
      */
-    private function post_process_forderungen_import($import_result, $csv_content) {
-        // Extract additional processing info
-        $lines = explode("\n", trim($csv_content));
-        $header = str_getcsv($lines[0], ',');
-        if (empty($header)) {
-            $header = str_getcsv($lines[0], ';');
-        }
-        
+    private function post_process_forderungen_import($import_result, $header) {
         // Handle dual contact creation (client and debtor)
         if ($import_result['success']) {
-            $this->create_dual_contacts($import_result, $lines, $header);
+            $this->create_dual_contacts($import_result, $header);
         }
         
         // Add Forderungen.com specific metadata
@@ -323,7 +360,7 @@ class LAI_Forderungen_Source {
     /**
      * Create dual contacts (client and debtor) for Forderungen.com cases
      */
-    private function create_dual_contacts($import_result, $lines, $header) {
+    private function create_dual_contacts($import_result, $header) {
         // This is a placeholder for complex dual contact creation logic
         // In a full implementation, this would:
         // 1. Parse each row again
@@ -255,6 +255,7 @@ class LegalAutomationImport {
         wp_localize_script('lai-admin-script', 'lai_ajax', array(
             'ajax_url' => admin_url('admin-ajax.php'),
             'rest_url' => rest_url('legal-automation/v1/'),
+            'jobs_url' => rest_url('klage-click/v1/import-jobs/'),
             'nonce' => wp_create_nonce('lai_ajax_nonce'),
             'rest_nonce' => wp_create_nonce('wp_rest')
         ));
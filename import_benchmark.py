@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Import Benchmark for the Legal Automation CSV import paths
+Generates seeded, realistic CSV datasets (1k to 1M rows, comma or semicolon
+separated, German headers for the generic import and the Forderungen.com
+columns for the specialised ones, messy values and duplicate rows) and drives
+each size end-to-end through import-benchmark.php against a local WordPress
+installation:
+
+    csv          LAI_CSV_Source::process_import
+    forderungen  LAI_Forderungen_Source::process_import
+    universal    CAH_Universal_Import_Manager::process_import (forderungen_com)
+
+--stream imports through the process_import_file() entry points, which read
+the file record by record instead of loading it (a separate series).
+
+Rows/sec, peak PHP memory, query count and error rate are recorded per size in
+the run history (one series per profile and delimiter), tagged with the plugin
+versions from deployment-manifest.json, so --compare can show how the scaling
+curve changed since the previous plugin version.
+
+The Forderungen.com columns and types are read from the mapping arrays in the
+PHP sources, so the datasets follow the plugins when a column is added.
+
+Usage:
+    python3 import_benchmark.py --wp-path /var/www/html [--profile csv,forderungen,universal]
+                                [--sizes 1000,10000,100000] [--delimiter ',;'] [--seed 42] [--stream]
+    python3 import_benchmark.py --generate-only --sizes 1000000 [--data-dir DIR]
+    python3 import_benchmark.py --compare
+"""
+
+import os
+import csv
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import deque
+from typing import Dict, List, Optional
+
+from php_symbols import returned_literal
+from run_history import DEFAULT_HISTORY_DB, RunHistory, build_run, record_run
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVER = os.path.join(BASE_DIR, 'import-benchmark.php')
+DEFAULT_MANIFEST = os.path.join(BASE_DIR, 'deployment-manifest.json')
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'la-import-benchmark')
+DEFAULT_SIZES = '1000,10000,100000'
+MAX_ROWS = 1_000_000
+
+DELIMITER_NAMES = {',': 'comma', ';': 'semicolon'}
+
+# Mapping arrays the specialised import paths use; the dataset columns come from these
+PROFILES = {
+    'csv': {
+        'description': 'LAI_CSV_Source with German headers'
+    },
+    'forderungen': {
+        'description': 'LAI_Forderungen_Source',
+        'mapping_file': 'import/includes/sources/class-forderungen-source.php',
+        'mapping_function': 'get_forderungen_field_mappings'
+    },
+    'universal': {
+        'description': 'CAH_Universal_Import_Manager (forderungen_com)',
+        'mapping_file': 'core/includes/class-universal-import-manager.php',
+        'mapping_function': 'get_forderungen_com_mapping'
+    }
+}
+
+# Header, target field, data type; the headers match LAI_CSV_Source::suggest_field_mapping
+# except for the last five, which the generic import leaves unmapped
+GENERIC_COLUMNS = [
+    ('Fall-ID', 'case_id', 'string'),
+    ('Vorname', 'first_name', 'string'),
+    ('Nachname', 'last_name', 'string'),
+    ('E-Mail', 'email', 'email'),
+    ('Firma', 'company_name', 'string'),
+    ('Telefon', 'phone', 'phone'),
+    ('Status', 'case_status', 'string'),
+    ('Forderungsbetrag', 'claim_amount', 'decimal'),
+    ('Straße', 'street', 'string'),
+    ('PLZ', 'postal_code', 'string'),
+    ('Ort', 'city', 'string'),
+    ('Erstellt am', 'case_creation_date', 'date'),
+    ('Bemerkung', 'case_notes', 'text')
+]
+
+GENERIC_STATUSES = ['Offen', 'In Bearbeitung', 'Abgeschlossen', 'Mahnverfahren', 'Klage eingereicht']
+
+FIRST_NAMES = ['Anna', 'Lukas', 'Sophie', 'Jürgen', 'Marie', 'Jonas', 'Lea', 'Björn', 'Hannah', 'Felix',
+               'Käthe', 'Maximilian', 'Emilia', 'Sören', 'Johanna', 'Paul', 'Zoë', 'Thomas', 'Mia', 'Özlem']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker', 'Schulz',
+              'Hoffmann', 'Schäfer', 'Koch', 'Bauer', 'Richter', 'Klein', 'Wolf', 'Schröder', 'Neumann',
+              'Groß', 'Yılmaz', 'von der Heide']
+COMPANY_WORDS = ['Nordlicht', 'Alpen', 'Rhein', 'Hanse', 'Spree', 'Elbtal', 'Schwarzwald', 'Ostsee', 'Main']
+COMPANY_KINDS = ['Marketing', 'Versand', 'Media', 'Handel', 'Consulting', 'Direktwerbung', 'Online']
+LEGAL_FORMS = ['GmbH', 'GmbH & Co. KG', 'AG', 'UG (haftungsbeschränkt)', 'e.K.', 'KG']
+STREETS = ['Hauptstraße', 'Schillerstraße', 'Goethestraße', 'Bahnhofstraße', 'Am Mühlbach', 'Lindenallee',
+           'Königsweg', 'Friedrich-Ebert-Straße', 'Kirchplatz', 'Gartenstraße']
+CITIES = [('10115', 'Berlin'), ('20095', 'Hamburg'), ('80331', 'München'), ('50667', 'Köln'),
+          ('60311', 'Frankfurt am Main'), ('70173', 'Stuttgart'), ('40213', 'Düsseldorf'), ('04109', 'Leipzig'),
+          ('01067', 'Dresden'), ('90402', 'Nürnberg'), ('28195', 'Bremen'), ('30159', 'Hannover')]
+MAIL_DOMAINS = ['gmx.de', 'web.de', 't-online.de', 'gmail.com', 'posteo.de', 'outlook.de']
+NOTES = ['Spam-E-Mail ohne Einwilligung erhalten', 'Auskunft nach Art. 15 DSGVO angefordert',
+         'Mahnung verschickt; keine Reaktion', 'Schuldner bittet um Ratenzahlung',
+         'Zustellung fehlgeschlagen, neue Anschrift ermitteln', 'Vergleichsangebot über 50 % abgelehnt']
+TRANSLITERATION = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss', 'ı': 'i', 'ë': 'e',
+                                 'Ä': 'Ae', 'Ö': 'Oe', 'Ü': 'Ue', ' ': ''})
+
+
+def load_columns(profile: str) -> List[Dict]:
+    """Dataset columns of a profile: header, target field, data type and allowed values"""
+    config = PROFILES[profile]
+    if 'mapping_file' not in config:
+        return [{'header': header, 'field': field, 'type': data_type, 'values': None}
+                for header, field, data_type in GENERIC_COLUMNS]
+
+    path = os.path.join(BASE_DIR, config['mapping_file'])
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        mapping = returned_literal(f.read(), config['mapping_function'])
+    if not isinstance(mapping, dict) or not mapping:
+        raise ValueError(f"Could not read {config['mapping_function']}() from {config['mapping_file']}")
+    return [{
+        'header': header,
+        'field': definition.get('target_field', ''),
+        'type': definition.get('data_type', 'string'),
+        'values': list(definition['value_mapping']) if definition.get('value_mapping') else None
+    } for header, definition in mapping.items()]
+
+
+class RowFactory:
+    """Seeded rows of plausible German case data; the same seed always gives the same file"""
+
+    def __init__(self, columns: List[Dict], rng: random.Random, messy: float):
+        self.columns = columns
+        self.rng = rng
+        self.messy = messy
+        self.messy_cells = 0
+
+    def person(self) -> Dict[str, str]:
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        postal_code, city = rng.choice(CITIES)
+        local = f"{first}.{last}".translate(TRANSLITERATION).lower()
+        return {
+            'first_name': first,
+            'last_name': last,
+            'email': f"{local}{rng.choice(['', str(rng.randint(1, 99))])}@{rng.choice(MAIL_DOMAINS)}",
+            'phone': rng.choice(['+49 ', '0']) + f"{rng.randint(30, 999)} {rng.randint(100000, 9999999)}",
+            'street': rng.choice(STREETS),
+            'house_number': str(rng.randint(1, 180)) + rng.choice(['', '', '', 'a', 'b']),
+            'postal_code': postal_code,
+            'city': city
+        }
+
+    def company(self) -> str:
+        rng = self.rng
+        return f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_KINDS)} {rng.choice(LEGAL_FORMS)}"
+
+    def value(self, column: Dict, number: int, user: Dict, debtor: Dict, company: str, created: float) -> str:
+        rng = self.rng
+        field, data_type = column['field'], column['type']
+        party = debtor if field.startswith('debtors_') or column['header'].startswith('Debtor') else user
+        key = field.replace('users_', '').replace('debtors_', '')
+
+        if column['values']:
+            return rng.choice(column['values'])
+        if field == 'external_id':
+            return 'rec' + ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789')
+                                   for _ in range(14))
+        if field == 'case_id':
+            return f"{time.gmtime(created).tm_year}-{number:06d}"
+        if field == 'case_status':
+            return rng.choice(GENERIC_STATUSES)
+        if field == 'company_name':
+            return company
+        if key == 'name':
+            # Debtor_Name: the company for most spam senders, otherwise the surname
+            return company if rng.random() < 0.7 else party['last_name']
+        if key in ('street_number', 'house_number'):
+            return party['house_number']
+        if key == 'address':
+            return f"{party['street']} {party['house_number']}"
+        if key == 'country':
+            return 'Deutschland'
+        if key in party:
+            return party[key]
+        if data_type == 'email':
+            return party['email'] if 'user' in field else f"info@{company.split()[0].lower()}.de"
+        if data_type == 'decimal':
+            return rng.choice(['350.00', '500.00', '1000.00']) if 'art15' in field \
+                else f"{rng.uniform(20, 5000):.2f}"
+        if data_type == 'integer':
+            return str(rng.randint(0, 40)) if 'number' in field else str(rng.randint(1000, 999999))
+        if data_type == 'datetime':
+            return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(created))
+        if data_type == 'date':
+            return time.strftime('%Y-%m-%d', time.gmtime(created))
+        if data_type == 'time':
+            return time.strftime('%H:%M', time.gmtime(created))
+        if data_type == 'url':
+            return f"https://dl.airtable.com/.attachments/{rng.getrandbits(64):016x}/brief-{number}.pdf"
+        if data_type == 'text':
+            return rng.choice(NOTES)
+        if 'subject' in field:
+            return rng.choice(['Ihre Bestellung', 'Gewinnbenachrichtigung!!!', 'Letzte Mahnung', 'Newsletter'])
+        return rng.choice(NOTES).split()[0]
+
+    def mess(self, value: str, column: Dict) -> str:
+        """One of the defects real exports have; an emptied required cell fails its row"""
+        rng = self.rng
+        data_type = column['type']
+        variants = ['whitespace', 'empty']
+        if data_type == 'decimal':
+            variants += ['decimal_comma', 'currency']
+        elif data_type in ('date', 'datetime'):
+            variants.append('german_date')
+        elif data_type == 'email':
+            variants += ['uppercase', 'invalid_email']
+        elif data_type == 'text':
+            variants += ['delimiters', 'quotes', 'multiline']
+        elif data_type == 'string':
+            variants += ['delimiters', 'quotes', 'uppercase']
+
+        variant = rng.choice(variants)
+        self.messy_cells += 1
+        if variant == 'whitespace':
+            return f"  {value}\t"
+        if variant == 'empty':
+            return ''
+        if variant == 'decimal_comma':
+            amount = float(value)
+            return f"{amount:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        if variant == 'currency':
+            return f"{value.replace('.', ',')} €"
+        if variant == 'german_date':
+            parts = value.split(' ')[0].split('-')
+            return '.'.join(reversed(parts)) + (' ' + value.split(' ')[1] if ' ' in value else '')
+        if variant == 'uppercase':
+            return value.upper()
+        if variant == 'invalid_email':
+            return value.replace('@', rng.choice([' (at) ', '@@', ' ']))
+        if variant == 'delimiters':
+            return f"{value}, {rng.choice(LAST_NAMES)}; {rng.choice(LAST_NAMES)}"
+        if variant == 'quotes':
+            return f'"{value}" (lt. Impressum)'
+        return f"{value}\nRückruf erbeten"
+
+    def row(self, number: int) -> List[str]:
+        rng = self.rng
+        user, debtor, company = self.person(), self.person(), self.company()
+        created = 1672531200 + rng.randint(0, 3 * 365 * 86400)  # 2023 to 2025
+        row = []
+        for column in self.columns:
+            value = self.value(column, number, user, debtor, company, created)
+            if self.messy and rng.random() < self.messy:
+                value = self.mess(value, column)
+            row.append(value)
+        return row
+
+
+def dataset_path(data_dir: str, profile: str, rows: int, delimiter: str, seed: int,
+                 messy: float, duplicates: float) -> str:
+    name = f"{profile}-{rows}-{DELIMITER_NAMES[delimiter]}-s{seed}-m{messy:g}-d{duplicates:g}.csv"
+    return os.path.join(data_dir, name)
+
+
+def generate(path: str, columns: List[Dict], rows: int, delimiter: str, seed: int,
+             messy: float, duplicates: float) -> Dict:
+    """Write one dataset; duplicates repeat a recent row exactly or with a changed status and amount"""
+    rng = random.Random(f"{seed}:{rows}:{delimiter}:{','.join(column['header'] for column in columns)}")
+    factory = RowFactory(columns, rng, messy)
+    recent = deque(maxlen=1000)
+    duplicate_rows = 0
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.partial'
+    with open(partial, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=delimiter, lineterminator='\n')
+        writer.writerow([column['header'] for column in columns])
+        for number in range(1, rows + 1):
+            if recent and rng.random() < duplicates:
+                row = list(rng.choice(recent))
+                if rng.random() < 0.5:
+                    # Re-export of the same case after an update
+                    for index, column in enumerate(columns):
+                        if column['values'] or column['type'] == 'decimal':
+                            row[index] = factory.value(column, number, factory.person(), factory.person(),
+                                                       factory.company(), 1672531200)
+                duplicate_rows += 1
+            else:
+                row = factory.row(number)
+                recent.append(row)
+            writer.writerow(row)
+    os.replace(partial, path)
+
+    return {'rows': rows, 'bytes': os.path.getsize(path), 'duplicates': duplicate_rows,
+            'messy_cells': factory.messy_cells}
+
+
+def plugin_versions(manifest_path: str, plugins=('core', 'import')) -> Dict[str, str]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {plugin: str(manifest[plugin]) for plugin in plugins if plugin in manifest}
+
+
+def run_import(php: str, wp_path: str, source: str, path: str, keep: bool, memory_limit: str,
+               timeout: float, stream: bool = False) -> Dict:
+    """One import through import-benchmark.php; failures come back as {'error': ...}"""
+    command = [php, '-d', f'memory_limit={memory_limit}', DRIVER, wp_path, source, path]
+    if keep:
+        command.append('--keep')
+    if stream:
+        command.append('--stream')
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f'Timed out after {timeout:g}s'}
+    except OSError as e:
+        return {'error': str(e)}
+
+    # WordPress or a plugin may print notices first; the driver's JSON is the last line
+    for line in reversed(proc.stdout.strip().splitlines()):
+        if line.startswith('{'):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    output = (proc.stderr or proc.stdout).strip().splitlines()
+    return {'error': output[-1] if output else f'Driver exited with code {proc.returncode}'}
+
+
+def size_metrics(rows: int, dataset: Dict, outcome: Dict) -> Dict:
+    """Throughput per generated row; PHP may count more lines when a quoted field spans lines"""
+    elapsed = outcome.get('elapsed') or 0.0
+    successful = outcome.get('successful', 0)
+    return {
+        'rows': rows,
+        'bytes': dataset['bytes'],
+        'duplicates': dataset['duplicates'],
+        'elapsed': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else 0.0,
+        'peak_memory': outcome.get('peak_memory'),
+        'queries': outcome.get('queries'),
+        'queries_per_row': outcome['queries'] / rows if outcome.get('queries') is not None else None,
+        'successful': successful,
+        'failed': outcome.get('failed', 0),
+        'error_rate': 1.0 - min(successful, rows) / rows,
+        'error': outcome.get('error'),
+        'error_samples': outcome.get('error_samples', [])
+    }
+
+
+def scaling_exponent(sizes: List[Dict]) -> Optional[float]:
+    """Least-squares slope of log(time) over log(rows): 1.0 is linear, 2.0 quadratic"""
+    points = [(math.log(size['rows']), math.log(size['elapsed'])) for size in sizes
+              if size['elapsed'] > 0 and not size['error']]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def format_memory(value: Optional[int]) -> str:
+    return f"{value / 1024 / 1024:.1f} MB" if value else '-'
+
+
+def print_curve(target: str, results: Dict):
+    versions = ', '.join(f"{plugin} {version}" for plugin, version in results['versions'].items())
+    print(f"\n📈 {target} ({versions})")
+    print(f"   {'rows':>9}  {'time':>9}  {'rows/s':>9}  {'peak mem':>10}  {'queries/row':>11}  {'errors':>7}")
+    for size in results['sizes']:
+        if size['error'] and not size['elapsed']:
+            print(f"   {size['rows']:>9}  ❌ {size['error']}")
+            continue
+        queries = f"{size['queries_per_row']:.1f}" if size['queries_per_row'] is not None else '-'
+        print(f"   {size['rows']:>9}  {size['elapsed']:>8.2f}s  {size['rows_per_sec']:>9.0f}  "
+              f"{format_memory(size['peak_memory']):>10}  {queries:>11}  {size['error_rate'] * 100:>6.1f}%")
+        for sample in size['error_samples'][:2]:
+            print(f"   {'':>9}  ⚠️  {sample[:100]}")
+    if results['exponent'] is not None:
+        print(f"   scaling: time ∝ rows^{results['exponent']:.2f}")
+
+
+def compare_versions(history: RunHistory, target: str) -> Optional[Dict]:
+    """The newest curve of a series against the newest one recorded for other plugin versions"""
+    runs = history.runs('import_benchmark', target)
+    if not runs:
+        return None
+    current = json.loads(runs[0]['results'])
+    previous = None
+    for run in runs[1:]:
+        results = json.loads(run['results'])
+        if results.get('versions') != current.get('versions'):
+            previous = results
+            break
+    if previous is None and len(runs) > 1:
+        previous = json.loads(runs[1]['results'])  # same versions: compare with the run before
+    if previous is None:
+        return None
+
+    before = {size['rows']: size for size in previous['sizes'] if not size['error']}
+    sizes = []
+    for size in current['sizes']:
+        old = before.get(size['rows'])
+        if old is None or size['error'] or not old['rows_per_sec']:
+            continue
+        sizes.append({
+            'rows': size['rows'],
+            'rows_per_sec': (old['rows_per_sec'], size['rows_per_sec']),
+            'speedup': size['rows_per_sec'] / old['rows_per_sec'],
+            'peak_memory': (old['peak_memory'], size['peak_memory']),
+            'queries_per_row': (old['queries_per_row'], size['queries_per_row']),
+            'error_rate': (old['error_rate'], size['error_rate'])
+        })
+    return {'target': target, 'versions': (previous.get('versions'), current.get('versions')),
+            'exponent': (previous.get('exponent'), current.get('exponent')), 'sizes': sizes}
+
+
+def print_comparison(comparison: Dict):
+    def label(versions):
+        return ', '.join(f"{plugin} {version}" for plugin, version in (versions or {}).items()) or 'unknown'
+
+    old_versions, new_versions = comparison['versions']
+    print(f"\n🔄 {comparison['target']}: {label(old_versions)} → {label(new_versions)}")
+    for size in comparison['sizes']:
+        icon = '🚀' if size['speedup'] >= 1.1 else '🐌' if size['speedup'] <= 0.9 else '➖'
+        old_rate, new_rate = size['rows_per_sec']
+        old_memory, new_memory = size['peak_memory']
+        print(f"   {icon} {size['rows']:>9} rows: {old_rate:.0f} → {new_rate:.0f} rows/s ({size['speedup']:.2f}x), "
+              f"peak {format_memory(old_memory)} → {format_memory(new_memory)}, "
+              f"errors {size['error_rate'][0] * 100:.1f}% → {size['error_rate'][1] * 100:.1f}%")
+    old_exponent, new_exponent = comparison['exponent']
+    if old_exponent is not None and new_exponent is not None:
+        print(f"   scaling exponent: {old_exponent:.2f} → {new_exponent:.2f}")
+
+
+def parse_sizes(text: str) -> List[int]:
+    sizes = sorted({int(part.replace('_', '')) for part in text.split(',') if part.strip()})
+    if not sizes or sizes[0] < 1 or sizes[-1] > MAX_ROWS:
+        raise argparse.ArgumentTypeError(f"sizes must be between 1 and {MAX_ROWS}")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CSV import paths with synthetic datasets')
+    parser.add_argument('--wp-path', help='Local WordPress installation with the plugins active')
+    parser.add_argument('--profile', default='csv,forderungen,universal',
+                        help=f"Comma-separated import paths: {', '.join(PROFILES)}")
+    parser.add_argument('--sizes', type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help=f"Comma-separated row counts, up to {MAX_ROWS} (default: {DEFAULT_SIZES})")
+    parser.add_argument('--delimiter', default=',;', help="Delimiters to test, any of ',;' (default: both)")
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the generated datasets')
+    parser.add_argument('--messy', type=float, default=0.02, help='Fraction of cells with a defect')
+    parser.add_argument('--duplicates', type=float, default=0.03, help='Fraction of duplicate rows')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Where the generated datasets are cached')
+    parser.add_argument('--regenerate', action='store_true', help='Regenerate cached datasets')
+    parser.add_argument('--generate-only', action='store_true', help='Only generate the datasets')
+    parser.add_argument('--php', default='php', help='PHP CLI binary')
+    parser.add_argument('--memory-limit', default='-1',
+                        help="PHP memory_limit for the import (default: unlimited, so the peak can be measured)")
+    parser.add_argument('--timeout', type=float, default=3600, help='Timeout per import in seconds')
+    parser.add_argument('--keep', action='store_true', help='Keep the imported rows in the database')
+    parser.add_argument('--stream', action='store_true', help='Import through the streaming file entry points')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help='Plugin versions the runs are tagged with')
+    parser.add_argument('--compare', action='store_true',
+                        help='Compare the latest curves with the previous plugin version and exit')
+    parser.add_argument('--json', metavar='PATH', help="Write the results as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB, help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true', help='Do not append the runs to the run history')
+    args = parser.parse_args()
+
+    profiles = [profile.strip() for profile in args.profile.split(',') if profile.strip()]
+    unknown = [profile for profile in profiles if profile not in PROFILES]
+    delimiters = [delimiter for delimiter in args.delimiter if delimiter in DELIMITER_NAMES]
+    if unknown or not delimiters:
+        print(f"Error: Unknown profile(s) {', '.join(unknown)}" if unknown else "Error: No valid delimiter given")
+        sys.exit(2)
+    suffix = '/stream' if args.stream else ''
+    targets = [(profile, delimiter, f"{profile}/{DELIMITER_NAMES[delimiter]}{suffix}")
+               for profile in profiles for delimiter in delimiters]
+
+    if args.compare:
+        history = RunHistory(args.history_db)
+        try:
+            comparisons = [comparison for comparison in (compare_versions(history, target) for *_, target in targets)
+                           if comparison]
+        finally:
+            history.close()
+        if not comparisons:
+            print("ℹ️  Not enough import benchmark runs recorded to compare")
+        for comparison in comparisons:
+            print_comparison(comparison)
+        sys.exit(0)
+
+    if not args.generate_only:
+        if not args.wp_path:
+            print("Error: --wp-path is required unless --generate-only or --compare is given")
+            sys.exit(2)
+        if shutil.which(args.php) is None:
+            print(f"Error: {args.php} not found")
+            sys.exit(2)
+
+    versions = plugin_versions(args.manifest)
+    columns = {profile: load_columns(profile) for profile in profiles}
+    runs, all_passed = [], True
+
+    for profile, delimiter, target in targets:
+        print(f"\n🧪 {PROFILES[profile]['description']}, {DELIMITER_NAMES[delimiter]} separated")
+        started_at = time.time()
+        sizes = []
+        for rows in args.sizes:
+            path = dataset_path(args.data_dir, profile, rows, delimiter, args.seed, args.messy, args.duplicates)
+            if args.regenerate or not os.path.exists(path):
+                start = time.time()
+                dataset = generate(path, columns[profile], rows, delimiter, args.seed, args.messy, args.duplicates)
+                print(f"   📝 Generated {rows} rows ({dataset['bytes'] / 1024 / 1024:.1f} MB, "
+                      f"{dataset['duplicates']} duplicates) in {time.time() - start:.1f}s")
+            else:
+                dataset = {'rows': rows, 'bytes': os.path.getsize(path), 'duplicates': None}
+            if args.generate_only:
+                print(f"   {path}")
+                continue
+
+            print(f"   ⏱️  Importing {rows} rows...")
+            outcome = run_import(args.php, args.wp_path, profile, path, args.keep, args.memory_limit, args.timeout,
+                                 args.stream)
+            sizes.append(size_metrics(rows, dataset, outcome))
+            if outcome.get('error') and not outcome.get('elapsed'):
+                print(f"   ❌ {outcome['error']}")
+                break  # larger sizes would fail the same way
+
+        if args.generate_only:
+            continue
+
+        results = {
+            'profile': profile,
+            'delimiter': delimiter,
+            'stream': args.stream,
+            'versions': versions,
+            'seed': args.seed,
+            'messy': args.messy,
+            'duplicates': args.duplicates,
+            'sizes': sizes,
+            'exponent': scaling_exponent(sizes)
+        }
+        print_curve(target, results)
+        passed = bool(sizes) and not any(size['error'] and not size['elapsed'] for size in sizes)
+        all_passed = all_passed and passed
+        run = build_run('import_benchmark', target, results, sum(size['elapsed'] for size in sizes),
+                        files_scanned=len(sizes), bytes_read=sum(size['bytes'] for size in sizes),
+                        passed=passed, started_at=started_at)
+        runs.append(run)
+        if not args.no_history:
+            record_run(run, args.history_db)
+
+    if args.json and runs:
+        output = json.dumps(runs, default=str, ensure_ascii=False)
+        if args.json == '-':
+            print(output)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Index Advisor for the Legal Automation plugins
+Compares the table definitions (every CREATE TABLE string, e.g. in
+CAH_Database::create_tables_direct()/ensure_complete_schema_integrity() and
+LAF_Database_Manager::create_tables(), plus the array returned by
+CAH_Schema_Manager::get_static_schema_definition()) with the columns the
+$wpdb queries of all plugins use in WHERE, JOIN ... ON and ORDER BY.
+
+Every access path no index serves is reported with its call sites, and the
+proposed (composite) indexes are printed as CAH_Schema_Manager::add_index()
+calls: equality columns first (most selective first), then the range or
+ORDER BY columns.
+
+Usage:
+    python3 index_advisor.py [PATH] [--table klage_cases] [--php proposals.php] [--json report.json]
+"""
+
+import os
+import re
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from php_symbols import DEFAULT_SYMBOL_INDEX, SymbolIndex, returned_literal
+from sql_corpus import TABLE_PREFIX, collect_queries, collect_schema, merge_definition
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA_FUNCTION = 'get_static_schema_definition'
+
+ANALYZED_KINDS = {'SELECT', 'UPDATE', 'DELETE'}
+
+# MySQL limits index names to 64 characters and composite indexes stay useful up to a few columns
+MAX_INDEX_NAME = 64
+MAX_INDEX_COLUMNS = 4
+
+SQL_KEYWORDS = {'WHERE', 'ON', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'JOIN', 'NATURAL', 'STRAIGHT_JOIN',
+                'ORDER', 'GROUP', 'LIMIT', 'HAVING', 'SET', 'USING', 'UNION', 'FORCE', 'USE', 'IGNORE'}
+
+TABLE_REFERENCE = re.compile(r'(\bFROM|\bJOIN|\bUPDATE|,)\s*`?(' + re.escape(TABLE_PREFIX) + r'\w+)`?'
+                             r'(?:\s+(?:AS\s+)?`?([A-Za-z_]\w*)`?)?', re.IGNORECASE)
+
+PREDICATE = re.compile(
+    r'(?<![\w.`])`?(?:([A-Za-z_]\w*)`?\.`?)?([A-Za-z_]\w*)`?\s*'
+    r'(<=>|!=|<>|<=|>=|=|<|>|\bNOT\s+IN\b|\bIN\b|\bNOT\s+LIKE\b|\bLIKE\b|\bNOT\s+BETWEEN\b|\bBETWEEN\b'
+    r'|\bIS\s+NOT\s+NULL\b|\bIS\s+NULL\b)\s*(`?(?:[A-Za-z_]\w*`?\.`?)?[A-Za-z_]\w*`?|\'%?)?',
+    re.IGNORECASE)
+
+CLAUSE_END = r'(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|\bUNION\b|$)'
+
+EQUALITY_OPERATORS = {'=', '<=>', 'IN', 'IS NULL'}
+RANGE_OPERATORS = {'<', '>', '<=', '>=', 'BETWEEN', 'LIKE'}
+
+LOW_CARDINALITY_NAME = re.compile(r'(?:^|_)(?:status|type|flag|active|default|independent|level|direction'
+                                  r'|priority|language|category)$|^is_|^has_', re.IGNORECASE)
+
+
+def collect_array_schema(index: SymbolIndex) -> Dict[str, Dict]:
+    """Tables of CAH_Schema_Manager::get_static_schema_definition() in the collect_schema() shape"""
+    schema = {}
+    for definition in index.functions(SCHEMA_FUNCTION):
+        try:
+            with open(os.path.join(index.base_path, definition['file']), 'r', encoding='utf-8',
+                      errors='replace') as f:
+                tables = returned_literal(f.read(), SCHEMA_FUNCTION)
+        except OSError:
+            continue
+        if not isinstance(tables, dict):
+            continue
+        for name, table in tables.items():
+            if not isinstance(table, dict) or not isinstance(table.get('columns'), dict):
+                continue
+            indexes = []
+            if table.get('primary_key'):
+                indexes.append({'name': 'PRIMARY', 'columns': [table['primary_key']], 'primary': True,
+                                'unique': True, 'fulltext': False})
+            for index_name, columns in (table.get('indexes') or {}).items():
+                indexes.append({'name': index_name, 'columns': list(columns), 'primary': False,
+                                'unique': False, 'fulltext': False})
+            schema[TABLE_PREFIX + name] = {
+                'table': TABLE_PREFIX + name,
+                'columns': table['columns'],
+                'indexes': indexes,
+                'source': f"{definition['file']}:{definition['line']}"
+            }
+    return schema
+
+
+def load_schema(index: SymbolIndex) -> Dict[str, Dict]:
+    """All table definitions, with the schema manager's columns and indexes merged in"""
+    schema = collect_schema(index)
+    for name, table in collect_array_schema(index).items():
+        if name not in schema:
+            schema[name] = dict(table, alter=[], sources=[table['source']])
+            continue
+        schema[name]['sources'].append(table['source'])
+        merge_definition(schema[name], table, table['source'])
+    return schema
+
+
+def is_low_cardinality(column: str, definition: str) -> bool:
+    """Flags, statuses and types: poor leading columns for an index"""
+    return bool(LOW_CARDINALITY_NAME.search(column) or
+                re.match(r'\s*(?:tinyint\(1\)|bool|enum\()', definition or '', re.IGNORECASE))
+
+
+def mask_parentheses(text: str) -> str:
+    """Blank out everything inside parentheses (the parentheses themselves stay)"""
+    masked, depth = [], 0
+    for char in text:
+        if char == ')':
+            depth -= 1
+        masked.append(char if depth <= 0 else ' ')
+        if char == '(':
+            depth += 1
+    return ''.join(masked)
+
+
+def unwrap(condition: str) -> str:
+    """Strip parentheses enclosing the whole condition"""
+    while condition.startswith('(') and condition.endswith(')') and not mask_parentheses(condition)[1:-1].strip():
+        condition = condition[1:-1].strip()
+    return condition
+
+
+def conjunctions(condition: str) -> List[str]:
+    """Top-level OR branches of a condition, each with nested parentheses blanked
+
+    Only the AND-ed terms of a branch can be combined into one index lookup.
+    """
+    condition = unwrap(condition.strip())
+    masked = mask_parentheses(condition)
+    branches, start = [], 0
+    for match in re.finditer(r'\bOR\b|\|\|', masked, re.IGNORECASE):
+        branches += conjunctions(condition[start:match.start()])
+        start = match.end()
+    if start == 0:
+        return [masked]
+    return branches + conjunctions(condition[start:])
+
+
+def subqueries(sql: str) -> List[str]:
+    """The statement and every nested SELECT, each with its own subqueries replaced by a literal"""
+    statements = []
+    while True:
+        match = re.search(r'\(\s*SELECT\b', sql, re.IGNORECASE)
+        if match is None:
+            break
+        depth, end = 0, match.start()
+        for end in range(match.start(), len(sql)):
+            if sql[end] == '(':
+                depth += 1
+            elif sql[end] == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+        inner = sql[match.start() + 1:end]
+        statements += subqueries(inner)
+        sql = sql[:match.start()] + '0' + sql[end + 1:]
+    return [sql] + statements
+
+
+def table_references(sql: str) -> List[Tuple[str, str]]:
+    """(alias, table) in FROM/JOIN order; the alias is the table name when none is given"""
+    references = []
+    for match in TABLE_REFERENCE.finditer(sql):
+        alias = match.group(3)
+        if alias is None or alias.upper() in SQL_KEYWORDS:
+            alias = match.group(2)
+        references.append((alias, match.group(2)))
+    return references
+
+
+class Statement:
+    """Tables, filter predicates and ORDER BY columns of one SQL statement"""
+
+    def __init__(self, sql: str, schema: Dict[str, Dict]):
+        # String literals could contain keywords; keep only whether they start with a wildcard
+        self.sql = re.sub(r"'(?:[^'\\]|\\.)*'", lambda m: "'%'" if m.group(0).startswith("'%") else "''", sql)
+        self.schema = schema
+        self.tables = table_references(self.sql)
+        self.aliases = {alias.lower(): table for alias, table in self.tables}
+        self.unknown_columns = set()  # (table, column) filtered on but defined nowhere
+
+    def resolve(self, qualifier: Optional[str], column: str, record: bool = False) -> Optional[Tuple[str, str]]:
+        """(alias, column) of a column reference, None for anything that is not a known column"""
+        if qualifier:
+            table = self.aliases.get(qualifier.lower())
+            if table in self.schema and column in self.schema[table]['columns']:
+                return qualifier.lower(), column
+            if record and table in self.schema:
+                self.unknown_columns.add((table, column))
+            return None
+        owners = [alias for alias, table in self.tables
+                  if table in self.schema and column in self.schema[table]['columns']]
+        # Only when every table is defined: an undefined one could be the owner
+        if record and not owners and self.tables and all(table in self.schema for _, table in self.tables):
+            self.unknown_columns.update((table, column) for _, table in self.tables)
+        return (owners[0].lower(), column) if len(set(owners)) == 1 else None
+
+    def predicates(self, masked: str) -> List[Dict]:
+        """Index-usable predicates of one conjunction"""
+        predicates = []
+        for match in PREDICATE.finditer(masked):
+            before = masked[:match.start()].rstrip()
+            if re.search(r'\bNOT$', before, re.IGNORECASE):
+                continue
+            operator = ' '.join(match.group(3).upper().split())
+            right = (match.group(4) or '').strip()
+            if operator == 'LIKE' and right == "'%":
+                continue
+            if operator not in EQUALITY_OPERATORS and operator not in RANGE_OPERATORS:
+                continue
+            kind = 'eq' if operator in EQUALITY_OPERATORS else 'range'
+            column = self.resolve(match.group(1), match.group(2), record=True)
+            if column is not None:
+                predicates.append({'alias': column[0], 'column': column[1], 'kind': kind})
+            if operator == '=' and right and not right.startswith("'"):
+                other = right.replace('`', '').split('.')
+                other_column = self.resolve(*other, record=True) if len(other) == 2 else self.resolve(None, other[0])
+                if other_column is not None:
+                    predicates.append({'alias': other_column[0], 'column': other_column[1], 'kind': 'eq'})
+        return predicates
+
+    def where_branches(self) -> List[List[Dict]]:
+        match = re.search(r'\bWHERE\b(.*?)' + CLAUSE_END, self.sql, re.IGNORECASE | re.DOTALL)
+        if match is None:
+            return [[]]
+        return [self.predicates(branch) for branch in conjunctions(match.group(1))]
+
+    def join_predicates(self) -> List[Dict]:
+        predicates = []
+        for match in re.finditer(r'\bON\b(.*?)(?=\b(?:LEFT|RIGHT|INNER|OUTER|CROSS|NATURAL|JOIN|WHERE)\b|'
+                                 + CLAUSE_END[3:], self.sql, re.IGNORECASE | re.DOTALL):
+            branches = conjunctions(match.group(1))
+            if len(branches) == 1:
+                predicates += self.predicates(branches[0])
+        return predicates
+
+    def order_columns(self) -> List[Tuple[str, str]]:
+        """ORDER BY as (alias, column); empty when any term is an expression"""
+        match = re.search(r'\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|$)', self.sql, re.IGNORECASE | re.DOTALL)
+        if match is None:
+            return []
+        columns = []
+        for term in mask_parentheses(match.group(1)).split(','):
+            term = re.match(r'\s*`?(?:([A-Za-z_]\w*)`?\.`?)?([A-Za-z_]\w*)`?(?:\s+(?:ASC|DESC))?\s*$', term,
+                            re.IGNORECASE)
+            column = term and self.resolve(term.group(1), term.group(2))
+            if not column:
+                return []
+            columns.append(column)
+        return columns
+
+    def access_paths(self) -> List[Dict]:
+        """Per table and WHERE branch: equality columns, first range column and sort columns
+
+        The first table drives the query and can use WHERE and ORDER BY; joined
+        tables are looked up through their ON equalities (plus their WHERE
+        equalities).
+        """
+        if not self.tables:
+            return []
+        joins = self.join_predicates()
+        branches = self.where_branches()
+        # Rows merged from several OR branches come back unsorted whatever the indexes
+        order = self.order_columns() if len(branches) == 1 else []
+        paths = []
+        for position, (alias, table) in enumerate(self.tables):
+            if table not in self.schema:
+                continue
+            alias = alias.lower()
+            for branch in branches:
+                own = [predicate for predicate in branch if predicate['alias'] == alias]
+                if position > 0:
+                    own = [predicate for predicate in joins if predicate['alias'] == alias] + \
+                          [predicate for predicate in own if predicate['kind'] == 'eq']
+                equality = list(dict.fromkeys(p['column'] for p in own if p['kind'] == 'eq'))
+                ranges = [p['column'] for p in own if p['kind'] == 'range' and p['column'] not in equality]
+                sort = [column for owner, column in order if owner == alias] \
+                    if position == 0 and order and all(owner == alias for owner, _ in order) else []
+                if equality or ranges or sort:
+                    paths.append({'table': table, 'equality': equality, 'range': ranges[0] if ranges else None,
+                                  'order': list(dict.fromkeys(sort))})
+        return paths
+
+
+def index_serves(index: Dict, path: Dict) -> Tuple[bool, bool]:
+    """(narrows the lookup, delivers the rows in ORDER BY order) for one index and access path"""
+    columns = index['columns']
+    if index['fulltext']:
+        return False, False
+    if index['unique'] and set(columns) <= set(path['equality']):
+        return True, True  # at most one row
+    prefix = 0
+    while prefix < len(columns) and columns[prefix] in path['equality']:
+        prefix += 1
+    lookup = prefix > 0 or (path['range'] is not None and columns[0] == path['range'])
+    if not path['order']:
+        return lookup, True
+    if path['range'] is not None:
+        return lookup, False
+    return lookup, columns[prefix:prefix + len(path['order'])] == path['order']
+
+
+def evaluate(path: Dict, table: Dict) -> Tuple[str, List[str]]:
+    """('covered' | 'unindexed' | 'unsorted', proposed index columns)"""
+    served = [index_serves(index, path) for index in table['indexes']]
+    if any(lookup and sorted_ for lookup, sorted_ in served):
+        return 'covered', []
+    if not path['equality'] and path['range'] is None and any(sorted_ for _, sorted_ in served):
+        return 'covered', []
+
+    definitions = table['columns']
+    equality = sorted(path['equality'], key=lambda column: is_low_cardinality(column, definitions.get(column)))
+    if path['range'] is not None:
+        columns = equality + [path['range']]
+    else:
+        columns = equality + [column for column in path['order'] if column not in equality]
+    status = 'unsorted' if any(lookup for lookup, _ in served) or not (path['equality'] or path['range']) \
+        else 'unindexed'
+    return status, columns[:MAX_INDEX_COLUMNS]
+
+
+def index_name(columns: List[str], existing: List[str]) -> str:
+    name = ('idx_' + '_'.join(columns))[:MAX_INDEX_NAME]
+    candidate, suffix = name, 2
+    while candidate in existing:
+        candidate = f"{name[:MAX_INDEX_NAME - len(str(suffix)) - 1]}_{suffix}"
+        suffix += 1
+    return candidate
+
+
+def advise(queries: List[Dict], schema: Dict[str, Dict]) -> Dict:
+    """Uncovered access paths grouped into index proposals, plus the tables and columns
+    queries use that no definition has"""
+    proposals, unknown_tables, unknown_columns = {}, {}, {}
+    analyzed = 0
+    for query in queries:
+        if query['kind'] not in ANALYZED_KINDS or not query['resolved']:
+            continue
+        analyzed += 1
+        site = {'file': query['file'], 'line': query['line'], 'class': query['class'],
+                'function': query['function'], 'sql': query['sql']}
+        for sql in subqueries(query['sql']):
+            statement = Statement(sql, schema)
+            for _, table in statement.tables:
+                if table not in schema:
+                    unknown_tables.setdefault(table, []).append(f"{query['file']}:{query['line']}")
+            for path in statement.access_paths():
+                status, columns = evaluate(path, schema[path['table']])
+                if status == 'covered' or not columns:
+                    continue
+                proposal = proposals.setdefault((path['table'], tuple(columns)), {
+                    'table': path['table'], 'columns': columns, 'status': status, 'sites': []})
+                if status == 'unindexed':
+                    proposal['status'] = 'unindexed'
+                if site not in proposal['sites']:
+                    proposal['sites'].append(site)
+            for table, column in statement.unknown_columns:
+                unknown_columns.setdefault(f"{table}.{column}", []).append(f"{query['file']}:{query['line']}")
+
+    # An index on (a, b) also serves lookups on a: fold prefixes into the longer proposal
+    merged = []
+    for key in sorted(proposals, key=lambda key: -len(key[1])):
+        proposal = proposals[key]
+        wider = next((other for other in merged if other['table'] == proposal['table'] and
+                      other['columns'][:len(proposal['columns'])] == proposal['columns']), None)
+        if wider is None:
+            merged.append(proposal)
+            continue
+        if proposal['status'] == 'unindexed':
+            wider['status'] = 'unindexed'
+        wider['sites'] += [site for site in proposal['sites'] if site not in wider['sites']]
+
+    for proposal in merged:
+        existing = [index['name'] for index in schema[proposal['table']]['indexes'] if index['name']]
+        proposal['index_name'] = index_name(proposal['columns'], existing)
+        proposal['sites'].sort(key=lambda site: (site['file'], site['line']))
+    merged.sort(key=lambda proposal: (proposal['status'] != 'unindexed', -len(proposal['sites']),
+                                      proposal['table'], proposal['columns']))
+    return {'analyzed': analyzed, 'proposals': merged,
+            'unknown_tables': {table: sorted(set(sites)) for table, sites in sorted(unknown_tables.items())},
+            'unknown_columns': {column: sorted(set(sites)) for column, sites in sorted(unknown_columns.items())}}
+
+
+def php_snippet(proposals: List[Dict]) -> str:
+    """The proposals as CAH_Schema_Manager::add_index() calls (it prepends the table prefix itself)"""
+    lines = ['$schema_manager = new CAH_Schema_Manager();']
+    for proposal in proposals:
+        columns = ', '.join(f"'{column}'" for column in proposal['columns'])
+        lines.append(f"$schema_manager->add_index('{proposal['table'][len(TABLE_PREFIX):]}', "
+                     f"'{proposal['index_name']}', array({columns}));")
+    return '\n'.join(lines)
+
+
+def print_report(result: Dict, schema: Dict[str, Dict], samples: int):
+    proposals = result['proposals']
+    unindexed = sum(1 for proposal in proposals if proposal['status'] == 'unindexed')
+    print(f"\n📇 INDEX ADVISOR: {len(schema)} tables, {result['analyzed']} statements analyzed")
+    print(f"   {unindexed} access paths without a usable index, "
+          f"{len(proposals) - unindexed} that need a composite index to avoid a filesort")
+    print("=" * 80)
+    for proposal in proposals:
+        label = 'no index' if proposal['status'] == 'unindexed' else 'filesort'
+        print(f"\n[{label}] {proposal['table']} ({', '.join(proposal['columns'])})"
+              f"  - {len(proposal['sites'])} call site{'s' if len(proposal['sites']) != 1 else ''}")
+        existing = [f"{index['name']}({', '.join(index['columns'])})"
+                    for index in schema[proposal['table']]['indexes']]
+        print(f"   existing: {', '.join(existing) or 'none'}")
+        for site in proposal['sites'][:samples]:
+            print(f"   {site['file']}:{site['line']}  {site['sql'][:110]}{'...' if len(site['sql']) > 110 else ''}")
+        if len(proposal['sites']) > samples:
+            print(f"   ... {len(proposal['sites']) - samples} more")
+
+    if result['unknown_tables']:
+        print("\nℹ️  Tables queried without a definition in the plugins:")
+        for table, sites in result['unknown_tables'].items():
+            print(f"   {table}: {', '.join(sites[:3])}{' ...' if len(sites) > 3 else ''}")
+    if result['unknown_columns']:
+        print("\n⚠️  Column not in schema (filtered on, but no definition of its table has it):")
+        for column, sites in result['unknown_columns'].items():
+            print(f"   {column}: {', '.join(sites[:3])}{' ...' if len(sites) > 3 else ''}")
+
+    if proposals:
+        print("\n🛠️  Proposed indexes:")
+        print(php_snippet(proposals))
+    else:
+        print("\n✅ Every WHERE, JOIN and ORDER BY column is covered by an index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Propose indexes for the columns the plugin queries filter and sort on')
+    parser.add_argument('path', nargs='?', default=BASE_DIR, help='Plugin tree to analyze (default: the repository)')
+    parser.add_argument('--table', action='append', help='Only report this table (without prefix, repeatable)')
+    parser.add_argument('--samples', type=int, default=3, help='Call sites shown per proposal')
+    parser.add_argument('--php', metavar='PATH', help='Write the add_index() calls to a file')
+    parser.add_argument('--json', metavar='PATH', help="Write the full report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    index = SymbolIndex(os.path.abspath(args.path), index_file=DEFAULT_SYMBOL_INDEX)
+    schema = load_schema(index)
+    result = advise(collect_queries(index), schema)
+    if args.table:
+        wanted = {TABLE_PREFIX + table for table in args.table}
+        result['proposals'] = [proposal for proposal in result['proposals'] if proposal['table'] in wanted]
+
+    if args.json != '-':
+        print_report(result, schema, args.samples)
+
+    if args.php:
+        with open(args.php, 'w', encoding='utf-8') as f:
+            f.write('<?php\n' + php_snippet(result['proposals']) + '\n')
+    if args.json:
+        output = json.dumps(result, indent=2, ensure_ascii=False)
+        if args.json == '-':
+            print(output)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+<?php
+/**
+ * Persistent Lint Worker for validate-deployment.py
+ * Started by lint_engine.LintWorkerPool and kept warm between files:
+ * reads one file path per line from STDIN and answers each with one JSON line
+ * {"file": ..., "passed": ..., "output": ..., "compiled": ...} on STDOUT.
+ *
+ * Every file is compiled with opcache_compile_file() without being run, so
+ * compile-time errors (a break outside a loop, a redeclared method) fail like
+ * they do under `php -l`. Parse errors are reported here; any other compile
+ * error is fatal and ends the worker, and the pool re-lints that file with
+ * `php -l`. The pool starts the worker with OPcache enabled for the CLI; if
+ * opcache_compile_file() is unavailable the handshake says so and every file
+ * is linted with `php -l` instead.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    exit;
+}
+
+// Handshake so the pool knows the worker is usable
+$ready = function_exists('opcache_compile_file') && ini_get('opcache.enable_cli');
+echo json_encode(array('ready' => (bool) $ready, 'php' => PHP_VERSION)), "\n";
+fflush(STDOUT);
+if (!$ready) {
+    exit(1);
+}
+
+while (($line = fgets(STDIN)) !== false) {
+    $file = rtrim($line, "\r\n");
+    if ($file === '') {
+        continue;
+    }
+
+    $result = array('file' => $file, 'passed' => true, 'output' => '');
+
+    if (!is_readable($file)) {
+        $result['passed'] = false;
+        $result['output'] = "Could not open input file: $file";
+    } else {
+        try {
+            // False without an error (e.g. a full OPcache) leaves the file to `php -l`
+            $result['compiled'] = opcache_compile_file($file);
+        } catch (ParseError $e) {
+            $result['passed'] = false;
+            $result['output'] = sprintf('PHP Parse error:  %s in %s on line %d', $e->getMessage(), $file, $e->getLine());
+        } catch (CompileError $e) {
+            $result['passed'] = false;
+            $result['output'] = sprintf('PHP Fatal error:  %s in %s on line %d', $e->getMessage(), $file, $e->getLine());
+        }
+    }
+
+    echo json_encode($result), "\n";
+    fflush(STDOUT);
+}
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+PHP Lint Engine for the Legal Automation plugin suite
+Runs `php -l` over many files concurrently and records per-file timings.
+Results can be kept in a content-hash cache so unchanged files are never re-linted,
+and files can be sent to a pool of warm PHP worker processes (lint-worker.php)
+instead of starting one PHP interpreter per file.
+"""
+
+import os
+import json
+import queue
+import hashlib
+import threading
+import zipfile
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+PHP_BINARY = 'php'
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.lint-cache.json')
+DEFAULT_CACHE_ENTRIES = 5000
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lint-worker.php')
+WORKER_TIMEOUT = 30.0
+# OPcache compiles the files in the worker; the shared memory is never used to run them
+WORKER_INI = ['-d', 'opcache.enable=1', '-d', 'opcache.enable_cli=1', '-d', 'opcache.memory_consumption=256',
+              '-d', 'opcache.validate_timestamps=1', '-d', 'opcache.revalidate_freq=0',
+              '-d', 'opcache.file_update_protection=0', '-d', 'display_errors=stderr']
+
+
+def default_workers() -> int:
+    """Default worker count: one lint process per CPU core"""
+    return os.cpu_count() or 1
+
+
+def find_php_files(plugin_path: str) -> List[str]:
+    """Collect all PHP files below plugin_path in a stable order"""
+    php_files = []
+    for root, dirs, files in os.walk(plugin_path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith('.php'):
+                php_files.append(os.path.join(root, file))
+    return php_files
+
+
+def lint_file(file_path: str, php_binary: str = PHP_BINARY) -> Dict:
+    """Lint a single file with one `php -l` call, capturing its output"""
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run([php_binary, '-l', file_path],
+                              capture_output=True, text=True)
+        passed = proc.returncode == 0
+        output = (proc.stderr.strip() or proc.stdout.strip()) if not passed else ''
+        exec_error = False
+    except OSError as e:
+        passed = False
+        output = str(e)
+        exec_error = True
+    return {
+        'file': file_path,
+        'passed': passed,
+        'output': output,
+        'duration': time.perf_counter() - start,
+        'cached': False,
+        'exec_error': exec_error
+    }
+
+
+class LintWorker:
+    """One long-lived `php lint-worker.php` process answering one JSON line per file path
+
+    A worker that does not answer within `timeout` seconds is killed, which
+    surfaces as OSError like any other dead worker.
+    """
+
+    def __init__(self, php_binary: str = PHP_BINARY, script: str = WORKER_SCRIPT,
+                 timeout: float = WORKER_TIMEOUT):
+        self.timeout = timeout
+        self.proc = subprocess.Popen([php_binary] + WORKER_INI + [script], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        handshake = self._read()
+        if not handshake.get('ready'):
+            self.close()
+            raise OSError(f"Lint worker did not start: {handshake}")
+        self.php_version = handshake.get('php', 'unknown')
+
+    def _read(self) -> Dict:
+        timer = threading.Timer(self.timeout, self.proc.kill)
+        timer.start()
+        try:
+            line = self.proc.stdout.readline()
+        finally:
+            timer.cancel()
+        if not line:
+            raise OSError("Lint worker exited")
+        return json.loads(line)
+
+    def lint(self, file_path: str) -> Dict:
+        start = time.perf_counter()
+        self.proc.stdin.write(os.path.abspath(file_path) + '\n')
+        self.proc.stdin.flush()
+        answer = self._read()
+        if answer.get('compiled') is False:
+            raise ValueError(f"Lint worker could not compile {file_path}")
+        return {
+            'file': file_path,
+            'passed': bool(answer['passed']),
+            'output': answer['output'].replace(os.path.abspath(file_path), file_path),
+            'duration': time.perf_counter() - start,
+            'cached': False,
+            'exec_error': False
+        }
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class LintWorkerPool:
+    """A pool of warm lint workers shared by the lint threads
+
+    If no worker can be started (no PHP, old PHP, missing script) the pool is
+    unavailable and every file falls back to a plain `php -l`. A worker that
+    dies mid-run (a fatal compile error ends it), hangs past its timeout or
+    cannot compile a file is replaced and the file is re-linted with `php -l`;
+    if no replacement starts, a None slot takes its place so no thread waits
+    forever.
+    """
+
+    def __init__(self, size: Optional[int] = None, php_binary: str = PHP_BINARY,
+                 script: str = WORKER_SCRIPT, timeout: float = WORKER_TIMEOUT):
+        self.php_binary = php_binary
+        self.script = script
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.workers = []
+        for _ in range(max(1, size or default_workers())):
+            try:
+                worker = LintWorker(php_binary, script, timeout)
+            except (OSError, ValueError):
+                break
+            self.workers.append(worker)
+            self.idle.put(worker)
+        self.fallbacks = 0
+
+    @property
+    def available(self) -> bool:
+        return len(self.workers) > 0
+
+    def cache_version(self, php_version: str) -> str:
+        # Worker results are kept apart from `php -l` results (and from the old token-parse worker)
+        return f"{php_version} [lint-worker compile]"
+
+    def lint(self, file_path: str) -> Dict:
+        if not self.available:
+            return self._fallback(file_path)
+        worker = self.idle.get()
+        if worker is None:
+            self.idle.put(None)
+            return self._fallback(file_path)
+        try:
+            result = worker.lint(file_path)
+        except (OSError, ValueError, KeyError):
+            worker.close()
+            self.idle.put(self._replace(worker))
+            return self._fallback(file_path)
+        self.idle.put(worker)
+        return result
+
+    def _fallback(self, file_path: str) -> Dict:
+        with self.lock:
+            self.fallbacks += 1
+        return lint_file(file_path, self.php_binary)
+
+    def _replace(self, worker: LintWorker) -> Optional[LintWorker]:
+        with self.lock:
+            self.workers.remove(worker)
+        try:
+            replacement = LintWorker(self.php_binary, self.script, self.timeout)
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            self.workers.append(replacement)
+        return replacement
+
+    def close(self):
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def lint_source(name: str, source: bytes, php_binary: str = PHP_BINARY) -> Dict:
+    """Lint in-memory source (e.g. an archive member) by piping it to `php -l`"""
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run([php_binary, '-l'], input=source, capture_output=True)
+        passed = proc.returncode == 0
+        output = ''
+        if not passed:
+            output = (proc.stderr.strip() or proc.stdout.strip()).decode('utf-8', errors='replace')
+            output = output.replace('Standard input code', name)
+        exec_error = False
+    except OSError as e:
+        passed = False
+        output = str(e)
+        exec_error = True
+    return {
+        'file': name,
+        'passed': passed,
+        'output': output,
+        'duration': time.perf_counter() - start,
+        'cached': False,
+        'exec_error': exec_error
+    }
+
+
+def php_version(php_binary: str = PHP_BINARY) -> str:
+    """First line of `php -v`, used to key cached lint results"""
+    try:
+        proc = subprocess.run([php_binary, '-v'], capture_output=True, text=True)
+        return proc.stdout.splitlines()[0].strip() if proc.stdout else 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of the file content"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class LintCache:
+    """Persistent map of (content hash, PHP version) -> lint result
+
+    Entries are evicted least-recently-used first once max_entries is exceeded.
+    Safe to share between threads, validate_suite lints zips concurrently.
+    """
+
+    def __init__(self, cache_file: str = DEFAULT_CACHE_FILE, php_version: str = 'unknown',
+                 max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.cache_file = cache_file
+        self.php_version = php_version
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            if len(self.entries) > self.max_entries:
+                by_age = sorted(self.entries.items(), key=lambda item: item[1]['last_used'])
+                self.entries = dict(by_age[len(self.entries) - self.max_entries:])
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries}, f)
+            os.replace(tmp_file, self.cache_file)
+
+    def key(self, digest: str) -> str:
+        return hashlib.sha256(f"{self.php_version}\0{digest}".encode('utf-8')).hexdigest()
+
+    def get(self, file_path: str, digest: str) -> Optional[Dict]:
+        with self.lock:
+            entry = self.entries.get(self.key(digest))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry['last_used'] = time.time()
+        return {
+            'file': file_path,
+            'passed': entry['passed'],
+            'output': entry['output'].replace('{file}', file_path),
+            'duration': 0.0,
+            'cached': True,
+            'exec_error': False
+        }
+
+    def put(self, digest: str, result: Dict):
+        if result['exec_error']:
+            return
+        with self.lock:
+            self.entries[self.key(digest)] = {
+                'passed': result['passed'],
+                'output': result['output'].replace(result['file'], '{file}'),
+                'last_used': time.time()
+            }
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {'enabled': True, 'hits': self.hits, 'misses': self.misses}
+
+
+def _lint_all(names: List[str], lint_one, digest_of, workers: Optional[int],
+              cache: Optional['LintCache']) -> List[Dict]:
+    """Answer what the cache knows and lint the rest concurrently, keeping the order of names"""
+    if not names:
+        return []
+    
+    results = {}
+    digests = {}
+    pending = []
+    for name in names:
+        if cache is not None:
+            digests[name] = digest_of(name)
+            cached = cache.get(name, digests[name])
+            if cached is not None:
+                results[name] = cached
+                continue
+        pending.append(name)
+    
+    if pending:
+        workers = max(1, workers or default_workers())
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            for result in executor.map(lint_one, pending):
+                results[result['file']] = result
+                if cache is not None:
+                    cache.put(digests[result['file']], result)
+    
+    if cache is not None:
+        cache.save()
+    
+    return [results[name] for name in names]
+
+
+def lint_files(file_paths: List[str], workers: Optional[int] = None,
+               php_binary: str = PHP_BINARY, cache: Optional[LintCache] = None,
+               pool: Optional[LintWorkerPool] = None) -> List[Dict]:
+    """Lint files concurrently; results keep the order of file_paths
+
+    With a worker pool the files go to warm PHP processes instead of one
+    `php -l` per file.
+    """
+    lint = pool.lint if pool is not None else lambda path: lint_file(path, php_binary)
+    return _lint_all(file_paths, lint, file_digest, workers, cache)
+
+
+def archive_php_members(archive: zipfile.ZipFile) -> List[str]:
+    """Names of all PHP members of an archive in a stable order"""
+    return sorted(name for name in archive.namelist() if name.endswith('.php'))
+
+
+def lint_archive(zip_path: str, workers: Optional[int] = None, php_binary: str = PHP_BINARY,
+                 cache: Optional[LintCache] = None) -> List[Dict]:
+    """Lint the PHP members of a plugin zip without extracting it to disk
+
+    Members are read straight out of the archive and piped to `php -l`; each
+    result is reported as <zip path>/<member name>.
+    """
+    sources = {}
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in archive_php_members(archive):
+            sources[os.path.join(zip_path, member)] = archive.read(member)
+    
+    return _lint_all(list(sources), lambda name: lint_source(name, sources[name], php_binary),
+                     lambda name: hashlib.sha256(sources[name]).hexdigest(), workers, cache)
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Load Generator for the Legal Automation REST endpoints
+Replays a weighted mix of the doc-in, CRM and import REST calls with asyncio
+at a set concurrency and (optionally) a fixed request rate, and reports
+p50/p95/p99 latency, throughput and error rate per endpoint.
+
+Only the standard library is used: requests go over persistent HTTP/1.1
+connections opened with asyncio streams. With --stub the endpoints are served
+by a local stub server, so the generator itself can be exercised without a
+WordPress installation; nothing ever leaves the configured host.
+
+Only read-only endpoints are called unless --allow-writes is given; the
+communications and import process calls create LOADTEST- records.
+
+Usage:
+    python3 load_test.py [--base-url http://localhost] [--auth user:app-password]
+                         [--concurrency 10] [--rate 50] [--duration 30] [--stub] [--allow-writes]
+"""
+
+import sys
+import math
+import json
+import time
+import base64
+import random
+import asyncio
+import argparse
+from urllib.parse import urlencode, urlsplit
+from typing import Dict, List, Optional, Tuple
+
+from run_history import DEFAULT_HISTORY_DB, build_run, record_run, report_to_stderr, write_json
+
+DEFAULT_BASE_URL = 'http://localhost'
+REQUEST_TIMEOUT = 30.0
+
+CASE_NUMBERS = [f'2024-{number:04d}' for number in range(1, 201)]
+DEBTOR_NAMES = ['Müller GmbH', 'Schmidt', 'Meier AG', 'Schneider', 'Fischer', 'Weber KG', 'Wagner']
+
+IMPORT_CSV_HEADER = 'case_id,debtor_name,debtor_email,claim_amount,case_status'
+
+
+def import_csv(rows: int, rng: random.Random) -> str:
+    """A small CSV in the layout the CSV import source expects; ids are prefixed LOADTEST-"""
+    lines = [IMPORT_CSV_HEADER]
+    for _ in range(rows):
+        number = rng.randrange(1, 10 ** 6)
+        lines.append(f'LOADTEST-{number:06d},{rng.choice(DEBTOR_NAMES)},debtor{number}@example.com,'
+                     f'{rng.randrange(100, 50000)}.00,draft')
+    return '\n'.join(lines)
+
+
+def case_lookup(rng: random.Random) -> Tuple[str, str, Optional[Dict]]:
+    query = urlencode({'caseNumber': rng.choice(CASE_NUMBERS), 'debtorName': rng.choice(DEBTOR_NAMES)})
+    return 'GET', f'/wp-json/cah-doc-in/v1/case-lookup?{query}', None
+
+
+def create_communication(rng: random.Random) -> Tuple[str, str, Optional[Dict]]:
+    number = rng.randrange(1, 10 ** 9)
+    return 'POST', '/wp-json/cah-doc-in/v1/communications', {
+        'caseNumber': rng.choice(CASE_NUMBERS),
+        'debtorName': rng.choice(DEBTOR_NAMES),
+        'emailMetadata': {
+            'subject': f'Load test message {number}',
+            'sender': 'loadtest@example.com',
+            'receivedDate': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'hasAttachment': False,
+            'messageId': f'<loadtest-{number}@example.com>'
+        },
+        'analysis': {'summary': 'Load test', 'category': 'other', 'isNewCase': 'false'},
+        'pipedream_execution_id': f'loadtest-{number}'
+    }
+
+
+def crm_dashboard(rng: random.Random) -> Tuple[str, str, Optional[Dict]]:
+    return 'GET', '/wp-json/la-crm/v1/dashboard', None
+
+
+def crm_contact_summary(rng: random.Random) -> Tuple[str, str, Optional[Dict]]:
+    return 'GET', f'/wp-json/la-crm/v1/contacts/{rng.randrange(1, 201)}/summary', None
+
+
+def import_preview(rng: random.Random) -> Tuple[str, str, Optional[Dict]]:
+    return 'POST', '/wp-json/legal-automation/v1/import/preview', {
+        'source_id': 'csv', 'data': import_csv(20, rng), 'field_mappings': {}
+    }
+
+
+def import_process(rng: random.Random) -> Tuple[str, str, Optional[Dict]]:
+    return 'POST', '/wp-json/legal-automation/v1/import/process', {
+        'source_id': 'csv', 'data': import_csv(5, rng), 'field_mappings': {}, 'options': {}
+    }
+
+
+# Scenario name -> (weight, request factory). Writes are weighted low: they
+# create LOADTEST-/loadtest- records on the target installation.
+SCENARIOS = {
+    'doc-in case_lookup': (30, case_lookup),
+    'doc-in communications': (10, create_communication),
+    'crm get_dashboard_data': (25, crm_dashboard),
+    'crm get_contact_summary': (25, crm_contact_summary),
+    'import rest_preview_import': (8, import_preview),
+    'import rest_process_import': (2, import_process)
+}
+
+# Only run with --allow-writes
+WRITE_SCENARIOS = {'doc-in communications', 'import rest_process_import'}
+
+READ_ONLY_SCENARIOS = {name: scenario for name, scenario in SCENARIOS.items() if name not in WRITE_SCENARIOS}
+
+
+class HTTPConnection:
+    """One persistent HTTP/1.1 connection over asyncio streams"""
+
+    def __init__(self, host: str, port: int, use_ssl: bool = False):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port,
+                                                                 ssl=True if self.use_ssl else None)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, headers: Dict[str, str],
+                      body: bytes = b'') -> Tuple[int, bytes]:
+        if self.writer is None:
+            await self.connect()
+        head = [f'{method} {path} HTTP/1.1', f'Host: {self.host}', f'Content-Length: {len(body)}']
+        head += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by server')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            response_body = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            response_body = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            response_body = await self.reader.read()
+            self.close()
+
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, response_body
+
+
+class EndpointStats:
+    """Latencies and outcomes of one scenario"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+        self.bytes_received = 0
+
+    def add(self, latency: float, status: str, ok: bool, size: int = 0):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.errors += not ok
+        self.bytes_received += size
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(stats: Dict[str, EndpointStats], elapsed: float) -> Dict[str, Dict]:
+    summary = {}
+    for name, endpoint in stats.items():
+        latencies = sorted(endpoint.latencies)
+        count = len(latencies)
+        summary[name] = {
+            'requests': count,
+            'errors': endpoint.errors,
+            'error_rate': endpoint.errors / count if count else 0.0,
+            'throughput': count / elapsed if elapsed > 0 else 0.0,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else 0.0,
+            'statuses': endpoint.statuses,
+            'bytes_received': endpoint.bytes_received
+        }
+    return summary
+
+
+async def run_load(base_url: str, concurrency: int = 10, rate: Optional[float] = None,
+                   duration: float = 30.0, max_requests: Optional[int] = None,
+                   auth: Optional[str] = None, seed: Optional[int] = None,
+                   scenarios: Optional[Dict] = None) -> Dict:
+    """Drive the weighted scenario mix and collect per-endpoint statistics
+
+    Without a rate every worker sends its next request as soon as the previous
+    one is answered (closed loop). With a rate, requests are scheduled at fixed
+    intervals and latency is measured from the scheduled send time, so a
+    backed-up server shows up in the percentiles instead of slowing the
+    generator down (no coordinated omission).
+    """
+    scenarios = scenarios or READ_ONLY_SCENARIOS
+    parts = urlsplit(base_url)
+    use_ssl = parts.scheme == 'https'
+    host = parts.hostname or 'localhost'
+    port = parts.port or (443 if use_ssl else 80)
+    prefix = parts.path.rstrip('/')
+
+    headers = {'Accept': 'application/json', 'User-Agent': 'Legal-Automation-Tester/1.0',
+               'Connection': 'keep-alive'}
+    if auth:
+        headers['Authorization'] = 'Basic ' + base64.b64encode(auth.encode('utf-8')).decode('ascii')
+
+    rng = random.Random(seed)
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    stats = {name: EndpointStats() for name in names}
+
+    start = time.perf_counter()
+    deadline = start + duration
+    issued = 0
+
+    def next_slot() -> Optional[float]:
+        """Intended send time of the next request, or None once the run is over"""
+        nonlocal issued
+        if max_requests is not None and issued >= max_requests:
+            return None
+        intended = start + issued / rate if rate else time.perf_counter()
+        if intended >= deadline:
+            return None
+        issued += 1
+        return intended
+
+    async def worker():
+        connection = HTTPConnection(host, port, use_ssl)
+        try:
+            while True:
+                intended = next_slot()
+                if intended is None:
+                    return
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                name = rng.choices(names, weights)[0]
+                method, path, payload = scenarios[name][1](rng)
+                body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                request_headers = dict(headers, **({'Content-Type': 'application/json'} if payload is not None else {}))
+                try:
+                    status, response = await asyncio.wait_for(
+                        connection.request(method, prefix + path, request_headers, body), REQUEST_TIMEOUT)
+                    stats[name].add(time.perf_counter() - intended, str(status), 200 <= status < 300, len(response))
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError) as e:
+                    connection.close()
+                    stats[name].add(time.perf_counter() - intended, type(e).__name__, False)
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+
+    endpoints = summarize(stats, elapsed)
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    errors = sum(endpoint['errors'] for endpoint in endpoints.values())
+    return {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'rate': rate,
+        'elapsed': elapsed,
+        'requests': total,
+        'errors': errors,
+        'error_rate': errors / total if total else 0.0,
+        'throughput': total / elapsed if elapsed > 0 else 0.0,
+        'bytes_received': sum(endpoint['bytes_received'] for endpoint in endpoints.values()),
+        'endpoints': endpoints
+    }
+
+
+# Local stub of the endpoints: path prefix -> canned response of the real callback
+STUB_RESPONSES = [
+    ('/wp-json/cah-doc-in/v1/case-lookup', {'success': True, 'match_found': True, 'case_id': 1}),
+    ('/wp-json/cah-doc-in/v1/communications', {'success': True, 'communication_id': 1}),
+    ('/wp-json/la-crm/v1/dashboard', {'recent_communications': [], 'upcoming_events': [], 'stats': {}}),
+    ('/wp-json/la-crm/v1/contacts/', {'contact': {}, 'cases': [], 'communications': []}),
+    ('/wp-json/legal-automation/v1/import/preview', {'success': True, 'preview_data': [], 'total_rows': 20}),
+    ('/wp-json/legal-automation/v1/import/process', {'success': True, 'imported': 5, 'errors': []})
+]
+
+
+async def start_stub_server(latency_ms: float = 0.0, host: str = '127.0.0.1'):
+    """Serve the scenario endpoints on an ephemeral local port; returns (server, base_url)"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                path = request_line.split()[1].decode('latin-1')
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'content-length':
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                if latency_ms:
+                    await asyncio.sleep(random.expovariate(1000.0 / latency_ms))
+
+                status, payload = 404, {'code': 'rest_no_route', 'message': 'No route was found'}
+                for prefix, response in STUB_RESPONSES:
+                    if path.startswith(prefix):
+                        status, payload = 200, response
+                        break
+                body = json.dumps(payload).encode('utf-8')
+                writer.write(f'HTTP/1.1 {status} {"OK" if status == 200 else "Not Found"}\r\n'
+                             f'Content-Type: application/json; charset=UTF-8\r\n'
+                             f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+                await writer.drain()
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f'http://{host}:{port}'
+
+
+async def run_load_test(args, base_url: str) -> Dict:
+    """Run the load test described by the parsed command line, against the stub if requested"""
+    server = None
+    if args.stub:
+        server, base_url = await start_stub_server(args.stub_latency)
+    try:
+        return await run_load(base_url, concurrency=args.concurrency, rate=args.rate,
+                              duration=args.duration, max_requests=args.requests,
+                              auth=args.auth, seed=args.seed,
+                              scenarios=SCENARIOS if args.allow_writes else READ_ONLY_SCENARIOS)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+
+def print_report(results: Dict):
+    print(f"\n📈 LOAD TEST RESULTS ({results['base_url']})")
+    print("=" * 100)
+    print(f"{'Endpoint':<30} {'Requests':>8} {'Err %':>7} {'Req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  Statuses")
+    print("-" * 100)
+    for name, endpoint in results['endpoints'].items():
+        statuses = ', '.join(f'{status}×{count}' for status, count in sorted(endpoint['statuses'].items()))
+        print(f"{name:<30} {endpoint['requests']:>8} {endpoint['error_rate'] * 100:>6.1f}% "
+              f"{endpoint['throughput']:>8.1f} {endpoint['p50'] * 1000:>8.1f} {endpoint['p95'] * 1000:>8.1f} "
+              f"{endpoint['p99'] * 1000:>8.1f} {endpoint['max'] * 1000:>8.1f}  {statuses}")
+    print("-" * 100)
+    print(f"Total: {results['requests']} requests in {results['elapsed']:.2f}s "
+          f"({results['throughput']:.1f} req/s), {results['error_rate'] * 100:.1f}% errors, "
+          f"concurrency {results['concurrency']}"
+          f"{', target rate ' + format(results['rate'], 'g') + ' req/s' if results['rate'] else ''}")
+
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    """Load test options, shared with backend_test.py --load"""
+    parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent connections')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Target requests per second over all endpoints (default: as fast as possible)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Test duration in seconds')
+    parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests')
+    parser.add_argument('--auth', metavar='USER:APP_PASSWORD',
+                        help='WordPress application password for the REST API (basic auth)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible request mix')
+    parser.add_argument('--allow-writes', action='store_true',
+                        help='Also call the endpoints that create LOADTEST records (communications, import process)')
+    parser.add_argument('--stub', action='store_true',
+                        help='Run against a local stub server instead of the WordPress installation')
+    parser.add_argument('--stub-latency', type=float, default=0.0, metavar='MS',
+                        help='Mean response time of the stub server in milliseconds')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help='Fail the run if more than this fraction of requests fail')
+
+
+def finish_load_test(results: Dict, args, target: str):
+    """Print the report, export and record the run and exit with its verdict"""
+    print_report(results)
+
+    passed = results['requests'] > 0 and results['error_rate'] <= args.max_error_rate
+    run = build_run('load_test', target, results, results['elapsed'],
+                    files_scanned=0, bytes_read=results['bytes_received'], passed=passed)
+    if args.json:
+        write_json(run, args.json)
+    if not args.no_history:
+        record_run(run, args.history_db)
+
+    if passed:
+        print(f"\n✅ LOAD TEST PASSED: error rate {results['error_rate'] * 100:.2f}% ≤ {args.max_error_rate * 100:g}%")
+        sys.exit(0)
+    else:
+        print(f"\n❌ LOAD TEST FAILED: error rate {results['error_rate'] * 100:.2f}% > {args.max_error_rate * 100:g}%")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the doc-in, CRM and import REST endpoints')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='WordPress installation to test')
+    add_load_arguments(parser)
+    parser.add_argument('--json', metavar='PATH', help="Write the results of this run as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB, help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true', help='Do not append this run to the run history')
+    args = parser.parse_args()
+    report_to_stderr(args.json)
+
+    print(f"🚀 Load testing {'local stub server' if args.stub else args.base_url} "
+          f"for {args.duration:g}s with {args.concurrency} connections{'' if args.allow_writes else ', read-only endpoints'}...")
+    results = asyncio.run(run_load_test(args, args.base_url))
+    finish_load_test(results, args, 'stub' if args.stub else args.base_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Shared Pattern Scanner for the Legal Automation test scripts
+Central registry for the patterns of all tests. Walks the plugin tree once,
+memory-maps every file and matches all rules that apply to it with one
+combined alternation, routing each hit back to the owning rule. Line numbers
+come from an incremental line-offset index instead of re-counting newlines
+for every match.
+"""
+
+import os
+import re
+import json
+import mmap
+import hashlib
+import fnmatch
+import threading
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SCAN_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.scan-cache.json')
+
+INLINE_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x'}
+
+
+class LineIndex:
+    """Maps byte offsets to 1-based line numbers, indexing newlines only as far as needed"""
+
+    def __init__(self, data):
+        self.data = data
+        self.offsets = [0]  # start offset of every line found so far
+        self.scanned = 0
+
+    def _extend_to(self, pos: int):
+        while self.scanned <= pos:
+            newline = self.data.find(b'\n', self.scanned)
+            if newline == -1:
+                self.scanned = len(self.data) + 1
+                break
+            self.offsets.append(newline + 1)
+            self.scanned = newline + 1
+
+    def line_number(self, pos: int) -> int:
+        self._extend_to(pos)
+        return bisect_right(self.offsets, pos)
+
+    def line_text(self, line_number: int) -> str:
+        start = self.offsets[line_number - 1]
+        end = self.data.find(b'\n', start)
+        if end == -1:
+            end = len(self.data)
+        return self.data[start:end].decode('utf-8', errors='replace').rstrip('\r')
+
+
+class ScanRule:
+    """One registered pattern and the files it applies to"""
+
+    def __init__(self, rule_id: str, pattern: str, paths: Optional[List[str]] = None,
+                 glob: str = '*.php', flags: int = 0):
+        self.rule_id = rule_id
+        self.pattern = pattern
+        self.regex = re.compile(pattern.encode('utf-8'), flags)
+        self.paths = paths
+        self.glob = glob
+        self.flags = flags
+
+    def inline_pattern(self) -> str:
+        """The pattern with its flags scoped inline, for use inside a combined alternation"""
+        letters = ''
+        for flag, letter in INLINE_FLAGS.items():
+            if self.flags & flag:
+                letters += letter
+        if self.flags & ~sum(INLINE_FLAGS):
+            raise ValueError(f"Unsupported regex flags for rule {self.rule_id}")
+        return f'(?{letters}:{self.pattern})' if letters else f'(?:{self.pattern})'
+
+    def applies_to(self, relative_path: str) -> bool:
+        if self.paths is not None:
+            return relative_path in self.paths
+        return fnmatch.fnmatch(os.path.basename(relative_path), self.glob)
+
+
+class PatternScanner:
+    """Collects patterns from all tests and scans the tree for them in one pass"""
+
+    def __init__(self, base_path, cache_file: Optional[str] = None):
+        self.base_path = Path(base_path)
+        self.cache_file = cache_file
+        self.rules: Dict[str, ScanRule] = {}
+        self.combined: Dict[Tuple[str, ...], re.Pattern] = {}
+        self.results: Optional[Dict[str, List[Dict]]] = None
+        self.stats = {'files_scanned': 0, 'files_reused': 0, 'bytes_read': 0}
+        self.lock = threading.Lock()
+        self.changed: Optional[set] = None
+        self.files: Optional[Dict[str, Dict]] = None  # per-file matches of the last scan, kept warm
+
+    def register(self, rule_id: str, pattern: str, paths: Optional[List[str]] = None,
+                 glob: str = '*.php', flags: int = 0):
+        """Register a pattern for explicit paths (relative to base_path) or every file matching glob"""
+        self.rules[rule_id] = ScanRule(rule_id, pattern, paths, glob, flags)
+        self.combined = {}
+        self.results = None
+        self.files = None
+
+    def register_literal(self, rule_id: str, text: str, paths: Optional[List[str]] = None,
+                         glob: str = '*.php'):
+        """Register a plain substring check (the equivalent of `text in content`)"""
+        self.register(rule_id, re.escape(text), paths, glob)
+
+    def _combined_regex(self, rules: List[ScanRule]) -> re.Pattern:
+        """One zero-width alternation over all rules, compiled once per distinct rule set
+
+        The lookahead makes every position where any rule starts a hit without
+        consuming input, so overlapping matches of different rules are all seen.
+        """
+        key = tuple(rule.rule_id for rule in rules)
+        if key not in self.combined:
+            alternation = '|'.join(rule.inline_pattern() for rule in rules)
+            self.combined[key] = re.compile(f'(?=(?:{alternation}))'.encode('utf-8'))
+        return self.combined[key]
+
+    def _candidate_files(self) -> List[str]:
+        files = set()
+        for rule in self.rules.values():
+            if rule.paths is not None:
+                files.update(path for path in rule.paths if (self.base_path / path).is_file())
+        if any(rule.paths is None for rule in self.rules.values()):
+            for root, dirs, names in os.walk(self.base_path):
+                dirs[:] = [name for name in dirs if not name.startswith('.')]
+                for name in names:
+                    files.add(os.path.relpath(os.path.join(root, name), self.base_path))
+        return sorted(files)
+
+    def _scan_file(self, relative_path: str, rules: List[ScanRule]) -> Dict[str, List[Dict]]:
+        file_path = self.base_path / relative_path
+        file_matches = {rule.rule_id: [] for rule in rules}
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return file_matches
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                self.stats['files_scanned'] += 1
+                self.stats['bytes_read'] += size
+                lines = LineIndex(data)
+                next_start = {rule.rule_id: 0 for rule in rules}
+                for hit in self._combined_regex(rules).finditer(data):
+                    pos = hit.start()
+                    for rule in rules:
+                        # Same non-overlapping semantics as finditer within one rule
+                        if pos < next_start[rule.rule_id]:
+                            continue
+                        match = rule.regex.match(data, pos)
+                        if match:
+                            file_matches[rule.rule_id].append(self._match_record(file_path, lines, match))
+                            next_start[rule.rule_id] = max(match.end(), pos + 1)
+        return file_matches
+
+    def _match_record(self, file_path: Path, lines: LineIndex, match) -> Dict:
+        line_number = lines.line_number(match.start())
+        return {
+            'file': file_path,
+            'line': line_number,
+            'text': match.group(0).decode('utf-8', errors='replace'),
+            'groups': tuple(group.decode('utf-8', errors='replace') if group is not None else None
+                            for group in match.groups()),
+            'content': lines.line_text(line_number).strip()
+        }
+
+    def rules_signature(self) -> str:
+        """Changes whenever a rule, its flags or its file selection changes"""
+        signature = [(rule.rule_id, rule.pattern, rule.flags, rule.paths, rule.glob)
+                     for rule in self.rules.values()]
+        return hashlib.sha256(json.dumps(signature).encode('utf-8')).hexdigest()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get('base_path') != str(self.base_path) or cache.get('rules') != self.rules_signature():
+            return {}
+        return cache.get('files', {})
+
+    def _save_cache(self, files: Dict[str, Dict]):
+        if not self.cache_file:
+            return
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'base_path': str(self.base_path), 'rules': self.rules_signature(), 'files': files}, f)
+        os.replace(tmp_file, self.cache_file)
+
+    def _reuse(self, relative_path: str, entry: Optional[Dict]) -> Optional[Dict[str, List[Dict]]]:
+        """Cached matches of an untouched file, if its size and mtime still agree"""
+        if entry is None or self.changed is None:
+            return None
+        file_path = self.base_path / relative_path
+        if os.path.abspath(file_path) in self.changed:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return None
+        return {rule_id: [dict(match, file=file_path, groups=tuple(match['groups'])) for match in matches]
+                for rule_id, matches in entry['matches'].items()}
+
+    def set_changed(self, changed_paths):
+        """Incremental mode: only rescan these absolute paths and reuse cached matches for the rest"""
+        self.changed = {os.path.abspath(path) for path in changed_paths}
+        self.results = None
+
+    def affected_rules(self) -> List[str]:
+        """Rules that apply to at least one changed file under base_path"""
+        if self.changed is None:
+            return list(self.rules)
+        base = os.path.abspath(self.base_path) + os.sep
+        changed = [os.path.relpath(path, self.base_path) for path in self.changed if path.startswith(base)]
+        return [rule_id for rule_id, rule in self.rules.items()
+                if any(rule.applies_to(relative_path) for relative_path in changed)]
+
+    def scan(self) -> Dict[str, List[Dict]]:
+        """Run every registered rule over the tree; results are kept until a new rule is registered
+
+        Safe to call from several threads: the first caller scans, the others
+        wait and then share the same read-only results.
+        """
+        with self.lock:
+            if self.results is not None:
+                return self.results
+
+            results = {rule_id: [] for rule_id in self.rules}
+            self.results = results
+            self.stats = {'files_scanned': 0, 'files_reused': 0, 'bytes_read': 0}
+            cached_files = dict(self.files) if self.files is not None else self._load_cache()
+            files = {}
+            for relative_path in self._candidate_files():
+                rules = [rule for rule in self.rules.values() if rule.applies_to(relative_path)]
+                if not rules:
+                    continue
+                file_matches = self._reuse(relative_path, cached_files.get(relative_path))
+                if file_matches is not None:
+                    self.stats['files_reused'] += 1
+                else:
+                    try:
+                        stat = os.stat(self.base_path / relative_path)
+                        file_matches = self._scan_file(relative_path, rules)
+                    except OSError:
+                        continue
+                    cached_files[relative_path] = {
+                        'size': stat.st_size,
+                        'mtime_ns': stat.st_mtime_ns,
+                        'matches': {rule_id: [dict(match, file=None) for match in matches]
+                                    for rule_id, matches in file_matches.items()}
+                    }
+                files[relative_path] = cached_files[relative_path]
+                for rule_id, matches in file_matches.items():
+                    results[rule_id].extend(matches)
+            self.files = files
+            try:
+                self._save_cache(files)
+            except OSError:
+                pass
+            return results
+
+    def matches(self, rule_id: str, file_path=None) -> List[Dict]:
+        """Matches of one rule, optionally restricted to one file"""
+        results = self.scan()[rule_id]
+        if file_path is None:
+            return results
+        return [match for match in results if match['file'] == Path(file_path)]
+
+    def found(self, rule_id: str, file_path=None) -> bool:
+        return len(self.matches(rule_id, file_path)) > 0
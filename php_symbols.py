@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+PHP Symbol Index for the Legal Automation test scripts
+Tokenizes the plugin sources once (comments, strings and heredocs are
+recognised, so text inside them is never mistaken for code) and keeps a
+persisted index of classes, functions/methods, calls, class references,
+add_action/add_filter hooks and $wpdb queries with file:line. Unchanged files
+are reused by size and mtime, touched files by content hash, so structural
+checks become dictionary lookups instead of regex scans.
+
+Usage:
+    python3 php_symbols.py [PATH] [--find NAME] [--hooks] [--wpdb [FILE]]
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SYMBOL_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.symbol-index.json')
+
+# Bump when the extracted records change shape so stale indexes are rebuilt
+INDEX_VERSION = 3
+
+HOOK_FUNCTIONS = {'add_action', 'add_filter'}
+
+WPDB_METHODS = {'query', 'get_results', 'get_row', 'get_var', 'get_col', 'insert', 'update',
+                'delete', 'replace', 'prepare'}
+
+# Language constructs that look like calls but are not symbols
+NON_CALLS = {'if', 'elseif', 'while', 'for', 'foreach', 'switch', 'match', 'catch', 'array', 'list',
+             'isset', 'empty', 'unset', 'echo', 'print', 'return', 'exit', 'die', 'include',
+             'include_once', 'require', 'require_once', 'function', 'fn', 'new', 'declare', 'eval'}
+
+CLASS_KEYWORDS = {'class', 'interface', 'trait', 'enum'}
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<close>\?>)
+  | (?P<comment>(?://|\#(?!\[))[^\n]*?(?=\?>|\n|$)|/\*.*?(?:\*/|\Z))
+  | (?P<heredoc><<<[ \t]*(?P<quote>["']?)(?P<label>[A-Za-z_]\w*)(?P=quote)\r?\n
+        .*?\n[ \t]*(?P=label)\b)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`(?:[^`\\]|\\.)*`)
+  | (?P<variable>\$[A-Za-z_\x80-\uffff][\w\x80-\uffff]*)
+  | (?P<name>\\?[A-Za-z_\x80-\uffff][\w\x80-\uffff]*(?:\\[A-Za-z_\x80-\uffff][\w\x80-\uffff]*)*)
+  | (?P<number>\d[\w.]*)
+  | (?P<space>\s+)
+  | (?P<op>\?->|->|::|=>|\S)
+''', re.VERBOSE | re.DOTALL)
+
+DDL = re.compile(r'(?:CREATE|ALTER)\s+TABLE', re.IGNORECASE)
+
+OPEN_TAG = re.compile(r'<\?(?:php\b|=)?', re.IGNORECASE)
+
+
+class Token:
+    __slots__ = ('kind', 'value', 'line', 'start', 'end')
+
+    def __init__(self, kind: str, value: str, line: int, start: int, end: int):
+        self.kind = kind
+        self.value = value
+        self.line = line
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f'Token({self.kind}, {self.value!r}, line {self.line})'
+
+
+def tokenize(text: str) -> List[Token]:
+    """Code tokens of a PHP file; inline HTML, comments and whitespace are dropped"""
+    tokens = []
+    pos, line = 0, 1
+    length = len(text)
+    while pos < length:
+        # Inline HTML up to the next open tag
+        open_tag = OPEN_TAG.search(text, pos)
+        if open_tag is None:
+            break
+        line += text.count('\n', pos, open_tag.end())
+        pos = open_tag.end()
+
+        while pos < length:
+            match = TOKEN_PATTERN.match(text, pos)
+            kind = match.lastgroup
+            if kind in ('quote', 'label'):
+                kind = 'heredoc'
+            value = match.group(0)
+            if kind == 'close':
+                pos = match.end()
+                break
+            if kind not in ('comment', 'space'):
+                tokens.append(Token(kind, value, line, pos, match.end()))
+            line += value.count('\n')
+            pos = match.end()
+    return tokens
+
+
+def string_value(token: Token) -> str:
+    """The text of a string literal without its quotes (escapes are left as written)"""
+    if token.kind == 'heredoc':
+        body = token.value.split('\n', 1)[1]
+        return body.rsplit('\n', 1)[0]
+    return token.value[1:-1]
+
+
+def assignment_operator(tokens: List[Token], index: int) -> Optional[Tuple[str, int]]:
+    """'=' or '.=' starting at index (but not ==, =>), and the index of the value after it"""
+    if index + 1 >= len(tokens):
+        return None
+    first, second = tokens[index], tokens[index + 1]
+    if first.value == '=' and second.value not in ('=', '>'):
+        return '=', index + 1
+    if first.value == '.' and second.value == '=' and index + 2 < len(tokens) and tokens[index + 2].value != '=':
+        return '.=', index + 2
+    return None
+
+
+def class_name(name: str) -> str:
+    return name.lstrip('\\')
+
+
+def split_arguments(tokens: List[Token], open_index: int) -> Tuple[List[List[Token]], int]:
+    """Top-level arguments of the call whose '(' is at open_index, and the index of its ')'"""
+    arguments, current = [], []
+    depth = 0
+    index = open_index
+    while index < len(tokens):
+        token = tokens[index]
+        if token.kind == 'op' and token.value in '([{':
+            depth += 1
+            if depth > 1:
+                current.append(token)
+        elif token.kind == 'op' and token.value in ')]}':
+            depth -= 1
+            if depth == 0:
+                if current:
+                    arguments.append(current)
+                return arguments, index
+            current.append(token)
+        elif token.kind == 'op' and token.value == ',' and depth == 1:
+            arguments.append(current)
+            current = []
+        else:
+            current.append(token)
+        index += 1
+    if current:
+        arguments.append(current)
+    return arguments, index
+
+
+def literal_value(tokens: List[Token]):
+    """Python value of a literal PHP expression: array()/[] (dict when keyed,
+    list otherwise), strings, numbers, true/false/null. Anything that is not a
+    plain literal evaluates to None."""
+    if not tokens:
+        return None
+    first = tokens[0]
+    if first.kind == 'name' and first.value.lower() == 'array' and len(tokens) > 1 and tokens[1].value == '(':
+        open_index = 1
+    elif first.kind == 'op' and first.value == '[':
+        open_index = 0
+    else:
+        if len(tokens) == 2 and first.value == '-' and tokens[1].kind == 'number':
+            value = literal_value(tokens[1:])
+            return -value if value is not None else None
+        if len(tokens) != 1:
+            return None
+        if first.kind in ('string', 'heredoc'):
+            return string_value(first)
+        if first.kind == 'number':
+            try:
+                return int(first.value, 0)
+            except ValueError:
+                try:
+                    return float(first.value)
+                except ValueError:
+                    return None
+        return {'true': True, 'false': False}.get(first.value.lower()) if first.kind == 'name' else None
+
+    elements, close_index = split_arguments(tokens, open_index)
+    if close_index != len(tokens) - 1:
+        return None
+    keyed, values = False, []
+    for element in elements:
+        arrow = next((i for i, token in enumerate(element) if token.kind == 'op' and token.value == '=>'), None)
+        if arrow is None:
+            values.append((None, literal_value(element)))
+        else:
+            keyed = True
+            values.append((literal_value(element[:arrow]), literal_value(element[arrow + 1:])))
+    if not keyed:
+        return [value for _, value in values]
+    result, next_key = {}, 0
+    for key, value in values:
+        if key is None:
+            key = next_key
+        if isinstance(key, int):
+            next_key = max(next_key, key + 1)
+        result[key] = value
+    return result
+
+
+def returned_literal(text: str, function_name: str):
+    """Value of the literal a PHP function returns, e.g. a hardcoded schema array"""
+    tokens = tokenize(text)
+    for index in range(len(tokens) - 1):
+        if tokens[index].value.lower() != 'function' or tokens[index + 1].value != function_name:
+            continue
+        start = next((i for i in range(index, len(tokens)) if tokens[i].value.lower() == 'return'), None)
+        if start is None:
+            return None
+        end, depth = start + 1, 0
+        while end < len(tokens) and not (depth == 0 and tokens[end].value == ';'):
+            if tokens[end].value in ('(', '['):
+                depth += 1
+            elif tokens[end].value in (')', ']'):
+                depth -= 1
+            end += 1
+        return literal_value(tokens[start + 1:end])
+    return None
+
+
+def extract_symbols(text: str) -> Dict[str, List[Dict]]:
+    """Classes, functions, calls, class references, hooks, $wpdb queries, string
+    assignments and CREATE/ALTER TABLE statements of one PHP file"""
+    tokens = tokenize(text)
+    symbols = {'classes': [], 'functions': [], 'calls': [], 'class_refs': [], 'hooks': [], 'wpdb': [],
+               'assignments': [], 'ddl': []}
+
+    def source(argument: List[Token]) -> str:
+        return text[argument[0].start:argument[-1].end] if argument else ''
+
+    def strings(argument: List[Token]) -> List[str]:
+        return [string_value(token) for token in argument if token.kind in ('string', 'heredoc')]
+
+    depth = 0
+    scopes = []          # (kind, name, depth at which the scope's body opened)
+    pending_scope = None  # class or function whose '{' has not been seen yet
+
+    def current(kind: str) -> Optional[str]:
+        for scope_kind, name, _ in reversed(scopes):
+            if scope_kind == kind:
+                return name
+        return None
+
+    for index, token in enumerate(tokens):
+        previous = tokens[index - 1] if index > 0 else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        after_member = previous is not None and previous.kind == 'op' and previous.value in ('->', '?->', '::')
+
+        if token.kind in ('string', 'heredoc') and DDL.search(token.value):
+            symbols['ddl'].append({'line': token.line, 'sql': string_value(token),
+                                   'class': current('class'), 'function': current('function')})
+            continue
+
+        # `$var = ...`, `$var .= ...` and `$this->prop = ...` with a string on the
+        # right, so SQL built up in variables can be resolved later
+        target = None
+        if token.kind == 'variable' and token.value != '$this' and not after_member:
+            target = token.value
+        elif (token.kind == 'name' and previous is not None and previous.value == '->'
+              and index >= 2 and tokens[index - 2].value == '$this'):
+            target = '$this->' + token.value
+        if target is not None and following is not None:
+            assignment = assignment_operator(tokens, index + 1)
+            if assignment is not None:
+                operator, value_index = assignment
+                end = value_index
+                nesting = 0
+                while end < len(tokens) and not (nesting == 0 and tokens[end].value in (';', ',', ')')):
+                    if tokens[end].value in ('(', '['):
+                        nesting += 1
+                    elif tokens[end].value in (')', ']'):
+                        nesting -= 1
+                    end += 1
+                value = tokens[value_index:end]
+                if any(part.kind in ('string', 'heredoc') or part.value == 'prefix' for part in value):
+                    symbols['assignments'].append({
+                        'target': target,
+                        'op': operator,
+                        'value': text[value[0].start:value[-1].end],
+                        'line': token.line,
+                        'class': current('class'),
+                        'function': current('function')
+                    })
+
+        if token.kind == 'op':
+            if token.value == '{':
+                depth += 1
+                if pending_scope is not None:
+                    scopes.append((pending_scope[0], pending_scope[1], depth))
+                    pending_scope = None
+            elif token.value == '}':
+                if scopes and scopes[-1][2] == depth:
+                    scopes.pop()
+                depth -= 1
+            elif token.value == ';' and pending_scope is not None and pending_scope[0] == 'function':
+                pending_scope = None  # abstract or interface method without a body
+            continue
+
+        if token.kind == 'name':
+            lowered = token.value.lower()
+
+            if (lowered in CLASS_KEYWORDS and not after_member and following is not None
+                    and following.kind == 'name' and not (previous and previous.value.lower() == 'new')):
+                record = {'name': following.value, 'kind': lowered, 'line': token.line,
+                          'extends': None, 'implements': []}
+                # extends / implements clauses up to the class body
+                clause = None
+                for ahead in tokens[index + 2:]:
+                    if ahead.kind == 'op' and ahead.value == '{':
+                        break
+                    if ahead.kind == 'name' and ahead.value.lower() in ('extends', 'implements'):
+                        clause = ahead.value.lower()
+                    elif ahead.kind == 'name' and clause is not None:
+                        if clause == 'extends' and record['extends'] is None:
+                            record['extends'] = class_name(ahead.value)
+                        else:
+                            record['implements'].append(class_name(ahead.value))
+                        symbols['class_refs'].append({'name': class_name(ahead.value), 'line': ahead.line})
+                symbols['classes'].append(record)
+                pending_scope = ('class', following.value)
+                continue
+
+            if lowered == 'function' and not after_member:
+                name_index = index + 1
+                if name_index < len(tokens) and tokens[name_index].value == '&':
+                    name_index += 1
+                if name_index < len(tokens) and tokens[name_index].kind == 'name':
+                    in_class = bool(scopes) and scopes[-1][0] == 'class' and scopes[-1][2] == depth
+                    name = tokens[name_index].value
+                    symbols['functions'].append({
+                        'name': name,
+                        'class': current('class') if in_class else None,
+                        'line': token.line
+                    })
+                    pending_scope = ('function', name)
+                continue
+
+            if previous is not None and previous.kind == 'name' and previous.value.lower() in ('new', 'instanceof'):
+                symbols['class_refs'].append({'name': class_name(token.value), 'line': token.line})
+            elif following is not None and following.value == '::' and not after_member:
+                if lowered not in ('self', 'static', 'parent'):
+                    symbols['class_refs'].append({'name': class_name(token.value), 'line': token.line})
+
+            is_call = following is not None and following.kind == 'op' and following.value == '('
+            if not is_call or lowered in NON_CALLS or (previous is not None and previous.value.lower() == 'new'):
+                continue
+            if previous is not None and (previous.value.lower() == 'function' or (
+                    previous.value == '&' and index >= 2 and tokens[index - 2].value.lower() == 'function')):
+                continue  # the definition itself, recorded above
+
+            call_kind = 'function'
+            if after_member:
+                call_kind = 'static' if previous.value == '::' else 'method'
+            arguments, _ = split_arguments(tokens, index + 1)
+            symbols['calls'].append({
+                'name': class_name(token.value),
+                'kind': call_kind,
+                'line': token.line,
+                'class': current('class'),
+                'function': current('function')
+            })
+
+            if call_kind == 'function' and lowered in ('class_exists', 'interface_exists') and arguments:
+                for name in strings(arguments[0]):
+                    symbols['class_refs'].append({'name': class_name(name), 'line': token.line})
+
+            if call_kind == 'function' and lowered in HOOK_FUNCTIONS and arguments:
+                hook_names = strings(arguments[0])
+                callback = strings(arguments[1])[-1:] if len(arguments) > 1 else []
+                symbols['hooks'].append({
+                    'type': 'action' if lowered == 'add_action' else 'filter',
+                    'hook': hook_names[0] if hook_names else source(arguments[0]),
+                    'callback': callback[0] if callback else (source(arguments[1]) if len(arguments) > 1 else None),
+                    'line': token.line
+                })
+
+            if call_kind == 'method' and lowered in WPDB_METHODS and index >= 2:
+                receiver = tokens[index - 2]
+                is_wpdb = receiver.value == '$wpdb' or (
+                    receiver.value == 'wpdb' and index >= 4 and tokens[index - 3].value == '->'
+                    and tokens[index - 4].value == '$this')
+                if is_wpdb:
+                    symbols['wpdb'].append({
+                        'method': lowered,
+                        'line': token.line,
+                        'argument': source(arguments[0]) if arguments else '',
+                        'sql': ' '.join(strings(arguments[0])) if arguments else '',
+                        'class': current('class'),
+                        'function': current('function')
+                    })
+    return symbols
+
+
+class SymbolIndex:
+    """Persisted symbol index over all PHP files below base_path, updated incrementally"""
+
+    def __init__(self, base_path, index_file: Optional[str] = DEFAULT_SYMBOL_INDEX):
+        self.base_path = Path(base_path)
+        self.index_file = index_file
+        self.files: Dict[str, Dict] = {}
+        self.lookup: Optional[Dict[str, Dict[str, List[Dict]]]] = None
+        self.stats = {'files_indexed': 0, 'files_reused': 0, 'bytes_read': 0}
+        self.lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.index_file:
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION or index.get('base_path') != str(self.base_path):
+            return {}
+        return index.get('files', {})
+
+    def _save(self):
+        if not self.index_file:
+            return
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'base_path': str(self.base_path), 'files': self.files}, f)
+        os.replace(tmp_file, self.index_file)
+
+    def _php_files(self) -> List[str]:
+        files = []
+        for root, dirs, names in os.walk(self.base_path):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for name in names:
+                if name.endswith('.php'):
+                    files.append(Path(os.path.relpath(os.path.join(root, name), self.base_path)).as_posix())
+        return sorted(files)
+
+    def _index_file(self, relative_path: str, entry: Optional[Dict]) -> Dict:
+        """Reuse the entry by size+mtime, then by content hash; otherwise tokenize the file"""
+        file_path = self.base_path / relative_path
+        stat = os.stat(file_path)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            self.stats['files_reused'] += 1
+            return entry
+
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        self.stats['bytes_read'] += len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry['sha256'] == digest:
+            self.stats['files_reused'] += 1
+            symbols = entry['symbols']
+        else:
+            self.stats['files_indexed'] += 1
+            symbols = extract_symbols(data.decode('utf-8', errors='replace'))
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest, 'symbols': symbols}
+
+    def update(self) -> 'SymbolIndex':
+        """Bring the index up to date with the tree and build the lookup tables
+
+        Safe to call from several threads: the first caller updates, the
+        others wait and then share the same read-only tables.
+        """
+        with self.lock:
+            if self.lookup is not None:
+                return self
+            self.stats = {'files_indexed': 0, 'files_reused': 0, 'bytes_read': 0}
+            previous = self.files or self._load()
+            files = {}
+            for relative_path in self._php_files():
+                try:
+                    files[relative_path] = self._index_file(relative_path, previous.get(relative_path))
+                except OSError:
+                    continue
+            self.files = files
+            try:
+                self._save()
+            except OSError:
+                pass
+            self.lookup = self._build_lookup()
+            return self
+
+    def invalidate(self):
+        """Make the next update() re-check the tree, reusing the in-memory entries of untouched files"""
+        with self.lock:
+            self.lookup = None
+
+    def _build_lookup(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """kind -> lower-cased name -> records (PHP class and function names are case-insensitive)"""
+        keys = {'classes': 'name', 'functions': 'name', 'calls': 'name', 'class_refs': 'name', 'hooks': 'hook'}
+        lookup = {kind: {} for kind in keys}
+        for relative_path, entry in self.files.items():
+            for kind, key in keys.items():
+                for record in entry['symbols'][kind]:
+                    lookup[kind].setdefault(str(record[key]).lower(), []).append(dict(record, file=relative_path))
+        return lookup
+
+    def find(self, kind: str, name: str, file_path: Optional[str] = None) -> List[Dict]:
+        """Records of one kind with this name, optionally restricted to one file (relative to base_path)"""
+        records = self.update().lookup[kind].get(name.lower(), [])
+        if file_path is None:
+            return records
+        return [record for record in records if record['file'] == file_path]
+
+    def classes(self, name: str, file_path: Optional[str] = None) -> List[Dict]:
+        return self.find('classes', name, file_path)
+
+    def functions(self, name: str, file_path: Optional[str] = None) -> List[Dict]:
+        """Definitions of a function or method"""
+        return self.find('functions', name, file_path)
+
+    def calls(self, name: str, file_path: Optional[str] = None) -> List[Dict]:
+        return self.find('calls', name, file_path)
+
+    def class_refs(self, name: str, file_path: Optional[str] = None) -> List[Dict]:
+        return self.find('class_refs', name, file_path)
+
+    def hooks(self, hook: str, file_path: Optional[str] = None) -> List[Dict]:
+        return self.find('hooks', hook, file_path)
+
+    def defines_or_calls(self, name: str, file_path: Optional[str] = None) -> bool:
+        """Whether a function/method is defined or called (in one file)"""
+        return bool(self.functions(name, file_path) or self.calls(name, file_path))
+
+    def names(self, kind: str, file_path: str) -> List[str]:
+        """All names of one kind in a file, e.g. the methods a class file defines"""
+        entry = self.update().files.get(file_path)
+        if entry is None:
+            return []
+        return [record['name'] for record in entry['symbols'][kind]]
+
+    def wpdb_queries(self, file_path: Optional[str] = None) -> List[Dict]:
+        """$wpdb calls of one file or the whole tree, in file and line order"""
+        self.update()
+        files = [file_path] if file_path is not None else sorted(self.files)
+        return [dict(query, file=relative_path)
+                for relative_path in files if relative_path in self.files
+                for query in self.files[relative_path]['symbols']['wpdb']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the PHP symbol index of the plugin sources')
+    parser.add_argument('path', nargs='?', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='Directory to index (default: the repository)')
+    parser.add_argument('--index-file', default=DEFAULT_SYMBOL_INDEX, help='Location of the persisted index')
+    parser.add_argument('--find', metavar='NAME', help='Show every definition, call and reference of NAME')
+    parser.add_argument('--hooks', action='store_true', help='List all add_action/add_filter registrations')
+    parser.add_argument('--wpdb', nargs='?', const='', metavar='FILE', help='List $wpdb queries (of one file)')
+    args = parser.parse_args()
+
+    index = SymbolIndex(os.path.abspath(args.path), index_file=args.index_file).update()
+    print(f"📚 {len(index.files)} PHP files indexed: {index.stats['files_indexed']} tokenized, "
+          f"{index.stats['files_reused']} reused ({index.stats['bytes_read']} bytes read)")
+
+    if args.find:
+        for kind in ('classes', 'functions', 'calls', 'class_refs', 'hooks'):
+            for record in index.find(kind, args.find):
+                owner = f" [{record['class']}]" if record.get('class') else ''
+                print(f"   {kind:<10} {record['file']}:{record['line']}{owner}")
+    if args.hooks:
+        for record in sorted((record for records in index.lookup['hooks'].values() for record in records),
+                             key=lambda record: (record['file'], record['line'])):
+            print(f"   {record['file']}:{record['line']}  add_{record['type']}('{record['hook']}') -> {record['callback']}")
+    if args.wpdb is not None:
+        for query in index.wpdb_queries(args.wpdb or None):
+            print(f"   {query['file']}:{query['line']}  $wpdb->{query['method']}({query['argument'][:80]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+WordPress Plugin Header Index
+Reads only the leading docblock of each top-level PHP file (like WordPress'
+get_file_data) and parses the plugin headers into one record per main file
+"""
+
+import os
+import re
+import zipfile
+from typing import Dict, List, Optional
+
+# WordPress itself only looks at the first 8 KB of a plugin file for headers
+HEADER_BYTES = 8192
+
+PLUGIN_HEADERS = [
+    'Plugin Name', 'Plugin URI', 'Version', 'Description', 'Author', 'Author URI',
+    'Text Domain', 'Domain Path', 'Network', 'Requires at least', 'Requires PHP',
+    'License', 'License URI', 'Update URI'
+]
+
+HEADER_PATTERNS = {
+    header: re.compile(r'^(?:[ \t]*<\?php)?[ \t/*#@]*' + re.escape(header) + r':(.*)$',
+                       re.MULTILINE | re.IGNORECASE)
+    for header in PLUGIN_HEADERS
+}
+
+
+def parse_plugin_headers(text: str) -> Dict[str, str]:
+    """Parse WordPress plugin headers out of the leading part of a PHP file"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    headers = {}
+    for header, pattern in HEADER_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            value = re.sub(r'\s*(?:\*/|\?>).*', '', match.group(1)).strip()
+            headers[header] = value
+    return headers
+
+
+def parse_header_record(file_path: str, head: str) -> Optional[Dict]:
+    """Build the header record for one file, or None if it is not a main plugin file"""
+    headers = parse_plugin_headers(head)
+    if 'Plugin Name' not in headers:
+        return None
+    return {
+        'file': file_path,
+        'headers': headers,
+        'has_abspath_check': 'ABSPATH' in head
+    }
+
+
+def read_file_head(file_path: str, max_bytes: int = HEADER_BYTES) -> str:
+    """Read at most max_bytes from the start of a file"""
+    with open(file_path, 'rb') as f:
+        return f.read(max_bytes).decode('utf-8', errors='ignore')
+
+
+def build_header_index(plugin_path: str, max_bytes: int = HEADER_BYTES) -> List[Dict]:
+    """Header records of all top-level main plugin files, in file name order"""
+    index = []
+    for file in sorted(os.listdir(plugin_path)):
+        if file.endswith('.php'):
+            file_path = os.path.join(plugin_path, file)
+            record = parse_header_record(file_path, read_file_head(file_path, max_bytes))
+            if record is not None:
+                index.append(record)
+    return index
+
+
+def is_archive(plugin_path: str) -> bool:
+    """Whether plugin_path is a plugin zip rather than an extracted directory"""
+    return plugin_path.endswith('.zip') and os.path.isfile(plugin_path)
+
+
+def archive_root(names: List[str]) -> str:
+    """The single top-level folder all members live in (e.g. 'legal-automation-core/'), or ''"""
+    roots = {name.split('/', 1)[0] for name in names}
+    if len(roots) == 1 and all('/' in name for name in names):
+        return roots.pop() + '/'
+    return ''
+
+
+def build_archive_header_index(zip_path: str, max_bytes: int = HEADER_BYTES) -> List[Dict]:
+    """Header records of the main plugin files of a zip, read without extracting it"""
+    index = []
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+        root = archive_root(names)
+        for name in sorted(names):
+            relative_name = name[len(root):]
+            if relative_name.endswith('.php') and '/' not in relative_name:
+                with archive.open(name) as member:
+                    head = member.read(max_bytes).decode('utf-8', errors='ignore')
+                record = parse_header_record(os.path.join(zip_path, name), head)
+                if record is not None:
+                    index.append(record)
+    return index
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Query Analyzer for the Legal Automation plugins
+Pulls every $wpdb SELECT out of the seven plugins (via the symbol index and
+sql_corpus), seeds a scratch database on a local MySQL/MariaDB server with the
+plugins' CREATE TABLE statements and runs EXPLAIN on each query. Full table
+scans, full index scans, filesorts and temporary tables are reported ranked by
+call site, together with static findings (no LIMIT, LIKE with a leading or
+bound pattern).
+
+The server is reached through the `mysql` command line client; without it (or
+with --static) only the static findings are reported.
+
+Usage:
+    python3 query_analyzer.py [--database la_query_analysis] [--host 127.0.0.1] [--user root]
+                              [--top 30] [--static] [--json report.json]
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+from php_symbols import DEFAULT_SYMBOL_INDEX, SymbolIndex
+from run_history import report_to_stderr
+from sql_corpus import collect_queries, collect_schema, tables_in
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATABASE = 'la_query_analysis'
+
+# Weight of each finding when ranking call sites
+FINDING_WEIGHTS = {
+    'full_scan': 3,
+    'temporary': 2,
+    'leading_wildcard': 2,
+    'like_bound_pattern': 1,
+    'filesort': 1,
+    'full_index_scan': 1,
+    'unbounded': 1
+}
+
+AGGREGATE_ONLY = re.compile(r'^SELECT\s+(?:COUNT|SUM|AVG|MIN|MAX)\s*\((?:(?!\bFROM\b).)*\bFROM\b(?!.*\bGROUP\s+BY\b)',
+                            re.IGNORECASE | re.DOTALL)
+
+
+class MySQLError(Exception):
+    pass
+
+
+class MySQLClient:
+    """Runs statements through the mysql command line client in batch mode"""
+
+    def __init__(self, database: Optional[str] = None, host: str = '127.0.0.1', port: int = 3306,
+                 user: str = 'root', password: Optional[str] = None, binary: str = 'mysql'):
+        self.database = database
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.binary = binary
+
+    def run(self, sql: str, database: Optional[str] = None) -> List[Dict[str, str]]:
+        """Rows of the (last) result set as dicts; raises MySQLError on failure"""
+        command = [self.binary, '--batch', '--raw', f'--host={self.host}', f'--port={self.port}',
+                   f'--user={self.user}']
+        if database or self.database:
+            command.append(database or self.database)
+        env = dict(os.environ)
+        if self.password is not None:
+            env['MYSQL_PWD'] = self.password  # keeps the password off the process list
+        try:
+            proc = subprocess.run(command, input=sql, capture_output=True, text=True, env=env, timeout=60)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise MySQLError(str(e))
+        if proc.returncode != 0:
+            raise MySQLError(proc.stderr.strip())
+        lines = proc.stdout.splitlines()
+        if not lines:
+            return []
+        header = lines[0].split('\t')
+        return [dict(zip(header, line.split('\t'))) for line in lines[1:]]
+
+
+def seed_database(client: MySQLClient, schema: Dict[str, Dict]) -> List[str]:
+    """(Re)create the scratch database from the plugin DDL; returns the statements that failed"""
+    client.run(f"CREATE DATABASE IF NOT EXISTS `{client.database}`", database='')
+    failed = []
+    for table_name, table in sorted(schema.items()):
+        try:
+            client.run(f"DROP TABLE IF EXISTS `{table_name}`;\n{table['sql']};")
+        except MySQLError as e:
+            failed.append(f"{table_name} ({table['source']}): {e}")
+            continue
+        # Columns and indexes other plugin versions add to the table
+        for alteration in table['alter']:
+            try:
+                client.run(alteration['sql'] + ';')
+            except MySQLError as e:
+                failed.append(f"{table_name} ({alteration['source']}): {e}")
+    return failed
+
+
+def static_findings(query: Dict) -> List[str]:
+    """Findings that need no database: missing LIMIT and LIKE patterns that defeat indexes"""
+    findings = []
+    sql = query['sql']
+    if query['resolved'] and not re.search(r'\bLIMIT\b', sql, re.IGNORECASE) and not AGGREGATE_ONLY.match(sql) \
+            and not re.search(r'\bWHERE\s+(?:\w+\.)?id\s*=', sql, re.IGNORECASE):
+        findings.append('unbounded')
+    if re.search(r"\bLIKE\s+(?:'%|\"%)", query['template'], re.IGNORECASE):
+        findings.append('leading_wildcard')
+    elif re.search(r"\bLIKE\s+(?:%s|'%s')", query['template'], re.IGNORECASE):
+        # The pattern is bound at runtime; an index only helps without a leading %
+        findings.append('like_bound_pattern')
+    return findings
+
+
+def explain_findings(rows: List[Dict[str, str]]) -> List[Dict]:
+    """Full scans, full index scans, filesorts and temporary tables in an EXPLAIN result"""
+    findings = []
+    for row in rows:
+        extra = row.get('Extra') or ''
+        table = row.get('table')
+        if row.get('type') == 'ALL':
+            findings.append({'finding': 'full_scan', 'table': table, 'rows': row.get('rows')})
+        elif row.get('type') == 'index':
+            findings.append({'finding': 'full_index_scan', 'table': table, 'rows': row.get('rows')})
+        if 'Using filesort' in extra:
+            findings.append({'finding': 'filesort', 'table': table, 'rows': row.get('rows')})
+        if 'Using temporary' in extra:
+            findings.append({'finding': 'temporary', 'table': table, 'rows': row.get('rows')})
+    return findings
+
+
+def analyze(queries: List[Dict], client: Optional[MySQLClient]) -> List[Dict]:
+    """Findings per SELECT call site, worst first"""
+    report = []
+    for query in queries:
+        if query['kind'] != 'SELECT':
+            continue
+        findings = [{'finding': finding, 'table': None, 'rows': None} for finding in static_findings(query)]
+        explain_error = None
+        if client is not None and query['resolved']:
+            try:
+                findings += explain_findings(client.run('EXPLAIN ' + query['sql']))
+            except MySQLError as e:
+                explain_error = str(e).splitlines()[-1] if str(e) else 'EXPLAIN failed'
+        report.append(dict(
+            query,
+            tables=tables_in(query['sql']),
+            findings=findings,
+            explain_error=explain_error,
+            score=sum(FINDING_WEIGHTS[finding['finding']] for finding in findings)
+        ))
+    return sorted(report, key=lambda entry: (-entry['score'], entry['file'], entry['line']))
+
+
+def describe(finding: Dict) -> str:
+    text = finding['finding'].replace('_', ' ')
+    if finding['table']:
+        text += f" on {finding['table']}"
+    if finding['rows'] not in (None, 'NULL'):
+        text += f" (~{finding['rows']} rows)"
+    return text
+
+
+def print_report(report: List[Dict], top: int, explained: bool):
+    flagged = [entry for entry in report if entry['score'] > 0]
+    print(f"\n📊 QUERY ANALYSIS: {len(report)} SELECT call sites, {len(flagged)} with findings"
+          f"{'' if explained else ' (static analysis only)'}")
+    print("=" * 80)
+    for entry in flagged[:top]:
+        owner = f"{entry['class']}::" if entry['class'] else ''
+        print(f"\n[{entry['score']:>2}] {entry['file']}:{entry['line']}  {owner}{entry['function'] or '(global)'}"
+              f"  $wpdb->{entry['method']}")
+        print(f"     {entry['sql'][:150]}{'...' if len(entry['sql']) > 150 else ''}")
+        for finding in entry['findings']:
+            print(f"     - {describe(finding)}")
+        if entry['explain_error']:
+            print(f"     ⚠️  EXPLAIN failed: {entry['explain_error']}")
+    if len(flagged) > top:
+        print(f"\n... {len(flagged) - top} more call sites with findings (use --top or --json)")
+
+    unresolved = [entry for entry in report if not entry['resolved']]
+    if unresolved:
+        print(f"\nℹ️  {len(unresolved)} queries are built dynamically and could not be resolved for EXPLAIN:")
+        for entry in unresolved[:10]:
+            print(f"   {entry['file']}:{entry['line']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN every $wpdb query of the plugins')
+    parser.add_argument('path', nargs='?', default=BASE_DIR, help='Plugin tree to analyze (default: the repository)')
+    parser.add_argument('--database', default=DEFAULT_DATABASE,
+                        help='Scratch database to (re)create from the plugin schema')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PWD'),
+                        help='MySQL password (default: $MYSQL_PWD)')
+    parser.add_argument('--mysql', default='mysql', help='mysql client binary')
+    parser.add_argument('--static', action='store_true', help='Skip EXPLAIN, only report static findings')
+    parser.add_argument('--top', type=int, default=30, help='Number of call sites to show')
+    parser.add_argument('--json', metavar='PATH', help="Write the full report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+    report_to_stderr(args.json)
+
+    index = SymbolIndex(os.path.abspath(args.path), index_file=DEFAULT_SYMBOL_INDEX)
+    queries = collect_queries(index)
+    schema = collect_schema(index)
+    print(f"🔍 {len(queries)} $wpdb call sites and {len(schema)} table definitions found")
+
+    client = None
+    if not args.static:
+        if shutil.which(args.mysql) is None:
+            print(f"⚠️  {args.mysql} client not found - reporting static findings only")
+        else:
+            client = MySQLClient(args.database, args.host, args.port, args.user, args.password, args.mysql)
+            try:
+                failed = seed_database(client, schema)
+            except MySQLError as e:
+                print(f"Error: Could not prepare database {args.database}: {e}")
+                sys.exit(1)
+            print(f"🗄️  Seeded {args.database} from {len(schema)} table definitions"
+                  f"{f' ({len(failed)} statements failed)' if failed else ''}")
+            for failure in failed:
+                print(f"   ⚠️  {failure}")
+
+    report = analyze(queries, client)
+    print_report(report, args.top, explained=client is not None)
+
+    if args.json:
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.json == '-':
+            print(output, file=sys.__stdout__)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+<?php
+/**
+ * Page-Render Benchmark Driver for render_benchmark.py
+ * Loads a local WordPress installation with the Legal Automation plugins as
+ * an administrator in the admin context and either seeds benchmark cases or
+ * renders one case screen of CAH_Admin_Dashboard headlessly. Every command
+ * prints one JSON line.
+ *
+ *   php render-benchmark.php <wp-path> seed <cases> [--seed 42] [--batch 1000]
+ *   php render-benchmark.php <wp-path> render <edit|view|list> [--samples 20] [--search TERM]
+ *   php render-benchmark.php <wp-path> clean
+ *
+ * seed    grows the benchmark data set to <cases> cases, each with a debtor and
+ *         a plaintiff contact, 1-4 financial rows, 0-3 documents and a TV
+ *         assignment for every fifth case, plus shared courts, plaintiffs and
+ *         TV lawyers; a larger existing set is removed first
+ * render  renders render_edit_case_form / render_view_case for evenly spread
+ *         benchmark cases, or render_cases_list (the la-cases list, optionally
+ *         with a search), after one untimed warm-up render. Per render it
+ *         reports the query count, DB time, PHP time and peak memory
+ * clean   removes every benchmark row
+ *
+ * Benchmark rows are recognised by import_source 'render_benchmark' (cases),
+ * e-mail addresses at bench.example.test (contacts) and court codes BENCH-*.
+ * DB time comes from $wpdb->queries, so SAVEQUERIES is switched on here unless
+ * wp-config.php already defines it as false.
+ */
+
+if (PHP_SAPI !== 'cli') {
+    exit;
+}
+
+const BENCH_SOURCE = 'render_benchmark';
+const BENCH_DOMAIN = 'bench.example.test';
+const BENCH_COURTS = 120;
+const BENCH_PLAINTIFFS = 200;
+const BENCH_TV_LAWYERS = 50;
+
+function benchmark_fail($message) {
+    echo json_encode(array('error' => $message)), "\n";
+    exit(1);
+}
+
+function benchmark_option($args, $name, $default) {
+    $index = array_search($name, $args, true);
+    return $index !== false && isset($args[$index + 1]) ? $args[$index + 1] : $default;
+}
+
+$args = array_slice($argv, 1);
+if (count($args) < 2) {
+    fwrite(STDERR, "Usage: php render-benchmark.php <wp-path> <seed N|render SCREEN|clean> [options]\n");
+    exit(2);
+}
+$wp_path = rtrim($args[0], '/');
+$command = $args[1];
+
+if (!file_exists($wp_path . '/wp-load.php')) {
+    benchmark_fail("No WordPress installation at $wp_path");
+}
+
+define('WP_USE_THEMES', false);
+define('WP_ADMIN', true);
+if (!defined('SAVEQUERIES')) {
+    define('SAVEQUERIES', true);
+}
+$_SERVER['HTTP_HOST'] = isset($_SERVER['HTTP_HOST']) ? $_SERVER['HTTP_HOST'] : 'localhost';
+$_SERVER['REQUEST_URI'] = '/wp-admin/admin.php?page=la-cases';
+$_SERVER['REQUEST_METHOD'] = 'GET';
+require $wp_path . '/wp-load.php';
+require_once ABSPATH . 'wp-admin/includes/admin.php';
+set_time_limit(0);
+
+global $wpdb;
+
+if (!class_exists('CAH_Admin_Dashboard')) {
+    benchmark_fail('Legal Automation Core is not active');
+}
+$cases_table = $wpdb->prefix . 'klage_cases';
+if ($wpdb->get_var($wpdb->prepare('SHOW TABLES LIKE %s', $cases_table)) !== $cases_table) {
+    benchmark_fail("Table $cases_table does not exist");
+}
+
+/**
+ * One multi-row INSERT; every value is bound as a string
+ */
+function bench_insert($table, $columns, $rows, $ignore = false) {
+    global $wpdb;
+    if (empty($rows)) {
+        return;
+    }
+    $placeholders = '(' . implode(', ', array_fill(0, count($columns), '%s')) . ')';
+    $values = array();
+    foreach ($rows as $row) {
+        foreach ($row as $value) {
+            $values[] = $value;
+        }
+    }
+    $sql = 'INSERT ' . ($ignore ? 'IGNORE ' : '') . "INTO {$wpdb->prefix}$table (" . implode(', ', $columns) . ') VALUES '
+        . implode(', ', array_fill(0, count($rows), $placeholders));
+    if ($wpdb->query($wpdb->prepare($sql, $values)) === false) {
+        benchmark_fail("Insert into $table failed: " . $wpdb->last_error);
+    }
+}
+
+/**
+ * id by unique value for rows just inserted
+ */
+function bench_ids($table, $column, $values) {
+    global $wpdb;
+    $placeholders = implode(', ', array_fill(0, count($values), '%s'));
+    $rows = $wpdb->get_results($wpdb->prepare(
+        "SELECT id, $column AS value FROM {$wpdb->prefix}$table WHERE $column IN ($placeholders)", $values
+    ));
+    $ids = array();
+    foreach ($rows as $row) {
+        $ids[$row->value] = (int) $row->id;
+    }
+    return $ids;
+}
+
+/**
+ * A random time up to $days away from now, in the past or (negative $days) in the future
+ */
+function bench_date($days) {
+    $offset = mt_rand(0, abs($days) * 86400);
+    return gmdate('Y-m-d H:i:s', $days < 0 ? time() + $offset : time() - $offset);
+}
+
+/**
+ * Courts, plaintiffs and TV lawyers shared by all benchmark cases
+ */
+function bench_seed_shared() {
+    $courts = array();
+    for ($i = 1; $i <= BENCH_COURTS; $i++) {
+        $courts[] = array(sprintf('Amtsgericht Bench %03d', $i), 'Amtsgericht', sprintf('BENCH-%03d', $i),
+                          "Gerichtsstraße $i", sprintf('%05d', 10000 + $i * 7), "Bench-Stadt $i", 1);
+    }
+    bench_insert('klage_courts', array('court_name', 'court_type', 'court_code', 'street', 'postal_code', 'city',
+                                       'active_status'), $courts, true);
+
+    $shared = array();
+    for ($i = 1; $i <= BENCH_PLAINTIFFS; $i++) {
+        $shared["plaintiff-$i@" . BENCH_DOMAIN] = array('company', '', '', "Bench Mandant $i GmbH");
+    }
+    for ($i = 1; $i <= BENCH_TV_LAWYERS; $i++) {
+        $shared["tv-$i@" . BENCH_DOMAIN] = array('person', 'Terminsvertreter', "Bench $i", '');
+    }
+    $existing = bench_ids('klage_contacts', 'email', array_keys($shared));
+    $rows = array();
+    foreach ($shared as $email => $contact) {
+        if (!isset($existing[$email])) {
+            $rows[] = array_merge($contact, array($email, 'Bench-Stadt', 1));
+        }
+    }
+    bench_insert('klage_contacts', array('contact_type', 'first_name', 'last_name', 'company_name', 'email', 'city',
+                                         'active_status'), $rows);
+
+    return array(
+        'courts' => array_values(bench_ids('klage_courts', 'court_code', array_map(function ($court) {
+            return $court[2];
+        }, $courts))),
+        'plaintiffs' => array_values(bench_ids('klage_contacts', 'email', array_filter(array_keys($shared), function ($email) {
+            return strpos($email, 'plaintiff-') === 0;
+        }))),
+        'tv_lawyers' => array_values(bench_ids('klage_contacts', 'email', array_filter(array_keys($shared), function ($email) {
+            return strpos($email, 'tv-') === 0;
+        })))
+    );
+}
+
+/**
+ * Cases first..last (1-based benchmark numbers) with their related rows
+ */
+function bench_seed_batch($first, $last, $shared, $seed) {
+    global $wpdb;
+    // Seeding per batch keeps a set grown in steps identical to one seeded at once
+    mt_srand($seed + $first);
+    $statuses = array('draft', 'processing', 'pending', 'completed', 'cancelled');
+    $priorities = array('low', 'medium', 'high', 'urgent');
+    $last_names = array('Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker', 'Hoffmann');
+    $first_names = array('Anna', 'Lukas', 'Marie', 'Jonas', 'Sophie', 'Felix', 'Lea', 'Paul', 'Emma', 'Max');
+
+    $debtors = array();
+    $cases = array();
+    $case_debtors = array();
+    foreach (range($first, $last) as $number) {
+        $email = "debtor-$number@" . BENCH_DOMAIN;
+        $debtors[$email] = array('person', $first_names[mt_rand(0, 9)], $last_names[mt_rand(0, 8)], '', $email,
+                                 '0170' . mt_rand(1000000, 9999999), 'Hauptstraße', (string) mt_rand(1, 200),
+                                 sprintf('%05d', mt_rand(10000, 99999)), 'Bench-Stadt', 'DE89370400440532013000', 1);
+        $claim = mt_rand(20000, 500000) / 100;
+        $case_number = sprintf('BENCH-%07d', $number);
+        $cases[$case_number] = array(
+            $case_number, bench_date(730), $statuses[mt_rand(0, 4)], $priorities[mt_rand(0, 3)], 'active',
+            $claim, $claim, round($claim * 0.15, 2), round($claim * 0.05, 2),
+            $shared['courts'][mt_rand(0, count($shared['courts']) - 1)], BENCH_SOURCE
+        );
+        $case_debtors[$case_number] = $email;
+    }
+
+    $wpdb->query('START TRANSACTION');
+    bench_insert('klage_contacts', array('contact_type', 'first_name', 'last_name', 'company_name', 'email', 'phone',
+                                         'street', 'street_number', 'postal_code', 'city', 'iban', 'active_status'),
+                 array_values($debtors));
+    $debtor_ids = bench_ids('klage_contacts', 'email', array_keys($debtors));
+
+    bench_insert('klage_cases', array('case_id', 'case_creation_date', 'case_status', 'case_priority', 'active_status',
+                                      'claim_amount', 'damage_amount', 'legal_fees', 'court_fees', 'court_id',
+                                      'import_source'), array_values($cases));
+    $case_ids = bench_ids('klage_cases', 'case_id', array_keys($cases));
+
+    $case_contacts = $financials = $documents = $tv_assignments = array();
+    foreach ($cases as $case_number => $case) {
+        $case_id = $case_ids[$case_number];
+        $date = substr($case[1], 0, 10);
+        $case_contacts[] = array($case_id, $debtor_ids[$case_debtors[$case_number]], 'debtor', 1, $date);
+        $case_contacts[] = array($case_id, $shared['plaintiffs'][mt_rand(0, count($shared['plaintiffs']) - 1)],
+                                 'plaintiff', 1, $date);
+        for ($i = mt_rand(1, 4); $i > 0; $i--) {
+            $financials[] = array($case_id, mt_rand(0, 1) ? 'claim' : 'payment_in', mt_rand(1000, 100000) / 100,
+                                  'Forderung ' . $case_number, mt_rand(0, 1) ? 'completed' : 'pending',
+                                  substr(bench_date(730), 0, 10));
+        }
+        for ($i = mt_rand(0, 3); $i > 0; $i--) {
+            $documents[] = array($case_id, "$case_number-$i.pdf", mt_rand(0, 1) ? 'klage' : 'mahnbescheid',
+                                 'application/pdf', mt_rand(20000, 2000000), "Dokument $i zu $case_number");
+        }
+        if (mt_rand(1, 5) === 1) {
+            $tv_assignments[] = array($case_id, $shared['tv_lawyers'][mt_rand(0, count($shared['tv_lawyers']) - 1)],
+                                      bench_date(-365), 'Amtsgericht Bench', 'requested');
+        }
+    }
+    bench_insert('klage_case_contacts', array('case_id', 'contact_id', 'role', 'active_status', 'assigned_date'),
+                 $case_contacts);
+    bench_insert('klage_financials', array('case_id', 'transaction_type', 'amount', 'purpose', 'status',
+                                           'transaction_date'), $financials);
+    bench_insert('klage_documents', array('case_id', 'original_filename', 'document_type', 'mime_type', 'file_size',
+                                          'title'), $documents);
+    bench_insert('klage_tv_assignments', array('case_id', 'tv_lawyer_contact_id', 'court_date', 'court_location',
+                                               'status'), $tv_assignments);
+    $wpdb->query('COMMIT');
+
+    return count($case_contacts) + count($financials) + count($documents) + count($tv_assignments)
+        + 2 * count($cases);
+}
+
+function bench_case_count() {
+    global $wpdb;
+    return (int) $wpdb->get_var($wpdb->prepare(
+        "SELECT COUNT(*) FROM {$wpdb->prefix}klage_cases WHERE import_source = %s", BENCH_SOURCE
+    ));
+}
+
+function bench_clean() {
+    global $wpdb;
+    $deleted = 0;
+    foreach (array('klage_case_contacts', 'klage_financials', 'klage_documents', 'klage_tv_assignments') as $table) {
+        $deleted += (int) $wpdb->query($wpdb->prepare(
+            "DELETE t FROM {$wpdb->prefix}$table t JOIN {$wpdb->prefix}klage_cases c ON t.case_id = c.id
+             WHERE c.import_source = %s", BENCH_SOURCE
+        ));
+    }
+    $deleted += (int) $wpdb->query($wpdb->prepare(
+        "DELETE FROM {$wpdb->prefix}klage_cases WHERE import_source = %s", BENCH_SOURCE
+    ));
+    $deleted += (int) $wpdb->query($wpdb->prepare(
+        "DELETE FROM {$wpdb->prefix}klage_contacts WHERE email LIKE %s", '%@' . $wpdb->esc_like(BENCH_DOMAIN)
+    ));
+    $deleted += (int) $wpdb->query($wpdb->prepare(
+        "DELETE FROM {$wpdb->prefix}klage_courts WHERE court_code LIKE %s", $wpdb->esc_like('BENCH-') . '%'
+    ));
+    return $deleted;
+}
+
+/**
+ * Evenly spread benchmark case ids
+ */
+function bench_sample_cases($samples) {
+    global $wpdb;
+    $range = $wpdb->get_row($wpdb->prepare(
+        "SELECT MIN(id) AS low, MAX(id) AS high FROM {$wpdb->prefix}klage_cases WHERE import_source = %s", BENCH_SOURCE
+    ));
+    if (!$range || $range->low === null) {
+        return array();
+    }
+    $ids = array();
+    for ($i = 0; $i < $samples; $i++) {
+        $target = (int) $range->low + (int) floor(((int) $range->high - (int) $range->low) * $i / max(1, $samples - 1));
+        $ids[] = (int) $wpdb->get_var($wpdb->prepare(
+            "SELECT id FROM {$wpdb->prefix}klage_cases WHERE id >= %d AND import_source = %s ORDER BY id LIMIT 1",
+            $target, BENCH_SOURCE
+        ));
+    }
+    return $ids;
+}
+
+/**
+ * Render once and measure; DB time is the sum of the query times $wpdb recorded
+ */
+function bench_render($dashboard, $method, $case_id) {
+    global $wpdb;
+    $wpdb->queries = array();
+    if (function_exists('memory_reset_peak_usage')) {
+        memory_reset_peak_usage();
+    }
+    $memory_before = memory_get_usage();
+    $queries_before = $wpdb->num_queries;
+    $start = microtime(true);
+
+    ob_start();
+    try {
+        $method->getNumberOfParameters() ? $method->invoke($dashboard, $case_id) : $method->invoke($dashboard);
+        $error = null;
+    } catch (Throwable $e) {
+        $error = get_class($e) . ': ' . $e->getMessage();
+    }
+    $html = ob_get_clean();
+
+    $total = microtime(true) - $start;
+    $db_time = 0.0;
+    $slowest = array();
+    foreach ((array) $wpdb->queries as $query) {
+        $db_time += $query[1];
+        $slowest[] = array('sql' => preg_replace('/\s+/', ' ', trim($query[0])), 'time' => $query[1]);
+    }
+    usort($slowest, function ($a, $b) {
+        return $b['time'] <=> $a['time'];
+    });
+
+    return array(
+        'case_id' => $case_id,
+        'queries' => $wpdb->num_queries - $queries_before,
+        'db_time' => $db_time,
+        'php_time' => max(0.0, $total - $db_time),
+        'total_time' => $total,
+        'peak_memory' => memory_get_peak_usage() - $memory_before,
+        'bytes' => strlen($html),
+        'not_found' => strpos($html, 'Fall nicht gefunden') !== false,
+        'error' => $error,
+        'slowest' => array_slice($slowest, 0, 3)
+    );
+}
+
+switch ($command) {
+    case 'seed':
+        $target = isset($args[2]) ? (int) $args[2] : 0;
+        $seed = (int) benchmark_option($args, '--seed', 42);
+        $batch = max(1, (int) benchmark_option($args, '--batch', 1000));
+        $start = microtime(true);
+        $existing = bench_case_count();
+        if ($existing > $target) {
+            bench_clean();
+            $existing = 0;
+        }
+        $shared = bench_seed_shared();
+        $rows = 0;
+        for ($first = $existing + 1; $first <= $target; $first += $batch) {
+            $rows += bench_seed_batch($first, min($target, $first + $batch - 1), $shared, $seed);
+        }
+        echo json_encode(array(
+            'cases' => bench_case_count(),
+            'added_cases' => $target - $existing,
+            'added_rows' => $rows,
+            'elapsed' => microtime(true) - $start
+        )), "\n";
+        break;
+
+    case 'render':
+        $screen = isset($args[2]) ? $args[2] : '';
+        $methods = array('edit' => 'render_edit_case_form', 'view' => 'render_view_case', 'list' => 'render_cases_list');
+        if (!isset($methods[$screen])) {
+            benchmark_fail("Unknown screen: $screen");
+        }
+        if (!SAVEQUERIES) {
+            benchmark_fail('SAVEQUERIES is disabled in wp-config.php; DB time cannot be measured');
+        }
+        $admins = get_users(array('role' => 'administrator', 'number' => 1, 'fields' => 'ID'));
+        if (empty($admins)) {
+            benchmark_fail('No administrator account to render the screens as');
+        }
+        wp_set_current_user((int) $admins[0]);
+
+        $samples = max(1, (int) benchmark_option($args, '--samples', 20));
+        $search = benchmark_option($args, '--search', '');
+        $_GET = array('page' => 'la-cases');
+        if ($screen === 'list') {
+            $case_ids = array_fill(0, $samples, 0);
+            if ($search !== '') {
+                $_GET['search'] = $search;
+            }
+        } else {
+            $_GET['action'] = $screen;
+            $case_ids = bench_sample_cases($samples);
+            if (empty($case_ids)) {
+                benchmark_fail('No benchmark cases seeded');
+            }
+        }
+
+        // The plugin builds its own instance on admin_menu; the hooks this one adds are never fired
+        $dashboard = new CAH_Admin_Dashboard();
+        $method = new ReflectionMethod('CAH_Admin_Dashboard', $methods[$screen]);
+        $method->setAccessible(true);
+
+        bench_render($dashboard, $method, $case_ids[0]);  // warm-up: autoloading, options cache
+        $renders = array();
+        foreach ($case_ids as $case_id) {
+            $_GET['id'] = $case_id;
+            $renders[] = bench_render($dashboard, $method, $case_id);
+        }
+        echo json_encode(array(
+            'screen' => $screen,
+            'search' => $search,
+            'cases' => bench_case_count(),
+            'renders' => $renders,
+            'php' => PHP_VERSION
+        )), "\n";
+        break;
+
+    case 'clean':
+        echo json_encode(array('deleted' => bench_clean())), "\n";
+        break;
+
+    default:
+        benchmark_fail("Unknown command: $command");
+}
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Page-Render Benchmark for the case screens of the core admin dashboard
+Seeds a local WordPress database with N benchmark cases (10k to 500k, each
+with contacts, financial rows, documents and TV assignments) through
+render-benchmark.php and renders the case screens of CAH_Admin_Dashboard
+headlessly for every size:
+
+    edit    render_edit_case_form for evenly spread cases
+    view    render_view_case for the same cases
+    list    render_cases_list, the la-cases list (LIMIT 50)
+    search  render_cases_list with a search term
+
+Query count, DB time, PHP time and peak memory per render are reported as
+median and p95 and recorded in the run history (one series per screen),
+tagged with the core plugin version from deployment-manifest.json.
+
+Usage:
+    python3 render_benchmark.py --wp-path /var/www/html [--sizes 10000,100000,500000]
+                                [--screens edit,view,list,search] [--samples 20] [--search 4711]
+    python3 render_benchmark.py --wp-path /var/www/html --clean
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+from statistics import median
+from typing import Dict, List
+
+from import_benchmark import format_memory, plugin_versions
+from load_test import percentile
+from run_history import DEFAULT_HISTORY_DB, build_run, record_run
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVER = os.path.join(BASE_DIR, 'render-benchmark.php')
+DEFAULT_MANIFEST = os.path.join(BASE_DIR, 'deployment-manifest.json')
+DEFAULT_SIZES = '10000,100000'
+MIN_CASES = 1
+MAX_CASES = 500_000
+
+# Screen -> (driver screen, uses the search term)
+SCREENS = {
+    'edit': ('edit', False),
+    'view': ('view', False),
+    'list': ('list', False),
+    'search': ('list', True)
+}
+METRICS = ['queries', 'db_time', 'php_time', 'total_time', 'peak_memory']
+
+
+def run_driver(php: str, wp_path: str, arguments: List[str], memory_limit: str, timeout: float) -> Dict:
+    """One render-benchmark.php command; failures come back as {'error': ...}"""
+    command = [php, '-d', f'memory_limit={memory_limit}', DRIVER, wp_path] + arguments
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f'Timed out after {timeout:g}s'}
+    except OSError as e:
+        return {'error': str(e)}
+
+    # WordPress or a plugin may print notices first; the driver's JSON is the last line
+    for line in reversed(proc.stdout.strip().splitlines()):
+        if line.startswith('{'):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    output = (proc.stderr or proc.stdout).strip().splitlines()
+    return {'error': output[-1] if output else f'Driver exited with code {proc.returncode}'}
+
+
+def render_metrics(cases: int, outcome: Dict) -> Dict:
+    """Median and p95 of every metric over the renders of one screen at one size"""
+    renders = [render for render in outcome.get('renders', []) if not render.get('error')]
+    metrics = {'cases': cases, 'renders': len(renders), 'error': outcome.get('error'),
+               'render_errors': [render['error'] for render in outcome.get('renders', []) if render.get('error')][:3],
+               'not_found': len([render for render in renders if render.get('not_found')])}
+    for metric in METRICS:
+        values = sorted(render[metric] for render in renders)
+        metrics[metric] = {'median': median(values) if values else None,
+                           'p95': percentile(values, 0.95) if values else None}
+
+    # The three slowest queries over all renders, with the same statement counted once
+    slowest = {}
+    for render in renders:
+        for query in render.get('slowest', []):
+            if query['time'] > slowest.get(query['sql'], 0.0):
+                slowest[query['sql']] = query['time']
+    metrics['slowest_queries'] = [{'sql': sql, 'time': elapsed}
+                                  for sql, elapsed in sorted(slowest.items(), key=lambda item: -item[1])[:3]]
+    return metrics
+
+
+def print_screen(screen: str, results: Dict):
+    search = f" '{results['search']}'" if results['search'] else ''
+    print(f"\n📈 {screen}{search} (core {results['versions'].get('core', '?')})")
+    print(f"   {'cases':>7}  {'queries':>7}  {'DB p50':>8}  {'DB p95':>8}  {'PHP p50':>8}  {'PHP p95':>8}  "
+          f"{'total p95':>9}  {'peak mem':>9}")
+    for size in results['sizes']:
+        if size['error'] or not size['renders']:
+            print(f"   {size['cases']:>7}  ❌ {size['error'] or (size['render_errors'] or ['No renders'])[0]}")
+            continue
+        print(f"   {size['cases']:>7}  {size['queries']['median']:>7.0f}  "
+              f"{size['db_time']['median'] * 1000:>6.1f}ms  {size['db_time']['p95'] * 1000:>6.1f}ms  "
+              f"{size['php_time']['median'] * 1000:>6.1f}ms  {size['php_time']['p95'] * 1000:>6.1f}ms  "
+              f"{size['total_time']['p95'] * 1000:>7.1f}ms  {format_memory(size['peak_memory']['p95']):>9}")
+        if size['not_found']:
+            print(f"   {'':>7}  ⚠️  {size['not_found']} renders showed 'Fall nicht gefunden'")
+    worst = results['sizes'][-1] if results['sizes'] else None
+    if worst and worst['slowest_queries']:
+        print(f"   🐌 Slowest queries at {worst['cases']} cases:")
+        for query in worst['slowest_queries']:
+            print(f"      {query['time'] * 1000:>7.1f}ms  {query['sql'][:110]}")
+
+
+def parse_sizes(text: str) -> List[int]:
+    sizes = sorted({int(part.replace('_', '')) for part in text.split(',') if part.strip()})
+    if not sizes or sizes[0] < MIN_CASES or sizes[-1] > MAX_CASES:
+        raise argparse.ArgumentTypeError(f"sizes must be between {MIN_CASES} and {MAX_CASES}")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the case edit, view and list screens on seeded data')
+    parser.add_argument('--wp-path', required=True, help='Local WordPress installation with the core plugin active')
+    parser.add_argument('--sizes', type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help=f"Comma-separated case counts, up to {MAX_CASES} (default: {DEFAULT_SIZES})")
+    parser.add_argument('--screens', default='edit,view,list,search',
+                        help=f"Comma-separated screens: {', '.join(SCREENS)}")
+    parser.add_argument('--samples', type=int, default=20, help='Timed renders per screen and size')
+    parser.add_argument('--search', default='4711', help='Search term of the search screen')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the seeded data')
+    parser.add_argument('--php', default='php', help='PHP CLI binary')
+    parser.add_argument('--memory-limit', default='-1',
+                        help="PHP memory_limit (default: unlimited, so the peak can be measured)")
+    parser.add_argument('--timeout', type=float, default=3600, help='Timeout per driver command in seconds')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark cases in the database afterwards')
+    parser.add_argument('--clean', action='store_true', help='Only remove the benchmark cases and exit')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help='Plugin versions the runs are tagged with')
+    parser.add_argument('--json', metavar='PATH', help="Write the results as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB, help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true', help='Do not append the runs to the run history')
+    args = parser.parse_args()
+
+    screens = [screen.strip() for screen in args.screens.split(',') if screen.strip()]
+    unknown = [screen for screen in screens if screen not in SCREENS]
+    if unknown or not screens:
+        print(f"Error: Unknown screen(s) {', '.join(unknown)}" if unknown else "Error: No screen given")
+        sys.exit(2)
+    if shutil.which(args.php) is None:
+        print(f"Error: {args.php} not found")
+        sys.exit(2)
+
+    if args.clean:
+        outcome = run_driver(args.php, args.wp_path, ['clean'], args.memory_limit, args.timeout)
+        if outcome.get('error'):
+            print(f"❌ {outcome['error']}")
+            sys.exit(1)
+        print(f"🧹 Removed {outcome['deleted']} benchmark rows")
+        sys.exit(0)
+
+    versions = plugin_versions(args.manifest, ('core',))
+    started_at = time.time()
+    sizes = {screen: [] for screen in screens}
+    failed = False
+
+    for cases in args.sizes:
+        print(f"\n🌱 Seeding {cases} cases...")
+        seeded = run_driver(args.php, args.wp_path, ['seed', str(cases), '--seed', str(args.seed)],
+                            args.memory_limit, args.timeout)
+        if seeded.get('error'):
+            print(f"   ❌ {seeded['error']}")
+            failed = True
+            break  # larger sizes would fail the same way
+        print(f"   {seeded['added_cases']} cases and {seeded['added_rows']} related rows added "
+              f"in {seeded['elapsed']:.1f}s")
+
+        for screen in screens:
+            driver_screen, searched = SCREENS[screen]
+            arguments = ['render', driver_screen, '--samples', str(args.samples)]
+            if searched:
+                arguments += ['--search', args.search]
+            outcome = run_driver(args.php, args.wp_path, arguments, args.memory_limit, args.timeout)
+            metrics = render_metrics(cases, outcome)
+            sizes[screen].append(metrics)
+            if metrics['error'] or not metrics['renders']:
+                failed = True
+            else:
+                print(f"   ⏱️  {screen}: {metrics['queries']['median']:.0f} queries, "
+                      f"{metrics['total_time']['median'] * 1000:.1f}ms median")
+
+    runs = []
+    for screen in screens:
+        results = {
+            'screen': screen,
+            'search': args.search if SCREENS[screen][1] else '',
+            'versions': versions,
+            'seed': args.seed,
+            'samples': args.samples,
+            'sizes': sizes[screen]
+        }
+        if not results['sizes']:
+            continue
+        print_screen(screen, results)
+        passed = all(not size['error'] and size['renders'] for size in results['sizes'])
+        run = build_run('render_benchmark', screen, results, time.time() - started_at,
+                        files_scanned=len(results['sizes']), bytes_read=0, passed=passed, started_at=started_at)
+        runs.append(run)
+        if not args.no_history:
+            record_run(run, args.history_db)
+
+    if not args.keep:
+        outcome = run_driver(args.php, args.wp_path, ['clean'], args.memory_limit, args.timeout)
+        if outcome.get('error'):
+            print(f"\n⚠️  Could not remove the benchmark cases: {outcome['error']}")
+        else:
+            print(f"\n🧹 Removed {outcome['deleted']} benchmark rows")
+
+    if args.json and runs:
+        output = json.dumps(runs, default=str, ensure_ascii=False)
+        if args.json == '-':
+            print(output)
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
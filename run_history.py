@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Run History for the Legal Automation validation scripts
+Appends every run of validate-deployment.py, comprehensive_test.py and
+backend_test.py to a local SQLite store and compares the latest run of a
+tool against its previous runs to flag validation-time regressions.
+Runs are compared only with runs of the same mode (full, incremental,
+cached, warm workers), since those take very different amounts of work.
+
+Usage:
+    python3 run_history.py list [--tool TOOL] [--last N]
+    python3 run_history.py compare [--tool TOOL] [--target TARGET] [--mode MODE] [--last N] [--threshold 1.25]
+    python3 run_history.py export [--tool TOOL] > runs.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from statistics import median
+from typing import Dict, List, Optional
+
+DEFAULT_HISTORY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.run-history.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tool TEXT NOT NULL,
+    target TEXT NOT NULL,
+    mode TEXT NOT NULL DEFAULT 'full',
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    files_scanned INTEGER NOT NULL,
+    bytes_read INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_tool_target ON runs (tool, target, id);
+"""
+
+
+def run_mode(changed_since: bool = False, cached: bool = False, warm_workers: bool = False) -> str:
+    """Mode of a run, e.g. 'full' or 'changed-since+cached'"""
+    parts = [name for name, used in (('changed-since', changed_since), ('cached', cached),
+                                     ('warm-workers', warm_workers)) if used]
+    return '+'.join(parts) or 'full'
+
+
+def build_run(tool: str, target: str, results: Dict, duration: float, files_scanned: int,
+              bytes_read: int, passed: bool, started_at: Optional[float] = None, mode: str = 'full') -> Dict:
+    """The machine-readable record of one run"""
+    return {
+        'tool': tool,
+        'target': target,
+        'mode': mode,
+        'started_at': started_at if started_at is not None else time.time() - duration,
+        'duration': duration,
+        'files_scanned': files_scanned,
+        'bytes_read': bytes_read,
+        'passed': passed,
+        'results': results
+    }
+
+
+def to_json(run: Dict) -> str:
+    # Results may hold Path objects and tuples; everything else is plain JSON
+    return json.dumps(run, default=str, ensure_ascii=False)
+
+
+def report_to_stderr(json_path: Optional[str]):
+    """With --json - the JSON owns stdout, so the text report goes to stderr"""
+    if json_path == '-':
+        sys.stdout = sys.stderr
+
+
+def write_json(run: Dict, path: str):
+    """Write one run as JSON to a file, or to stdout for '-'"""
+    if path == '-':
+        # The real stdout, even while report_to_stderr() has the report on stderr
+        print(to_json(run), file=sys.__stdout__, flush=True)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(to_json(run) + '\n')
+
+
+class RunHistory:
+    """Append-only store of runs; rows are only ever inserted"""
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        # Histories written before runs had a mode hold full runs only
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(runs)")]
+        if 'mode' not in columns:
+            self.conn.execute("ALTER TABLE runs ADD COLUMN mode TEXT NOT NULL DEFAULT 'full'")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_series ON runs (tool, target, mode, id)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, run: Dict) -> int:
+        cursor = self.conn.execute(
+            "INSERT INTO runs (tool, target, mode, started_at, duration, files_scanned, bytes_read, passed, results) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run['tool'], run['target'], run.get('mode', 'full'), run['started_at'], run['duration'], run['files_scanned'],
+             run['bytes_read'], int(bool(run['passed'])), json.dumps(run['results'], default=str, ensure_ascii=False))
+        )
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def runs(self, tool: Optional[str] = None, target: Optional[str] = None,
+             limit: Optional[int] = None, mode: Optional[str] = None) -> List[Dict]:
+        """Runs newest first"""
+        query = "SELECT * FROM runs"
+        conditions, params = [], []
+        if tool is not None:
+            conditions.append("tool = ?")
+            params.append(tool)
+        if target is not None:
+            conditions.append("target = ?")
+            params.append(target)
+        if mode is not None:
+            conditions.append("mode = ?")
+            params.append(mode)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def series(self):
+        """Distinct (tool, target, mode) series that have runs"""
+        return [(row['tool'], row['target'], row['mode'])
+                for row in self.conn.execute("SELECT DISTINCT tool, target, mode FROM runs ORDER BY tool, target, mode")]
+
+    def compare(self, tool: str, target: str, last: int = 10, threshold: float = 1.25,
+                mode: str = 'full') -> Optional[Dict]:
+        """Compare the newest run of a series with the median of the `last` runs of the same mode before it"""
+        runs = self.runs(tool, target, limit=last + 1, mode=mode)
+        if len(runs) < 2:
+            return None
+        current, previous = runs[0], runs[1:]
+        baseline = median(run['duration'] for run in previous)
+        ratio = current['duration'] / baseline if baseline > 0 else 1.0
+        return {
+            'tool': tool,
+            'target': target,
+            'mode': mode,
+            'current': current['duration'],
+            'baseline': baseline,
+            'ratio': ratio,
+            'runs_compared': len(previous),
+            'files_scanned': current['files_scanned'],
+            'baseline_files_scanned': median(run['files_scanned'] for run in previous),
+            'bytes_read': current['bytes_read'],
+            'baseline_bytes_read': median(run['bytes_read'] for run in previous),
+            'regression': ratio > threshold
+        }
+
+
+def record_run(run: Dict, db_path: str = DEFAULT_HISTORY_DB):
+    """Append a run to the history; history problems never fail a validation"""
+    try:
+        history = RunHistory(db_path)
+        try:
+            history.record(run)
+        finally:
+            history.close()
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not record run history: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validation run history and trend comparison')
+    parser.add_argument('--db', default=DEFAULT_HISTORY_DB, help='Location of the run history database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='Show recent runs')
+    list_parser.add_argument('--tool')
+    list_parser.add_argument('--target')
+    list_parser.add_argument('--last', type=int, default=20)
+
+    compare_parser = subparsers.add_parser('compare', help='Compare the latest run against previous runs')
+    compare_parser.add_argument('--tool')
+    compare_parser.add_argument('--target')
+    compare_parser.add_argument('--mode', help="Only compare runs of this mode, e.g. 'full'")
+    compare_parser.add_argument('--last', type=int, default=10, help='Number of previous runs to compare against')
+    compare_parser.add_argument('--threshold', type=float, default=1.25,
+                                help='Flag a regression when current/median duration exceeds this ratio')
+
+    export_parser = subparsers.add_parser('export', help='Dump runs as JSONL, oldest first')
+    export_parser.add_argument('--tool')
+    export_parser.add_argument('--target')
+
+    args = parser.parse_args()
+    history = RunHistory(args.db)
+
+    if args.command == 'list':
+        print(f"{'#':>5}  {'Tool':<22} {'Target':<20} {'Mode':<14} {'When':<19} {'Duration':>9} {'Files':>6} "
+              f"{'Bytes':>10}  Result")
+        for run in history.runs(args.tool, args.target, limit=args.last):
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started_at']))
+            print(f"{run['id']:>5}  {run['tool']:<22} {run['target']:<20} {run['mode']:<14} {when:<19} "
+                  f"{run['duration']:>8.3f}s "
+                  f"{run['files_scanned']:>6} {run['bytes_read']:>10}  {'PASSED' if run['passed'] else 'FAILED'}")
+
+    elif args.command == 'compare':
+        regressions = 0
+        for tool, target, mode in history.series():
+            if (args.tool and tool != args.tool) or (args.target and target != args.target) \
+                    or (args.mode and mode != args.mode):
+                continue
+            comparison = history.compare(tool, target, last=args.last, threshold=args.threshold, mode=mode)
+            if comparison is None:
+                print(f"ℹ️  {tool} [{target}, {mode}]: not enough runs to compare")
+                continue
+            status = '❌ REGRESSION' if comparison['regression'] else '✅ OK'
+            print(f"{status} {tool} [{target}, {mode}]: {comparison['current']:.3f}s vs median "
+                  f"{comparison['baseline']:.3f}s of last {comparison['runs_compared']} runs "
+                  f"(x{comparison['ratio']:.2f}, files {comparison['files_scanned']} vs "
+                  f"{comparison['baseline_files_scanned']:.0f}, bytes {comparison['bytes_read']} vs "
+                  f"{comparison['baseline_bytes_read']:.0f})")
+            regressions += comparison['regression']
+        history.close()
+        sys.exit(1 if regressions else 0)
+
+    elif args.command == 'export':
+        for run in reversed(history.runs(args.tool, args.target)):
+            run['passed'] = bool(run['passed'])
+            run['results'] = json.loads(run['results'])
+            print(to_json(run))
+
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+SQL Corpus of the Legal Automation plugins
+Turns the $wpdb calls and CREATE/ALTER TABLE strings of the symbol index into
+concrete SQL: table prefixes and string variables built up earlier in the
+same method (`$sql = ...; $sql .= ...`) or in the constructor
+(`$this->table = $wpdb->prefix . '...'`) are resolved, prepare() placeholders
+are replaced with sample literals, and CREATE TABLE statements (plus the
+columns ALTER TABLE statements add) are parsed into columns and indexes.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from php_symbols import SymbolIndex, split_arguments, string_value, tokenize
+
+TABLE_PREFIX = 'wp_'
+
+# Stands in for any part of a statement that cannot be resolved statically
+UNRESOLVED = '/*?*/'
+
+READ_METHODS = {'get_results', 'get_row', 'get_var', 'get_col', 'query', 'prepare'}
+
+PREFIX_EXPRESSIONS = ('$wpdb->prefix', '$this->wpdb->prefix', '$wpdb->base_prefix')
+
+INTERPOLATION = re.compile(r'\{(\$[^{}]+)\}|(\$\w+(?:->\w+)*)')
+
+PLACEHOLDER = re.compile(r"'%(?:\d+\$)?s'|\"%(?:\d+\$)?s\"|%(?:\d+\$)?[dfsi]|%%")
+
+MAX_DEPTH = 8
+
+
+class Resolver:
+    """Resolves PHP string expressions at one call site of a file"""
+
+    def __init__(self, assignments: List[Dict], class_name: Optional[str], function: Optional[str], line: int,
+                 bindings: Optional[Dict[str, str]] = None):
+        self.assignments = assignments
+        self.class_name = class_name
+        self.function = function
+        self.line = line
+        self.bindings = bindings or {}  # parameter -> value passed by every caller
+
+    def lookup(self, target: str, depth: int) -> Optional[str]:
+        """Value of a variable or property just before the call site"""
+        if depth > MAX_DEPTH:
+            return None
+        if target.startswith('$this->'):
+            # Properties are usually set once, in the constructor
+            candidates = [a for a in self.assignments if a['target'] == target and a['class'] == self.class_name]
+        else:
+            candidates = [a for a in self.assignments
+                          if a['target'] == target and a['class'] == self.class_name
+                          and a['function'] == self.function and a['line'] <= self.line]
+        base = None
+        for position, assignment in enumerate(candidates):
+            if assignment['op'] == '=':
+                base = position
+        if base is None:
+            return self.bindings.get(target)
+        value = self.evaluate(candidates[base]['value'], depth + 1)
+        for assignment in candidates[base + 1:]:
+            value += self.evaluate(assignment['value'], depth + 1)
+        return value
+
+    def interpolate(self, text: str, depth: int) -> str:
+        """Expand "{$var}" / "$var" inside a double-quoted string"""
+        def expand(match):
+            expression = match.group(1) or match.group(2)
+            if expression in PREFIX_EXPRESSIONS:
+                return TABLE_PREFIX
+            if re.fullmatch(r'\$\w+(?:->\w+)?', expression):
+                value = self.lookup(expression, depth)
+                if value is not None:
+                    return value
+            return UNRESOLVED
+        return INTERPOLATION.sub(expand, text)
+
+    def evaluate(self, source: str, depth: int = 0) -> str:
+        """A concatenation of strings, prefixes, variables and prepare()/esc_sql() calls"""
+        if depth > MAX_DEPTH:
+            return UNRESOLVED
+        code = '<?php ' + source
+        tokens = tokenize(code)
+        result = []
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            if token.kind == 'op' and token.value == '.':
+                index += 1
+                continue
+            # Collect one operand up to the next top-level '.'
+            end, nesting = index, 0
+            while end < len(tokens) and not (nesting == 0 and tokens[end].value == '.' and tokens[end].kind == 'op'):
+                if tokens[end].value in ('(', '['):
+                    nesting += 1
+                elif tokens[end].value in (')', ']'):
+                    nesting -= 1
+                end += 1
+            result.append(self.operand(tokens[index:end], code, depth))
+            index = end
+        return ''.join(result)
+
+    def operand(self, tokens, code: str, depth: int) -> str:
+        values = [token.value for token in tokens]
+        text = ''.join(values)
+        if len(tokens) == 1 and tokens[0].kind == 'string':
+            if tokens[0].value.startswith("'"):
+                return string_value(tokens[0]).replace("\\'", "'").replace('\\\\', '\\')
+            return self.interpolate(string_value(tokens[0]), depth)
+        if len(tokens) == 1 and tokens[0].kind == 'heredoc':
+            quoted = tokens[0].value.split('\n', 1)[0].strip().endswith("'")
+            body = string_value(tokens[0])
+            return body if quoted else self.interpolate(body, depth)
+        if len(tokens) == 1 and tokens[0].kind == 'number':
+            return tokens[0].value
+        if text in PREFIX_EXPRESSIONS:
+            return TABLE_PREFIX
+        if re.fullmatch(r'\$\w+(?:->\w+)?', text):
+            value = self.lookup(text, depth)
+            return value if value is not None else UNRESOLVED
+        if tokens and tokens[-1].value == ')':
+            # prepare(query, ...) and esc_sql(value) evaluate to their first argument
+            open_index = values.index('(') if '(' in values else 0
+            if open_index > 0 and values[open_index - 1] in ('prepare', 'esc_sql', 'trim', 'sanitize_text_field'):
+                arguments, _ = split_arguments(tokens, open_index)
+                if arguments:
+                    return self.evaluate(code[arguments[0][0].start:arguments[0][-1].end], depth + 1)
+        if len(tokens) >= 3 and tokens[0].value == '(' and tokens[-1].value == ')':
+            return self.evaluate(code[tokens[1].start:tokens[-2].end], depth + 1)
+        return UNRESOLVED
+
+
+def parameter_bindings(index: SymbolIndex, relative_path: str, class_name: Optional[str],
+                       function: Optional[str]) -> Dict[str, str]:
+    """Parameters of a method that all its callers in the same class pass the same string,
+    e.g. a table name handed down from the method that computed it"""
+    if not function:
+        return {}
+    try:
+        with open(index.base_path / relative_path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    except OSError:
+        return {}
+    tokens = tokenize(text)
+    parameters = []
+    for position in range(len(tokens) - 2):
+        if tokens[position].value.lower() == 'function' and tokens[position + 1].value == function \
+                and tokens[position + 2].value == '(':
+            arguments, _ = split_arguments(tokens, position + 2)
+            parameters = [next((token.value for token in argument if token.kind == 'variable'), None)
+                          for argument in arguments]
+            break
+
+    symbols = index.files[relative_path]['symbols']
+    values = {}
+    for call in index.calls(function, relative_path):
+        if call['class'] != class_name:
+            continue
+        call_index = next((position for position, token in enumerate(tokens)
+                           if token.line == call['line'] and token.value == function
+                           and position + 1 < len(tokens) and tokens[position + 1].value == '('), None)
+        if call_index is None:
+            return {}
+        arguments, _ = split_arguments(tokens, call_index + 1)
+        resolver = Resolver(symbols['assignments'], call['class'], call['function'], call['line'])
+        for parameter, argument in zip(parameters, arguments):
+            if parameter is None:
+                continue
+            value = resolver.evaluate(text[argument[0].start:argument[-1].end])
+            values.setdefault(parameter, set()).add(value)
+    return {parameter: found.pop() for parameter, found in values.items()
+            if len(found) == 1 and UNRESOLVED not in next(iter(found))}
+
+
+def normalize_placeholders(sql: str) -> str:
+    """Replace prepare() placeholders with literals so the statement can be EXPLAINed"""
+    def literal(match):
+        placeholder = match.group(0)
+        if placeholder == '%%':
+            return '%'
+        if placeholder.endswith("s'") or placeholder.endswith('s"') or placeholder.endswith('s'):
+            return "'x'"
+        if placeholder.endswith('f'):
+            return '1.0'
+        return '1'
+    return PLACEHOLDER.sub(literal, sql)
+
+
+def squash(sql: str) -> str:
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def statement_kind(sql: str) -> str:
+    match = re.match(r'\s*(?:\(\s*)?(\w+)', sql)
+    return match.group(1).upper() if match else ''
+
+
+def collect_queries(index: SymbolIndex) -> List[Dict]:
+    """Every $wpdb read/query call site with its resolved SQL
+
+    'template' keeps the prepare() placeholders, 'sql' has them replaced by
+    sample literals.
+    """
+    index.update()
+    queries = []
+    for relative_path in sorted(index.files):
+        symbols = index.files[relative_path]['symbols']
+        records = [record for record in symbols['wpdb'] if record['method'] in READ_METHODS]
+        # A prepare() passed straight into get_results() & co. is the same call site
+        outer = [record for record in records if record['method'] != 'prepare' and 'prepare' in record['argument']]
+        for record in records:
+            if record['method'] == 'prepare' and any(
+                    other['function'] == record['function'] and other['class'] == record['class']
+                    and other['line'] <= record['line'] <= other['line'] + other['argument'].count('\n')
+                    for other in outer):
+                continue
+            resolver = Resolver(symbols['assignments'], record['class'], record['function'], record['line'])
+            sql = resolver.evaluate(record['argument']) if record['argument'] else UNRESOLVED
+            prepared = record['method'] == 'prepare' or 'prepare' in record['argument'] or (
+                '%' in sql and re.search(r'%[dfs]', sql) is not None and UNRESOLVED not in record['argument'])
+            template = squash(sql)
+            sql = normalize_placeholders(template) if prepared else template
+            queries.append({
+                'file': relative_path,
+                'line': record['line'],
+                'method': record['method'],
+                'class': record['class'],
+                'function': record['function'],
+                'sql': sql,
+                'template': template,
+                'kind': statement_kind(sql),
+                'resolved': UNRESOLVED not in sql and bool(sql)
+            })
+
+    # The same statement assigned from prepare() and executed later shows up twice
+    unique, seen = [], set()
+    for query in sorted(queries, key=lambda query: query['method'] == 'prepare'):
+        key = (query['file'], query['class'], query['function'], query['sql'])
+        if key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return sorted(unique, key=lambda query: (query['file'], query['line']))
+
+
+def split_top_level(text: str, separator: str = ',') -> List[str]:
+    parts, current, nesting, quote = [], [], 0, None
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+        elif char == '(':
+            nesting += 1
+        elif char == ')':
+            nesting -= 1
+        elif char == separator and nesting == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def index_columns(column_list: str) -> List[str]:
+    """`(a, b(191), `c`)` -> ['a', 'b', 'c']"""
+    return [re.sub(r'\(\d+\)', '', column).strip('` ').split()[0] for column in split_top_level(column_list)]
+
+
+KEY_DEFINITION = re.compile(
+    r'(PRIMARY\s+KEY|UNIQUE(?:\s+(?:KEY|INDEX))?|(?:FULLTEXT\s+)?(?:KEY|INDEX))\s*`?(\w*)`?\s*\((.*)\)\s*$',
+    re.IGNORECASE | re.DOTALL)
+
+ALTER_TABLE_STATEMENT = re.compile(r'ALTER\s+TABLE\s+`?([\w$]+)`?\s+(.*)', re.IGNORECASE | re.DOTALL)
+
+
+def index_definition(key: re.Match) -> Dict:
+    kind = key.group(1).upper()
+    return {
+        'name': 'PRIMARY' if kind.startswith('PRIMARY') else key.group(2) or None,
+        'columns': index_columns(key.group(3)),
+        'primary': kind.startswith('PRIMARY'),
+        'unique': kind.startswith('PRIMARY') or kind.startswith('UNIQUE'),
+        'fulltext': kind.startswith('FULLTEXT')
+    }
+
+
+CREATE_TABLE_STATEMENT = re.compile(
+    r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?([\w$]+)`?\s*\((.*)\)', re.IGNORECASE | re.DOTALL)
+
+
+def parse_create_table(sql: str) -> Optional[Dict]:
+    """Table name, column definitions and indexes of one CREATE TABLE statement"""
+    match = CREATE_TABLE_STATEMENT.search(sql)
+    if match is None:
+        return None
+    # The body ends at the parenthesis that closes the column list
+    body, nesting = [], 0
+    for char in re.sub(r'--(?:[ \t][^\n]*)?(?=\n|$)', '', match.group(2)) + ')':
+        if char == '(':
+            nesting += 1
+        elif char == ')':
+            if nesting == 0:
+                break
+            nesting -= 1
+        body.append(char)
+
+    table = {'table': match.group(1), 'columns': {}, 'indexes': []}
+    for part in split_top_level(''.join(body)):
+        upper = part.upper()
+        key = KEY_DEFINITION.match(part)
+        if key:
+            table['indexes'].append(index_definition(key))
+            continue
+        if upper.startswith(('CONSTRAINT', 'FOREIGN KEY', 'CHECK')):
+            continue
+        column = re.match(r'`?(\w+)`?\s+(.*)', part, re.DOTALL)
+        if column is None:
+            continue
+        name, definition = column.group(1), squash(column.group(2))
+        table['columns'][name] = definition
+        if re.search(r'\bPRIMARY\s+KEY\b', definition, re.IGNORECASE):
+            table['indexes'].append({'name': 'PRIMARY', 'columns': [name], 'primary': True,
+                                     'unique': True, 'fulltext': False})
+        elif re.search(r'\bUNIQUE\b', definition, re.IGNORECASE):
+            table['indexes'].append({'name': name, 'columns': [name], 'primary': False,
+                                     'unique': True, 'fulltext': False})
+    return table
+
+
+def parse_alter_table(sql: str) -> Optional[Dict]:
+    """Table name and the columns and indexes an ALTER TABLE statement adds"""
+    match = ALTER_TABLE_STATEMENT.search(sql)
+    if match is None:
+        return None
+    table = {'table': match.group(1), 'columns': {}, 'indexes': []}
+    for part in split_top_level(match.group(2).strip().rstrip(';')):
+        add = re.match(r'ADD\s+(.*)', part, re.IGNORECASE | re.DOTALL)
+        if add is None or UNRESOLVED in part:
+            continue
+        key = KEY_DEFINITION.match(add.group(1))
+        if key:
+            table['indexes'].append(index_definition(key))
+            continue
+        column = re.match(r'(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s+(.*)', add.group(1),
+                          re.IGNORECASE | re.DOTALL)
+        if column is None or column.group(1).upper() in ('CONSTRAINT', 'FOREIGN', 'CHECK'):
+            continue
+        definition = re.sub(r'\s+(?:AFTER\s+`?\w+`?|FIRST)\s*$', '', squash(column.group(2)), flags=re.IGNORECASE)
+        table['columns'][column.group(1)] = definition
+    return table
+
+
+def add_column_statement(table: str, column: str, definition: str) -> str:
+    return f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+
+
+def add_index_statement(table: str, index: Dict) -> str:
+    kind = 'UNIQUE INDEX' if index['unique'] else 'FULLTEXT INDEX' if index['fulltext'] else 'INDEX'
+    return f"ALTER TABLE {table} ADD {kind} {index['name']} ({', '.join(index['columns'])})"
+
+
+def merge_definition(table: Dict, addition: Dict, source: str):
+    """Add the columns and indexes another definition or ALTER TABLE has on top of table
+
+    Each addition is kept under 'alter' as an ALTER TABLE statement, so a
+    database created from 'sql' can be brought to the same state.
+    """
+    for column, definition in addition['columns'].items():
+        if column in table['columns'] or re.search(r'\bAUTO_INCREMENT\b', definition, re.IGNORECASE):
+            continue
+        table['columns'][column] = definition
+        table['alter'].append({'sql': add_column_statement(table['table'], column, definition), 'source': source})
+    names = {index['name'] for index in table['indexes']}
+    covered = [index['columns'] for index in table['indexes']]
+    for index in addition['indexes']:
+        if index['primary'] or not index['name'] or index['name'] in names or index['columns'] in covered \
+                or not all(column in table['columns'] for column in index['columns']):
+            continue
+        table['indexes'].append(index)
+        names.add(index['name'])
+        covered.append(index['columns'])
+        table['alter'].append({'sql': add_index_statement(table['table'], index), 'source': source})
+
+
+def collect_schema(index: SymbolIndex) -> Dict[str, Dict]:
+    """Table name (with prefix) -> parsed definition, from all CREATE/ALTER TABLE strings
+
+    Several plugin versions define the same table and an upgraded install ends
+    up with the union of them: the definition with the most columns is the
+    base ('sql', 'source'), the columns and indexes only the other definitions
+    and ALTER TABLE strings add are merged in (and listed under 'alter'), and
+    the files defining the table are listed under 'sources'.
+    """
+    index.update()
+    definitions, alterations = {}, []
+    for relative_path in sorted(index.files):
+        symbols = index.files[relative_path]['symbols']
+        for record in symbols['ddl']:
+            resolver = Resolver(symbols['assignments'], record['class'], record['function'], record['line'])
+            sql = resolver.interpolate(record['sql'], 0)
+            source = f"{relative_path}:{record['line']}"
+            if UNRESOLVED in sql and re.match(r'ALTER\s+TABLE\b', sql.strip(), re.IGNORECASE):
+                # ALTER TABLE helpers usually get the table name as a parameter
+                bindings = parameter_bindings(index, relative_path, record['class'], record['function'])
+                resolver = Resolver(symbols['assignments'], record['class'], record['function'], record['line'],
+                                    bindings)
+                sql = resolver.interpolate(record['sql'], 0)
+            if ALTER_TABLE_STATEMENT.match(sql.strip()):
+                alterations.append((sql.strip().rstrip(';'), source))
+                continue
+            table = parse_create_table(sql)
+            if table is None or UNRESOLVED in table['table'] or not table['columns']:
+                continue
+            sql = re.sub(r'\)\s*(?:/\*\?\*/|\$\w+)?\s*;?\s*$', ')', sql.strip())
+            table.update(sql=sql, source=source)
+            definitions.setdefault(table['table'], []).append(table)
+
+    schema = {}
+    for name, tables in definitions.items():
+        base = max(tables, key=lambda table: len(table['columns']))  # first of the widest
+        schema[name] = dict(base, columns=dict(base['columns']), indexes=list(base['indexes']), alter=[],
+                            sources=[table['source'] for table in tables])
+        for table in tables:
+            if table is not base:
+                merge_definition(schema[name], table, table['source'])
+    for sql, source in alterations:
+        alteration = parse_alter_table(sql)
+        if alteration is not None and alteration['table'] in schema:
+            merge_definition(schema[alteration['table']], alteration, source)
+    return schema
+
+
+def tables_in(sql: str) -> List[str]:
+    """Prefixed table names a statement reads or writes"""
+    return sorted(set(re.findall(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+`?(' + re.escape(TABLE_PREFIX) + r'\w+)`?',
+                                 sql, re.IGNORECASE)))
@@ -0,0 +1,52 @@
+"""Predicate columns that no table definition has"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_advisor import advise
+
+SCHEMA = {
+    'wp_klage_cases': {
+        'columns': {'id': 'bigint(20) NOT NULL', 'case_id': 'varchar(100)', 'debtor_id': 'bigint(20)'},
+        'indexes': [{'name': 'PRIMARY', 'columns': ['id'], 'primary': True, 'unique': True, 'fulltext': False}],
+    },
+    'wp_klage_debtors': {
+        'columns': {'id': 'bigint(20) NOT NULL', 'debtors_name': 'varchar(200)'},
+        'indexes': [{'name': 'PRIMARY', 'columns': ['id'], 'primary': True, 'unique': True, 'fulltext': False}],
+    },
+}
+
+
+def query(sql, line=1):
+    return {'file': 'matcher.php', 'line': line, 'class': None, 'function': None,
+            'kind': sql.split()[0].upper(), 'resolved': True, 'sql': sql}
+
+
+class UnknownColumnTest(unittest.TestCase):
+
+    def test_single_table(self):
+        result = advise([query("SELECT id FROM wp_klage_cases WHERE case_number = 'x'")], SCHEMA)
+        self.assertEqual(result['unknown_columns'], {'wp_klage_cases.case_number': ['matcher.php:1']})
+
+    def test_qualified_in_join(self):
+        result = advise([query("SELECT c.id FROM wp_klage_cases c JOIN wp_klage_debtors d ON d.id = c.debtor_id "
+                               "WHERE c.case_number = 'x'")], SCHEMA)
+        self.assertEqual(list(result['unknown_columns']), ['wp_klage_cases.case_number'])
+
+    def test_unqualified_in_join(self):
+        result = advise([query("SELECT c.id FROM wp_klage_cases c JOIN wp_klage_debtors d ON d.id = c.debtor_id "
+                               "WHERE case_number = 'x'")], SCHEMA)
+        self.assertEqual(sorted(result['unknown_columns']),
+                         ['wp_klage_cases.case_number', 'wp_klage_debtors.case_number'])
+
+    def test_known_columns(self):
+        result = advise([query("SELECT c.id FROM wp_klage_cases c JOIN wp_klage_debtors d ON d.id = c.debtor_id "
+                               "WHERE debtors_name = 'x'")], SCHEMA)
+        self.assertEqual(result['unknown_columns'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
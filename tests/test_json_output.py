@@ -0,0 +1,42 @@
+"""--json - leaves stdout to the JSON, the text report goes to stderr"""
+
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def json_stdout(script, *args):
+    proc = subprocess.run([sys.executable, os.path.join(BASE_DIR, script), *args, '--json', '-'],
+                          cwd=BASE_DIR, capture_output=True, text=True, timeout=600)
+    return json.loads(proc.stdout), proc.stderr
+
+
+class JsonStdoutTest(unittest.TestCase):
+
+    def test_validate_deployment(self):
+        run, report = json_stdout('validate-deployment.py', '--suite', '--no-cache', '--no-history')
+        self.assertEqual(run['tool'], 'validate-deployment')
+        self.assertIn('SUITE CONFIDENCE REPORT', report)
+
+    def test_comprehensive_test(self):
+        run, report = json_stdout('comprehensive_test.py', '--no-history')
+        self.assertEqual(run['tool'], 'comprehensive_test')
+        self.assertTrue(report)
+
+    def test_backend_test(self):
+        run, report = json_stdout('backend_test.py', '--no-history')
+        self.assertEqual(run['tool'], 'backend_test')
+        self.assertIn('URL ROUTING FIX VERIFICATION', report)
+
+    def test_query_analyzer(self):
+        report, text = json_stdout('query_analyzer.py', '--static')
+        self.assertIsInstance(report, list)
+        self.assertTrue(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""LintCache shared between the threads that lint zips concurrently"""
+
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lint_engine import LintCache
+
+
+class LintCacheThreadsTest(unittest.TestCase):
+
+    def test_concurrent_put_and_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = os.path.join(tmp, 'lint-cache.json')
+            cache = LintCache(cache_file, php_version='8.2')
+
+            def lint_archive(archive):
+                for n in range(50):
+                    digest = f'{archive}-{n}'
+                    if cache.get(f'{archive}/file{n}.php', digest) is None:
+                        cache.put(digest, {'file': f'{archive}/file{n}.php', 'passed': True,
+                                           'output': 'No syntax errors', 'exec_error': False})
+                    cache.save()
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(lint_archive, range(8)))
+
+            self.assertEqual(cache.stats()['misses'], 400)
+            self.assertEqual(len(LintCache(cache_file, php_version='8.2').entries), 400)
+            self.assertFalse(os.path.exists(cache_file + '.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
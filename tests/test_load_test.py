@@ -0,0 +1,31 @@
+"""Write scenarios of the load generator are opt-in"""
+
+import os
+import sys
+import asyncio
+import argparse
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_test import WRITE_SCENARIOS, add_load_arguments, run_load_test
+
+
+def endpoints(*argv):
+    parser = argparse.ArgumentParser()
+    add_load_arguments(parser)
+    args = parser.parse_args(['--stub', '--requests', '200', '--seed', '1', *argv])
+    return set(asyncio.run(run_load_test(args, 'http://localhost'))['endpoints'])
+
+
+class WriteScenariosTest(unittest.TestCase):
+
+    def test_read_only_by_default(self):
+        self.assertFalse(endpoints() & WRITE_SCENARIOS)
+
+    def test_allow_writes(self):
+        self.assertEqual(endpoints('--allow-writes') & WRITE_SCENARIOS, WRITE_SCENARIOS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Watch mode reports the backend checks that fail"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_test import CORE_PLUGIN, LegalAutomationTester
+from watch import WatchedSuite, backend_problems
+
+
+class WatchedBackendSuiteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        core_plugin = os.path.join(self.tmp.name, CORE_PLUGIN)
+        os.makedirs(os.path.dirname(core_plugin))
+        # Still on version 240, so the version check fails
+        with open(core_plugin, 'w', encoding='utf-8') as f:
+            f.write("<?php\n/**\n * Plugin Name: Core\n * Version: 240\n */\ndefine('CAH_PLUGIN_VERSION', '240');\n")
+        self.tester = LegalAutomationTester(base_path=self.tmp.name)
+        self.tester.scanner.scan()
+        self.tester.symbols.update()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_failing_check_is_reported(self):
+        suite = WatchedSuite('backend_test', self.tester, backend_problems)
+        suite.run('test_core_plugin_version_241_update', verbose=False)
+
+        problems = suite.current_problems()
+        self.assertTrue(problems)
+        self.assertTrue(all(problem.startswith('backend_test: ❌') for problem in problems))
+        self.assertEqual(suite.results['test_core_plugin_version_241_update']['summary']['failed'], len(problems))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,204 +8,434 @@ import os
 import sys
 import re
 import json
-from typing import Dict, List, Tuple
+import time
+import argparse
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-def validate_php_syntax(plugin_path: str) -> Dict:
+from lint_engine import (DEFAULT_CACHE_FILE, LintCache, LintWorkerPool, default_workers,
+                         archive_php_members, find_php_files, lint_archive, lint_files,
+                         php_version)
+from plugin_headers import build_archive_header_index, build_header_index, is_archive
+from run_history import DEFAULT_HISTORY_DB, build_run, record_run, report_to_stderr, run_mode, write_json
+from git_changes import GitError, affected_plugins, changed_files
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment-manifest.json')
+
+def validate_php_syntax(plugin_path: str, workers: Optional[int] = None,
+                        cache: Optional[LintCache] = None,
+                        lint_results: Optional[List[Dict]] = None,
+                        pool: Optional[LintWorkerPool] = None) -> Dict:
     """Validate PHP syntax for all PHP files in the plugin"""
     errors = []
-    files_checked = 0
-    
-    for root, dirs, files in os.walk(plugin_path):
-        for file in files:
-            if file.endswith('.php'):
-                file_path = os.path.join(root, file)
-                files_checked += 1
-                
-                # Use php -l to check syntax
-                result = os.system(f'php -l "{file_path}" > /dev/null 2>&1')
-                if result != 0:
-                    # Double-check with actual PHP output to get the error
-                    import subprocess
-                    try:
-                        subprocess.run(['php', '-l', file_path], 
-                                     check=True, capture_output=True, text=True)
-                    except subprocess.CalledProcessError as e:
-                        errors.append(f"PHP syntax error in: {file_path} - {e.stderr.strip()}")
-                    except Exception:
-                        errors.append(f"PHP syntax error in: {file_path}")
-    
+    start = time.perf_counter()
+
+    # Lint all files concurrently, one `php -l` per file not already in the cache
+    if lint_results is None and is_archive(plugin_path):
+        lint_results = lint_archive(plugin_path, workers=workers, cache=cache)
+    elif lint_results is None:
+        lint_results = lint_files(find_php_files(plugin_path), workers=workers, cache=cache, pool=pool)
+
+    for result in lint_results:
+        if not result['passed']:
+            if result['output']:
+                errors.append(f"PHP syntax error in: {result['file']} - {result['output']}")
+            else:
+                errors.append(f"PHP syntax error in: {result['file']}")
+
+    cache_hits = len([result for result in lint_results if result['cached']])
+
+    if is_archive(plugin_path):
+        with zipfile.ZipFile(plugin_path) as archive:
+            bytes_checked = sum(archive.getinfo(name).file_size for name in archive_php_members(archive))
+    else:
+        bytes_checked = sum(os.path.getsize(result['file']) for result in lint_results)
+
     return {
-        'files_checked': files_checked,
+        'files_checked': len(lint_results),
+        'bytes_checked': bytes_checked,
         'errors': errors,
-        'passed': len(errors) == 0
+        'passed': len(errors) == 0,
+        'timings': {result['file']: result['duration'] for result in lint_results
+                    if not result['cached']},
+        'duration': time.perf_counter() - start,
+        'cache': {
+            'enabled': cache is not None,
+            'hits': cache_hits,
+            'misses': len(lint_results) - cache_hits if cache is not None else 0
+        }
     }
 
-def validate_wordpress_compliance(plugin_path: str) -> Dict:
+def validate_wordpress_compliance(plugin_path: str, header_index: Optional[List[Dict]] = None) -> Dict:
     """Check WordPress plugin compliance"""
     issues = []
-    main_file = None
-    
+
     # Find main plugin file
-    for file in os.listdir(plugin_path):
-        if file.endswith('.php'):
-            file_path = os.path.join(plugin_path, file)
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                if 'Plugin Name:' in content:
-                    main_file = file_path
-                    break
-    
-    if not main_file:
+    if header_index is None:
+        header_index = build_header_index(plugin_path)
+
+    if not header_index:
         issues.append("No main plugin file found with 'Plugin Name:' header")
         return {'issues': issues, 'passed': False}
-    
+
+    main_record = header_index[0]
+
     # Validate plugin headers
-    with open(main_file, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-        
-        required_headers = ['Plugin Name:', 'Version:', 'Description:']
-        for header in required_headers:
-            if header not in content:
-                issues.append(f"Missing required header: {header}")
-        
-        # Check for security: prevent direct access
-        if 'ABSPATH' not in content:
-            issues.append("Missing ABSPATH security check")
-    
+    required_headers = ['Plugin Name', 'Version', 'Description']
+    for header in required_headers:
+        if header not in main_record['headers']:
+            issues.append(f"Missing required header: {header}:")
+
+    # Check for security: prevent direct access
+    if not main_record['has_abspath_check']:
+        issues.append("Missing ABSPATH security check")
+
     return {
         'issues': issues,
         'passed': len(issues) == 0,
-        'main_file': main_file
+        'main_file': main_record['file']
     }
 
-def validate_naming_convention(plugin_path: str, expected_prefix: str = "legal-automation") -> Dict:
+def validate_naming_convention(plugin_path: str, expected_prefix: str = "legal-automation",
+                               header_index: Optional[List[Dict]] = None) -> Dict:
     """Validate naming convention compliance"""
     issues = []
-    
+
     # Check plugin name in header
-    main_files = []
-    for file in os.listdir(plugin_path):
-        if file.endswith('.php'):
-            file_path = os.path.join(plugin_path, file)
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                if 'Plugin Name:' in content:
-                    main_files.append(file_path)
-                    
-                    # Extract plugin name
-                    plugin_name_match = re.search(r'Plugin Name:\s*(.+)', content)
-                    if plugin_name_match:
-                        plugin_name = plugin_name_match.group(1).strip()
-                        if not plugin_name.startswith("Legal Automation"):
-                            issues.append(f"Plugin name doesn't follow naming convention: {plugin_name}")
-                    
-                    # Extract text domain
-                    text_domain_match = re.search(r'Text Domain:\s*(.+)', content)
-                    if text_domain_match:
-                        text_domain = text_domain_match.group(1).strip()
-                        if not text_domain.startswith(expected_prefix):
-                            issues.append(f"Text domain doesn't follow naming convention: {text_domain}")
-    
+    if header_index is None:
+        header_index = build_header_index(plugin_path)
+
+    for record in header_index:
+        plugin_name = record['headers'].get('Plugin Name')
+        if plugin_name and not plugin_name.startswith("Legal Automation"):
+            issues.append(f"Plugin name doesn't follow naming convention: {plugin_name}")
+
+        text_domain = record['headers'].get('Text Domain')
+        if text_domain and not text_domain.startswith(expected_prefix):
+            issues.append(f"Text domain doesn't follow naming convention: {text_domain}")
+
     return {
         'issues': issues,
         'passed': len(issues) == 0,
-        'main_files': main_files
+        'main_files': [record['file'] for record in header_index]
     }
 
-def extract_version(plugin_path: str) -> str:
+def extract_version(plugin_path: str, header_index: Optional[List[Dict]] = None) -> str:
     """Extract version from plugin header"""
-    for file in os.listdir(plugin_path):
-        if file.endswith('.php'):
-            file_path = os.path.join(plugin_path, file)
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                if 'Plugin Name:' in content:
-                    version_match = re.search(r'Version:\s*(.+)', content)
-                    if version_match:
-                        return version_match.group(1).strip()
+    if header_index is None:
+        header_index = build_header_index(plugin_path)
+
+    for record in header_index:
+        if record['headers'].get('Version'):
+            return record['headers']['Version']
     return "Unknown"
 
 def calculate_confidence_score(results: Dict) -> int:
     """Calculate deployment confidence score (0-100)"""
     score = 100
-    
+
     # PHP syntax errors are critical
     if not results['php_syntax']['passed']:
         score -= 50
-    
+
     # WordPress compliance issues
     if not results['wordpress_compliance']['passed']:
         score -= 30
-    
+
     # Naming convention issues
     if not results['naming_convention']['passed']:
         score -= 20
-    
+
     return max(0, score)
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 validate-deployment.py /path/to/plugin VERSION")
-        sys.exit(1)
-    
-    plugin_path = sys.argv[1]
-    expected_version = sys.argv[2]
-    
-    if not os.path.exists(plugin_path):
-        print(f"Error: Plugin path does not exist: {plugin_path}")
-        sys.exit(1)
-    
-    print(f"🔍 Validating plugin: {plugin_path}")
-    print(f"📋 Expected version: {expected_version}")
-    print("=" * 60)
-    
+def validate_plugin(plugin_path: str, expected_version: str, workers: Optional[int] = None,
+                    cache: Optional[LintCache] = None,
+                    lint_results: Optional[List[Dict]] = None,
+                    pool: Optional[LintWorkerPool] = None) -> Dict:
+    """Run every check against one plugin (directory or zip) and score it"""
+    if is_archive(plugin_path):
+        header_index = build_archive_header_index(plugin_path)
+    else:
+        header_index = build_header_index(plugin_path)
+
     # Run all validations
     results = {
-        'php_syntax': validate_php_syntax(plugin_path),
-        'wordpress_compliance': validate_wordpress_compliance(plugin_path),
-        'naming_convention': validate_naming_convention(plugin_path)
+        'php_syntax': validate_php_syntax(plugin_path, workers=workers, cache=cache,
+                                          lint_results=lint_results, pool=pool),
+        'wordpress_compliance': validate_wordpress_compliance(plugin_path, header_index=header_index),
+        'naming_convention': validate_naming_convention(plugin_path, header_index=header_index)
     }
-    
+
     # Extract actual version
-    actual_version = extract_version(plugin_path)
+    actual_version = extract_version(plugin_path, header_index=header_index)
     results['version_info'] = {
         'expected': expected_version,
         'actual': actual_version,
         'match': actual_version == expected_version
     }
-    
+
     # Calculate confidence score
-    confidence_score = calculate_confidence_score(results)
-    results['confidence_score'] = confidence_score
-    
-    # Display results
+    results['confidence_score'] = calculate_confidence_score(results)
+
+    return results
+
+def load_manifest(manifest_path: str) -> Dict[str, str]:
+    """Load a plugin -> expected version manifest; paths are relative to the manifest"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    return {os.path.normpath(os.path.join(base_dir, plugin)): str(version)
+            for plugin, version in manifest.items()}
+
+def files_to_lint(plugin_path: str, changes: Optional[set], cache: Optional[LintCache]) -> Optional[List[str]]:
+    """PHP files of a plugin that need a lint result
+
+    In incremental mode without a cache only the changed files are linted;
+    with a cache the untouched files are included and answered from it.
+    A zip has no per-file changes and returns None: validate_php_syntax()
+    lints all of its members with lint_archive().
+    """
+    if is_archive(plugin_path):
+        return None
+    php_files = find_php_files(plugin_path)
+    if changes is None or cache is not None:
+        return php_files
+    return [file_path for file_path in php_files if os.path.abspath(file_path) in changes]
+
+def validate_suite(manifest: Dict[str, str], workers: Optional[int] = None,
+                   cache: Optional[LintCache] = None,
+                   changes: Optional[Dict[str, set]] = None,
+                   pool: Optional[LintWorkerPool] = None) -> Dict[str, Dict]:
+    """Validate every plugin of the manifest in one process
+
+    All PHP files of all plugins share a single lint pool; the header checks
+    of the plugins then run concurrently from each plugin's header index.
+    With changes (from --changed-since) only the affected plugins are validated.
+    """
+    if changes is not None:
+        manifest = {plugin_path: version for plugin_path, version in manifest.items()
+                    if plugin_path in changes}
+    plugin_files = {
+        plugin_path: files_to_lint(plugin_path, changes[plugin_path] if changes is not None else None, cache)
+        for plugin_path in manifest
+    }
+    all_files = [file_path for files in plugin_files.values() if files is not None for file_path in files]
+    lint_by_file = {result['file']: result
+                    for result in lint_files(all_files, workers=workers, cache=cache, pool=pool)}
+
+    def run(plugin_path):
+        lint_results = None
+        if plugin_files[plugin_path] is not None:
+            lint_results = [lint_by_file[file_path] for file_path in plugin_files[plugin_path]]
+        return validate_plugin(plugin_path, manifest[plugin_path], workers=workers, cache=cache,
+                               lint_results=lint_results)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(manifest))) as executor:
+        return dict(zip(manifest, executor.map(run, manifest)))
+
+def print_plugin_results(plugin_path: str, results: Dict, slowest: int, workers: int):
+    """Display the validation results of one plugin"""
     print("📊 VALIDATION RESULTS:")
     print("-" * 40)
-    
+
     print(f"✅ PHP Syntax: {'PASSED' if results['php_syntax']['passed'] else '❌ FAILED'}")
     if not results['php_syntax']['passed']:
         for error in results['php_syntax']['errors']:
             print(f"   - {error}")
     else:
         print(f"   - {results['php_syntax']['files_checked']} PHP files checked")
-    
+    print(f"   - Lint time: {results['php_syntax']['duration']:.2f}s ({workers} workers)")
+    cache_stats = results['php_syntax']['cache']
+    if cache_stats['enabled']:
+        print(f"   - Lint cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    else:
+        print("   - Lint cache: disabled")
+    timings = sorted(results['php_syntax']['timings'].items(), key=lambda item: item[1], reverse=True)
+    for file_path, duration in timings[:slowest]:
+        print(f"     {duration:.3f}s  {os.path.relpath(file_path, plugin_path)}")
+
     print(f"✅ WordPress Compliance: {'PASSED' if results['wordpress_compliance']['passed'] else '❌ FAILED'}")
     if not results['wordpress_compliance']['passed']:
         for issue in results['wordpress_compliance']['issues']:
             print(f"   - {issue}")
-    
+
     print(f"✅ Naming Convention: {'PASSED' if results['naming_convention']['passed'] else '❌ FAILED'}")
     if not results['naming_convention']['passed']:
         for issue in results['naming_convention']['issues']:
             print(f"   - {issue}")
-    
+
     print(f"📦 Version Check: {'PASSED' if results['version_info']['match'] else '❌ FAILED'}")
-    print(f"   - Expected: {expected_version}")
-    print(f"   - Actual: {actual_version}")
-    
+    print(f"   - Expected: {results['version_info']['expected']}")
+    print(f"   - Actual: {results['version_info']['actual']}")
+
     print("-" * 40)
-    print(f"🎯 DEPLOYMENT CONFIDENCE SCORE: {confidence_score}%")
-    
+    print(f"🎯 DEPLOYMENT CONFIDENCE SCORE: {results['confidence_score']}%")
+
+def print_suite_results(suite_results: Dict[str, Dict], slowest: int, workers: int, duration: float,
+                        skipped: Optional[List[str]] = None):
+    """Display one combined report for all plugins of the suite"""
+    for plugin_path, results in suite_results.items():
+        print(f"\n🔍 Plugin: {plugin_path}")
+        print_plugin_results(plugin_path, results, slowest, workers)
+
+    print("\n" + "=" * 60)
+    print("📊 SUITE CONFIDENCE REPORT")
+    print("=" * 60)
+    print(f"{'Plugin':<20} {'Version':<10} {'Syntax':<8} {'WP':<8} {'Naming':<8} {'Score':>6}")
+    for plugin_path, results in suite_results.items():
+        status = lambda check: 'PASSED' if results[check]['passed'] else 'FAILED'
+        print(f"{os.path.basename(plugin_path):<20} {results['version_info']['actual']:<10} "
+              f"{status('php_syntax'):<8} {status('wordpress_compliance'):<8} "
+              f"{status('naming_convention'):<8} {results['confidence_score']:>5}%")
+    for plugin_path in skipped or []:
+        print(f"{os.path.basename(plugin_path):<20} {'-':<10} {'unchanged, skipped':<26} {'-':>6}")
+
+    files_checked = sum(results['php_syntax']['files_checked'] for results in suite_results.values())
+    print("-" * 60)
+    print(f"   - {len(suite_results)} plugins, {files_checked} PHP files in {duration:.2f}s")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        usage="python3 validate-deployment.py /path/to/plugin[.zip] VERSION [--workers N] [--no-cache]\n"
+              "       python3 validate-deployment.py --suite [MANIFEST] [--workers N] [--no-cache]")
+    parser.add_argument('plugin_path', nargs='?')
+    parser.add_argument('expected_version', nargs='?')
+    parser.add_argument('--suite', nargs='?', const=DEFAULT_MANIFEST, metavar='MANIFEST',
+                        help='Validate every plugin of a JSON manifest {"plugin dir": "version"}')
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='Number of concurrent php -l processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-lint every file instead of reusing cached results')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE,
+                        help='Location of the persistent lint cache')
+    parser.add_argument('--warm-workers', action='store_true',
+                        help='Compile through a pool of long-lived PHP worker processes with OPcache (lint-worker.php) '
+                             'instead of one php -l process per file')
+    parser.add_argument('--changed-since', metavar='REV',
+                        help='Only validate plugins and files that changed since this git revision')
+    parser.add_argument('--slowest', type=int, default=5,
+                        help='Number of slowest files to list in the timing report')
+    parser.add_argument('--json', metavar='PATH',
+                        help="Write the results of this run as JSON ('-' for stdout)")
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB,
+                        help='Run history database used by run_history.py')
+    parser.add_argument('--no-history', action='store_true',
+                        help='Do not append this run to the run history')
+    args = parser.parse_args()
+    if args.suite is None and (args.plugin_path is None or args.expected_version is None):
+        parser.print_usage()
+        sys.exit(1)
+    return args
+
+def export_run(args, target: str, results: Dict, plugin_results: List[Dict], duration: float, passed: bool,
+               pool: Optional[LintWorkerPool] = None):
+    """Write the run as JSON and append it to the run history"""
+    run = build_run(
+        'validate-deployment', target, results, duration,
+        files_scanned=sum(plugin['php_syntax']['files_checked'] for plugin in plugin_results),
+        bytes_read=sum(plugin['php_syntax']['bytes_checked'] for plugin in plugin_results),
+        passed=passed,
+        mode=run_mode(changed_since=bool(args.changed_since),
+                      cached=any(plugin['php_syntax']['cache']['hits'] for plugin in plugin_results),
+                      warm_workers=pool is not None and pool.available)
+    )
+    if args.json:
+        write_json(run, args.json)
+    if not args.no_history:
+        record_run(run, args.history_db)
+
+def main():
+    args = parse_args()
+    report_to_stderr(args.json)
+    start = time.perf_counter()
+
+    pool = None
+    if args.warm_workers:
+        pool = LintWorkerPool(args.workers)
+        if pool.available:
+            print(f"🔥 Lint workers: {len(pool.workers)} warm PHP processes")
+        else:
+            print("⚠️  Lint workers unavailable, falling back to php -l per file")
+
+    cache = None
+    if not args.no_cache:
+        version = php_version()
+        if pool is not None and pool.available:
+            version = pool.cache_version(version)
+        cache = LintCache(args.cache_file, php_version=version)
+
+    changed = None
+    if args.changed_since:
+        try:
+            changed = changed_files(args.changed_since, args.plugin_path or os.path.dirname(args.suite))
+        except GitError as e:
+            print(f"Error: Could not determine changes since {args.changed_since}: {e}")
+            sys.exit(1)
+
+    if args.suite is not None:
+        if not os.path.exists(args.suite):
+            print(f"Error: Manifest does not exist: {args.suite}")
+            sys.exit(1)
+
+        manifest = load_manifest(args.suite)
+        missing = [plugin_path for plugin_path in manifest if not os.path.exists(plugin_path)]
+        if missing:
+            print(f"Error: Plugin path does not exist: {', '.join(missing)}")
+            sys.exit(1)
+
+        print(f"🔍 Validating suite: {args.suite}")
+        print(f"📋 Plugins: {len(manifest)}")
+        print("=" * 60)
+
+        changes = affected_plugins(changed, list(manifest)) if changed is not None else None
+        if changes is not None:
+            print(f"🔀 Changed since {args.changed_since}: {len(changes)} of {len(manifest)} plugins affected")
+        suite_results = validate_suite(manifest, workers=args.workers, cache=cache, changes=changes,
+                                       pool=pool)
+        duration = time.perf_counter() - start
+        skipped = [plugin_path for plugin_path in manifest if plugin_path not in suite_results]
+        print_suite_results(suite_results, args.slowest, args.workers, duration, skipped)
+
+        confidence_score = min([results['confidence_score'] for results in suite_results.values()] or [100])
+        print(f"🎯 SUITE CONFIDENCE SCORE (lowest plugin): {confidence_score}%")
+        export_run(args, 'suite', suite_results, list(suite_results.values()), duration,
+                   confidence_score >= 95, pool)
+    else:
+        plugin_path = args.plugin_path
+        expected_version = args.expected_version
+
+        if not os.path.exists(plugin_path):
+            print(f"Error: Plugin path does not exist: {plugin_path}")
+            sys.exit(1)
+
+        print(f"🔍 Validating plugin: {plugin_path}")
+        print(f"📋 Expected version: {expected_version}")
+        print("=" * 60)
+
+        lint_results = None
+        if changed is not None and is_archive(plugin_path):
+            print(f"🔀 Changed since {args.changed_since}: zip archives are linted in full")
+        elif changed is not None:
+            plugin_changes = affected_plugins(changed, [plugin_path]).get(plugin_path, set())
+            print(f"🔀 Changed since {args.changed_since}: {len(plugin_changes)} files in this plugin")
+            lint_results = lint_files(files_to_lint(plugin_path, plugin_changes, cache),
+                                      workers=args.workers, cache=cache, pool=pool)
+
+        results = validate_plugin(plugin_path, expected_version, workers=args.workers, cache=cache,
+                                  lint_results=lint_results, pool=pool)
+        duration = time.perf_counter() - start
+        print_plugin_results(plugin_path, results, args.slowest, args.workers)
+        confidence_score = results['confidence_score']
+        export_run(args, os.path.basename(os.path.normpath(plugin_path)), results, [results], duration,
+                   confidence_score >= 95, pool)
+
+    if pool is not None:
+        if pool.fallbacks:
+            print(f"   - {pool.fallbacks} files linted with php -l after a worker was unavailable")
+        pool.close()
+
     if confidence_score >= 95:
         print("✅ DEPLOYMENT APPROVED - Confidence score ≥ 95%")
         sys.exit(0)
@@ -215,4 +445,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
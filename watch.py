@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Watch Mode for the Legal Automation plugins
+Keeps the lint workers, the lint cache, the pattern scanner, the symbol index
+and the results of validate-deployment.py, comprehensive_test.py and
+backend_test.py warm in one process. File system events under the plugin
+folders (inotify, or mtime polling where inotify is not available) are
+debounced into one run that only re-lints the changed PHP files, re-checks
+the headers of plugins whose main file changed, rescans the changed files and
+re-runs the tests that read an affected rule or symbol. Creating or deleting
+a file re-runs every test, since some of them check that files exist.
+
+Usage:
+    python3 watch.py [--manifest deployment-manifest.json] [--debounce 150] [--workers N] [--poll] [--verbose]
+"""
+
+import io
+import os
+import sys
+import copy
+import time
+import errno
+import ctypes
+import select
+import struct
+import argparse
+import contextlib
+import ctypes.util
+from typing import Callable, Dict, List, Optional
+
+from lint_engine import DEFAULT_CACHE_FILE, LintCache, LintWorkerPool, default_workers, find_php_files, \
+    lint_files, php_version
+from pattern_scanner import PatternScanner
+from php_symbols import SymbolIndex
+from plugin_headers import build_header_index
+from build_artifacts import DEFAULT_MANIFEST, load_validator
+from backend_test import LegalAutomationTester
+from comprehensive_test import LegalAutomationFixValidator
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+DEFAULT_DEBOUNCE_MS = 150
+POLL_INTERVAL = 0.5
+
+# Editor swap and backup files that never affect a result
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp', '.part')
+
+
+def ignored(path: str) -> bool:
+    name = os.path.basename(path)
+    return name.startswith('.') or name.endswith(IGNORED_SUFFIXES) or name == '4913'
+
+
+def walk_files(roots: List[str]) -> List[str]:
+    files = []
+    for root in roots:
+        for directory, dirs, names in os.walk(root):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            files += [os.path.join(directory, name) for name in names if not ignored(name)]
+    return files
+
+
+class InotifyWatcher:
+    """Recursive inotify watches on the plugin folders, read through ctypes"""
+
+    def __init__(self, roots: List[str]):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.roots = roots
+        self.watches: Dict[int, str] = {}
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, root: str) -> List[str]:
+        """Watch a directory and everything below it; returns the files already in it"""
+        files = []
+        for directory, dirs, names in os.walk(root):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOSPC:
+                    raise OSError(code, 'inotify watch limit reached (fs.inotify.max_user_watches)')
+                continue
+            self.watches[wd] = directory
+            files += [os.path.join(directory, name) for name in names if not ignored(name)]
+        return files
+
+    def read(self, timeout: Optional[float]) -> set:
+        """Paths created, written, moved or deleted, after waiting up to timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: treat every file as changed
+                return set(walk_files(self.roots))
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    paths.update(self.add_tree(path))
+            elif not ignored(path):
+                paths.add(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for systems without inotify: compares size and mtime of every file"""
+
+    def __init__(self, roots: List[str], interval: float = POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for path in walk_files(self.roots):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: Optional[float]) -> set:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            paths = {path for path in self.snapshot if path not in current}
+            paths.update(path for path, signature in current.items() if self.snapshot.get(path) != signature)
+            self.snapshot = current
+            if paths or (deadline is not None and time.monotonic() >= deadline):
+                return paths
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+def collect_changes(watcher, debounce: float) -> set:
+    """Block until something changes, then keep reading until the tree is quiet for debounce seconds"""
+    changes = set()
+    paths = watcher.read(None)
+    while paths:
+        changes |= paths
+        paths = watcher.read(debounce)
+    return changes
+
+
+class RecordingScanner(PatternScanner):
+    """Pattern scanner that remembers which rules the running test read"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = None
+
+    def matches(self, rule_id: str, file_path=None) -> List[Dict]:
+        if self.reads is not None:
+            self.reads.add(rule_id)
+        return super().matches(rule_id, file_path)
+
+
+class RecordingSymbolIndex(SymbolIndex):
+    """Symbol index that remembers which files the running test looked up ('*' for the whole tree)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = None
+
+    def find(self, kind: str, name: str, file_path: Optional[str] = None) -> List[Dict]:
+        if self.reads is not None:
+            self.reads.add(file_path or '*')
+        return super().find(kind, name, file_path)
+
+    def names(self, kind: str, file_path: str) -> List[str]:
+        if self.reads is not None:
+            self.reads.add(file_path)
+        return super().names(kind, file_path)
+
+    def wpdb_queries(self, file_path: Optional[str] = None) -> List[Dict]:
+        if self.reads is not None:
+            self.reads.add(file_path or '*')
+        return super().wpdb_queries(file_path)
+
+
+class WatchedSuite:
+    """One test suite whose tests are re-run one by one, each with its own results"""
+
+    def __init__(self, name: str, tester, problems: Callable[[Dict], List[str]]):
+        self.name = name
+        self.tester = tester
+        self.problems = problems
+        self.template = copy.deepcopy(tester.results)
+        self.tests = {test.__name__: test for test in tester.get_tests()}
+        self.results: Dict[str, Dict] = {}
+        self.reads: Dict[str, Dict[str, set]] = {}
+
+    def run(self, name: str, verbose: bool):
+        """Run one test against fresh results, recording what it read"""
+        scanner, symbols = self.tester.scanner, self.tester.symbols
+        self.tester.results = copy.deepcopy(self.template)
+        scanner.reads, symbols.reads = set(), set()
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                if hasattr(self.tester, 'run_timed'):
+                    # run_timed hands back what the test printed and logged instead of recording it
+                    printed, logged = self.tester.run_timed(self.tests[name])
+                    print(printed, end='')
+                    for category, result in logged:
+                        self.tester.add_result(category, result)
+                else:
+                    self.tests[name]()
+        finally:
+            self.reads[name] = {'rules': scanner.reads, 'symbols': symbols.reads}
+            scanner.reads, symbols.reads = None, None
+        self.results[name] = self.tester.results
+
+    def affected(self, rules: set, php_files: set) -> List[str]:
+        """Tests that read one of these rules or looked up symbols of one of these files"""
+        return [name for name in self.tests
+                if name not in self.reads or self.reads[name]['rules'] & rules
+                or (php_files and '*' in self.reads[name]['symbols'])
+                or self.reads[name]['symbols'] & php_files]
+
+    def current_problems(self) -> List[str]:
+        return [f"{self.name}: {problem}" for results in self.results.values() for problem in self.problems(results)]
+
+
+def backend_problems(results: Dict) -> List[str]:
+    return [f"❌ {entry['test']}: {entry['message']}"
+            for key, entries in results.items() if isinstance(entries, list)
+            for entry in entries if entry.get('status') == 'FAIL']
+
+
+def comprehensive_problems(results: Dict) -> List[str]:
+    icons = {'critical': '🔴', 'major': '🟡'}
+    return [f"{icons[issue['severity']]} {issue['type']}: {issue['message']}"
+            for key, issues in results.items() if isinstance(issues, list)
+            for issue in issues if issue.get('severity') in icons]
+
+
+class Watcher:
+    """Warm state of all checks, updated one change set at a time"""
+
+    def __init__(self, manifest_path: str, workers: int, cache_file: str, verbose: bool = False):
+        self.validator = load_validator()
+        self.manifest = self.validator.load_manifest(manifest_path)
+        self.base_path = os.path.dirname(os.path.abspath(manifest_path))
+        self.workers = workers
+        self.verbose = verbose
+
+        self.pool = LintWorkerPool(workers)
+        version = php_version()
+        if self.pool.available:
+            version = self.pool.cache_version(version)
+        self.cache = LintCache(cache_file, php_version=version)
+
+        # One scanner and symbol index shared by both test suites, kept in memory
+        self.scanner = RecordingScanner(self.base_path)
+        self.symbols = RecordingSymbolIndex(self.base_path, index_file=None)
+        self.suites = [
+            WatchedSuite('comprehensive_test', LegalAutomationFixValidator(
+                base_path=self.base_path, scanner=self.scanner, symbols=self.symbols), comprehensive_problems),
+            WatchedSuite('backend_test', LegalAutomationTester(
+                base_path=self.base_path, scanner=self.scanner, symbols=self.symbols), backend_problems)
+        ]
+
+        self.known_files = set(walk_files(list(self.manifest)))
+        self.lint_failures: Dict[str, Dict] = {}
+        self.headers: Dict[str, Dict] = {}
+        self.problems: set = set()
+
+    def plugin_of(self, path: str) -> Optional[str]:
+        for plugin_path in self.manifest:
+            if path.startswith(plugin_path + os.sep):
+                return plugin_path
+        return None
+
+    def lint(self, file_paths: List[str]):
+        for result in lint_files(file_paths, workers=self.workers, cache=self.cache, pool=self.pool):
+            if result['passed']:
+                self.lint_failures.pop(result['file'], None)
+            else:
+                self.lint_failures[result['file']] = result
+
+    def check_headers(self, plugin_path: str):
+        header_index = build_header_index(plugin_path)
+        self.headers[plugin_path] = {
+            'wordpress_compliance': self.validator.validate_wordpress_compliance(plugin_path, header_index),
+            'naming_convention': self.validator.validate_naming_convention(plugin_path, header_index=header_index),
+            'version': self.validator.extract_version(plugin_path, header_index)
+        }
+
+    def deployment_problems(self) -> List[str]:
+        problems = [f"validate-deployment: ❌ {result['output'] or 'PHP syntax error in ' + file_path}"
+                    for file_path, result in sorted(self.lint_failures.items())]
+        for plugin_path, headers in self.headers.items():
+            plugin = os.path.basename(plugin_path)
+            for check in ('wordpress_compliance', 'naming_convention'):
+                problems += [f"validate-deployment: ⚠️  {plugin}: {issue}" for issue in headers[check]['issues']]
+            if headers['version'] != self.manifest[plugin_path]:
+                problems.append(f"validate-deployment: ⚠️  {plugin}: version {headers['version']}, "
+                                f"manifest expects {self.manifest[plugin_path]}")
+        return problems
+
+    def confidence_scores(self) -> Dict[str, int]:
+        scores = {}
+        for plugin_path, headers in self.headers.items():
+            syntax_passed = not any(file_path.startswith(plugin_path + os.sep) for file_path in self.lint_failures)
+            scores[os.path.basename(plugin_path)] = self.validator.calculate_confidence_score({
+                'php_syntax': {'passed': syntax_passed},
+                'wordpress_compliance': headers['wordpress_compliance'],
+                'naming_convention': headers['naming_convention']
+            })
+        return scores
+
+    def run_all(self) -> Dict:
+        """Initial run: lint every file, check every header and run every test"""
+        start = time.perf_counter()
+        files = [file_path for plugin_path in self.manifest for file_path in find_php_files(plugin_path)]
+        self.lint(files)
+        for plugin_path in self.manifest:
+            self.check_headers(plugin_path)
+        self.scanner.scan()
+        self.symbols.update()
+        tests = 0
+        for suite in self.suites:
+            for name in suite.tests:
+                suite.run(name, self.verbose)
+                tests += 1
+        return {'files': files, 'linted': len(files), 'rules': len(self.scanner.rules), 'tests': tests,
+                'duration': time.perf_counter() - start}
+
+    def run_changes(self, changes: set) -> Optional[Dict]:
+        """Re-run only what the changed files can affect"""
+        start = time.perf_counter()
+        # Temporary files that came and went within the burst are not changes
+        existing = {path for path in changes if self.plugin_of(path) is not None and os.path.isfile(path)}
+        changes = existing | (changes & self.known_files)
+        if not changes:
+            return None
+
+        # Editors that save by renaming a new file over the old one only modify it;
+        # a file that appeared or disappeared can change the outcome of any test
+        structural = existing ^ (changes & self.known_files) != set()
+        self.known_files = (self.known_files - changes) | existing
+
+        php_changed = [path for path in changes if path.endswith('.php')]
+        for path in php_changed:
+            if path not in existing:
+                self.lint_failures.pop(path, None)
+        to_lint = [path for path in php_changed if path in existing]
+        self.lint(to_lint)
+
+        # Main plugin files are the top-level PHP files of a plugin
+        for plugin_path in {self.plugin_of(path) for path in php_changed
+                            if os.path.dirname(path) == self.plugin_of(path)}:
+            self.check_headers(plugin_path)
+
+        self.scanner.set_changed(changes)
+        rules = set(self.scanner.affected_rules())
+        self.scanner.scan()
+        relative_php = {os.path.relpath(path, self.base_path).replace(os.sep, '/') for path in php_changed}
+        if relative_php:
+            self.symbols.invalidate()
+            self.symbols.update()
+
+        tests = 0
+        for suite in self.suites:
+            names = list(suite.tests) if structural else suite.affected(rules, relative_php)
+            for name in names:
+                suite.run(name, self.verbose)
+            tests += len(names)
+        return {'files': sorted(changes), 'linted': len(to_lint), 'rules': len(rules), 'tests': tests,
+                'duration': time.perf_counter() - start}
+
+    def report(self, run: Dict, title: str):
+        problems = self.deployment_problems() + [problem for suite in self.suites
+                                                 for problem in suite.current_problems()]
+        new = [problem for problem in problems if problem not in self.problems]
+        fixed = [problem for problem in self.problems if problem not in problems]
+        self.problems = set(problems)
+
+        total_tests = sum(len(suite.tests) for suite in self.suites)
+        print(f"\n{title} → linted {run['linted']}, {run['rules']} of {len(self.scanner.rules)} rules, "
+              f"{run['tests']} of {total_tests} tests in {run['duration'] * 1000:.0f}ms "
+              f"({self.scanner.stats['files_scanned']} files rescanned)")
+        for problem in sorted(fixed):
+            print(f"   ✔️  fixed  {problem}")
+        for problem in new:
+            print(f"   🆕 {problem}")
+        scores = self.confidence_scores()
+        lowest = min(scores.values()) if scores else 100
+        if problems:
+            print(f"❌ {len(problems)} problems, lowest confidence score {lowest}%")
+        else:
+            print(f"✅ All checks pass, lowest confidence score {lowest}%")
+
+    def close(self):
+        self.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-run lint, deployment checks and tests on every change')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help='Deployment manifest listing the plugin folders to watch')
+    parser.add_argument('--workers', type=int, default=default_workers(), help='Number of warm lint workers')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE, help='Location of the persistent lint cache')
+    parser.add_argument('--debounce', type=int, default=DEFAULT_DEBOUNCE_MS, metavar='MS',
+                        help='Wait until no file changed for this long before running')
+    parser.add_argument('--poll', action='store_true', help='Poll file mtimes instead of using inotify')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of every test that runs')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifest):
+        print(f"Error: Manifest does not exist: {args.manifest}")
+        sys.exit(1)
+
+    watcher = Watcher(args.manifest, args.workers, args.cache_file, args.verbose)
+    roots = list(watcher.manifest)
+    try:
+        events = PollingWatcher(roots) if args.poll else InotifyWatcher(roots)
+    except OSError as e:
+        print(f"⚠️  inotify unavailable ({e}), polling every {POLL_INTERVAL:g}s instead")
+        events = PollingWatcher(roots)
+    mode = 'polling' if isinstance(events, PollingWatcher) else f"inotify, {len(events.watches)} directories"
+    workers = f"{len(watcher.pool.workers)} warm lint workers" if watcher.pool.available else 'php -l per file'
+
+    print(f"👀 Watching {len(roots)} plugins ({mode}, {workers})")
+    print("=" * 80)
+    try:
+        watcher.report(watcher.run_all(), '🚀 Initial run')
+        while True:
+            run = watcher.run_changes(collect_changes(events, args.debounce / 1000))
+            if run is None:
+                continue
+            files = [os.path.relpath(path, watcher.base_path) for path in run['files']]
+            more = f" (+{len(files) - 1} more)" if len(files) > 1 else ''
+            watcher.report(run, f"🔁 {files[0]}{more}")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        events.close()
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()